@@ -56,7 +56,8 @@ export default function ChatView({ initialQuestion, conversationId, onNewQuestio
   const [loadingStatus, setLoadingStatus] = useState<string>("");
   const currentThinkingSteps = useRef<ThinkingStep[]>([]);
   const thinkingStartTime = useRef<number>(0);
-  const [contextChunks, setContextChunks] = useState<any[]>([]);  // 🔥 누적 컨텍스트 저장
+  const [contextChunkIds, setContextChunkIds] = useState<string[]>([]);  // 🔥 누적 컨텍스트 (청크 ID만 저장, 본문은 서버에 있음)
+  const [sessionId, setSessionId] = useState<string | null>(null);  // 서버 측 대화 세션 (히스토리는 서버에 저장)
   const [hoveredUserMessage, setHoveredUserMessage] = useState<number | null>(null);
   const [copiedUserMessage, setCopiedUserMessage] = useState<number | null>(null);
   const userScrolledUp = useRef(false); // 사용자가 스크롤을 위로 올렸는지 추적
@@ -216,7 +217,8 @@ export default function ChatView({ initialQuestion, conversationId, onNewQuestio
             })) as Message[];
             setMessages(typedMessages);
             setCurrentConversationId(conversationId);
-            setContextChunks([]);  // 🔥 기존 대화 불러올 때 컨텍스트 초기화
+            setContextChunkIds([]);  // 🔥 기존 대화 불러올 때 컨텍스트 초기화
+            setSessionId(null);  // 첫 질문에서 불러온 히스토리로 새 세션 생성
           }
           // 대화 불러오기 완료 후 hasCalledAPI 리셋
           hasCalledAPI.current = false;
@@ -229,7 +231,8 @@ export default function ChatView({ initialQuestion, conversationId, onNewQuestio
 
         // 새 대화 시작
         hasCalledAPI.current = true;
-        setContextChunks([]);  // 🔥 새 대화 시작 시 컨텍스트 초기화
+        setContextChunkIds([]);  // 🔥 새 대화 시작 시 컨텍스트 초기화
+        setSessionId(null);
         queryAPI(initialQuestion, true);
       }
     };
@@ -301,7 +304,7 @@ export default function ChatView({ initialQuestion, conversationId, onNewQuestio
 
       // 백엔드 SSE 스트리밍 호출 (대화 히스토리 + 누적 컨텍스트 포함)
       console.log("🌐 프론트엔드에서 전송하는 언어:", language);
-      console.log("📚 프론트엔드에서 전송하는 이전 컨텍스트:", contextChunks.length, "개");
+      console.log("📚 프론트엔드에서 전송하는 이전 컨텍스트:", contextChunkIds.length, "개");
       const backendUrl = process.env.NEXT_PUBLIC_BACKEND_URL || "http://localhost:8000";
       const response = await fetch(`${backendUrl}/query-stream`, {
         method: "POST",
@@ -310,8 +313,9 @@ export default function ChatView({ initialQuestion, conversationId, onNewQuestio
         },
         body: JSON.stringify({
           question: question,
-          conversation_history: conversationHistory,
-          previous_context_chunks: contextChunks,  // 🔥 이전 컨텍스트 전달
+          session_id: sessionId,
+          conversation_history: conversationHistory,  // 세션이 있으면 서버 히스토리 사용, 세션 만료 시 이 최근 3턴으로 새 세션 시작
+          previous_context_ids: contextChunkIds,  // 🔥 이전 컨텍스트 청크 ID 전달 (서버가 본문 복원)
           // language 파라미터 제거 - 백엔드가 질문 텍스트에서 자동 감지하도록 변경
         }),
         signal: abortControllerRef.current.signal, // AbortController 시그널 추가
@@ -508,8 +512,11 @@ export default function ChatView({ initialQuestion, conversationId, onNewQuestio
                 console.log("✅ Streaming done event received");
 
                 // 🔥 누적 컨텍스트 저장 (다음 질문에서 사용)
+                if (data.session_id) {
+                  setSessionId(data.session_id);
+                }
                 if (data.context_chunks) {
-                  setContextChunks(data.context_chunks);
+                  setContextChunkIds(data.context_chunks.map((chunk: { id: string }) => chunk.id));
                   console.log("📚 컨텍스트 저장 완료:", data.context_chunks.length, "개");
                 }
               } else if (data.status === "followup_ready") {
@@ -0,0 +1,204 @@
+"""
+Semantic answer cache
+Replays a previous answer when a new question's embedding is within a
+cosine-distance threshold of an already answered one (same language,
+no conversation history)
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, List, Optional
+
+import numpy as np
+
+from app.cache import chunk_ref
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachedAnswer:
+    """A fully answered question, ready to be replayed as an SSE stream"""
+    question: str
+    language: str
+    answer: str
+    references: List[Dict]
+    followup_questions: List[str]
+    context_chunks: List[Dict]
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    created_at: float = field(default_factory=time.time)
+    hits: int = 0
+
+
+class SemanticAnswerCache:
+    def __init__(
+        self,
+        max_entries: int = 500,
+        max_distance: float = 0.03,
+        ttl: Optional[float] = 24 * 3600,
+        index_version: str = ""
+    ):
+        """
+        Args:
+            max_entries: Oldest entries are evicted beyond this size
+            max_distance: Maximum cosine distance (1 - cosine similarity) for a hit
+            ttl: Entries older than this (seconds) are ignored and evicted
+            index_version: Vector index version the cached answers were built from
+        """
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.ttl = ttl
+        self.index_version = index_version
+
+        self._entries: List[CachedAnswer] = []
+        self._vectors: List[np.ndarray] = []
+        self._matrix: Optional[np.ndarray] = None  # rebuilt lazily after changes
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.saved_prompt_tokens = 0
+        self.saved_completion_tokens = 0
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def set_index_version(self, version: str):
+        """Drop every cached answer when the underlying vector index changes"""
+        if version and version != self.index_version:
+            if self._entries:
+                logger.info(f"Vector index version changed ({self.index_version} → {version}); clearing {len(self._entries)} cached answers")
+                self.invalidations += 1
+            self.index_version = version
+            self.clear()
+
+    def clear(self):
+        self._entries = []
+        self._vectors = []
+        self._matrix = None
+
+    def _remove(self, indices: List[int]):
+        drop = set(indices)
+        self._entries = [e for i, e in enumerate(self._entries) if i not in drop]
+        self._vectors = [v for i, v in enumerate(self._vectors) if i not in drop]
+        self._matrix = None
+        self.evictions += len(drop)
+
+    def _evict_expired(self):
+        if self.ttl is None:
+            return
+        cutoff = time.time() - self.ttl
+        expired = [i for i, e in enumerate(self._entries) if e.created_at < cutoff]
+        if expired:
+            self._remove(expired)
+
+    def lookup(self, embedding: List[float], language: str) -> Optional[CachedAnswer]:
+        """Return the closest cached answer in the same language within max_distance"""
+        self._evict_expired()
+        if not self._entries:
+            self.misses += 1
+            return None
+
+        if self._matrix is None:
+            self._matrix = np.vstack(self._vectors)
+
+        similarities = self._matrix @ self._normalize(embedding)
+        for i, entry in enumerate(self._entries):
+            if entry.language != language:
+                similarities[i] = -np.inf
+        best = int(np.argmax(similarities))
+
+        if 1.0 - float(similarities[best]) > self.max_distance:
+            self.misses += 1
+            return None
+
+        entry = self._entries[best]
+        entry.hits += 1
+        self.hits += 1
+        self.saved_prompt_tokens += entry.prompt_tokens
+        self.saved_completion_tokens += entry.completion_tokens
+        return entry
+
+    def store(self, embedding: List[float], entry: CachedAnswer):
+        """Add an answered question; evicts the oldest entries beyond max_entries"""
+        self._evict_expired()
+        self._entries.append(entry)
+        self._vectors.append(self._normalize(embedding))
+        self._matrix = None
+
+        overflow = len(self._entries) - self.max_entries
+        if overflow > 0:
+            oldest = sorted(range(len(self._entries)), key=lambda i: self._entries[i].created_at)[:overflow]
+            self._remove(oldest)
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "index_version": self.index_version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "saved_prompt_tokens": self.saved_prompt_tokens,
+            "saved_completion_tokens": self.saved_completion_tokens
+        }
+
+
+def split_for_replay(text: str, chunk_size: int = 40) -> List[str]:
+    """Split a cached answer into stream-sized pieces without cutting a {{citation:...}} tag"""
+    pieces = []
+    start = 0
+    while start < len(text):
+        end = min(start + chunk_size, len(text))
+        open_idx = text.rfind("{{", start, end)
+        if open_idx != -1 and text.find("}}", open_idx, end) == -1:
+            close_idx = text.find("}}", open_idx)
+            end = close_idx + 2 if close_idx != -1 else len(text)
+        pieces.append(text[start:end])
+        start = end
+    return pieces
+
+
+async def replay_answer(cached: CachedAnswer, sse, chunk_store, generating_frame: bytes,
+                        session_id: Optional[str] = None) -> AsyncIterator[bytes]:
+    """
+    Replay a cached answer with the same SSE event sequence as a generated one
+
+    Args:
+        sse: SSEWriter of the request (answer pieces are coalesced like live deltas)
+        chunk_store: ChunkStore the context chunks are written back to, so the
+            next turn can rehydrate them from the IDs in the done event
+        generating_frame: Pre-encoded "generating" status event
+    """
+    yield sse.encoded(generating_frame)
+    for piece in split_for_replay(cached.answer):
+        frame = sse.delta(piece)
+        if frame:
+            yield frame
+    yield sse.event({
+        "status": "references_ready",
+        "answer": cached.answer,
+        "references": cached.references
+    })
+    await asyncio.to_thread(chunk_store.put_many, cached.context_chunks)
+    yield sse.event({
+        "status": "done",
+        "message": "완료",
+        "context_chunks": [chunk_ref(chunk) for chunk in cached.context_chunks],
+        "session_id": session_id,
+        "cached": True
+    })
+    if cached.followup_questions:
+        yield sse.event({
+            "status": "followup_ready",
+            "followup_questions": cached.followup_questions
+        })
@@ -0,0 +1,247 @@
+"""
+BM25 keyword index over chunk text
+Complements dense search on exact clinical tokens (drug names, dosages,
+test names) that embeddings rank poorly. Built at ingestion time from the
+same chunk metadata that is upserted into the vector store.
+"""
+
+import json
+import logging
+import math
+import re
+import shutil
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.vector_store import replace_directory
+
+logger = logging.getLogger(__name__)
+
+# Keeps dosages and identifiers in one token: "0.4-0.6", "mg/kg", "t4", "il-31", "q12h"
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[.\-/][a-z0-9]+)*")
+
+STOP_WORDS = frozenset("""
+a an and are as at be by can do does for from has have how in is it its of on or
+that the their there these this to was what when where which who why with your
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase tokens; hyphen/slash tokens also contribute their parts ("0.4-0.6" → 0.4-0.6, 0.4, 0.6)"""
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token in STOP_WORDS:
+            continue
+        tokens.append(token)
+        parts = re.split(r"[\-/]", token)
+        if len(parts) > 1:
+            tokens.extend(part for part in parts if part not in STOP_WORDS and len(part) > 1)
+    return tokens
+
+
+class BM25Index:
+    """
+    Directory layout:
+        bm25.json         {"k1", "b", "doc_count", "avg_doc_len"}
+        vocab.json        term → [start, end] into the posting arrays
+        postings.npy      int32 document numbers (grouped by term)
+        tfs.npy           uint16 term frequencies (parallel to postings)
+        doc_len.npy       uint32 token count per document
+        docs.jsonl        {"id", "metadata"} per document (+ docs.idx.npy byte offsets)
+
+    Posting arrays are memory-mapped; metadata is read lazily per hit.
+    """
+
+    def __init__(self, path: str, k1: float = 1.2, b: float = 0.75):
+        self.path = Path(path)
+        config = json.loads((self.path / "bm25.json").read_text())
+        self.k1 = config.get("k1", k1)
+        self.b = config.get("b", b)
+        self.doc_count = config["doc_count"]
+        self.avg_doc_len = config["avg_doc_len"] or 1.0
+        self.vocab: Dict[str, List[int]] = json.loads((self.path / "vocab.json").read_text())
+        self.postings = np.load(self.path / "postings.npy", mmap_mode="r")
+        self.tfs = np.load(self.path / "tfs.npy", mmap_mode="r")
+        self.doc_len = np.load(self.path / "doc_len.npy")
+        self._doc_offsets = np.load(self.path / "docs.idx.npy")
+        self._docs_file = open(self.path / "docs.jsonl", "rb")
+        self._lock = threading.Lock()
+        # Length normalisation term per document, precomputed once
+        self._norm = (self.k1 * (1 - self.b + self.b * self.doc_len / self.avg_doc_len)).astype(np.float32)
+
+    def _doc(self, number: int) -> Dict:
+        with self._lock:
+            self._docs_file.seek(int(self._doc_offsets[number]))
+            return json.loads(self._docs_file.readline())
+
+    def score(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (document numbers, BM25 scores) for every document matching a query term"""
+        terms = Counter(tokenize(query))
+        doc_numbers, doc_scores = [], []
+        for term, query_tf in terms.items():
+            span = self.vocab.get(term)
+            if not span:
+                continue
+            start, end = span
+            docs = np.asarray(self.postings[start:end])
+            tf = np.asarray(self.tfs[start:end], dtype=np.float32)
+            df = end - start
+            idf = math.log(1 + (self.doc_count - df + 0.5) / (df + 0.5))
+            doc_numbers.append(docs)
+            doc_scores.append(query_tf * idf * tf * (self.k1 + 1) / (tf + self._norm[docs]))
+        if not doc_numbers:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        docs = np.concatenate(doc_numbers)
+        scores = np.concatenate(doc_scores)
+        unique, inverse = np.unique(docs, return_inverse=True)
+        totals = np.zeros(len(unique), dtype=np.float32)
+        np.add.at(totals, inverse, scores)
+        return unique, totals
+
+    def search(self, query: str, top_k: int = 15) -> List[Dict]:
+        """
+        Top-k chunks for a query
+
+        Returns:
+            Chunk dicts in the same shape as vector search results (metadata + id),
+            with the BM25 score under 'bm25_score'
+        """
+        docs, scores = self.score(query)
+        if len(docs) == 0:
+            return []
+        k = min(top_k, len(docs))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        chunks = []
+        for i in top:
+            doc = self._doc(int(docs[i]))
+            chunk = dict(doc.get("metadata") or {})
+            chunk["id"] = doc["id"]
+            chunk["bm25_score"] = float(scores[i])
+            chunks.append(chunk)
+        return chunks
+
+    def search_many(self, queries: List[str], top_k: int = 15) -> List[List[Dict]]:
+        """Search each expanded query (blocking - run via asyncio.to_thread)"""
+        return [self.search(query, top_k) for query in queries]
+
+    def stats(self) -> Dict:
+        return {"documents": self.doc_count, "terms": len(self.vocab), "avg_doc_len": round(self.avg_doc_len, 1)}
+
+
+def build_bm25_index(path, documents: Iterable[Tuple[str, Dict]], k1: float = 1.2, b: float = 0.75) -> int:
+    """
+    Build a BM25Index directory from unique (id, metadata) pairs; metadata["text"] is indexed
+
+    The index is written to a sibling .tmp directory and swapped in by rename,
+    so a BM25Index serving from the old files (memory-mapped postings) keeps
+    reading a consistent copy. Other files in the directory (the writer's
+    corpus.jsonl) are carried over.
+
+    Returns the number of indexed documents.
+    """
+    started = time.perf_counter()
+    target = Path(path)
+    path = target.with_name(target.name + ".tmp")
+    shutil.rmtree(path, ignore_errors=True)
+    path.mkdir(parents=True)
+
+    # Per-document (term id, tf) arrays, grouped by term with one stable sort at the end
+    term_ids: Dict[str, int] = {}
+    doc_terms, doc_numbers, doc_tfs = [], [], []
+    doc_lengths = []
+    offsets = []
+    with open(path / "docs.jsonl", "wb") as docs_file:
+        for number, (doc_id, metadata) in enumerate(documents):
+            tokens = tokenize(metadata.get("text", ""))
+            doc_lengths.append(len(tokens))
+            term_counts = Counter(tokens)
+            doc_terms.append(np.fromiter((term_ids.setdefault(t, len(term_ids)) for t in term_counts), dtype=np.int32, count=len(term_counts)))
+            doc_tfs.append(np.fromiter((min(tf, 65535) for tf in term_counts.values()), dtype=np.uint16, count=len(term_counts)))
+            doc_numbers.append(np.full(len(term_counts), number, dtype=np.int32))
+            offsets.append(docs_file.tell())
+            docs_file.write(json.dumps({"id": doc_id, "metadata": metadata}, ensure_ascii=False).encode("utf-8") + b"\n")
+
+    all_terms = np.concatenate(doc_terms) if doc_terms else np.zeros(0, dtype=np.int32)
+    order = np.argsort(all_terms, kind="stable")
+    postings = np.concatenate(doc_numbers)[order] if doc_numbers else np.zeros(0, dtype=np.int32)
+    tfs = np.concatenate(doc_tfs)[order] if doc_tfs else np.zeros(0, dtype=np.uint16)
+    counts = np.bincount(all_terms, minlength=len(term_ids))
+    ends = np.cumsum(counts)
+    vocab = {term: [int(ends[i] - counts[i]), int(ends[i])] for term, i in term_ids.items()}
+
+    np.save(path / "postings.npy", postings)
+    np.save(path / "tfs.npy", tfs)
+    np.save(path / "doc_len.npy", np.asarray(doc_lengths, dtype=np.uint32))
+    np.save(path / "docs.idx.npy", np.asarray(offsets, dtype=np.int64))
+    (path / "vocab.json").write_text(json.dumps(vocab, ensure_ascii=False))
+    (path / "bm25.json").write_text(json.dumps({
+        "k1": k1,
+        "b": b,
+        "doc_count": len(doc_lengths),
+        "avg_doc_len": float(np.mean(doc_lengths)) if doc_lengths else 0.0
+    }))
+    if target.exists():
+        for child in target.iterdir():
+            if not (path / child.name).exists():
+                child.rename(path / child.name)
+    replace_directory(path, target)
+    logger.info(f"Built BM25 index: {len(doc_lengths)} documents, {len(vocab)} terms in {time.perf_counter() - started:.1f}s → {target}")
+    return len(doc_lengths)
+
+
+class BM25Writer:
+    """
+    Ingestion-side writer: appends upserted chunks to a corpus log and
+    rebuilds the index from the full log on flush()
+
+        writer = BM25Writer("vector_data/bm25")
+        index.upsert(vectors=vectors)
+        writer.add(vectors)      # same [{"id", "values", "metadata"}] batch
+        writer.flush()           # at the end of the ingestion run
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.log_path = self.path / "corpus.jsonl"
+        self._pending = 0
+
+    def add(self, vectors: List[Dict]):
+        with open(self.log_path, "a", encoding="utf-8") as log:
+            for item in vectors:
+                log.write(json.dumps({"id": item["id"], "metadata": item.get("metadata") or {}}, ensure_ascii=False) + "\n")
+        self._pending += len(vectors)
+
+    def _read_log(self) -> Iterable[Tuple[str, Dict]]:
+        """Latest entry per chunk ID (re-ingested chunks replace older ones)"""
+        last_line = {}
+        with open(self.log_path, encoding="utf-8") as log:
+            for number, line in enumerate(log):
+                if line.strip():
+                    last_line[json.loads(line)["id"]] = number
+        keep = set(last_line.values())
+        with open(self.log_path, encoding="utf-8") as log:
+            for number, line in enumerate(log):
+                if number in keep:
+                    entry = json.loads(line)
+                    yield entry["id"], entry["metadata"]
+
+    def flush(self):
+        if self._pending and self.log_path.exists():
+            build_bm25_index(self.path, self._read_log())
+            self._pending = 0
+
+
+def load_bm25_index(path: Optional[str]) -> Optional[BM25Index]:
+    """Open the BM25 index if it has been built; None disables keyword search"""
+    if not path or not (Path(path) / "bm25.json").exists():
+        return None
+    return BM25Index(path)
@@ -0,0 +1,411 @@
+"""
+Caching primitives for the RAG pipeline
+In-process LRU (TTL + size eviction) backed by an optional SQLite tier,
+and the query embedding / query understanding / context chunk caches built
+on top of them
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.vector_search import chunk_handle
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """Normalize a question for cache keys (NFKC, lowercase, collapsed whitespace)"""
+    text = unicodedata.normalize("NFKC", text)
+    return " ".join(text.lower().split())
+
+
+def hash_key(*parts: str) -> str:
+    """Stable key for the disk tier"""
+    return hashlib.sha1("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    """Thread-safe in-memory LRU with per-entry TTL"""
+
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, stored_at = entry
+            if self.ttl is not None and time.time() - stored_at > self.ttl:
+                del self._data[key]
+                self.evictions += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: Any):
+        with self._lock:
+            self._data[key] = (value, time.time())
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteCacheTier:
+    """Persistent key → bytes store with TTL and row-count eviction"""
+
+    # Seconds before a read refreshes accessed_at (the LRU eviction order)
+    TOUCH_INTERVAL = 60.0
+
+    def __init__(self, path: str, table: str, ttl: Optional[float] = None, max_entries: int = 100_000):
+        self.path = path
+        self.table = table
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._writes_since_prune = 0
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_accessed ON {table}(accessed_at)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: List[str]) -> Dict[str, bytes]:
+        """
+        Look up several keys in one query; returns only the live hits
+
+        accessed_at is only rewritten when older than TOUCH_INTERVAL, so hot
+        reads do not turn into a write + commit each (eviction order is
+        approximate to that interval).
+        """
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        now = time.time()
+        found, expired, touched = {}, [], []
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, value, created_at, accessed_at FROM {self.table} "
+                    f"WHERE key IN ({','.join('?' * len(batch))})", batch
+                ).fetchall()
+                for key, value, created_at, accessed_at in rows:
+                    if self.ttl is not None and now - created_at > self.ttl:
+                        expired.append((key,))
+                        continue
+                    found[key] = value
+                    if now - accessed_at > self.TOUCH_INTERVAL:
+                        touched.append((now, key))
+            if expired or touched:
+                with self._conn:
+                    self._conn.executemany(f"DELETE FROM {self.table} WHERE key = ?", expired)
+                    self._conn.executemany(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", touched)
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put(self, key: str, value: bytes):
+        self.put_many([(key, value)])
+
+    def put_many(self, items: List[Tuple[str, bytes]]):
+        """Insert or replace several entries in one transaction"""
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    [(key, value, now, now) for key, value in items]
+                )
+            self._writes_since_prune += len(items)
+            if self._writes_since_prune >= 100:
+                self._prune_locked()
+
+    def prune(self):
+        """Drop expired rows and least-recently-used rows beyond max_entries"""
+        with self._lock:
+            self._prune_locked()
+
+    def _prune_locked(self):
+        self._writes_since_prune = 0
+        if self.ttl is not None:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE created_at < ?", (time.time() - self.ttl,))
+        count = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN "
+                f"(SELECT key FROM {self.table} ORDER BY accessed_at ASC LIMIT ?)",
+                (overflow,)
+            )
+        self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def two_tier_stats(memory: LRUCache, disk: Optional[SQLiteCacheTier]) -> Dict:
+    """Hit/miss counters for a memory tier backed by an optional disk tier"""
+    memory_hits = memory.hits
+    disk_hits = disk.hits if disk else 0
+    # Memory misses that were then served from disk are not real misses
+    misses = memory.misses - disk_hits
+    lookups = memory_hits + disk_hits + misses
+    return {
+        "memory_entries": len(memory),
+        "disk_entries": len(disk) if disk else 0,
+        "memory_hits": memory_hits,
+        "disk_hits": disk_hits,
+        "misses": misses,
+        "evictions": memory.evictions,
+        "hit_rate": round((memory_hits + disk_hits) / lookups, 4) if lookups else 0.0
+    }
+
+
+class EmbeddingCache:
+    """
+    Two-tier query embedding cache keyed by (model, normalized text)
+
+    Memory tier keeps full-precision vectors; the disk tier stores float16
+    blobs (half the size, cosine similarity is unaffected at this precision).
+    """
+
+    def __init__(
+        self,
+        model: str,
+        memory_size: int = 2048,
+        ttl: Optional[float] = None,
+        disk_path: Optional[str] = None,
+        disk_max_entries: int = 100_000
+    ):
+        self.model = model
+        self.memory = LRUCache(max_size=memory_size, ttl=ttl)
+        self.disk = SQLiteCacheTier(disk_path, "embeddings", ttl=ttl, max_entries=disk_max_entries) if disk_path else None
+
+    def _key(self, text: str) -> str:
+        return hash_key(self.model, normalize_text(text))
+
+    def get(self, text: str) -> Optional[List[float]]:
+        key = self._key(text)
+        vector = self.memory.get(key)
+        if vector is not None:
+            return vector
+        if self.disk is None:
+            return None
+
+        blob = self.disk.get(key)
+        if blob is None:
+            return None
+        vector = np.frombuffer(blob, dtype=np.float16).astype(np.float32).tolist()
+        self.memory.put(key, vector)
+        return vector
+
+    def put(self, text: str, vector: List[float]):
+        key = self._key(text)
+        self.memory.put(key, vector)
+        if self.disk is not None:
+            self.disk.put(key, np.asarray(vector, dtype=np.float16).tobytes())
+
+    def get_many(self, texts: List[str]) -> Dict[str, List[float]]:
+        """Look up several texts (one disk query for the memory misses); returns only the hits"""
+        found, missing = {}, {}
+        for text in texts:
+            key = self._key(text)
+            vector = self.memory.get(key)
+            if vector is not None:
+                found[text] = vector
+            else:
+                missing.setdefault(key, []).append(text)
+        if self.disk is not None and missing:
+            for key, blob in self.disk.get_many(list(missing)).items():
+                vector = np.frombuffer(blob, dtype=np.float16).astype(np.float32).tolist()
+                self.memory.put(key, vector)
+                for text in missing[key]:
+                    found[text] = vector
+        return found
+
+    def put_many(self, vectors: Dict[str, List[float]]):
+        """Store several vectors (one disk transaction)"""
+        items = []
+        for text, vector in vectors.items():
+            key = self._key(text)
+            self.memory.put(key, vector)
+            items.append((key, np.asarray(vector, dtype=np.float16).tobytes()))
+        if self.disk is not None:
+            self.disk.put_many(items)
+
+    def stats(self) -> Dict:
+        return two_tier_stats(self.memory, self.disk)
+
+
+def normalize_question(text: str) -> str:
+    """normalize_text plus trailing punctuation removal, so near-identical questions share a key"""
+    return normalize_text(text).rstrip("?？.。!！ ")
+
+
+class QueryUnderstandingCache:
+    """
+    Two-tier memo cache for the query understanding stage (translation + expansion + type)
+
+    Keyed by (language, normalized question, prompt version) so that a prompt
+    change invalidates old translations without a manual flush.
+    """
+
+    def __init__(
+        self,
+        prompt_version: str,
+        memory_size: int = 1024,
+        ttl: Optional[float] = None,
+        disk_path: Optional[str] = None,
+        disk_max_entries: int = 50_000
+    ):
+        self.prompt_version = prompt_version
+        self.memory = LRUCache(max_size=memory_size, ttl=ttl)
+        self.disk = SQLiteCacheTier(disk_path, "query_understanding", ttl=ttl, max_entries=disk_max_entries) if disk_path else None
+
+    def _key(self, language: str, question: str) -> str:
+        return hash_key(self.prompt_version, language, normalize_question(question))
+
+    def get(self, language: str, question: str) -> Optional[Dict]:
+        key = self._key(language, question)
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+        if self.disk is None:
+            return None
+
+        blob = self.disk.get(key)
+        if blob is None:
+            return None
+        value = json.loads(blob.decode("utf-8"))
+        self.memory.put(key, value)
+        return value
+
+    def put(self, language: str, question: str, value: Dict):
+        key = self._key(language, question)
+        self.memory.put(key, value)
+        if self.disk is not None:
+            self.disk.put(key, json.dumps(value, ensure_ascii=False).encode("utf-8"))
+
+    def stats(self) -> Dict:
+        return two_tier_stats(self.memory, self.disk)
+
+
+def chunk_ref(chunk: Dict) -> Dict:
+    """Handle sent to the client instead of the full chunk (ID + retrieval score)"""
+    score = chunk.get("score")
+    return {"id": chunk_handle(chunk), "score": round(float(score), 4) if score is not None else None}
+
+
+class ChunkStore:
+    """
+    Two-tier store of context chunks keyed by chunk ID
+
+    The done event returns chunk_ref() handles and the next turn sends the
+    IDs back; the chunks are rehydrated from here instead of round-tripping
+    full texts through the browser. Dense vectors ('values') are not stored.
+    """
+
+    def __init__(
+        self,
+        memory_size: int = 4096,
+        ttl: Optional[float] = None,
+        disk_path: Optional[str] = None,
+        disk_max_entries: int = 200_000
+    ):
+        self.memory = LRUCache(max_size=memory_size, ttl=ttl)
+        self.disk = SQLiteCacheTier(disk_path, "context_chunks", ttl=ttl, max_entries=disk_max_entries) if disk_path else None
+
+    def get(self, chunk_id: str) -> Optional[Dict]:
+        chunk = self.memory.get(chunk_id)
+        if chunk is not None:
+            return chunk
+        if self.disk is None:
+            return None
+
+        blob = self.disk.get(chunk_id)
+        if blob is None:
+            return None
+        chunk = json.loads(blob.decode("utf-8"))
+        self.memory.put(chunk_id, chunk)
+        return chunk
+
+    def put(self, chunk: Dict):
+        self.put_many([chunk])
+
+    def get_many(self, chunk_ids: List[str]) -> Dict[str, Dict]:
+        """Look up several IDs (one disk query for the memory misses); returns only the hits"""
+        found = {}
+        for chunk_id in chunk_ids:
+            chunk = self.memory.get(chunk_id)
+            if chunk is not None:
+                found[chunk_id] = chunk
+        missing = [chunk_id for chunk_id in chunk_ids if chunk_id not in found]
+        if self.disk is not None and missing:
+            for chunk_id, blob in self.disk.get_many(missing).items():
+                chunk = found[chunk_id] = json.loads(blob.decode("utf-8"))
+                self.memory.put(chunk_id, chunk)
+        return found
+
+    def put_many(self, chunks: List[Dict]):
+        """Store several chunks (one disk transaction)"""
+        items = []
+        for chunk in chunks:
+            chunk = {k: v for k, v in chunk.items() if k != "values"}
+            chunk_id = chunk_handle(chunk)
+            self.memory.put(chunk_id, chunk)
+            items.append((chunk_id, json.dumps(chunk, ensure_ascii=False).encode("utf-8")))
+        if self.disk is not None:
+            self.disk.put_many(items)
+
+    def stats(self) -> Dict:
+        return two_tier_stats(self.memory, self.disk)
@@ -0,0 +1,378 @@
+"""
+Record/replay cassettes for upstream calls
+In record mode every OpenAI HTTP exchange (through an httpx transport passed
+to AsyncOpenAI(http_client=...)) and every vector store call (through a
+VectorStore wrapper) is appended to a JSONL cassette, including streamed
+response chunks with their arrival offsets. In replay mode the same calls are
+answered from the cassette with the recorded timing (scaled by `speed`; 0 =
+no delays), so a question mix can be re-run against pipeline changes without
+live services or API cost.
+
+Requests are matched by a hash of their content (path + JSON body, or the
+vector store operation + query vector). Identical requests are answered in
+recorded order. With fallback=True a request that was never recorded is
+answered by the next unused response of the same kind (same endpoint, model
+and stream flag, or vector store operation) - useful when a prompt change
+alters request bodies but the upstream responses are still representative.
+"""
+
+import asyncio
+import base64
+import codecs
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from dataclasses import asdict
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+import httpx
+import numpy as np
+
+from app.vector_store import IndexStats, QueryResult, VectorMatch, VectorRecord, VectorStore
+
+logger = logging.getLogger(__name__)
+
+MODES = ("record", "replay")
+
+
+class CassetteMiss(LookupError):
+    """Replay found no recorded response for a request"""
+
+
+def _hash(payload: Any) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()[:32]
+
+
+def _json_default(value: Any):
+    if hasattr(value, "tolist"):  # numpy arrays / scalars from local stores
+        return value.tolist()
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
+
+
+def vector_digest(vector) -> str:
+    """Stable identity of a query vector (float32 bytes)"""
+    return hashlib.sha256(np.asarray(vector, dtype=np.float32).tobytes()).hexdigest()[:32]
+
+
+# ============================================================
+# Cassette file
+# ============================================================
+
+class Cassette:
+    """
+    JSONL file of interactions: {"kind", "key", "signature", "request", "response"}
+
+    Recorded interactions are appended (and flushed) as they complete, so a
+    recording survives a crash of the server.
+    """
+
+    def __init__(self, path: str, mode: str = "replay", speed: float = 1.0, fallback: bool = False):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode: {mode} (expected one of {MODES})")
+        self.path = path
+        self.mode = mode
+        self.speed = speed
+        self.fallback = fallback
+        self._lock = threading.Lock()
+        self._by_key: Dict[str, Deque[Dict]] = defaultdict(deque)
+        self._by_signature: Dict[str, Deque[Dict]] = defaultdict(deque)
+        self._last: Dict[str, Dict] = {}
+        self.recorded = 0
+        self.replayed = 0
+        self.fallbacks = 0
+        self.misses = 0
+
+        if mode == "replay":
+            self._load()
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> Optional["Cassette"]:
+        """
+        Env:
+            CASSETTE_MODE: "record" | "replay" (unset = off)
+            CASSETTE_PATH: JSONL file (required - recordings hold full questions and answers,
+                so there is no default location inside the source tree)
+            CASSETTE_REPLAY_SPEED: recorded delays x speed on replay (0 = no delays)
+            CASSETTE_FALLBACK: "true" to answer unrecorded requests with the next response of the same kind
+        """
+        mode = os.getenv("CASSETTE_MODE", "").lower()
+        if not mode:
+            return None
+        path = os.getenv("CASSETTE_PATH", "")
+        if not path:
+            raise ValueError("CASSETTE_PATH is required when CASSETTE_MODE is set")
+        return cls(
+            path,
+            mode=mode,
+            speed=float(os.getenv("CASSETTE_REPLAY_SPEED", "1.0")),
+            fallback=os.getenv("CASSETTE_FALLBACK", "false").lower() == "true"
+        )
+
+    def _load(self):
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._by_key[entry["key"]].append(entry)
+                    self._by_signature[entry["signature"]].append(entry)
+        logger.info(f"Loaded cassette {self.path}: {sum(len(q) for q in self._by_key.values())} interactions")
+
+    def record(self, kind: str, key: str, signature: str, request: Dict, response: Dict):
+        entry = {"kind": kind, "key": key, "signature": signature, "request": request, "response": response}
+        line = json.dumps(entry, ensure_ascii=False, default=_json_default) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+            self.recorded += 1
+
+    def take(self, key: str, signature: str) -> Dict:
+        """Next recorded response for a request (recorded order; the last one repeats once exhausted)"""
+        with self._lock:
+            queue = self._by_key.get(key)
+            if queue:
+                entry = queue.popleft()
+                self._remove(self._by_signature[signature], entry)
+            elif key in self._last:
+                entry = self._last[key]
+            elif self.fallback and self._by_signature.get(signature):
+                entry = self._by_signature[signature].popleft()
+                self._remove(self._by_key[entry["key"]], entry)
+                self.fallbacks += 1
+            else:
+                self.misses += 1
+                raise CassetteMiss(f"No recorded response for {signature} ({key}) in {self.path}")
+            self._last[key] = entry
+            self.replayed += 1
+            return entry["response"]
+
+    @staticmethod
+    def _remove(queue: Deque[Dict], entry: Dict):
+        try:
+            queue.remove(entry)
+        except ValueError:
+            pass
+
+    def delay(self, seconds: float) -> float:
+        return max(0.0, seconds * self.speed)
+
+    def http_client(self, **kwargs) -> httpx.AsyncClient:
+        """httpx client for AsyncOpenAI(http_client=...) routed through this cassette"""
+        return httpx.AsyncClient(transport=CassetteTransport(self), **kwargs)
+
+    def wrap_vector_store(self, store: Optional[VectorStore]) -> "CassetteVectorStore":
+        return CassetteVectorStore(self, store)
+
+    def stats(self) -> Dict:
+        return {
+            "mode": self.mode,
+            "path": self.path,
+            "recorded": self.recorded,
+            "replayed": self.replayed,
+            "fallbacks": self.fallbacks,
+            "misses": self.misses,
+        }
+
+
+# ============================================================
+# OpenAI (httpx transport)
+# ============================================================
+
+def http_request_entry(request: httpx.Request) -> Dict:
+    try:
+        body = json.loads(request.content) if request.content else None
+    except ValueError:
+        body = base64.b64encode(request.content).decode("ascii")
+    return {"method": request.method, "path": request.url.path, "body": body}
+
+
+def http_signature(entry: Dict) -> str:
+    body = entry["body"] if isinstance(entry["body"], dict) else {}
+    return f"{entry['method']} {entry['path']} model={body.get('model')} stream={bool(body.get('stream'))}"
+
+
+class _RecordingStream(httpx.AsyncByteStream):
+    """Passes the upstream body through and records each chunk with its offset from the request start"""
+
+    def __init__(self, inner: httpx.AsyncByteStream, started: float, on_complete: Callable[[List], None]):
+        self.inner = inner
+        self.started = started
+        self.on_complete = on_complete
+        self.chunks: List = []
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._done = False
+
+    async def __aiter__(self):
+        async for chunk in self.inner:
+            text = self._decoder.decode(chunk)
+            if text:
+                self.chunks.append([round(time.perf_counter() - self.started, 4), text])
+            yield chunk
+
+    async def aclose(self):
+        await self.inner.aclose()
+        if not self._done:
+            self._done = True
+            tail = self._decoder.decode(b"", final=True)
+            if tail:
+                self.chunks.append([round(time.perf_counter() - self.started, 4), tail])
+            self.on_complete(self.chunks)
+
+
+class _ReplayStream(httpx.AsyncByteStream):
+    """Recorded chunks re-emitted at their recorded offsets (x speed)"""
+
+    def __init__(self, chunks: List, cassette: Cassette, started: float):
+        self.chunks = chunks
+        self.cassette = cassette
+        self.started = started
+
+    async def __aiter__(self):
+        for offset, text in self.chunks:
+            wait = self.started + self.cassette.delay(offset) - time.perf_counter()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            yield text.encode("utf-8")
+
+
+class CassetteTransport(httpx.AsyncBaseTransport):
+    """
+    Record mode: forwards to the real transport and records the exchange
+    Replay mode: answers from the cassette without network access
+    """
+
+    def __init__(self, cassette: Cassette, inner: Optional[httpx.AsyncBaseTransport] = None):
+        self.cassette = cassette
+        self.inner = inner or (httpx.AsyncHTTPTransport() if cassette.mode == "record" else None)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        entry = http_request_entry(request)
+        key, signature = _hash(entry), http_signature(entry)
+        started = time.perf_counter()
+
+        if self.cassette.mode == "replay":
+            try:
+                recorded = self.cassette.take(key, signature)
+            except CassetteMiss as e:
+                logger.warning(str(e))
+                raise httpx.ConnectError(str(e), request=request) from e
+            wait = self.cassette.delay(recorded["headers_at"])
+            if wait:
+                await asyncio.sleep(wait)
+            return httpx.Response(
+                recorded["status"],
+                headers={"content-type": recorded["content_type"]},
+                stream=_ReplayStream(recorded["chunks"], self.cassette, started),
+                request=request
+            )
+
+        # 압축된 본문은 청크 단위로 기록할 수 없으므로 identity 인코딩으로 요청
+        request.headers["Accept-Encoding"] = "identity"
+        response = await self.inner.handle_async_request(request)
+        headers_at = round(time.perf_counter() - started, 4)
+
+        def on_complete(chunks: List):
+            self.cassette.record("openai", key, signature, entry, {
+                "status": response.status_code,
+                "content_type": response.headers.get("content-type", "application/json"),
+                "headers_at": headers_at,
+                "chunks": chunks,
+            })
+
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            stream=_RecordingStream(response.stream, started, on_complete),
+            extensions=response.extensions,
+            request=request
+        )
+
+    async def aclose(self):
+        if self.inner is not None:
+            await self.inner.aclose()
+
+
+# ============================================================
+# Vector store
+# ============================================================
+
+def _encode_result(result: QueryResult) -> List[Dict]:
+    return [asdict(match) for match in result.matches]
+
+
+def _decode_result(matches: List[Dict]) -> QueryResult:
+    return QueryResult(matches=[VectorMatch(**match) for match in matches])
+
+
+class CassetteVectorStore(VectorStore):
+    """
+    VectorStore wrapper: records calls to `inner` (record mode) or answers
+    them from the cassette (replay mode, `inner` may be None)
+    """
+
+    backend_name = "cassette"
+
+    def __init__(self, cassette: Cassette, inner: Optional[VectorStore] = None):
+        if cassette.mode == "record" and inner is None:
+            raise ValueError("Recording needs the real vector store")
+        self.cassette = cassette
+        self.inner = inner
+        self.prefers_batch_query = getattr(inner, "prefers_batch_query", False)
+        if inner is not None:
+            self.backend_name = f"{inner.backend_name}+cassette"
+
+    def _call(self, request: Dict, live: Callable[[], Any], encode: Callable, decode: Callable):
+        key, signature = _hash(request), f"vector {request['op']}"
+        if self.cassette.mode == "replay":
+            recorded = self.cassette.take(key, signature)
+            time.sleep(self.cassette.delay(recorded["elapsed"]))
+            return decode(recorded["result"])
+
+        started = time.perf_counter()
+        result = live()
+        self.cassette.record("vector", key, signature, request, {
+            "elapsed": round(time.perf_counter() - started, 4),
+            "result": encode(result),
+        })
+        return result
+
+    def query(self, vector, top_k=10, filter=None, include_metadata=True, include_values=False) -> QueryResult:
+        request = {"op": "query", "vector": vector_digest(vector), "top_k": top_k, "filter": filter,
+                   "include_metadata": include_metadata, "include_values": include_values}
+        return self._call(request, lambda: self.inner.query(vector, top_k, filter, include_metadata, include_values),
+                          _encode_result, _decode_result)
+
+    def query_batch(self, vectors, top_k=10, filter=None, include_metadata=True, include_values=False) -> List[QueryResult]:
+        request = {"op": "query_batch", "vectors": [vector_digest(v) for v in vectors], "top_k": top_k, "filter": filter,
+                   "include_metadata": include_metadata, "include_values": include_values}
+        return self._call(request, lambda: self.inner.query_batch(vectors, top_k, filter, include_metadata, include_values),
+                          lambda results: [_encode_result(r) for r in results],
+                          lambda results: [_decode_result(r) for r in results])
+
+    def fetch(self, ids: List[str]) -> Dict[str, VectorRecord]:
+        request = {"op": "fetch", "ids": sorted(ids)}
+        return self._call(request, lambda: self.inner.fetch(ids),
+                          lambda records: {vid: asdict(record) for vid, record in records.items()},
+                          lambda records: {vid: VectorRecord(**record) for vid, record in records.items()})
+
+    def stats(self) -> IndexStats:
+        try:
+            return self._call({"op": "stats"}, lambda: self.inner.stats(), asdict, lambda stats: IndexStats(**stats))
+        except CassetteMiss:
+            # /health, index version check - not part of the recorded question mix
+            return IndexStats(total_vector_count=0, dimension=0, backend=self.backend_name)
+
+    def upsert(self, vectors: List[Dict]):
+        if self.inner is None:
+            raise NotImplementedError("Cassette replay is read-only")
+        self.inner.upsert(vectors)
+
+    def delete(self, ids: List[str]):
+        if self.inner is None:
+            raise NotImplementedError("Cassette replay is read-only")
+        self.inner.delete(ids)
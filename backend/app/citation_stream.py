@@ -0,0 +1,165 @@
+"""
+Incremental citation parser for the streamed answer
+Consumes model deltas once, emits plain text as soon as it cannot be part
+of a citation tag, and validates/normalizes {{citation:N,M}} tags on the fly.
+
+Output is identical to the batch rewrite over the full answer:
+    re.sub(r'\\{\\{?citation:(\\d+(?:,\\d+)*)\\}\\}?', rewrite, answer)
+where indices >= num_references are dropped (a tag with no valid index is
+removed) and every tag is normalized to double braces.
+"""
+
+import logging
+import re
+from typing import Callable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+CITATION_PATTERN = re.compile(r'\{\{?citation:(\d+(?:,\d+)*)\}\}?')
+
+LITERAL = "citation:"
+
+# Parser states (position inside a candidate tag)
+TEXT = 0         # no candidate
+OPEN1 = 1        # "{"
+OPEN2 = 2        # "{{"
+NAME = 3         # inside "citation:" (progress in self._literal_pos)
+NEED_DIGIT = 4   # after ":" or ","
+DIGITS = 5       # inside a number
+CLOSE1 = 6       # after the first "}" - a complete tag, second "}" optional
+
+
+def format_citation(numbers: List[int], num_references: int, seen: Optional[Set[int]] = None,
+                    on_invalid: Optional[Callable[[int], None]] = None) -> str:
+    """Normalized tag with only valid indices ('' if none are valid)"""
+    valid = []
+    for number in numbers:
+        if 0 <= number < num_references:
+            valid.append(number)
+            if seen is not None:
+                seen.add(number)
+        elif on_invalid:
+            on_invalid(number)
+    return '{{citation:' + ','.join(map(str, valid)) + '}}' if valid else ''
+
+
+def rewrite_citations(text: str, num_references: int) -> str:
+    """Batch reference implementation (full text at once)"""
+    return CITATION_PATTERN.sub(
+        lambda m: format_citation([int(n) for n in m.group(1).split(',')], num_references),
+        text
+    )
+
+
+class CitationStreamParser:
+    """
+    State machine over the delta stream
+
+        parser = CitationStreamParser(num_references)
+        for delta in stream:
+            safe = parser.feed(delta)    # text that can be shown now
+        rest = parser.flush()            # at end of stream
+
+    Only a candidate tag ("{", "{{cita", "{{citation:1,2") is held back.
+    When a candidate fails, its first character is emitted and the rest is
+    re-scanned, which is how the regex restarts its leftmost match.
+    """
+
+    def __init__(self, num_references: int, on_invalid: Optional[Callable[[int], None]] = None):
+        self.num_references = num_references
+        self.on_invalid = on_invalid
+        self.seen_citations: Set[int] = set()
+        self._state = TEXT
+        self._pending: List[str] = []
+        self._literal_pos = 0
+        self._numbers: List[int] = []
+        self._current = 0
+
+    @property
+    def pending(self) -> str:
+        """Held-back characters of the current candidate tag"""
+        return ''.join(self._pending)
+
+    def _reset(self):
+        self._state = TEXT
+        self._pending = []
+        self._numbers = []
+        self._current = 0
+        self._literal_pos = 0
+
+    def _emit_citation(self, out: List[str]):
+        out.append(format_citation(self._numbers, self.num_references, self.seen_citations, self.on_invalid))
+        self._reset()
+
+    def _scan(self, text: str, out: List[str]):
+        i, n = 0, len(text)
+        while i < n:
+            state = self._state
+            if state == TEXT:
+                # Fast path: copy everything up to the next "{" in one slice
+                brace = text.find('{', i)
+                if brace == -1:
+                    out.append(text[i:])
+                    return
+                if brace > i:
+                    out.append(text[i:brace])
+                self._state = OPEN1
+                self._pending = ['{']
+                i = brace + 1
+                continue
+
+            char = text[i]
+            if state == OPEN1 and char == '{':
+                self._state = OPEN2
+            elif state in (OPEN1, OPEN2) and char == LITERAL[0]:
+                self._state = NAME
+                self._literal_pos = 1
+            elif state == NAME and char == LITERAL[self._literal_pos]:
+                self._literal_pos += 1
+                if self._literal_pos == len(LITERAL):
+                    self._state = NEED_DIGIT
+            elif state in (NEED_DIGIT, DIGITS) and '0' <= char <= '9':
+                self._current = self._current * 10 + ord(char) - 48
+                self._state = DIGITS
+            elif state == DIGITS and char == ',':
+                self._numbers.append(self._current)
+                self._current = 0
+                self._state = NEED_DIGIT
+            elif state == DIGITS and char == '}':
+                self._numbers.append(self._current)
+                self._state = CLOSE1
+            elif state == CLOSE1:
+                if char == '}':
+                    self._emit_citation(out)
+                    i += 1
+                else:
+                    self._emit_citation(out)
+                continue
+            else:
+                # Candidate broken: emit its first char and re-scan the rest together with the remaining text
+                text = ''.join(self._pending[1:]) + text[i:]
+                out.append(self._pending[0])
+                self._reset()
+                i, n = 0, len(text)
+                continue
+            self._pending.append(char)
+            i += 1
+
+    def feed(self, delta: str) -> str:
+        """Consume a delta; returns the text that is safe to emit now"""
+        out: List[str] = []
+        self._scan(delta, out)
+        return ''.join(out)
+
+    def flush(self) -> str:
+        """End of stream: complete a tag missing its optional second brace, release anything else"""
+        out: List[str] = []
+        while self._state != TEXT:
+            if self._state == CLOSE1:
+                self._emit_citation(out)
+            else:
+                replay = ''.join(self._pending[1:])
+                out.append(self._pending[0])
+                self._reset()
+                self._scan(replay, out)
+        return ''.join(out)
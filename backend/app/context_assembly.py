@@ -0,0 +1,135 @@
+"""
+Context assembly stage
+Turns the selected chunks into the prompt's "Document i" blocks: one block
+per paper (matching the citation numbering of doc_order), with chunks that
+are adjacent in the source stitched into one passage and the ingestion
+overlap (150 characters between consecutive chunks) removed.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Ingestion uses chunk_size=600, overlap=150; sentence-boundary trimming can move the cut
+MAX_OVERLAP = 300
+MIN_OVERLAP = 20
+PASSAGE_SEPARATOR = "\n[...]\n"
+
+
+@dataclass
+class AssemblyStats:
+    chunks: int = 0
+    passages: int = 0
+    raw_chars: int = 0
+    context_chars: int = 0
+
+    @property
+    def chars_saved(self) -> int:
+        return self.raw_chars - self.context_chars
+
+
+def chunk_position(chunk: Dict):
+    """Position of a chunk inside its paper ('page' holds the chunk index for XML papers), or None"""
+    for field in ('chunk_index', 'page'):
+        value = chunk.get(field)
+        if value is None or value == '':
+            continue
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def overlap_length(previous: str, following: str, max_overlap: int = MAX_OVERLAP, min_overlap: int = MIN_OVERLAP) -> int:
+    """Length of the longest suffix of `previous` that is a prefix of `following` (0 if shorter than min_overlap)"""
+    longest = min(len(previous), len(following), max_overlap)
+    for size in range(longest, min_overlap - 1, -1):
+        if previous.endswith(following[:size]):
+            return size
+    return 0
+
+
+def stitch_chunks(chunks: List[Dict]) -> List[str]:
+    """
+    Passages for one paper
+
+    Chunks with consecutive (or equal) positions whose texts overlap are
+    joined with the overlap removed; anything else starts a new passage.
+    Chunks without a position keep their order and are deduplicated by text.
+    """
+    positioned = sorted(
+        (c for c in chunks if chunk_position(c) is not None),
+        key=chunk_position
+    )
+    unpositioned = [c for c in chunks if chunk_position(c) is None]
+
+    passages: List[str] = []
+    seen = set()
+    last_position = None
+    for chunk in positioned:
+        text = chunk.get('text', '').strip()
+        position = chunk_position(chunk)
+        if not text or text in seen:
+            continue
+        seen.add(text)
+        # PDF chunks share a page number, so same-position chunks are only stitched on a real overlap
+        overlap = overlap_length(passages[-1], text) if passages and position - last_position in (0, 1) else 0
+        if overlap:
+            passages[-1] += text[overlap:]
+        else:
+            passages.append(text)
+        last_position = position
+
+    for chunk in unpositioned:
+        text = chunk.get('text', '').strip()
+        if text and text not in seen:
+            passages.append(text)
+            seen.add(text)
+    return passages
+
+
+def group_chunks_by_document(chunks: List[Dict]) -> Tuple[List[str], Dict[str, List[Dict]]]:
+    """
+    Group chunks by paper in first-seen order
+    Returns: (doc_order, grouped_chunks) - citation i refers to doc_order[i]
+    """
+    seen_docs = {}
+    doc_order = []
+
+    for chunk in chunks:
+        ref_key = f"{chunk.get('source', 'unknown')}_{chunk.get('title', 'unknown')}"
+        if ref_key not in seen_docs:
+            seen_docs[ref_key] = []
+            doc_order.append(ref_key)
+        seen_docs[ref_key].append(chunk)
+
+    return doc_order, seen_docs
+
+
+def assemble_context(doc_order: List[str], seen_docs: Dict[str, List[Dict]]) -> Tuple[str, AssemblyStats]:
+    """
+    Build the context text with one "Document i" block per paper
+
+    Args:
+        doc_order: Paper keys in citation order (from group_chunks_by_document)
+        seen_docs: Paper key → chunks
+
+    Returns:
+        (context_text, stats) - stats compare passage text against the raw chunk text
+    """
+    stats = AssemblyStats()
+    blocks = []
+    for i, ref_key in enumerate(doc_order):
+        chunks = seen_docs[ref_key]
+        passages = stitch_chunks(chunks)
+        stats.chunks += len(chunks)
+        stats.passages += len(passages)
+        stats.raw_chars += sum(len(c.get('text', '')) for c in chunks)
+        stats.context_chars += sum(len(p) for p in passages)
+        blocks.append(f"Document {i}: {PASSAGE_SEPARATOR.join(passages)}")
+
+    logger.debug(f"Context assembly: {stats.chunks} chunks → {stats.passages} passages, {stats.chars_saved} chars saved")
+    return "\n\n".join(blocks), stats
@@ -0,0 +1,89 @@
+"""
+Context selection stage
+Picks the chunks sent to the answer model from the retrieved candidates:
+maximal-marginal-relevance over the chunk embeddings plus a cap on chunks
+per paper, so overlapping neighbours of one paper do not fill the context
+"""
+
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def document_key(chunk: Dict) -> str:
+    """Paper identity of a chunk (PMCID, then DOI, then title)"""
+    return chunk.get('pmcid') or chunk.get('doi') or chunk.get('title') or chunk.get('id', '')
+
+
+def relevance_scores(chunks: List[Dict]) -> np.ndarray:
+    """
+    Retrieval relevance in [0, 1], in candidate order
+
+    Uses the fused RRF score when present (hybrid search), otherwise the
+    dense similarity score, scaled by the best candidate.
+    """
+    field = 'rrf_score' if any('rrf_score' in c for c in chunks) else 'score'
+    scores = np.asarray([float(c.get(field, 0.0) or 0.0) for c in chunks], dtype=np.float32)
+    best = scores.max() if len(scores) else 0.0
+    return scores / best if best > 0 else scores
+
+
+def select_context(
+    candidates: List[Dict],
+    max_chunks: int = 15,
+    max_per_document: Optional[int] = 3,
+    mmr_lambda: float = 0.7
+) -> List[Dict]:
+    """
+    Greedy MMR selection with a per-paper cap
+
+    Each step picks the candidate maximising
+        mmr_lambda * relevance - (1 - mmr_lambda) * max cosine similarity to the already selected chunks
+    among candidates whose paper has not reached max_per_document.
+    Candidates without an embedding ('values') only contribute relevance.
+
+    Args:
+        candidates: Ranked retrieval results (may carry 'values')
+        max_chunks: Number of chunks to return
+        max_per_document: Chunks allowed per paper (None = no cap)
+        mmr_lambda: 1.0 = pure relevance order, lower = more diversity
+
+    Returns:
+        Selected chunks in selection order, without their 'values'
+    """
+    if not candidates:
+        return []
+
+    relevance = relevance_scores(candidates)
+    dimension = next((len(c['values']) for c in candidates if c.get('values')), 0)
+    vectors = np.zeros((len(candidates), max(dimension, 1)), dtype=np.float32)
+    for i, chunk in enumerate(candidates):
+        values = chunk.get('values')
+        if values is not None and len(values) == dimension:
+            vector = np.asarray(values, dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            vectors[i] = vector / norm if norm > 0 else vector
+
+    per_document: Dict[str, int] = {}
+    max_similarity = np.full(len(candidates), 0.0, dtype=np.float32)
+    available = np.ones(len(candidates), dtype=bool)
+    selected = []
+
+    while len(selected) < max_chunks and available.any():
+        mmr = mmr_lambda * relevance - (1 - mmr_lambda) * max_similarity
+        mmr[~available] = -np.inf
+        best = int(np.argmax(mmr))
+        available[best] = False
+
+        doc = document_key(candidates[best])
+        if max_per_document is not None and per_document.get(doc, 0) >= max_per_document:
+            continue
+        per_document[doc] = per_document.get(doc, 0) + 1
+        selected.append(best)
+        max_similarity = np.maximum(max_similarity, vectors @ vectors[best])
+
+    logger.debug(f"Context selection: {len(candidates)} candidates → {len(selected)} chunks from {len(per_document)} papers")
+    return [{k: v for k, v in candidates[i].items() if k != 'values'} for i in selected]
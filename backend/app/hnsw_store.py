@@ -0,0 +1,320 @@
+"""
+HNSW approximate-nearest-neighbour vector store
+Graph index (hnswlib) on top of a local NumpyVectorStore directory: the graph
+answers queries, vectors and metadata stay memory-mapped on disk
+"""
+
+import json
+import logging
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import hnswlib
+import numpy as np
+
+from app.vector_store import DEFAULT_DIMENSION, NumpyVectorStore, QueryResult, matches_filter, read_manifest, replace_directory
+
+logger = logging.getLogger(__name__)
+
+# Metadata fields kept as in-memory columns for fast filtering inside the graph search
+FILTER_COLUMNS = ("journal", "year")
+
+# Below this many allowed rows a filtered query is answered by exact search over those rows
+EXACT_FILTER_THRESHOLD = 20000
+
+
+class _Column:
+    """Categorical column: one int32 code per row + the distinct values"""
+
+    def __init__(self, values: Optional[List] = None, codes: Optional[np.ndarray] = None):
+        self.values: List = list(values or [])
+        self._code_of = {v: i for i, v in enumerate(self.values)}
+        self.codes = codes if codes is not None else np.zeros(0, dtype=np.int32)
+        self._pending: List[int] = []
+
+    def code(self, value) -> int:
+        if value not in self._code_of:
+            self._code_of[value] = len(self.values)
+            self.values.append(value)
+        return self._code_of[value]
+
+    def append(self, value):
+        self._pending.append(self.code(value))
+
+    def all_codes(self) -> np.ndarray:
+        if self._pending:
+            self.codes = np.concatenate([self.codes, np.asarray(self._pending, dtype=np.int32)])
+            self._pending = []
+        return self.codes
+
+    def allowed(self, condition) -> np.ndarray:
+        """Boolean lookup table: which distinct values satisfy the condition"""
+        return np.asarray([matches_filter({"v": v}, {"v": condition}) for v in self.values], dtype=bool)
+
+
+class _ReadWriteLock:
+    """
+    Reentrant exclusive lock (`with lock:`) that also admits concurrent readers (`with lock.shared():`)
+
+    Graph searches only read the graph and can overlap; inserts, deletes,
+    resizes and saves take it exclusively. Waiting writers block new readers.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writers_waiting = 0
+        self._owner = None
+        self._depth = 0
+
+    def __enter__(self):
+        me = threading.get_ident()
+        with self._cond:
+            if self._owner == me:
+                self._depth += 1
+                return self
+            self._writers_waiting += 1
+            while self._owner is not None or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._owner, self._depth = me, 1
+        return self
+
+    def __exit__(self, *exc):
+        with self._cond:
+            self._depth -= 1
+            if self._depth == 0:
+                self._owner = None
+                self._cond.notify_all()
+
+    @contextmanager
+    def shared(self):
+        with self._cond:
+            if self._owner == threading.get_ident():
+                owned = True  # already held exclusively by this thread
+            else:
+                owned = False
+                while self._owner is not None or self._writers_waiting:
+                    self._cond.wait()
+                self._readers += 1
+        try:
+            yield
+        finally:
+            if not owned:
+                with self._cond:
+                    self._readers -= 1
+                    if not self._readers:
+                        self._cond.notify_all()
+
+
+class HnswVectorStore(NumpyVectorStore):
+    """
+    Index subdirectory hnsw/ of the store:
+        graph.bin      hnswlib graph (label = row number)
+        config.json    {"M", "ef_construction", "max_elements"} + the store generation and row count covered
+        columns.json   distinct values + columns.npz codes for FILTER_COLUMNS
+
+    Inserts and deletes update the graph immediately; save() keeps deleted
+    rows as tombstones so graph labels stay valid (compact=True rebuilds).
+    Rows another backend appended since the graph was saved are added on
+    load; if rows moved (compaction) the graph is rebuilt.
+    """
+
+    backend_name = "hnsw"
+    prefers_batch_query = True
+
+    def __init__(self, path: str, ef: int = 64, M: int = 16, ef_construction: int = 200,
+                 dimension: int = DEFAULT_DIMENSION, dtype: str = "float16", num_threads: int = 1):
+        self.ef = ef
+        self.M = M
+        self.ef_construction = ef_construction
+        self.num_threads = num_threads
+        super().__init__(path, dimension=dimension, dtype=dtype)
+        self._lock = _ReadWriteLock()
+
+    # ---------- load / build ----------
+
+    def _load(self, path: Path, dimension: int, dtype: str):
+        super()._load(path, dimension, dtype)
+        index_dir = self.path / "hnsw"
+        covered = None
+        if (index_dir / "config.json").exists():
+            config = json.loads((index_dir / "config.json").read_text())
+            covered = self.covered_rows(config.get("generation"), config.get("count", 0))
+            if covered is None:
+                logger.warning("HNSW graph was built for rows that have since moved - rebuilding")
+        if covered is None:
+            self._build_graph()
+        else:
+            total = len(self._base_ids)
+            self.M = config["M"]
+            self.ef_construction = config["ef_construction"]
+            self.graph = hnswlib.Index(space="ip", dim=self.dimension)
+            self.graph.load_index(str(index_dir / "graph.bin"), max_elements=max(config["max_elements"], total, 1))
+            self._columns = self._load_columns(index_dir)
+            if config["generation"] != self.generation:
+                # 그래프 저장 이후 다른 백엔드가 저장한 tombstone + 뒤에 추가된 행 반영
+                for row in np.flatnonzero(self._deleted[:covered]):
+                    try:
+                        self.graph.mark_deleted(int(row))
+                    except RuntimeError:
+                        pass  # already deleted in the saved graph
+                self._add_base_rows(covered, total)
+                logger.info(f"Added {total - covered} rows appended since the HNSW graph was saved")
+        self.graph.set_ef(self.ef)
+
+    def _load_columns(self, index_dir: Path) -> Dict[str, _Column]:
+        values = json.loads((index_dir / "columns.json").read_text())
+        codes = np.load(index_dir / "columns.npz")
+        return {name: _Column(values[name], codes[name]) for name in FILTER_COLUMNS}
+
+    def _add_base_rows(self, start: int, end: int):
+        """Insert base rows [start, end) into the graph and the filter columns"""
+        for block_start in range(start, end, self.block_size):
+            block = np.asarray(self._base[block_start:min(block_start + self.block_size, end)], dtype=np.float32)
+            self.graph.add_items(block, np.arange(block_start, block_start + len(block)), num_threads=self.num_threads)
+        for row in range(start, end):
+            metadata = self._metadata(row)
+            for name, column in self._columns.items():
+                column.append(metadata.get(name))
+            if self._deleted[row]:
+                self.graph.mark_deleted(row)
+
+    def _build_graph(self):
+        """Build the graph (and filter columns) from every row of the store"""
+        total = len(self._base_ids)
+        started = time.perf_counter()
+        self.graph = hnswlib.Index(space="ip", dim=self.dimension)
+        self.graph.init_index(max_elements=max(total, 1), ef_construction=self.ef_construction, M=self.M, allow_replace_deleted=False)
+        self._columns = {name: _Column() for name in FILTER_COLUMNS}
+        self._add_base_rows(0, total)
+        if total:
+            logger.info(f"Built HNSW graph: {total} vectors in {time.perf_counter() - started:.1f}s (M={self.M}, ef_construction={self.ef_construction})")
+
+    def _save_extra(self, tmp: Path, compact: bool):
+        if compact:
+            # Row numbers changed - the graph is rebuilt when the new directory is loaded
+            return
+        manifest = read_manifest(tmp)
+        index_tmp = tmp / "hnsw.tmp"
+        shutil.rmtree(index_tmp, ignore_errors=True)
+        index_tmp.mkdir()
+        self.graph.save_index(str(index_tmp / "graph.bin"))
+        (index_tmp / "config.json").write_text(json.dumps({
+            "M": self.M, "ef_construction": self.ef_construction, "max_elements": self.graph.get_max_elements(),
+            "generation": manifest["generation"], "count": manifest["count"]
+        }))
+        (index_tmp / "columns.json").write_text(json.dumps({name: c.values for name, c in self._columns.items()}, ensure_ascii=False))
+        np.savez(index_tmp / "columns.npz", **{name: c.all_codes() for name, c in self._columns.items()})
+        replace_directory(index_tmp, tmp / "hnsw")
+
+    def save(self, path: Optional[str] = None, compact: bool = False):
+        if not self._dirty and not compact and path is None:
+            # Rows unchanged since load - only the graph files need writing
+            with self._lock:
+                self._save_extra(self.path, compact=False)
+            return
+        super().save(path, compact=compact)
+
+    # ---------- writes ----------
+
+    def upsert(self, vectors: List[Dict]):
+        with self._lock:
+            first_new_row = len(self._base_ids) + len(self._extra_ids)
+            previous_rows = {self._row_of.get(item["id"]) for item in vectors}
+            super().upsert(vectors)
+
+            for row in previous_rows - {None}:
+                self.graph.mark_deleted(row)
+
+            new_rows = np.arange(first_new_row, first_new_row + len(vectors))
+            needed = first_new_row + len(vectors)
+            if needed > self.graph.get_max_elements():
+                self.graph.resize_index(max(needed, int(self.graph.get_max_elements() * 1.2)))
+            self.graph.add_items(np.vstack(self._extra_vectors[-len(vectors):]), new_rows, num_threads=self.num_threads)
+            for item in vectors:
+                metadata = item.get("metadata") or {}
+                for name, column in self._columns.items():
+                    column.append(metadata.get(name))
+            # Same ID twice in one batch: only the last row stays live
+            for row in new_rows:
+                if self._is_deleted(int(row)):
+                    self.graph.mark_deleted(int(row))
+
+    def delete(self, ids: List[str]):
+        with self._lock:
+            rows = {self._row_of.get(vid) for vid in ids}
+            super().delete(ids)
+            for row in rows - {None}:
+                self.graph.mark_deleted(row)
+
+    # ---------- queries ----------
+
+    def _filter_mask(self, filter: Optional[Dict]) -> Optional[np.ndarray]:
+        """Row mask for filters on FILTER_COLUMNS only; None if the filter needs metadata reads"""
+        if not filter or any(key not in self._columns for key in filter):
+            return None
+        mask = None
+        for key, condition in filter.items():
+            column = self._columns[key]
+            allowed = column.allowed(condition)
+            field_mask = allowed[column.all_codes()] if len(allowed) else np.zeros(0, dtype=bool)
+            mask = field_mask if mask is None else (mask & field_mask)
+        return mask & ~self._deleted_mask()
+
+    def _exact_rows(self, queries: np.ndarray, rows: np.ndarray, top_k: int) -> List[List[tuple]]:
+        """Exact scores over a small set of rows (highly selective filters)"""
+        if len(rows) == 0:
+            return [[] for _ in range(len(queries))]
+        base_count = len(self._base_ids)
+        base_rows = rows[rows < base_count]  # rows are sorted: base rows first, then the delta
+        parts = [np.asarray(self._base[base_rows], dtype=np.float32)]
+        parts += [self._extra_vectors[int(r) - base_count][None, :] for r in rows[rows >= base_count]]
+        matrix = np.vstack(parts)
+        scores = queries @ matrix.T
+        results = []
+        for q in range(len(queries)):
+            order = np.argsort(-scores[q])[:top_k]
+            results.append([(int(rows[i]), float(scores[q, i])) for i in order])
+        return results
+
+    def _graph_search(self, queries: np.ndarray, k: int, label_filter=None) -> List[List[tuple]]:
+        live = len(self._row_of)
+        k = min(k, live)
+        if k == 0:
+            return [[] for _ in range(len(queries))]
+        # hnswlib searches with max(ef, k) candidates per query, so the shared graph's ef is never changed here
+        labels, distances = self.graph.knn_query(queries, k=k, num_threads=self.num_threads, filter=label_filter)
+        return [
+            [(int(label), 1.0 - float(dist)) for label, dist in zip(labels[q], distances[q])]
+            for q in range(len(queries))
+        ]
+
+    def query_batch(self, vectors, top_k=10, filter=None, include_metadata=True, include_values=False) -> List[QueryResult]:
+        if not vectors:
+            return []
+        # Graph searches run concurrently; writes wait for them (and block new searches) via the exclusive lock
+        with self._lock.shared():
+            queries = self._normalize(np.asarray(vectors))
+            mask = self._filter_mask(filter)
+
+            if mask is not None:
+                allowed_rows = np.flatnonzero(mask)
+                scored = None
+                if len(allowed_rows) > EXACT_FILTER_THRESHOLD:
+                    try:
+                        scored = self._graph_search(queries, min(top_k, len(allowed_rows)), label_filter=lambda label: bool(mask[label]))
+                    except RuntimeError:
+                        # hnswlib could not collect k filtered neighbours at this ef
+                        logger.warning("Filtered HNSW search returned too few results - falling back to exact search")
+                if scored is None:
+                    scored = self._exact_rows(queries, allowed_rows, top_k)
+                return [self._build_result(s, top_k, None, include_metadata, include_values) for s in scored]
+
+            # No filter, or a filter on other fields: over-fetch and post-filter on metadata
+            scored = self._graph_search(queries, top_k * 10 if filter else top_k)
+            return [self._build_result(s, top_k, filter, include_metadata, include_values) for s in scored]
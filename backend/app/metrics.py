@@ -0,0 +1,70 @@
+"""
+Request metrics for GET /metrics (prometheus_client)
+main.py registers its counters, gauges and histograms on its own
+CollectorRegistry and renders it with render_metrics(). RequestTimer
+collects per-request stage spans (query understanding, embedding, vector
+search, TTFT, ...) and observes each into a shared stage latency histogram,
+so p95 per stage can be read off the bucket counts under real load.
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest
+
+# Seconds; spans from sub-millisecond dedup to multi-second generation
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+
+def render_metrics(registry: CollectorRegistry) -> bytes:
+    """Prometheus text exposition of every metric in the registry"""
+    return generate_latest(registry)
+
+
+def record_request(timer: "RequestTimer", outcome: str, counter: Counter, latency: Histogram):
+    """Count a finished request under its outcome and observe its end-to-end duration"""
+    counter.labels(outcome=outcome).inc()
+    latency.labels(outcome=outcome).observe(timer.elapsed())
+
+
+class RequestTimer:
+    """
+    Stage spans of one request
+
+        timer = RequestTimer(stage_histogram)
+        with timer.span("embedding"):
+            vectors = await embed_queries(queries)
+        timer.observe("ttft", first_token_at - started)
+        logger.info("stages: %s", timer.summary())   # "embedding 82ms, ttft 640ms, ..."
+
+    A stage recorded more than once is summed in the per-request summary
+    and observed once per span in the histogram.
+    """
+
+    def __init__(self, histogram: Optional[Histogram] = None, label: str = "stage"):
+        self.histogram = histogram
+        self.label = label
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+
+    def observe(self, stage: str, seconds: float):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+        if self.histogram is not None:
+            self.histogram.labels(**{self.label: stage}).observe(seconds)
+
+    @contextmanager
+    def span(self, stage: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def summary(self) -> str:
+        return ", ".join(f"{stage} {seconds * 1000:.0f}ms" for stage, seconds in self.stages.items())
@@ -0,0 +1,64 @@
+"""
+Provider-side prompt caching instrumentation
+OpenAI caches prompt prefixes automatically (1024+ identical leading
+tokens); usage.prompt_tokens_details.cached_tokens reports how much of a
+request was served from that cache. These stats track the hit rate and
+time-to-first-token with and without a cache hit.
+"""
+
+import hashlib
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+
+def prefix_fingerprint(text: str) -> str:
+    """Short hash of a static prompt prefix, logged to confirm it is byte-identical across requests and deploys"""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+
+
+def cached_tokens_from_usage(usage) -> int:
+    """cached_tokens from an OpenAI usage object (0 when the field is missing)"""
+    details = getattr(usage, "prompt_tokens_details", None)
+    return int(getattr(details, "cached_tokens", 0) or 0)
+
+
+def _median(values) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[len(ordered) // 2], 4)
+
+
+class PromptCacheStats:
+    """Running totals plus a window of recent time-to-first-token samples, split by cache hit"""
+
+    def __init__(self, window: int = 500):
+        self.requests = 0
+        self.cache_hits = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self._ttft_hit = deque(maxlen=window)
+        self._ttft_miss = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, prompt_tokens: int, cached_tokens: int, ttft: Optional[float] = None):
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens += prompt_tokens
+            self.cached_tokens += cached_tokens
+            if cached_tokens:
+                self.cache_hits += 1
+            if ttft is not None:
+                (self._ttft_hit if cached_tokens else self._ttft_miss).append(ttft)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "cache_hits": self.cache_hits,
+                "hit_rate": round(self.cache_hits / self.requests, 4) if self.requests else 0.0,
+                "cached_token_ratio": round(self.cached_tokens / self.prompt_tokens, 4) if self.prompt_tokens else 0.0,
+                "ttft_p50_hit": _median(self._ttft_hit),
+                "ttft_p50_miss": _median(self._ttft_miss)
+            }
@@ -0,0 +1,273 @@
+"""
+Quantized vector store
+Keeps only compressed codes in RAM (scalar int8 or product quantization),
+ranks candidates on the codes and re-scores the best ones exactly from the
+float16 vectors memory-mapped on disk
+"""
+
+import json
+import logging
+import shutil
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from app.vector_store import DEFAULT_DIMENSION, NumpyVectorStore, read_manifest, replace_directory
+
+logger = logging.getLogger(__name__)
+
+# ============================================================
+# Quantizers
+# ============================================================
+
+class ScalarInt8Quantizer:
+    """Symmetric per-dimension int8: x ≈ code * scale"""
+
+    method = "int8"
+
+    def __init__(self, scale: Optional[np.ndarray] = None):
+        self.scale = scale
+
+    def train(self, sample: np.ndarray):
+        self.scale = np.maximum(np.abs(sample).max(axis=0), 1e-8).astype(np.float32) / 127.0
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        return np.clip(np.rint(vectors / self.scale), -127, 127).astype(np.int8)
+
+    def scores(self, queries: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        return (queries * self.scale) @ codes.astype(np.float32).T
+
+    def params(self) -> dict:
+        return {"scale": self.scale}
+
+    @classmethod
+    def from_params(cls, params, config) -> "ScalarInt8Quantizer":
+        return cls(params["scale"])
+
+    def config(self) -> dict:
+        return {}
+
+
+class ProductQuantizer:
+    """
+    Product quantization: the vector is split into m sub-vectors, each replaced
+    by the index of its nearest of 256 centroids (one byte per sub-vector).
+    Inner products are computed from per-query lookup tables (ADC).
+    """
+
+    method = "pq"
+
+    def __init__(self, m: int = 96, codebooks: Optional[np.ndarray] = None, iterations: int = 15):
+        self.m = m
+        self.codebooks = codebooks  # (m, k, dsub)
+        self.iterations = iterations
+
+    def _split(self, vectors: np.ndarray) -> np.ndarray:
+        n, d = vectors.shape
+        return vectors.reshape(n, self.m, d // self.m)
+
+    def train(self, sample: np.ndarray):
+        if sample.shape[1] % self.m:
+            raise ValueError(f"dimension {sample.shape[1]} is not divisible by m={self.m}")
+        rng = np.random.default_rng(0)
+        subs = self._split(sample.astype(np.float32))
+        k = min(256, len(sample))
+        codebooks = []
+        for j in range(self.m):
+            x = subs[:, j, :]
+            centroids = x[rng.choice(len(x), size=k, replace=False)].copy()
+            for _ in range(self.iterations):
+                assign = self._nearest(x, centroids)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, assign, x)
+                counts = np.bincount(assign, minlength=k)
+                filled = counts > 0
+                centroids[filled] = sums[filled] / counts[filled, None]
+            codebooks.append(centroids)
+        self.codebooks = np.stack(codebooks)
+
+    @staticmethod
+    def _nearest(x: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        distances = (centroids ** 2).sum(axis=1)[None, :] - 2 * x @ centroids.T
+        return distances.argmin(axis=1)
+
+    def encode(self, vectors: np.ndarray) -> np.ndarray:
+        subs = self._split(vectors.astype(np.float32))
+        return np.stack([self._nearest(subs[:, j, :], self.codebooks[j]) for j in range(self.m)], axis=1).astype(np.uint8)
+
+    def scores(self, queries: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        # Lookup table (n_queries, m, k): inner product of each query sub-vector with each centroid
+        tables = np.einsum("qmd,mkd->qmk", self._split(queries), self.codebooks)
+        columns = np.arange(self.m)
+        return np.stack([tables[q][columns, codes].sum(axis=1) for q in range(len(queries))])
+
+    def params(self) -> dict:
+        return {"codebooks": self.codebooks}
+
+    @classmethod
+    def from_params(cls, params, config) -> "ProductQuantizer":
+        return cls(m=config["m"], codebooks=params["codebooks"])
+
+    def config(self) -> dict:
+        return {"m": self.m}
+
+
+def make_quantizer(method: str, pq_m: int = 96):
+    if method == "int8":
+        return ScalarInt8Quantizer()
+    if method == "pq":
+        return ProductQuantizer(m=pq_m)
+    raise ValueError(f"Unknown quantization method: {method}")
+
+
+# ============================================================
+# Store
+# ============================================================
+
+class QuantizedVectorStore(NumpyVectorStore):
+    """
+    Index subdirectory {method}/ of the store (int8/ and pq/ can coexist):
+        config.json    quantizer config + the store generation and row count the codes cover
+        codes.npy      (count, bytes per vector) codes, loaded into RAM
+        params.npz     quantizer parameters (int8 scales / PQ codebooks)
+
+    Rows added after load are scored exactly; save() encodes them with the
+    existing quantizer (no retraining). Rows another backend appended since
+    the codes were written are encoded on load; if rows moved (compaction)
+    the codes are rebuilt.
+    """
+
+    prefers_batch_query = True
+
+    def __init__(self, path: str, method: str = "int8", pq_m: int = 96, rescore: int = 200,
+                 train_size: int = 50000, dimension: int = DEFAULT_DIMENSION, dtype: str = "float16"):
+        """
+        Args:
+            method: "int8" or "pq" (codes are built on first load if missing)
+            pq_m: PQ sub-vectors (bytes per vector)
+            rescore: Candidates re-scored exactly from the float16 vectors (at least top_k)
+            train_size: Vectors sampled to train the quantizer
+        """
+        self.method = method
+        self.pq_m = pq_m
+        self.rescore = rescore
+        self.train_size = train_size
+        super().__init__(path, dimension=dimension, dtype=dtype)
+
+    @property
+    def backend_name(self) -> str:
+        return self.method
+
+    # ---------- load / build ----------
+
+    def _load(self, path: Path, dimension: int, dtype: str):
+        super()._load(path, dimension, dtype)
+        index_dir = self.path / self.method
+        covered = None
+        if (index_dir / "config.json").exists():
+            config = json.loads((index_dir / "config.json").read_text())
+            covered = self.covered_rows(config.get("generation"), config.get("count", 0))
+            if covered is None:
+                logger.warning(f"{self.method} codes were built for rows that have since moved - rebuilding")
+        if covered is None:
+            self._build()
+            return
+
+        params = np.load(index_dir / "params.npz")
+        quantizer_cls = ScalarInt8Quantizer if self.method == "int8" else ProductQuantizer
+        self.quantizer = quantizer_cls.from_params(params, config["quantizer"])
+        self.codes = np.load(index_dir / "codes.npy")
+        total = len(self._base_ids)
+        if covered < total:
+            # 다른 백엔드가 저장하면서 뒤에 추가된 행만 기존 quantizer로 인코딩
+            self.codes = np.concatenate([self.codes] + [
+                self.quantizer.encode(np.asarray(self._base[start:min(start + self.block_size, total)], dtype=np.float32))
+                for start in range(covered, total, self.block_size)
+            ])
+            logger.info(f"Encoded {total - covered} rows appended since the {self.method} codes were saved")
+
+    def _build(self):
+        """Train the quantizer on a sample of rows and encode every row"""
+        started = time.perf_counter()
+        self.quantizer = make_quantizer(self.method, self.pq_m)
+        total = len(self._base_ids)
+        if total == 0:
+            self.quantizer.train(np.zeros((1, self.dimension), dtype=np.float32))
+            self.codes = self.quantizer.encode(np.zeros((0, self.dimension), dtype=np.float32))
+            return
+
+        rng = np.random.default_rng(0)
+        sample_rows = np.sort(rng.choice(total, size=min(total, self.train_size), replace=False))
+        self.quantizer.train(np.asarray(self._base[sample_rows], dtype=np.float32))
+        self.codes = np.concatenate([
+            self.quantizer.encode(np.asarray(self._base[start:start + self.block_size], dtype=np.float32))
+            for start in range(0, total, self.block_size)
+        ])
+        logger.info(f"Built {self.quantizer.method} codes: {total} vectors in {time.perf_counter() - started:.1f}s "
+                    f"({self.codes.nbytes / 1e6:.1f} MB)")
+
+    def _save_extra(self, tmp: Path, compact: bool):
+        codes = self.codes if not compact else self.codes[~self._deleted]
+        extra_rows = [i for i, deleted in enumerate(self._extra_deleted) if not (compact and deleted)]
+        if extra_rows:
+            extra_codes = self.quantizer.encode(np.vstack([self._extra_vectors[i] for i in extra_rows]))
+            codes = np.concatenate([codes, extra_codes])
+
+        manifest = read_manifest(tmp)
+        index_tmp = tmp / f"{self.method}.tmp"
+        shutil.rmtree(index_tmp, ignore_errors=True)
+        index_tmp.mkdir()
+        np.save(index_tmp / "codes.npy", codes)
+        np.savez(index_tmp / "params.npz", **self.quantizer.params())
+        (index_tmp / "config.json").write_text(json.dumps({
+            "quantizer": self.quantizer.config(), "generation": manifest["generation"], "count": manifest["count"]
+        }))
+        replace_directory(index_tmp, tmp / self.method)
+
+    def save(self, path: Optional[str] = None, compact: bool = True):
+        if not self._dirty and path is None and not compact:
+            # Rows unchanged since load - only the codes need writing
+            with self._lock:
+                self._save_extra(self.path, compact=False)
+            return
+        super().save(path, compact=compact)
+
+    # ---------- queries ----------
+
+    def _view(self):
+        view = super()._view()
+        view.codes = self.codes
+        return view
+
+    def _block_scores(self, queries: np.ndarray, view):
+        """Approximate scores from the codes for base rows, exact scores for the in-memory delta"""
+        for start in range(0, len(view.codes), self.block_size):
+            yield start, self.quantizer.scores(queries, view.codes[start:start + self.block_size])
+        if view.extra is not None:
+            yield view.base_count, queries @ view.extra.T
+
+    def _score_all(self, queries: np.ndarray, keep: int, view) -> List[List[tuple]]:
+        """Rank on the codes, then re-score the best candidates from the float16 vectors on disk"""
+        candidates = super()._score_all(queries, min(view.total, max(keep, self.rescore)), view)
+
+        base_count = view.base_count
+        results = []
+        for q, scored in enumerate(candidates):
+            rows = np.asarray(sorted(row for row, _ in scored), dtype=np.int64)
+            if len(rows) == 0:
+                results.append([])
+                continue
+            base_rows = rows[rows < base_count]
+            parts = [np.asarray(view.base[base_rows], dtype=np.float32)]
+            if len(base_rows) < len(rows):
+                parts.append(view.extra[rows[rows >= base_count] - base_count])
+            exact = np.vstack(parts) @ queries[q]
+            order = np.argsort(-exact)[:keep]
+            results.append([(int(rows[i]), float(exact[i])) for i in order])
+        return results
+
+    def memory_bytes(self) -> int:
+        """RAM held by the compressed representation (codes + quantizer parameters)"""
+        return int(self.codes.nbytes + sum(np.asarray(v).nbytes for v in self.quantizer.params().values()))
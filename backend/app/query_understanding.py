@@ -0,0 +1,332 @@
+"""
+Query understanding stage for the RAG pipeline
+One JSON-mode gpt-4o-mini call returns the English search query, two
+alternative phrasings and the question type (regex classifier as fallback)
+
+For speculative retrieval the call can be streamed: the English query is
+reported as soon as its JSON string is complete, so the primary search can
+start while the alternatives and question type are still being generated.
+"""
+
+import asyncio
+import json
+import logging
+import re
+from dataclasses import asdict, dataclass, field
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Bump when the prompt changes so cached results from older prompts are ignored
+PROMPT_VERSION = "qu-v1"
+
+UNDERSTANDING_MODEL = "gpt-4o-mini"
+
+QUESTION_TYPES = ('diagnostic_symptom', 'treatment', 'prognosis', 'diagnostic_disease', 'general')
+
+
+def classify_question_type(question: str, language: str) -> str:
+    """
+    Classify question type using pattern matching.
+
+    Returns: 'diagnostic_symptom', 'treatment', 'prognosis',
+             'diagnostic_disease', 'general'
+    """
+    question_lower = question.lower()
+
+    # Symptom patterns (highest priority)
+    symptom_patterns = {
+        'Korean': [r'토.*해', r'구토', r'설사', r'기침', r'절뚝', r'가려워',
+                   r'안.*먹', r'기운.*없', r'우웩', r'콜록', r'거품', r'물.*똥',
+                   r'피.*똥', r'긁', r'핥', r'처져', r'불안'],
+        'Japanese': [r'吐.*て', r'嘔吐', r'下痢', r'咳', r'痒.*がっ',
+                     r'食べ.*ない', r'元気.*ない', r'泡', r'血便', r'掻.*て',
+                     r'舐.*て', r'ぐったり'],
+        'English': [r'vomit', r'diarrhea', r'cough', r'limp', r'itch',
+                    r'not.*eat', r'letharg', r'foam', r'scratch', r'lick',
+                    r'weak', r'tired']
+    }
+
+    # Treatment patterns
+    treatment_patterns = {
+        'Korean': [r'치료', r'약물', r'처치', r'수술', r'투여', r'처방'],
+        'Japanese': [r'治療', r'薬物', r'処置', r'手術', r'投与', r'処方'],
+        'English': [r'treatment', r'therapy', r'medication', r'protocol', r'drug', r'how to treat']
+    }
+
+    # Prognosis patterns
+    prognosis_patterns = {
+        'Korean': [r'예후', r'생존율', r'얼마나 살', r'완치', r'회복'],
+        'Japanese': [r'予後', r'生存率', r'どのくらい生きる', r'完治', r'回復'],
+        'English': [r'prognosis', r'survival', r'life expectancy', r'outcome', r'cure rate']
+    }
+
+    # Check patterns in priority order
+    if language in symptom_patterns:
+        for pattern in symptom_patterns[language]:
+            if re.search(pattern, question_lower):
+                return 'diagnostic_symptom'
+
+    if language in treatment_patterns:
+        for pattern in treatment_patterns[language]:
+            if re.search(pattern, question_lower):
+                return 'treatment'
+
+    if language in prognosis_patterns:
+        for pattern in prognosis_patterns[language]:
+            if re.search(pattern, question_lower):
+                return 'prognosis'
+
+    # Check for disease names (diagnostic_disease)
+    disease_patterns = [r'what is', r'뭔가요', r'とは何', r'무엇', r'何ですか']
+    for pattern in disease_patterns:
+        if re.search(pattern, question_lower):
+            return 'diagnostic_disease'
+
+    return 'general'
+
+
+# Language-specific translation rules (kept from the dedicated translation prompt)
+TRANSLATION_RULES = {
+    "Korean": """Translate the Korean veterinary question to English while PRESERVING ALL clinical context and nuances.
+
+TRANSLATION RULES:
+1. **Preserve temporal context**: "아침에" → "in the morning", "밤에" → "at night", "식후" → "after eating"
+2. **Preserve symptom descriptions**:
+   - "우웩우웩" (retching sound) → "retched" or "dry heaving"
+   - "거품토" → "foamy vomit" or "frothy vomit"
+   - "물같은 설사" → "watery diarrhea"
+   - "피똥" → "bloody stool" or "hematochezia"
+3. **Preserve clinical patterns**: If the question mentions timing, frequency, or progression, keep those details
+4. **Use proper veterinary terminology**: Translate colloquial Korean to professional English medical terms
+5. **Preserve question intent**: If asking "what causes", keep it as diagnostic question; if asking "how to treat", keep it as treatment question
+
+Examples:
+- "강아지가 아침에 우웩우웩 거품토를 했는데 뭐가 원인임?"
+  → "My dog retched and vomited foam in the morning. What could be the cause?"
+- "고양이가 밥 먹고 나서 계속 토해요"
+  → "My cat keeps vomiting after eating meals"
+- "강아지 다리를 절뚝거려요. 어디가 아픈건가요?"
+  → "My dog is limping. Where might the pain be?"
+""",
+    "Japanese": """Translate the Japanese veterinary question to English while PRESERVING ALL clinical context and nuances.
+
+TRANSLATION RULES:
+1. **Preserve temporal context**: "朝に" → "in the morning", "夜に" → "at night", "食後" → "after eating"
+2. **Preserve symptom descriptions** (keep onomatopoeia meanings):
+   - "ゲーゲー" (retching sound) → "retched" or "dry heaving"
+   - "泡状の嘔吐" → "foamy vomit" or "frothy vomit"
+   - "水様性下痢" → "watery diarrhea"
+   - "血便" → "bloody stool" or "hematochezia"
+3. **Preserve clinical patterns**: If the question mentions timing, frequency, or progression, keep those details
+4. **Use proper veterinary terminology**: Translate colloquial Japanese to professional English medical terms
+5. **Preserve question intent**: Maintain whether it's asking for diagnosis, treatment, or explanation
+
+Examples:
+- "犬が朝に泡状の嘔吐をしました。原因は何ですか？"
+  → "My dog vomited foam in the morning. What could be the cause?"
+- "猫が食後に吐き続けます"
+  → "My cat keeps vomiting after eating meals"
+- "犬が足を引きずっています。どこが痛いのでしょうか？"
+  → "My dog is limping. Where might the pain be?"
+""",
+    "English": """The question is already in English. Use it unchanged as "english_query".""",
+}
+
+
+def build_understanding_prompt(question: str, language: str) -> str:
+    """Build the single JSON-mode prompt (translation + expansion + question type)"""
+    rules = TRANSLATION_RULES.get(language, TRANSLATION_RULES["English"])
+    return f"""You are a veterinary medical search assistant. Our literature database is in English.
+
+STEP 1 - ENGLISH QUERY
+{rules}
+
+STEP 2 - QUERY EXPANSION
+Generate 2 alternative phrasings of the English query in English, using different but accurate veterinary terminology.
+
+STEP 3 - QUESTION TYPE
+Classify the question as exactly one of:
+- "diagnostic_symptom": describes symptoms and asks what is wrong
+- "treatment": asks about treatment, drugs, dosages, surgery or protocols
+- "prognosis": asks about prognosis, survival, outcome or recovery
+- "diagnostic_disease": asks what a disease or condition is
+- "general": anything else
+
+Question ({language}):
+{question}
+
+Respond with a JSON object only:
+{{"english_query": "...", "alternative_queries": ["...", "..."], "question_type": "..."}}"""
+
+
+@dataclass
+class QueryUnderstanding:
+    """Result of the query understanding stage"""
+    english_query: str
+    alternative_queries: List[str] = field(default_factory=list)
+    question_type: str = 'general'
+    source: str = 'llm'  # 'llm' | 'cache' | 'fallback'
+
+    @property
+    def expanded_queries(self) -> List[str]:
+        """English query first, followed by up to 2 alternatives (max 3 total)"""
+        return ([self.english_query] + self.alternative_queries)[:3]
+
+
+def fallback_understanding(question: str, language: str) -> QueryUnderstanding:
+    """Regex-only result used when the LLM call fails or returns unusable JSON"""
+    return QueryUnderstanding(
+        english_query=question,
+        alternative_queries=[],
+        question_type=classify_question_type(question, language),
+        source='fallback'
+    )
+
+
+_ENGLISH_QUERY_PATTERN = re.compile(r'"english_query"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+
+def extract_english_query(partial: str) -> Optional[str]:
+    """english_query from a partial JSON response, once its string value is complete"""
+    match = _ENGLISH_QUERY_PATTERN.search(partial)
+    if not match:
+        return None
+    try:
+        value = json.loads(f'"{match.group(1)}"')
+    except json.JSONDecodeError:
+        return None
+    return value.strip() or None
+
+
+def parse_understanding(content: str, question: str, language: str) -> QueryUnderstanding:
+    """
+    Parse the JSON-mode response into a QueryUnderstanding
+
+    Falls back field-by-field: a missing translation uses the original question,
+    an unknown question type uses the regex classifier.
+    """
+    try:
+        data = json.loads(content)
+    except (json.JSONDecodeError, TypeError):
+        logger.warning(f"Query understanding returned invalid JSON: {str(content)[:200]}")
+        return fallback_understanding(question, language)
+
+    if not isinstance(data, dict):
+        return fallback_understanding(question, language)
+
+    english_query = data.get("english_query")
+    if language == "English" or not isinstance(english_query, str) or not english_query.strip():
+        english_query = question
+    english_query = english_query.strip()
+
+    alternatives = []
+    raw_alternatives = data.get("alternative_queries")
+    if isinstance(raw_alternatives, list):
+        for alt in raw_alternatives:
+            if isinstance(alt, str) and alt.strip() and alt.strip() != english_query:
+                alternatives.append(alt.strip())
+
+    question_type = data.get("question_type")
+    if question_type not in QUESTION_TYPES:
+        question_type = classify_question_type(question, language)
+
+    return QueryUnderstanding(
+        english_query=english_query,
+        alternative_queries=alternatives[:2],
+        question_type=question_type,
+        source='llm'
+    )
+
+
+async def _stream_content(client, request: dict, on_english_query: Callable[[str], None]) -> str:
+    """Streamed JSON-mode call; reports english_query as soon as it is complete"""
+    stream = await client.chat.completions.create(**request, stream=True)
+    content = ""
+    reported = False
+    async for chunk in stream:
+        if not chunk.choices or not chunk.choices[0].delta.content:
+            continue
+        content += chunk.choices[0].delta.content
+        if not reported:
+            english_query = extract_english_query(content)
+            if english_query:
+                reported = True
+                on_english_query(english_query)
+    return content
+
+
+async def understand_query(
+    client,
+    question: str,
+    language: str,
+    cache: Optional[object] = None,
+    on_english_query: Optional[Callable[[str], None]] = None
+) -> QueryUnderstanding:
+    """
+    Run the query understanding stage with one JSON-mode call
+
+    Args:
+        client: AsyncOpenAI client
+        question: Original user question
+        language: Detected language ('Korean', 'Japanese', 'English')
+        cache: Optional QueryUnderstandingCache; hits skip the LLM call entirely
+        on_english_query: Optional callback for speculative retrieval, called once
+            with the search query as soon as it is known (English questions before
+            the call, translations from the streamed response, at the latest with
+            the final result)
+
+    Returns:
+        QueryUnderstanding (regex fallback if the call fails)
+    """
+    reported = []
+
+    def report(english_query: str):
+        if on_english_query is not None and not reported:
+            reported.append(english_query)
+            on_english_query(english_query)
+
+    # A failing cache (disk error, stale entry) is treated as a miss
+    if cache is not None:
+        try:
+            cached = await asyncio.to_thread(cache.get, language, question)
+            result = QueryUnderstanding(**{**cached, "source": "cache"}) if cached is not None else None
+        except Exception as e:
+            logger.warning(f"Query understanding cache read failed: {e}")
+            result = None
+        if result is not None:
+            report(result.english_query)
+            return result
+
+    if language == "English":
+        # English questions are searched as typed (see parse_understanding)
+        report(question.strip())
+
+    request = dict(
+        model=UNDERSTANDING_MODEL,
+        messages=[{"role": "user", "content": build_understanding_prompt(question, language)}],
+        response_format={"type": "json_object"},
+        temperature=0.3,
+        max_tokens=400
+    )
+    try:
+        if on_english_query is not None:
+            content = await _stream_content(client, request, report)
+        else:
+            response = await client.chat.completions.create(**request)
+            content = response.choices[0].message.content
+        result = parse_understanding(content, question, language)
+    except Exception as e:
+        logger.error(f"Query understanding call failed: {e}")
+        result = fallback_understanding(question, language)
+        report(result.english_query)
+        return result
+
+    report(result.english_query)
+    # Fallback results are not cached so the next attempt can still reach the LLM
+    if cache is not None and result.source == 'llm':
+        try:
+            await asyncio.to_thread(cache.put, language, question, asdict(result))
+        except Exception as e:
+            logger.warning(f"Query understanding cache write failed: {e}")
+    return result
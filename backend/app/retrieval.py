@@ -0,0 +1,240 @@
+"""
+Retrieval orchestration for /query-stream
+Query understanding (translation + expansion) runs as a streamed call; with
+speculative retrieval the primary English query is embedded and searched as
+soon as it appears in the stream, while the expanded queries are embedded and
+searched in a separate task once understanding finishes. Their results are
+merged only if they arrive within the expansion deadline after the primary
+search, otherwise the request continues with the primary results.
+
+    run = retriever.start(question, language, timer)
+    queries = await run.primary_queries()
+    embeddings = await run.embed()
+    if answer_cache_hit:
+        run.cancel()          # understanding keeps running and fills its cache
+    else:
+        result = await run.search()
+"""
+
+import asyncio
+import logging
+from contextlib import nullcontext
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from app.metrics import RequestTimer
+from app.query_understanding import QueryUnderstanding, understand_query
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RetrievalResult:
+    """Search results of one request (dense and keyword lists are fused by the caller)"""
+    queries: List[str]
+    dense_results: List[List[Dict]]
+    keyword_results: List[List[Dict]]
+    expansion: Optional[str] = None  # "merged" | "skipped" | "failed"; None when every query was searched up front
+
+
+class Retriever:
+    """Shared clients, caches and settings of the retrieval stage"""
+
+    def __init__(
+        self,
+        client,
+        searcher,
+        embedding_cache,
+        understanding_cache=None,
+        bm25_index=None,
+        embedding_model: str = "text-embedding-3-small",
+        top_k: int = 15,
+        include_values: bool = False,
+        speculative: bool = True,
+        expansion_deadline_ms: float = 800.0
+    ):
+        """
+        Args:
+            client: AsyncOpenAI client (query understanding and embeddings)
+            searcher: ConcurrentSearcher over the vector store
+            embedding_cache: EmbeddingCache (get_many / put_many)
+            understanding_cache: Optional QueryUnderstandingCache
+            bm25_index: Optional BM25 index for hybrid keyword search
+            include_values: Return match vectors under 'values' (MMR context selection)
+            speculative: Search the primary query before query understanding finishes
+            expansion_deadline_ms: How long to wait for expansion results after the primary search (0 = always wait)
+        """
+        self.client = client
+        self.searcher = searcher
+        self.embedding_cache = embedding_cache
+        self.understanding_cache = understanding_cache
+        self.bm25_index = bm25_index
+        self.embedding_model = embedding_model
+        self.top_k = top_k
+        self.include_values = include_values
+        self.speculative = speculative
+        self.expansion_deadline_ms = expansion_deadline_ms
+
+    async def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """
+        Embed queries with one batched request
+        Cached queries are reused and the rest (de-duplicated) are requested
+        together; vectors are returned in input order
+        """
+        unique_queries = list(dict.fromkeys(queries))
+        if not unique_queries:
+            return []
+
+        # The SQLite tier blocks, so cache reads and writes run in a thread
+        vectors = await asyncio.to_thread(self.embedding_cache.get_many, unique_queries)
+        missing = [q for q in unique_queries if q not in vectors]
+
+        if missing:
+            response = await self.client.embeddings.create(model=self.embedding_model, input=missing)
+            # Response items are matched by their index field
+            new_vectors = {missing[item.index]: item.embedding for item in response.data}
+            vectors.update(new_vectors)
+            await asyncio.to_thread(self.embedding_cache.put_many, new_vectors)
+
+        logger.info(f"🧮 Embedding: {len(queries)} queries → {len(unique_queries) - len(missing)} cached, {len(missing)} requested in {1 if missing else 0} batch")
+        return [vectors[q] for q in queries]
+
+    async def keyword_search(self, queries: List[str]) -> List[List[Dict]]:
+        """BM25 results per query (empty without an index or on failure)"""
+        if not self.bm25_index or not queries:
+            return []
+        try:
+            return await asyncio.to_thread(self.bm25_index.search_many, queries, self.top_k)
+        except Exception as e:
+            logger.warning(f"BM25 search failed: {e}")
+            return []
+
+    async def retrieve_expansions(self, understanding_task: asyncio.Task, searched_queries: List[str]) -> Tuple[List[str], List[List[Dict]], List[List[Dict]]]:
+        """
+        Second stage of speculative retrieval: once query understanding finishes,
+        embed and search only the expanded queries not searched yet
+        The understanding call is shielded, so cancelling this (missed deadline,
+        answer cache hit) still lets it finish and fill the understanding cache.
+
+        Returns:
+            (expanded queries, vector search results, BM25 results)
+        """
+        understanding = await asyncio.shield(understanding_task)
+        queries = [q for q in understanding.expanded_queries if q not in searched_queries]
+        if not queries:
+            return [], [], []
+
+        async def dense_search():
+            embeddings = await self.embed_queries(queries)
+            return await self.searcher.search_many(embeddings, top_k=self.top_k, include_values=self.include_values)
+
+        search_results, keyword_results = await asyncio.gather(dense_search(), self.keyword_search(queries))
+        return queries, search_results, keyword_results
+
+    def start(self, question: str, language: str, timer: Optional[RequestTimer] = None) -> "RetrievalRun":
+        """Start query understanding for one request (must be called from the event loop)"""
+        return RetrievalRun(self, question, language, timer)
+
+
+class RetrievalRun:
+    """Retrieval of one request; stage spans are recorded on the request timer"""
+
+    def __init__(self, retriever: Retriever, question: str, language: str, timer: Optional[RequestTimer] = None):
+        self.retriever = retriever
+        self.question = question
+        self.language = language
+        self.timer = timer
+        self.queries: List[str] = []
+        self.embeddings: List[List[float]] = []
+        self.keyword_task: Optional[asyncio.Task] = None
+        self.expansion_task: Optional[asyncio.Task] = None
+        self._understanding: Optional[QueryUnderstanding] = None
+
+        self._search_query_ready = asyncio.get_running_loop().create_future()
+        self.understanding_task = asyncio.create_task(understand_query(
+            retriever.client, question, language, cache=retriever.understanding_cache,
+            on_english_query=self._on_english_query if retriever.speculative else None
+        ))
+
+    def _on_english_query(self, english_query: str):
+        if not self._search_query_ready.done():
+            self._search_query_ready.set_result(english_query)
+
+    def _span(self, stage: str):
+        return self.timer.span(stage) if self.timer is not None else nullcontext()
+
+    @property
+    def understanding(self) -> Optional[QueryUnderstanding]:
+        """Query understanding result, or None while the call is still running"""
+        if self._understanding is None and self.understanding_task.done():
+            self._understanding = self.understanding_task.result()
+        return self._understanding
+
+    async def primary_queries(self) -> List[str]:
+        """
+        Wait for the first search query and start the searches that do not need embeddings
+        If understanding already finished (cache hit, speculative retrieval off)
+        all expanded queries are primary; otherwise only the English query is,
+        and the expansions are searched in their own task as they arrive.
+        """
+        with self._span("query_understanding"):
+            await asyncio.wait([self._search_query_ready, self.understanding_task], return_when=asyncio.FIRST_COMPLETED)
+        understanding = self.understanding
+        self.queries = understanding.expanded_queries if understanding else [self._search_query_ready.result()]
+        if understanding is None:
+            self.expansion_task = asyncio.create_task(
+                self.retriever.retrieve_expansions(self.understanding_task, list(self.queries))
+            )
+        # Keyword search needs no embeddings, so it runs alongside embedding and vector search
+        if self.retriever.bm25_index:
+            self.keyword_task = asyncio.create_task(self.retriever.keyword_search(self.queries))
+        return self.queries
+
+    async def embed(self) -> List[List[float]]:
+        """Embed the primary queries (one batched request)"""
+        with self._span("embedding"):
+            self.embeddings = await self.retriever.embed_queries(self.queries)
+        return self.embeddings
+
+    def cancel(self):
+        """Stop the pending searches (answer cache hit); query understanding keeps running"""
+        for task in (self.keyword_task, self.expansion_task):
+            if task is not None:
+                task.cancel()
+
+    async def search(self) -> RetrievalResult:
+        """Search the primary embeddings, then merge the expansion results that meet the deadline"""
+        retriever = self.retriever
+        with self._span("vector_search"):
+            dense_results = await retriever.searcher.search_many(
+                self.embeddings, top_k=retriever.top_k, include_values=retriever.include_values
+            )
+
+        keyword_results = []
+        if self.keyword_task:
+            # Ran alongside the vector search - only the extra wait is recorded
+            with self._span("keyword_search_wait"):
+                keyword_results = await self.keyword_task
+
+        queries = list(self.queries)
+        expansion = None
+        if self.expansion_task:
+            deadline = retriever.expansion_deadline_ms / 1000 if retriever.expansion_deadline_ms > 0 else None
+            with self._span("expansion_wait"):
+                await asyncio.wait([self.expansion_task], timeout=deadline)
+            if not self.expansion_task.done():
+                self.expansion_task.cancel()
+                expansion = "skipped"
+                logger.info(f"⏭️  Query expansion missed the {retriever.expansion_deadline_ms:.0f}ms deadline - primary query results only")
+            else:
+                try:
+                    expansion_queries, expansion_results, expansion_keyword_results = self.expansion_task.result()
+                    queries += expansion_queries
+                    dense_results += expansion_results
+                    keyword_results += expansion_keyword_results
+                    expansion = "merged"
+                except Exception as e:
+                    expansion = "failed"
+                    logger.warning(f"Expansion search failed: {e}")
+
+        return RetrievalResult(queries, dense_results, keyword_results, expansion)
@@ -0,0 +1,110 @@
+"""
+JSON serialization for SSE events and API responses
+orjson when it is installed, stdlib json otherwise (JSON_SERIALIZER=json
+forces the stdlib). Both backends write compact UTF-8 JSON, so frames are
+byte-identical whichever one is active, and values orjson rejects (ints
+beyond 64 bits, ...) fall back to the stdlib per call.
+"""
+
+import json
+import logging
+import os
+from typing import Any, Dict
+
+from fastapi import FastAPI, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, Response
+from fastapi.utils import is_body_allowed_for_status_code
+from starlette.exceptions import HTTPException
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+
+class StdlibSerializer:
+    name = "json"
+
+    def dumps(self, obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class OrjsonSerializer:
+    name = "orjson"
+
+    def __init__(self):
+        self._options = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        self._fallback = StdlibSerializer()
+
+    def dumps(self, obj: Any) -> bytes:
+        try:
+            return orjson.dumps(obj, option=self._options)
+        except TypeError:  # orjson.JSONEncodeError
+            return self._fallback.dumps(obj)
+
+
+def get_serializer(name: str = None):
+    """Serializer by name ("orjson" / "json"); orjson is used when available unless "json" is requested"""
+    name = (name or os.getenv("JSON_SERIALIZER", "orjson")).lower()
+    if name == "json":
+        return StdlibSerializer()
+    if orjson is None:
+        if name == "orjson":
+            logger.info("orjson is not installed, using stdlib json")
+        return StdlibSerializer()
+    return OrjsonSerializer()
+
+
+serializer = get_serializer()
+
+
+def dumps(obj: Any) -> bytes:
+    return serializer.dumps(obj)
+
+
+def sse_frame(data: Dict) -> bytes:
+    """Encoded "data: {...}\\n\\n" frame"""
+    return b"data: " + serializer.dumps(data) + b"\n\n"
+
+
+_STREAMING_PREFIX = b'data: {"status":"streaming","chunk":'
+
+
+def sse_delta_frame(text: str) -> bytes:
+    """Frame for {"status": "streaming", "chunk": text} - only the text is serialized per delta"""
+    return _STREAMING_PREFIX + serializer.dumps(text) + b"}\n\n"
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with the active serializer"""
+
+    def render(self, content: Any) -> bytes:
+        return serializer.dumps(content)
+
+
+async def http_exception_handler(request: Request, exc: HTTPException) -> Response:
+    """FastAPI's HTTPException handler, rendered with FastJSONResponse"""
+    headers = getattr(exc, "headers", None)
+    if not is_body_allowed_for_status_code(exc.status_code):
+        return Response(status_code=exc.status_code, headers=headers)
+    return FastJSONResponse({"detail": exc.detail}, status_code=exc.status_code, headers=headers)
+
+
+async def request_validation_exception_handler(request: Request, exc: RequestValidationError) -> Response:
+    """FastAPI's 422 validation error handler, rendered with FastJSONResponse"""
+    return FastJSONResponse({"detail": jsonable_encoder(exc.errors())}, status_code=422)
+
+
+def install_exception_handlers(app: FastAPI):
+    """
+    Route error bodies through the active serializer too
+
+    default_response_class only covers endpoint return values; HTTPException
+    and request validation errors use FastAPI's own handlers unless replaced.
+    """
+    app.add_exception_handler(HTTPException, http_exception_handler)
+    app.add_exception_handler(RequestValidationError, request_validation_exception_handler)
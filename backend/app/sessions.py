@@ -0,0 +1,242 @@
+"""
+Server-side conversation sessions with history compaction
+The conversation history lives on the server (in-process LRU with an
+optional SQLite tier), so clients send a session ID instead of the whole
+history every turn. Once the verbatim messages grow past a token threshold,
+older turns are folded into a running summary in the background, and only
+the summary plus the most recent messages are sent to the model.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.cache import LRUCache, SQLiteCacheTier, two_tier_stats
+from app.token_budget import TokenCounter
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+
+@dataclass
+class Session:
+    session_id: str
+    messages: List[Dict] = field(default_factory=list)  # verbatim turns not yet summarized, oldest first
+    summary: str = ""
+    summarized_messages: int = 0
+    context_ids: List[str] = field(default_factory=list)  # context chunk IDs of the last answer
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+
+    def summary_message(self) -> Optional[Dict]:
+        """The summary as a history message (None before the first compaction)"""
+        if not self.summary:
+            return None
+        return {"role": "system", "content": SUMMARY_PREFIX + self.summary}
+
+
+class SessionStore:
+    """
+    Two-tier session store keyed by session ID
+
+    Calls block on SQLite when a disk tier is configured (run them via
+    asyncio.to_thread). Read-modify-write goes through update(), which holds
+    a lock, so append_turn() and a compaction never interleave.
+    """
+
+    def __init__(
+        self,
+        memory_size: int = 2048,
+        ttl: Optional[float] = None,
+        disk_path: Optional[str] = None,
+        disk_max_entries: int = 50_000
+    ):
+        self.memory = LRUCache(max_size=memory_size, ttl=ttl)
+        self.disk = SQLiteCacheTier(disk_path, "sessions", ttl=ttl, max_entries=disk_max_entries) if disk_path else None
+        self._lock = threading.RLock()
+
+    def create(self, history: Optional[List[Dict]] = None) -> Session:
+        """New session, optionally seeded with history the client still had"""
+        session = Session(
+            session_id=uuid.uuid4().hex,
+            messages=[{"role": m["role"], "content": m["content"]} for m in (history or []) if m.get("content")]
+        )
+        self.save(session)
+        return session
+
+    def get_or_create(self, session_id: Optional[str], history: Optional[List[Dict]] = None) -> Session:
+        """The stored session, or a new one seeded with the client's history if it is missing or expired"""
+        session = self.get(session_id) if session_id else None
+        return session if session is not None else self.create(history)
+
+    def get(self, session_id: str) -> Optional[Session]:
+        session = self.memory.get(session_id)
+        if session is not None:
+            return session
+        if self.disk is None:
+            return None
+
+        blob = self.disk.get(session_id)
+        if blob is None:
+            return None
+        session = Session(**json.loads(blob.decode("utf-8")))
+        self.memory.put(session_id, session)
+        return session
+
+    def save(self, session: Session):
+        with self._lock:
+            session.updated_at = time.time()
+            self.memory.put(session.session_id, session)
+            if self.disk is not None:
+                self.disk.put(session.session_id, json.dumps(asdict(session), ensure_ascii=False).encode("utf-8"))
+
+    def update(self, session_id: str, apply: Callable[[Session], None]) -> Optional[Session]:
+        """Apply a change to the current version of the session and save it (None if the session is gone)"""
+        with self._lock:
+            session = self.get(session_id)
+            if session is None:
+                return None
+            apply(session)
+            self.save(session)
+            return session
+
+    def append_turn(self, session_id: str, messages: List[Dict], context_ids: Optional[List[str]] = None) -> Optional[Session]:
+        """Append a finished turn to the current version of the session"""
+        def append(session: Session):
+            session.messages.extend(messages)
+            if context_ids is not None:
+                session.context_ids = list(context_ids)
+        return self.update(session_id, append)
+
+    def stats(self) -> Dict:
+        return two_tier_stats(self.memory, self.disk)
+
+
+class HistoryCompactor:
+    """
+    Folds older turns into the session summary
+
+        if compactor.needs_compaction(session):
+            spawn_background(compactor.compact(session.session_id))   # keep a task reference
+
+    The newest `keep_recent` messages always stay verbatim. Compaction runs
+    when the verbatim messages exceed `threshold_tokens` or `max_messages`
+    (the planner only sends that many anyway, so older ones would be lost).
+    """
+
+    def __init__(
+        self,
+        store: SessionStore,
+        counter: TokenCounter,
+        summarize: Callable[[str, List[Dict]], Awaitable[str]],
+        threshold_tokens: int = 1500,
+        keep_recent: int = 4,
+        max_messages: int = 6
+    ):
+        """
+        Args:
+            summarize: async (previous_summary, messages) -> new summary
+        """
+        self.store = store
+        self.counter = counter
+        self.summarize = summarize
+        self.threshold_tokens = threshold_tokens
+        self.keep_recent = keep_recent
+        self.max_messages = max_messages
+        self.compactions = 0
+        self.failures = 0
+        self.messages_summarized = 0
+        self.tokens_saved = 0
+        self._running = set()  # session IDs being compacted (one compaction per session at a time)
+
+    def history_tokens(self, session: Session) -> int:
+        return sum(self.counter.count_message(m) for m in session.messages)
+
+    def needs_compaction(self, session: Session) -> bool:
+        if len(session.messages) <= self.keep_recent:
+            return False
+        return len(session.messages) > self.max_messages or self.history_tokens(session) > self.threshold_tokens
+
+    async def compact(self, session_id: str) -> bool:
+        """Summarize all but the newest messages; returns True if the session was compacted"""
+        # Claimed before the first await so two triggers for one session cannot both fold the same prefix
+        if session_id in self._running:
+            return False
+        self._running.add(session_id)
+        try:
+            session = await asyncio.to_thread(self.store.get, session_id)
+            if session is None or not self.needs_compaction(session):
+                return False
+
+            older = session.messages[:-self.keep_recent]
+            try:
+                summary = await self.summarize(session.summary, older)
+            except Exception as e:
+                self.failures += 1
+                logger.warning(f"History compaction failed for session {session_id[:8]}: {e}")
+                return False
+            if not summary:
+                self.failures += 1
+                return False
+
+            # Turns may have been appended while summarizing - drop exactly the summarized prefix
+            removed_tokens = sum(self.counter.count_message(m) for m in older)
+            previous_summary_tokens = self.counter.count(session.summary) if session.summary else 0
+
+            def fold(current: Session):
+                current.messages = current.messages[len(older):]
+                current.summary = summary
+                current.summarized_messages += len(older)
+
+            if await asyncio.to_thread(self.store.update, session_id, fold) is None:
+                fold(session)
+                await asyncio.to_thread(self.store.save, session)
+
+            self.compactions += 1
+            self.messages_summarized += len(older)
+            self.tokens_saved += removed_tokens + previous_summary_tokens - self.counter.count(summary)
+            logger.info(f"Compacted session {session_id[:8]}: {len(older)} messages → summary")
+            return True
+        finally:
+            self._running.discard(session_id)
+
+    def stats(self) -> Dict:
+        return {
+            "compactions": self.compactions,
+            "failures": self.failures,
+            "messages_summarized": self.messages_summarized,
+            "tokens_saved": self.tokens_saved
+        }
+
+
+async def record_turn(
+    store: SessionStore,
+    compactor: HistoryCompactor,
+    session_id: str,
+    question: str,
+    answer: str,
+    context_ids: List[str],
+    spawn: Callable[[Awaitable], Any]
+) -> Optional[Session]:
+    """
+    Save a finished turn (SQLite write in a thread) and start a compaction if it is due
+
+    Args:
+        context_ids: Handles of the turn's context chunks (rehydrated on the next turn)
+        spawn: Starts the compaction without awaiting it and keeps the task referenced
+    """
+    session = await asyncio.to_thread(
+        store.append_turn,
+        session_id,
+        [{"role": "user", "content": question}, {"role": "assistant", "content": answer}],
+        context_ids
+    )
+    if session and compactor.needs_compaction(session):
+        spawn(compactor.compact(session_id))
+    return session
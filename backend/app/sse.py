@@ -0,0 +1,153 @@
+"""
+SSE frame writer with delta coalescing
+Answer deltas are merged into one "streaming" frame until a time window
+or a byte threshold is reached, instead of one frame (and one socket
+write) per model delta. Frames are encoded bytes, ready for the socket. Other events flush pending text first so event
+order is preserved. Frames, bytes and deltas are counted per stream and
+in process-wide totals.
+"""
+
+import asyncio
+import threading
+import time
+from typing import AsyncIterator, Callable, Dict, Optional
+
+
+class SSETotals:
+    """Process-wide counters across finished streams"""
+
+    def __init__(self):
+        self.streams = 0
+        self.frames = 0
+        self.bytes = 0
+        self.deltas = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, writer: "SSEWriter"):
+        with self._lock:
+            self.streams += 1
+            self.frames += writer.frames
+            self.bytes += writer.bytes
+            self.deltas += writer.deltas
+            self.seconds += writer.elapsed()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "streams": self.streams,
+                "frames": self.frames,
+                "bytes": self.bytes,
+                "deltas": self.deltas,
+                "deltas_per_frame": round(self.deltas / self.frames, 2) if self.frames else 0.0,
+                "frames_per_sec": round(self.frames / self.seconds, 1) if self.seconds else 0.0
+            }
+
+
+class SSEWriter:
+    """
+    Per-stream frame builder
+
+        sse = SSEWriter(encode=sse_frame, window=0.05, max_bytes=1024)
+        yield sse.event({"status": "searching", ...})
+        yield sse.encoded(PRE_ENCODED_FRAME)
+        frame = sse.delta(text)          # b'' while coalescing
+        frame = sse.flush()              # window expired / end of answer
+
+    window=0 and max_bytes=0 send one frame per delta (no coalescing).
+    """
+
+    def __init__(self, encode: Callable[[dict], bytes], window: float = 0.05, max_bytes: int = 1024,
+                 encode_delta: Optional[Callable[[str], bytes]] = None):
+        self.encode = encode
+        self.window = max(0.0, window)
+        self.max_bytes = max(0, max_bytes)
+        self.encode_delta = encode_delta or (lambda text: encode({"status": "streaming", "chunk": text}))
+        self.frames = 0
+        self.bytes = 0
+        self.deltas = 0
+        self.started = time.perf_counter()
+        self._pending = []
+        self._pending_bytes = 0
+        self._pending_since: Optional[float] = None
+
+    def write(self, frame: bytes) -> bytes:
+        """Count an already encoded frame"""
+        self.frames += 1
+        self.bytes += len(frame)
+        return frame
+
+    def flush(self) -> bytes:
+        """Pending deltas as one streaming frame (b'' if nothing is pending)"""
+        if not self._pending:
+            return b""
+        text = "".join(self._pending)
+        self._pending = []
+        self._pending_bytes = 0
+        self._pending_since = None
+        return self.write(self.encode_delta(text))
+
+    def event(self, data: dict) -> bytes:
+        """Frame for a non-delta event, preceded by any pending delta frame"""
+        return self.flush() + self.write(self.encode(data))
+
+    def encoded(self, frame: bytes) -> bytes:
+        """Same as event() for a frame encoded ahead of time (constant status events)"""
+        return self.flush() + self.write(frame)
+
+    def delta(self, text: str) -> bytes:
+        """Buffer an answer delta; returns the frame(s) to send now (b'' while coalescing)"""
+        if not text:
+            return b""
+        self.deltas += 1
+        now = time.perf_counter()
+        if self._pending_since is None:
+            self._pending_since = now
+        self._pending.append(text)
+        self._pending_bytes += len(text.encode("utf-8"))
+        if self._pending_bytes >= self.max_bytes or now - self._pending_since >= self.window:
+            return self.flush()
+        return b""
+
+    def time_until_flush(self) -> Optional[float]:
+        """Seconds until pending deltas must be sent (None if nothing is pending)"""
+        if self._pending_since is None:
+            return None
+        return max(0.0, self.window - (time.perf_counter() - self._pending_since))
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def stats(self) -> Dict:
+        elapsed = self.elapsed()
+        return {
+            "frames": self.frames,
+            "bytes": self.bytes,
+            "deltas": self.deltas,
+            "seconds": round(elapsed, 3),
+            "frames_per_sec": round(self.frames / elapsed, 1) if elapsed else 0.0
+        }
+
+
+async def with_flush_deadlines(source: AsyncIterator, writer: SSEWriter) -> AsyncIterator:
+    """
+    Iterate `source`, yielding None whenever the writer's coalescing window
+    expires while the next item is still pending (the caller then flushes)
+    """
+    iterator = source.__aiter__()
+    next_item = asyncio.ensure_future(iterator.__anext__())
+    try:
+        while True:
+            done, _ = await asyncio.wait({next_item}, timeout=writer.time_until_flush())
+            if not done:
+                yield None
+                continue
+            try:
+                item = next_item.result()
+            except StopAsyncIteration:
+                return
+            yield item
+            next_item = asyncio.ensure_future(iterator.__anext__())
+    finally:
+        if not next_item.done():
+            next_item.cancel()
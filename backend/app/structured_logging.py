@@ -0,0 +1,259 @@
+"""
+Structured, non-blocking logging
+Log records are put on a bounded in-memory queue by the calling thread
+(the event loop) and formatted/written to stderr by a background writer
+thread, so request handling never waits on a flushed write to the log
+pipe. Records are rendered as one JSON object per line with the request
+correlation ID; hot-path messages marked with extra={"sampled": True} are
+kept at LOG_SAMPLE_RATE. When the queue is full, records are dropped and
+counted instead of blocking.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from app.serialization import dumps
+
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+# LogRecord attributes that are not user-supplied `extra` fields
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "request_id", "sampled"}
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def get_request_id() -> str:
+    return request_id_var.get()
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamp the current request ID on the record (runs in the logging thread's caller)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep every Nth record marked sampled=True (1 / rate); other records always pass"""
+
+    def __init__(self, rate: float = 1.0):
+        super().__init__()
+        self.every = max(1, round(1 / rate)) if rate > 0 else 0
+        self._seen = 0
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "sampled", False):
+            return True
+        with self._lock:
+            self._seen += 1
+            keep = self.every > 0 and self._seen % self.every == 1 % self.every
+            if not keep:
+                self.dropped += 1
+            return keep
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record: ts, level, logger, request_id, msg, extra fields, exc"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        try:
+            return dumps(entry).decode("utf-8")
+        except (TypeError, ValueError):  # extra field that is not JSON-serializable
+            return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable format for local development (LOG_FORMAT=text)"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s [%(request_id)s] %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        if not hasattr(record, "request_id"):
+            record.request_id = "-"
+        return super().format(record)
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops (and counts) records when the queue is full instead of blocking"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge args now (they may be mutated later); formatting happens on the writer thread
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class BatchWriter:
+    """
+    Listener thread: formats queued records and writes everything that is
+    waiting in one write + flush, so a burst of records costs one syscall
+    (and one GIL hand-off) instead of one per record
+    """
+
+    def __init__(self, log_queue: queue.Queue, stream, formatter: logging.Formatter, max_batch: int = 256):
+        self.queue = log_queue
+        self.stream = stream
+        self.formatter = formatter
+        self.max_batch = max_batch
+        self.batches = 0
+        self.write_errors = 0
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            record = self.queue.get()
+            batch = [record]
+            while record is not None and len(batch) < self.max_batch:
+                try:
+                    record = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                batch.append(record)
+
+            lines = [self._format(r) for r in batch if r is not None]
+            if lines:
+                try:
+                    self.stream.write("\n".join(lines) + "\n")
+                    self.stream.flush()
+                except Exception:  # closed / broken stream - never raise into the logging thread
+                    self.write_errors += 1
+                self.batches += 1
+            if batch[-1] is None:
+                return
+
+    def _format(self, record: logging.LogRecord) -> str:
+        try:
+            return self.formatter.format(record)
+        except Exception as e:
+            return f"log formatting failed: {e!r} ({record.msg!r})"
+
+    def stop(self):
+        """Write what is still queued, then stop"""
+        self.queue.put(None)
+        self._thread.join()
+
+
+class _LoggingState:
+    handler: Optional[NonBlockingQueueHandler] = None
+    writer: Optional[BatchWriter] = None
+    sampler: Optional[SamplingFilter] = None
+
+
+_state = _LoggingState()
+
+
+def configure_logging(level: str = "INFO", fmt: str = "json", sample_rate: float = 0.1,
+                      queue_size: int = 10_000, stream=None) -> NonBlockingQueueHandler:
+    """
+    Route the root logger through a bounded queue to a stderr writer thread
+
+    Safe to call again (e.g. in tests): the previous writer is stopped first.
+    """
+    shutdown_logging()
+    log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    handler = NonBlockingQueueHandler(log_queue)
+    handler.addFilter(RequestContextFilter())
+    sampler = SamplingFilter(sample_rate)
+    handler.addFilter(sampler)
+
+    writer = BatchWriter(log_queue, stream or sys.stderr, TextFormatter() if fmt == "text" else JSONFormatter())
+    writer.start()
+
+    root = logging.getLogger()
+    root.addHandler(handler)
+    root.setLevel(getattr(logging, level.upper(), logging.INFO))
+
+    _state.handler, _state.writer, _state.sampler = handler, writer, sampler
+    return handler
+
+
+def shutdown_logging():
+    """Detach the queue handler, write queued records and stop the writer thread"""
+    if _state.handler is not None:
+        logging.getLogger().removeHandler(_state.handler)
+    if _state.writer is not None:
+        _state.writer.stop()
+        _state.writer = None
+
+
+atexit.register(shutdown_logging)
+
+
+def logging_stats() -> Dict:
+    handler = _state.handler
+    return {
+        "queued": handler.queue.qsize() if handler else 0,
+        "dropped_queue_full": handler.dropped if handler else 0,
+        "dropped_sampling": _state.sampler.dropped if _state.sampler else 0,
+        "write_batches": _state.writer.batches if _state.writer else 0,
+    }
+
+
+class RequestIdMiddleware:
+    """
+    ASGI middleware: one correlation ID per HTTP request (X-Request-ID header if
+    the client sent one), set for the whole request including streamed bodies
+    and echoed back in the response headers
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = dict(scope.get("headers") or []).get(b"x-request-id", b"").decode("latin-1")[:64] or new_request_id()
+        token = request_id_var.set(request_id)
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id_var.reset(token)
@@ -0,0 +1,180 @@
+"""
+Token budget planner for the answer prompt
+Counts tokens with tiktoken (per-chunk counts cached by chunk ID) and
+packs system prompt, conversation history and ranked context chunks into
+an input budget chosen by question type, so prompt size stays bounded
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from app.cache import LRUCache, hash_key
+from app.vector_search import chunk_handle
+
+logger = logging.getLogger(__name__)
+
+# Input token budgets per question type (system prompt + history + context + question)
+DEFAULT_BUDGETS = {
+    'diagnostic_symptom': 10000,
+    'diagnostic_disease': 10000,
+    'treatment': 12000,
+    'prognosis': 8000,
+    'general': 8000,
+}
+
+# Chat format overhead per message, and per "Document i: " block header
+MESSAGE_OVERHEAD_TOKENS = 4
+DOCUMENT_OVERHEAD_TOKENS = 5
+
+
+def parse_budgets(spec: Optional[str], defaults: Dict[str, int] = DEFAULT_BUDGETS) -> Dict[str, int]:
+    """Parse "treatment=12000,general=6000" overrides on top of the defaults"""
+    budgets = dict(defaults)
+    for item in (spec or "").split(","):
+        if "=" not in item:
+            continue
+        name, value = item.split("=", 1)
+        try:
+            budgets[name.strip()] = int(value)
+        except ValueError:
+            logger.warning(f"Ignoring invalid token budget '{item}'")
+    return budgets
+
+
+# ============================================================
+# Token counting
+# ============================================================
+
+class TokenCounter:
+    """
+    tiktoken encoder for the answer model with a cached count per chunk
+
+    Falls back to a character estimate (≈4 ASCII chars or 1 CJK char per
+    token) when tiktoken or its encoding file is unavailable.
+    """
+
+    def __init__(self, model: str = "gpt-4o", cache_size: int = 50_000):
+        self.model = model
+        self._chunk_counts = LRUCache(max_size=cache_size)
+        try:
+            import tiktoken
+            self._encoding = tiktoken.encoding_for_model(model)
+            self.backend = f"tiktoken:{self._encoding.name}"
+        except Exception as e:
+            logger.warning(f"tiktoken unavailable for {model} ({e}); using a character estimate")
+            self._encoding = None
+            self.backend = "estimate"
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        ascii_chars = sum(1 for c in text if ord(c) < 128)
+        return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+    def count_chunk(self, chunk: Dict) -> int:
+        """Token count of a chunk's text, cached by chunk ID (text hash for chunks without one)"""
+        text = chunk.get('text', '')
+        key = chunk_handle(chunk) if chunk.get('id') else hash_key(text)
+        count = self._chunk_counts.get(key)
+        if count is None:
+            count = self.count(text)
+            self._chunk_counts.put(key, count)
+        return count
+
+    def count_message(self, message: Dict) -> int:
+        return self.count(message.get("content", "")) + MESSAGE_OVERHEAD_TOKENS
+
+    def stats(self) -> Dict:
+        return {
+            "backend": self.backend,
+            "cached_chunks": len(self._chunk_counts),
+            "hits": self._chunk_counts.hits,
+            "misses": self._chunk_counts.misses,
+        }
+
+
+# ============================================================
+# Planner
+# ============================================================
+
+@dataclass
+class PromptPlan:
+    budget: int
+    fixed_tokens: int
+    chunks: List[Dict] = field(default_factory=list)
+    history: List[Dict] = field(default_factory=list)
+    context_tokens: int = 0
+    history_tokens: int = 0
+    dropped_chunks: int = 0
+    dropped_messages: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.fixed_tokens + self.history_tokens + self.context_tokens
+
+
+def plan_prompt(
+    counter: TokenCounter,
+    budget: int,
+    fixed_tokens: int,
+    chunks: List[Dict],
+    history: List[Dict],
+    max_history_messages: int = 6,
+    history_share: float = 0.3,
+    min_chunks: int = 1,
+    summary: Optional[Dict] = None
+) -> PromptPlan:
+    """
+    Pack history and ranked context chunks into what remains of the budget
+
+    The fixed part (system prompt, question and instructions) is always
+    sent. History takes at most `history_share` of the remainder, newest
+    messages first and without gaps, then the summary of older turns if
+    it still fits (placed before the messages). Context chunks follow in rank order
+    until the budget is spent; the top `min_chunks` are always kept.
+    Chunk counts are an upper bound of the assembled context, since
+    stitching removes overlap between adjacent chunks.
+
+    Args:
+        counter: Token counter (cached per-chunk counts)
+        budget: Input token budget for the whole prompt
+        fixed_tokens: Tokens of the system prompt and the user message without context
+        chunks: Context chunks, best first
+        history: Conversation history, oldest first
+        summary: Compacted summary of turns older than `history`, as a message
+    """
+    plan = PromptPlan(budget=budget, fixed_tokens=fixed_tokens)
+    remaining = max(0, budget - fixed_tokens)
+
+    recent = history[-max_history_messages:] if max_history_messages else []
+    history_budget = int(remaining * history_share)
+    kept = []
+    for message in reversed(recent):
+        tokens = counter.count_message(message)
+        if plan.history_tokens + tokens > history_budget:
+            break
+        kept.append(message)
+        plan.history_tokens += tokens
+    plan.dropped_messages = len(recent) - len(kept)
+    if summary is not None:
+        tokens = counter.count_message(summary)
+        if plan.history_tokens + tokens <= history_budget:
+            kept.append(summary)
+            plan.history_tokens += tokens
+        else:
+            plan.dropped_messages += 1
+    plan.history = list(reversed(kept))
+    remaining -= plan.history_tokens
+
+    for i, chunk in enumerate(chunks):
+        tokens = counter.count_chunk(chunk) + DOCUMENT_OVERHEAD_TOKENS
+        if i >= min_chunks and plan.context_tokens + tokens > remaining:
+            plan.dropped_chunks += 1
+            continue
+        plan.chunks.append(chunk)
+        plan.context_tokens += tokens
+
+    return plan
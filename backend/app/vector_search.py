@@ -0,0 +1,194 @@
+"""
+Concurrent vector search layer
+Runs blocking vector index queries on a dedicated thread pool so that the
+expanded queries are searched in parallel, each with its own timeout
+
+A timeout only stops waiting: the blocking call keeps its worker thread
+until it returns. Backends should bound their own calls (Pinecone gets a
+client-side request timeout); calls still running after the timeout are
+counted as stalled, and once every worker is stalled new searches fail
+fast instead of queueing behind them.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SearchPoolExhausted(RuntimeError):
+    """Every search worker is still blocked in a call that already timed out"""
+
+
+class ConcurrentSearcher:
+    def __init__(self, index: Any, max_workers: int = 8, timeout: float = 5.0,
+                 on_query: Optional[Callable[[float, str], None]] = None):
+        """
+        Args:
+            index: VectorStore (or any object with a blocking query(vector=..., top_k=..., ...) method)
+            max_workers: Size of the dedicated search thread pool
+            timeout: Per-query timeout in seconds (slow queries are dropped, not retried)
+            on_query: Called with (seconds, outcome) after every index call; outcome is
+                "ok", "timeout", "error" or "rejected" ("batch_" prefixed for query_batch calls)
+        """
+        self.index = index
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.on_query = on_query
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="vector-search")
+        self.timeouts = 0
+        self.errors = 0
+        self.rejected = 0
+        self.stalled = 0  # timed-out calls still holding a worker thread
+        self._stalled_lock = threading.Lock()
+
+    @staticmethod
+    def _to_chunks(results) -> List[Dict]:
+        chunks = []
+        for match in results.matches:
+            chunk = dict(match.metadata or {})
+            chunk['id'] = match.id
+            chunk['score'] = match.score
+            if getattr(match, 'values', None):
+                chunk['values'] = list(match.values)
+            chunks.append(chunk)
+        return chunks
+
+    def _query_blocking(self, embedding: List[float], top_k: int, filter: Optional[Dict], include_values: bool = False) -> List[Dict]:
+        """Blocking query executed on the pool; converts matches to chunk dicts"""
+        kwargs = {"vector": embedding, "top_k": top_k, "include_metadata": True}
+        if filter:
+            kwargs["filter"] = filter
+        if include_values:
+            kwargs["include_values"] = True
+        return self._to_chunks(self.index.query(**kwargs))
+
+    def _query_batch_blocking(self, embeddings: List[List[float]], top_k: int, filter: Optional[Dict], include_values: bool = False) -> List[List[Dict]]:
+        """One batched query for all embeddings (local stores: a single matrix product)"""
+        results = self.index.query_batch(embeddings, top_k=top_k, filter=filter, include_metadata=True, include_values=include_values)
+        return [self._to_chunks(r) for r in results]
+
+    async def _run(self, fn, *args):
+        """Run a blocking index call on the pool with the timeout (raises SearchPoolExhausted if every worker is stalled)"""
+        if self.stalled >= self.max_workers:
+            raise SearchPoolExhausted(f"all {self.max_workers} search workers are stalled")
+        future = self.executor.submit(fn, *args)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            if not future.done():
+                # Still running in its worker thread - counted until it returns
+                with self._stalled_lock:
+                    self.stalled += 1
+                future.add_done_callback(self._stall_ended)
+            raise
+
+    def _stall_ended(self, future: Future):
+        with self._stalled_lock:
+            self.stalled -= 1
+
+    async def search(self, embedding: List[float], top_k: int = 15, filter: Optional[Dict] = None, include_values: bool = False) -> List[Dict]:
+        """
+        Search a single embedding with a timeout
+
+        Returns:
+            Matching chunks (metadata + score); empty list on timeout or error
+        """
+        started = time.perf_counter()
+        try:
+            results = await self._run(self._query_blocking, embedding, top_k, filter, include_values)
+            self._record(started, "ok")
+            return results
+        except SearchPoolExhausted as e:
+            self.rejected += 1
+            self._record(started, "rejected")
+            logger.warning(f"Vector query rejected: {e}")
+            return []
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            self._record(started, "timeout")
+            logger.warning(f"Vector query timed out after {self.timeout:.1f}s - result dropped")
+            return []
+        except Exception as e:
+            self.errors += 1
+            self._record(started, "error")
+            logger.error(f"Vector query failed after {time.perf_counter() - started:.2f}s: {e}")
+            return []
+
+    def _record(self, started: float, outcome: str):
+        if self.on_query is not None:
+            self.on_query(time.perf_counter() - started, outcome)
+
+    async def search_many(self, embeddings: List[List[float]], top_k: int = 15, filter: Optional[Dict] = None, include_values: bool = False) -> List[List[Dict]]:
+        """
+        Search all embeddings concurrently
+
+        Wall time is bounded by the slowest query (or the timeout), not the sum.
+        Stores that prefer batched queries get a single query_batch call instead.
+        Results are returned in the same order as the embeddings.
+        include_values adds each match's vector under 'values' (used by MMR context selection).
+        """
+        if getattr(self.index, "prefers_batch_query", False) and len(embeddings) > 1:
+            started = time.perf_counter()
+            try:
+                results = await self._run(self._query_batch_blocking, embeddings, top_k, filter, include_values)
+                self._record(started, "batch_ok")
+                return results
+            except SearchPoolExhausted as e:
+                self.rejected += 1
+                self._record(started, "batch_rejected")
+                logger.warning(f"Batched vector query rejected: {e}")
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                self._record(started, "batch_timeout")
+                logger.warning(f"Batched vector query timed out after {self.timeout:.1f}s - results dropped")
+            except Exception as e:
+                self.errors += 1
+                self._record(started, "batch_error")
+                logger.error(f"Batched vector query failed: {e}")
+            return [[] for _ in embeddings]
+
+        return list(await asyncio.gather(*(self.search(emb, top_k, filter, include_values) for emb in embeddings)))
+
+    def shutdown(self):
+        """Release the search thread pool"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def chunk_key(chunk: Dict) -> str:
+    """Dedup identity of a chunk across result lists (source/title/page)"""
+    return f"{chunk.get('source', 'unknown')}_{chunk.get('title', 'unknown')}_{chunk.get('page', 0)}"
+
+
+def chunk_handle(chunk: Dict) -> str:
+    """Server-side handle of a chunk (vector ID, or the dedup key for payloads without one)"""
+    return chunk.get('id') or chunk_key(chunk)
+
+
+def reciprocal_rank_fusion(result_lists: List[List[Dict]], k: int = 60) -> List[Dict]:
+    """
+    Merge ranked result lists (dense and keyword) by reciprocal-rank fusion
+
+    Each chunk scores sum(1 / (k + rank)) over the lists it appears in, so
+    agreement between lists matters more than raw scores, which are not
+    comparable between cosine similarity and BM25. The dense 'score' and
+    'bm25_score' of the best occurrence are kept; the fused score is 'rrf_score'.
+    """
+    fused: Dict[str, Dict] = {}
+    for results in result_lists:
+        for rank, chunk in enumerate(results, start=1):
+            key = chunk_key(chunk)
+            entry = fused.get(key)
+            if entry is None:
+                entry = fused[key] = dict(chunk)
+                entry['rrf_score'] = 0.0
+            else:
+                for field in ('score', 'bm25_score'):
+                    if field in chunk:
+                        entry[field] = max(entry.get(field, chunk[field]), chunk[field])
+            entry['rrf_score'] += 1.0 / (k + rank)
+    return sorted(fused.values(), key=lambda c: c['rrf_score'], reverse=True)
@@ -0,0 +1,632 @@
+"""
+Vector store abstraction
+One interface (query, batched query, upsert, fetch, delete, stats) for the
+backend and the data-pipeline scripts, with a Pinecone implementation and a
+local exact-search backend on a memory-mapped NumPy matrix
+"""
+
+import json
+import logging
+import os
+import shutil
+import threading
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DIMENSION = 1536
+
+
+# ============================================================
+# Result types (same shape as Pinecone responses: result.matches[i].metadata)
+# ============================================================
+
+@dataclass
+class VectorMatch:
+    id: str
+    score: float
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    values: Optional[List[float]] = None
+
+
+@dataclass
+class QueryResult:
+    matches: List[VectorMatch] = field(default_factory=list)
+
+
+@dataclass
+class VectorRecord:
+    id: str
+    values: List[float]
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class IndexStats:
+    total_vector_count: int
+    dimension: int
+    backend: str
+
+
+# ============================================================
+# Metadata filter (Pinecone filter syntax subset)
+# ============================================================
+
+def _match_condition(value: Any, condition: Any) -> bool:
+    if not isinstance(condition, dict):
+        return value == condition
+    for op, target in condition.items():
+        if op == "$eq" and not value == target:
+            return False
+        if op == "$ne" and not value != target:
+            return False
+        if op == "$in" and value not in target:
+            return False
+        if op == "$nin" and value in target:
+            return False
+        if op in ("$gt", "$gte", "$lt", "$lte"):
+            try:
+                v, t = float(value), float(target)
+            except (TypeError, ValueError):
+                return False
+            if op == "$gt" and not v > t:
+                return False
+            if op == "$gte" and not v >= t:
+                return False
+            if op == "$lt" and not v < t:
+                return False
+            if op == "$lte" and not v <= t:
+                return False
+    return True
+
+
+def matches_filter(metadata: Dict[str, Any], filter: Optional[Dict[str, Any]]) -> bool:
+    """
+    Evaluate a Pinecone-style metadata filter locally
+
+    Supports {"field": value}, $eq/$ne/$in/$nin/$gt/$gte/$lt/$lte and $and/$or.
+    Numeric comparisons coerce strings (e.g. year stored as "2021").
+    """
+    if not filter:
+        return True
+    for key, condition in filter.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, sub) for sub in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_filter(metadata, sub) for sub in condition):
+                return False
+        elif not _match_condition(metadata.get(key), condition):
+            return False
+    return True
+
+
+# ============================================================
+# Interface
+# ============================================================
+
+class VectorStore:
+    """Base class - all backends return the same result types"""
+
+    backend_name = "base"
+    # Local backends answer several queries faster with one batched call than
+    # with concurrent single queries
+    prefers_batch_query = False
+
+    def query(
+        self,
+        vector: List[float],
+        top_k: int = 10,
+        filter: Optional[Dict] = None,
+        include_metadata: bool = True,
+        include_values: bool = False
+    ) -> QueryResult:
+        raise NotImplementedError
+
+    def query_batch(
+        self,
+        vectors: List[List[float]],
+        top_k: int = 10,
+        filter: Optional[Dict] = None,
+        include_metadata: bool = True,
+        include_values: bool = False
+    ) -> List[QueryResult]:
+        return [self.query(v, top_k, filter, include_metadata, include_values) for v in vectors]
+
+    def upsert(self, vectors: List[Dict]):
+        """vectors: [{"id": str, "values": [...], "metadata": {...}}, ...]"""
+        raise NotImplementedError
+
+    def fetch(self, ids: List[str]) -> Dict[str, VectorRecord]:
+        raise NotImplementedError
+
+    def delete(self, ids: List[str]):
+        raise NotImplementedError
+
+    def stats(self) -> IndexStats:
+        raise NotImplementedError
+
+    def flush(self):
+        """Persist pending writes (no-op for remote stores)"""
+
+
+# ============================================================
+# Pinecone backend
+# ============================================================
+
+class PineconeVectorStore(VectorStore):
+    backend_name = "pinecone"
+
+    def __init__(self, index_name: str, api_key: Optional[str] = None, host: Optional[str] = None,
+                 request_timeout: Optional[float] = None):
+        """
+        Args:
+            request_timeout: Client-side timeout (seconds) for queries, so a hung request
+                frees its search worker thread instead of holding it indefinitely
+        """
+        from pinecone import Pinecone
+
+        self.index_name = index_name
+        self.request_timeout = request_timeout
+        pc = Pinecone(api_key=api_key or os.getenv("PINECONE_API_KEY"))
+        self.index = pc.Index(index_name, host=host) if host else pc.Index(index_name)
+
+    @staticmethod
+    def _convert(results) -> QueryResult:
+        matches = []
+        for match in results.matches:
+            values = list(match.values) if getattr(match, "values", None) else None
+            matches.append(VectorMatch(id=match.id, score=match.score, metadata=dict(match.metadata or {}), values=values))
+        return QueryResult(matches=matches)
+
+    def query(self, vector, top_k=10, filter=None, include_metadata=True, include_values=False) -> QueryResult:
+        kwargs = {"vector": list(vector), "top_k": top_k, "include_metadata": include_metadata, "include_values": include_values}
+        if filter:
+            kwargs["filter"] = filter
+        if self.request_timeout:
+            kwargs["_request_timeout"] = self.request_timeout
+        return self._convert(self.index.query(**kwargs))
+
+    def upsert(self, vectors: List[Dict]):
+        self.index.upsert(vectors=vectors)
+
+    def fetch(self, ids: List[str]) -> Dict[str, VectorRecord]:
+        response = self.index.fetch(ids=list(ids))
+        return {
+            vid: VectorRecord(id=vid, values=list(v.values), metadata=dict(v.metadata or {}))
+            for vid, v in response.vectors.items()
+        }
+
+    def delete(self, ids: List[str]):
+        self.index.delete(ids=list(ids))
+
+    def list_ids(self, batch_size: int = 100) -> Iterable[List[str]]:
+        """Yield pages of vector IDs (serverless indexes only)"""
+        yield from self.index.list(limit=batch_size)
+
+    def stats(self) -> IndexStats:
+        stats = self.index.describe_index_stats()
+        return IndexStats(
+            total_vector_count=stats.get("total_vector_count", 0),
+            dimension=stats.get("dimension", DEFAULT_DIMENSION),
+            backend=self.backend_name
+        )
+
+
+# ============================================================
+# Local exact-search backend (memory-mapped NumPy matrix)
+# ============================================================
+
+@dataclass
+class _ScanView:
+    """Arrays one NumpyVectorStore scan reads, captured under the store lock"""
+    base: np.ndarray                    # memory-mapped base rows
+    base_count: int
+    extra: Optional[np.ndarray]         # in-memory delta (rows appended after load)
+    deleted: np.ndarray                 # tombstones over base + delta rows (a copy)
+    codes: Optional[np.ndarray] = None  # quantized codes of the base rows (QuantizedVectorStore)
+
+    @property
+    def total(self) -> int:
+        return len(self.deleted)
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    Exact cosine search over a memory-mapped matrix
+
+    Directory layout:
+        manifest.json     {"dimension", "dtype", "count", "generation", "lineage"}
+        vectors.npy       (count, dimension) float16/float32, L2-normalized rows
+        ids.json          row → vector ID
+        metadata.jsonl    one JSON object per row
+        metadata.idx.npy  byte offset of each metadata line (lazy reads)
+        deleted.npy       optional tombstones for rows kept by save(compact=False)
+        <backend>/        derived indexes (int8/, pq/, hnsw/), one subdirectory each
+
+    Upserts and deletes are kept in memory (appended rows + tombstones) until
+    save() rewrites the files. Each save gets a new generation; "lineage"
+    lists earlier [generation, count] pairs whose rows are still an unchanged
+    prefix, so a derived index built for one of them only needs the rows
+    appended since (see covered_rows).
+    """
+
+    backend_name = "numpy"
+    prefers_batch_query = True
+
+    def __init__(self, path: str, dimension: int = DEFAULT_DIMENSION, dtype: str = "float16", block_size: int = 16384):
+        self.block_size = block_size
+        self._lock = threading.RLock()
+        self._meta_lock = threading.Lock()  # shared metadata.jsonl handle (seek + readline)
+        self._load(Path(path), dimension, dtype)
+
+    def _load(self, path: Path, dimension: int, dtype: str):
+        self.path = path
+        manifest_path = self.path / "manifest.json"
+        if manifest_path.exists():
+            manifest = json.loads(manifest_path.read_text())
+            self.dimension = manifest["dimension"]
+            self.dtype = np.dtype(manifest["dtype"])
+            self.generation: Optional[str] = manifest.get("generation")
+            self._lineage: List[List] = manifest.get("lineage", [])
+            self._base = np.load(self.path / "vectors.npy", mmap_mode="r")
+            self._base_ids: List[str] = json.loads((self.path / "ids.json").read_text())
+            self._meta_offsets = np.load(self.path / "metadata.idx.npy")
+            self._meta_file = open(self.path / "metadata.jsonl", "rb")
+        else:
+            self.dimension = dimension
+            self.dtype = np.dtype(dtype)
+            self.generation = None
+            self._lineage = []
+            self._base = np.zeros((0, dimension), dtype=self.dtype)
+            self._base_ids = []
+            self._meta_offsets = np.zeros(0, dtype=np.int64)
+            self._meta_file = None
+
+        self._deleted = np.zeros(len(self._base_ids), dtype=bool)
+        if (self.path / "deleted.npy").exists():
+            self._deleted = np.load(self.path / "deleted.npy").astype(bool)
+        self._row_of = {vid: i for i, vid in enumerate(self._base_ids) if not self._deleted[i]}
+        # In-memory delta (rows appended after load)
+        self._extra_vectors: List[np.ndarray] = []
+        self._extra_ids: List[str] = []
+        self._extra_meta: List[Dict] = []
+        self._extra_deleted: List[bool] = []
+        self._extra_matrix: Optional[np.ndarray] = None
+        self._dirty = False
+
+    # ---------- helpers ----------
+
+    def _normalize(self, vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors[None, :]
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def _metadata(self, row: int) -> Dict:
+        base_count = len(self._base_ids)
+        if row >= base_count:
+            return dict(self._extra_meta[row - base_count])
+        with self._meta_lock:
+            self._meta_file.seek(int(self._meta_offsets[row]))
+            line = self._meta_file.readline()
+        return json.loads(line)
+
+    def _vector(self, row: int) -> np.ndarray:
+        base_count = len(self._base_ids)
+        if row >= base_count:
+            return self._extra_vectors[row - base_count]
+        return np.asarray(self._base[row], dtype=np.float32)
+
+    def _id(self, row: int) -> str:
+        base_count = len(self._base_ids)
+        return self._extra_ids[row - base_count] if row >= base_count else self._base_ids[row]
+
+    def _is_deleted(self, row: int) -> bool:
+        base_count = len(self._base_ids)
+        return self._extra_deleted[row - base_count] if row >= base_count else bool(self._deleted[row])
+
+    def _view(self) -> "_ScanView":
+        """Capture what a scan reads (call under the lock); scoring then runs without it"""
+        if self._extra_vectors and self._extra_matrix is None:
+            self._extra_matrix = np.vstack(self._extra_vectors)
+        return _ScanView(
+            base=self._base,
+            base_count=len(self._base_ids),
+            extra=self._extra_matrix if self._extra_vectors else None,
+            deleted=self._deleted_mask()
+        )
+
+    def _blocks(self, view: "_ScanView"):
+        """Yield (row_offset, float32 block) over base rows and the in-memory delta"""
+        for start in range(0, view.base_count, self.block_size):
+            yield start, np.asarray(view.base[start:start + self.block_size], dtype=np.float32)
+        if view.extra is not None:
+            yield view.base_count, view.extra
+
+    def _block_scores(self, queries: np.ndarray, view: "_ScanView"):
+        """Yield (row_offset, scores) per row block; scores has shape (n_queries, block_rows)"""
+        for offset, block in self._blocks(view):
+            yield offset, queries @ block.T
+
+    def _score_all(self, queries: np.ndarray, keep: int, view: "_ScanView") -> List[List[tuple]]:
+        """Batched matrix product over all rows; keeps the best `keep` (row, score) per query"""
+        n_queries = queries.shape[0]
+        best_rows = [np.zeros(0, dtype=np.int64) for _ in range(n_queries)]
+        best_scores = [np.zeros(0, dtype=np.float32) for _ in range(n_queries)]
+
+        for offset, scores in self._block_scores(queries, view):
+            deleted = view.deleted[offset:offset + scores.shape[1]]
+            if deleted.any():
+                scores[:, deleted] = -np.inf
+            k = min(keep, scores.shape[1])
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            for q in range(n_queries):
+                rows = np.concatenate([best_rows[q], top[q] + offset])
+                vals = np.concatenate([best_scores[q], scores[q, top[q]]])
+                order = np.argsort(-vals)[:keep]
+                best_rows[q], best_scores[q] = rows[order], vals[order]
+
+        return [
+            [(int(r), float(s)) for r, s in zip(best_rows[q], best_scores[q]) if np.isfinite(s)]
+            for q in range(n_queries)
+        ]
+
+    def _build_result(self, scored: List[tuple], top_k: int, filter, include_metadata, include_values) -> QueryResult:
+        matches = []
+        for row, score in scored:
+            if self._is_deleted(row):
+                continue  # deleted after the scan's view was taken
+            metadata = self._metadata(row) if (include_metadata or filter) else {}
+            if filter and not matches_filter(metadata, filter):
+                continue
+            matches.append(VectorMatch(
+                id=self._id(row),
+                score=score,
+                metadata=metadata if include_metadata else {},
+                values=self._vector(row).tolist() if include_values else None
+            ))
+            if len(matches) >= top_k:
+                break
+        return QueryResult(matches=matches)
+
+    # ---------- interface ----------
+
+    def query(self, vector, top_k=10, filter=None, include_metadata=True, include_values=False) -> QueryResult:
+        return self.query_batch([vector], top_k, filter, include_metadata, include_values)[0]
+
+    def query_batch(self, vectors, top_k=10, filter=None, include_metadata=True, include_values=False) -> List[QueryResult]:
+        if not vectors:
+            return []
+        queries = self._normalize(np.asarray(vectors))
+        with self._lock:
+            view = self._view()
+        if view.total == 0:
+            return [QueryResult() for _ in vectors]
+
+        # The matrix scan runs outside the lock on the captured arrays, so concurrent queries overlap
+        # With a filter, over-fetch and filter afterwards; fall back to a full ranking if too few pass
+        keep = min(view.total, top_k * 20 if filter else top_k)
+        results = self._collect(self._score_all(queries, keep, view), view, top_k, filter, include_metadata, include_values)
+        if results is not None and filter and any(len(r.matches) < top_k for r in results) and keep < view.total:
+            full = self._score_all(queries, view.total, view)
+            results = self._collect(full, view, top_k, filter, include_metadata, include_values)
+        if results is None:
+            # save() reloaded the store during the scan (rows may have moved) - scan the new files
+            return self.query_batch(vectors, top_k, filter, include_metadata, include_values)
+        return results
+
+    def _collect(self, scored_lists, view: "_ScanView", top_k, filter, include_metadata, include_values) -> Optional[List[QueryResult]]:
+        """Results for scan output; None if the store was reloaded after the view was taken"""
+        with self._lock:
+            if view.base is not self._base:
+                return None
+            return [self._build_result(s, top_k, filter, include_metadata, include_values) for s in scored_lists]
+
+    def upsert(self, vectors: List[Dict]):
+        with self._lock:
+            for item in vectors:
+                vid = item["id"]
+                old_row = self._row_of.get(vid)
+                if old_row is not None:
+                    self._mark_deleted(old_row)
+                values = self._normalize(np.asarray(item["values"]))[0]
+                self._extra_vectors.append(values.astype(np.float32))
+                self._extra_ids.append(vid)
+                self._extra_meta.append(dict(item.get("metadata") or {}))
+                self._extra_deleted.append(False)
+                self._row_of[vid] = len(self._base_ids) + len(self._extra_ids) - 1
+            self._extra_matrix = None
+            self._dirty = True
+
+    def _mark_deleted(self, row: int):
+        base_count = len(self._base_ids)
+        if row >= base_count:
+            self._extra_deleted[row - base_count] = True
+        else:
+            self._deleted[row] = True
+
+    def fetch(self, ids: List[str]) -> Dict[str, VectorRecord]:
+        with self._lock:
+            found = {}
+            for vid in ids:
+                row = self._row_of.get(vid)
+                if row is None or self._is_deleted(row):
+                    continue
+                found[vid] = VectorRecord(id=vid, values=self._vector(row).tolist(), metadata=self._metadata(row))
+            return found
+
+    def delete(self, ids: List[str]):
+        with self._lock:
+            for vid in ids:
+                row = self._row_of.pop(vid, None)
+                if row is not None:
+                    self._mark_deleted(row)
+                    self._dirty = True
+
+    def stats(self) -> IndexStats:
+        return IndexStats(total_vector_count=len(self._row_of), dimension=self.dimension, backend=self.backend_name)
+
+    def _iter_rows(self, include_deleted: bool = False) -> Iterable[VectorRecord]:
+        for row in range(len(self._base_ids) + len(self._extra_ids)):
+            if self._is_deleted(row) and not include_deleted:
+                continue
+            yield VectorRecord(id=self._id(row), values=self._vector(row), metadata=self._metadata(row))
+
+    def iter_records(self) -> Iterable[VectorRecord]:
+        """Iterate over all live records (used by save() and by index builders)"""
+        return self._iter_rows()
+
+    def _deleted_mask(self) -> np.ndarray:
+        return np.concatenate([self._deleted, np.asarray(self._extra_deleted, dtype=bool)])
+
+    def flush(self):
+        if self._dirty:
+            self.save()
+
+    def covered_rows(self, generation: Optional[str], count: int) -> Optional[int]:
+        """
+        Rows of this store still valid in a derived index built for (generation, count)
+
+        Returns count when those rows are unchanged (same generation or an
+        ancestor in the lineage; later rows are new), None when rows moved
+        and the index has to be rebuilt.
+        """
+        if generation is None:
+            return None
+        if generation == self.generation or [generation, count] in self._lineage:
+            return count if count <= len(self._base_ids) else None
+        return None
+
+    def _save_extra(self, tmp: Path, compact: bool):
+        """Hook for subclasses to write their own index subdirectory into the new store directory"""
+
+    def save(self, path: Optional[str] = None, compact: bool = True):
+        """
+        Write base rows + delta to disk as a fresh store
+
+        compact=True drops deleted rows (row numbers change); compact=False
+        keeps them with a tombstone file so row numbers stay stable. Index
+        subdirectories of other backends are carried over untouched.
+        """
+        with self._lock:
+            target = Path(path) if path else self.path
+            tmp = target.with_name(target.name + ".tmp")
+            shutil.rmtree(tmp, ignore_errors=True)
+
+            # 기존 행이 그대로 앞부분에 남으면(삭제 행을 압축하지 않으면) 파생 인덱스는 새 행만 추가하면 됨
+            rows_kept = not (compact and self._deleted.any())
+            lineage = (self._lineage + [[self.generation, len(self._base_ids)]])[-16:] if rows_kept and self.generation else []
+            write_store(tmp, self._iter_rows(include_deleted=not compact), dimension=self.dimension, dtype=str(self.dtype),
+                        lineage=lineage)
+            if not compact:
+                np.save(tmp / "deleted.npy", self._deleted_mask())
+            self._save_extra(tmp, compact)
+            if target == self.path and target.exists():
+                for child in target.iterdir():
+                    if child.is_dir() and child.suffix not in (".tmp", ".old") and not (tmp / child.name).exists():
+                        child.rename(tmp / child.name)
+
+            if self._meta_file is not None:
+                self._meta_file.close()
+            self._base = None
+            replace_directory(tmp, target)
+            self._load(target, self.dimension, str(self.dtype))
+
+
+def replace_directory(tmp: Path, target: Path):
+    """Swap a fully written directory into place (renames; the previous copy is removed afterwards)"""
+    old = target.with_name(target.name + ".old")
+    shutil.rmtree(old, ignore_errors=True)
+    if target.exists():
+        target.rename(old)
+    tmp.rename(target)
+    shutil.rmtree(old, ignore_errors=True)
+
+
+def read_manifest(path) -> Dict:
+    return json.loads((Path(path) / "manifest.json").read_text())
+
+
+def write_store(path, records: Iterable[VectorRecord], dimension: int = DEFAULT_DIMENSION, dtype: str = "float16",
+                lineage: Optional[List[List]] = None):
+    """
+    Stream records into a NumpyVectorStore directory without holding all vectors in RAM
+
+    Vectors are written to a raw file first, then converted into vectors.npy
+    through a memory-mapped .npy header once the row count is known.
+    """
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    np_dtype = np.dtype(dtype)
+    raw_path = path / "vectors.raw"
+
+    ids = []
+    offsets = []
+    with open(raw_path, "wb") as raw, open(path / "metadata.jsonl", "wb") as meta:
+        for record in records:
+            vector = np.asarray(record.values, dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            if norm > 0:
+                vector = vector / norm
+            raw.write(vector.astype(np_dtype).tobytes())
+            offsets.append(meta.tell())
+            meta.write(json.dumps(record.metadata or {}, ensure_ascii=False).encode("utf-8") + b"\n")
+            ids.append(record.id)
+
+    count = len(ids)
+    matrix = np.lib.format.open_memmap(path / "vectors.npy", mode="w+", dtype=np_dtype, shape=(count, dimension))
+    if count:
+        matrix[:] = np.memmap(raw_path, dtype=np_dtype, mode="r", shape=(count, dimension))
+    matrix.flush()
+    del matrix
+    raw_path.unlink()
+
+    np.save(path / "metadata.idx.npy", np.asarray(offsets, dtype=np.int64))
+    (path / "ids.json").write_text(json.dumps(ids))
+    (path / "manifest.json").write_text(json.dumps({
+        "dimension": dimension, "dtype": np_dtype.name, "count": count,
+        "generation": uuid.uuid4().hex, "lineage": lineage or []
+    }))
+    logger.info(f"Wrote local vector store: {count} vectors → {path}")
+
+
+# ============================================================
+# Factory
+# ============================================================
+
+def get_vector_store(index_name: Optional[str] = None, backend: Optional[str] = None) -> VectorStore:
+    """
+    Create the configured vector store
+
+    Env:
+        VECTOR_STORE_BACKEND: "pinecone" (default), "numpy" (exact), "hnsw" (approximate)
+            or "int8" / "pq" (quantized codes in RAM, exact re-scoring from disk)
+        LOCAL_VECTOR_STORE_PATH: directory of the local store (all local backends)
+        HNSW_EF: HNSW query-time candidate list size (recall vs latency)
+        VECTOR_RESCORE_CANDIDATES: candidates re-scored exactly by the quantized backends
+        PINECONE_INDEX_NAME / PINECONE_HOST: Pinecone index (backend default)
+        PINECONE_REQUEST_TIMEOUT: client-side query timeout in seconds (default VECTOR_SEARCH_TIMEOUT)
+    """
+    backend = (backend or os.getenv("VECTOR_STORE_BACKEND", "pinecone")).lower()
+    local_path = os.getenv("LOCAL_VECTOR_STORE_PATH", str(Path(__file__).parent.parent / "vector_data" / "numpy"))
+    if backend == "numpy":
+        return NumpyVectorStore(local_path)
+    if backend == "hnsw":
+        from app.hnsw_store import HnswVectorStore
+        return HnswVectorStore(local_path, ef=int(os.getenv("HNSW_EF", "64")))
+    if backend in ("int8", "pq"):
+        from app.quantized_store import QuantizedVectorStore
+        return QuantizedVectorStore(local_path, method=backend, rescore=int(os.getenv("VECTOR_RESCORE_CANDIDATES", "200")))
+    if backend == "pinecone":
+        index_name = index_name or os.getenv("PINECONE_INDEX_NAME", "medical-guidelines-kr")
+        request_timeout = float(os.getenv("PINECONE_REQUEST_TIMEOUT", os.getenv("VECTOR_SEARCH_TIMEOUT", "5.0")))
+        return PineconeVectorStore(index_name, host=os.getenv("PINECONE_HOST"), request_timeout=request_timeout)
+    raise ValueError(f"Unknown VECTOR_STORE_BACKEND: {backend}")
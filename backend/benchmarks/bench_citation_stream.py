@@ -0,0 +1,132 @@
+"""
+답변 스트림 citation 처리 마이크로벤치마크
+기존 버퍼 방식(델타마다 버퍼 전체 re.search + partial prefix 검사) vs CitationStreamParser (상태 머신)
+
+사용법:
+    python benchmarks/bench_citation_stream.py
+    python benchmarks/bench_citation_stream.py --answers 200 --tokens 2000 --delta-chars 4
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.citation_stream import CitationStreamParser, rewrite_citations
+from bench_vector_store import percentile
+
+SENTENCES = [
+    "Oclacitinib at 0.4-0.6 mg/kg PO q12h reduced pruritus scores by more than 50% in 67% of dogs.",
+    "Serum T4 concentrations above 4.0 ug/dL support a diagnosis of hyperthyroidism in cats.",
+    "**Late-evening feeding is the first-line management for bilious vomiting syndrome.**",
+    "Allergen-specific immunotherapy improves long-term outcome when combined with environmental control.",
+    "| Drug | Dose | Frequency |\n|---|---|---|\n| Maropitant | 1 mg/kg | q24h |",
+]
+
+
+def build_answer(rng: random.Random, tokens: int, num_references: int) -> str:
+    parts, length = [], 0
+    while length < tokens * 4:
+        paragraph = " ".join(rng.choice(SENTENCES) for _ in range(rng.randint(2, 4)))
+        cited = sorted(rng.sample(range(num_references + 2), rng.randint(1, 3)))
+        parts.append(paragraph + "{{citation:" + ",".join(map(str, cited)) + "}}\n\n")
+        length += len(parts[-1])
+    return "".join(parts)
+
+
+def split_deltas(rng: random.Random, text: str, mean_chars: int) -> List[str]:
+    deltas, i = [], 0
+    while i < len(text):
+        size = max(1, int(rng.expovariate(1 / mean_chars)))
+        deltas.append(text[i:i + size])
+        i += size
+    return deltas
+
+
+def legacy_stream(deltas: List[str], num_references: int) -> str:
+    """The previous generate_answer_stream buffering loop (logging removed)"""
+    pattern = r'\{\{?citation:(\d+(?:,\d+)*)\}\}?'
+    partial_patterns = ['{{', '{{c', '{{ci', '{{cit', '{{cita', '{{citat',
+                        '{{citati', '{{citatio', '{{citation', '{{citation:']
+
+    def rewrite(match):
+        valid = [n for n in (int(x) for x in match.group(1).split(',')) if 0 <= n < num_references]
+        return '{{citation:' + ','.join(map(str, valid)) + '}}' if valid else ''
+
+    out, buffer = [], ""
+    for content in deltas:
+        buffer += content
+        output_chunk = ""
+        while buffer:
+            match = re.search(pattern, buffer)
+            if match:
+                output_chunk += buffer[:match.start()] + rewrite(match)
+                buffer = buffer[match.end():]
+            elif buffer and ('{{' in buffer[-10:] or buffer.endswith('{{')):
+                last_double_brace_idx = buffer.rfind('{{')
+                if last_double_brace_idx != -1:
+                    after_brace = buffer[last_double_brace_idx:]
+                    if any(after_brace.startswith(p) for p in partial_patterns):
+                        if last_double_brace_idx > 0:
+                            output_chunk += buffer[:last_double_brace_idx]
+                            buffer = buffer[last_double_brace_idx:]
+                        break
+                    output_chunk += buffer
+                    buffer = ""
+                    break
+                if len(buffer) > 25:
+                    output_chunk += buffer[:-25]
+                    buffer = buffer[-25:]
+                break
+            else:
+                output_chunk += buffer
+                buffer = ""
+                break
+        out.append(output_chunk)
+    out.append(re.sub(pattern, rewrite, buffer))
+    return "".join(out)
+
+
+def parser_stream(deltas: List[str], num_references: int) -> str:
+    parser = CitationStreamParser(num_references)
+    out = [parser.feed(delta) for delta in deltas]
+    out.append(parser.flush())
+    return "".join(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Citation stream processing microbenchmark")
+    parser.add_argument("--answers", type=int, default=100)
+    parser.add_argument("--tokens", type=int, default=2000, help="Approximate answer length in tokens")
+    parser.add_argument("--delta-chars", type=int, default=4, help="Mean characters per streamed delta")
+    parser.add_argument("--references", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    answers = []
+    for _ in range(args.answers):
+        text = build_answer(rng, args.tokens, args.references)
+        answers.append((text, split_deltas(rng, text, args.delta_chars)))
+    deltas_per_answer = sum(len(d) for _, d in answers) / len(answers)
+    print(f"📊 {args.answers} answers, ~{args.tokens} tokens, {deltas_per_answer:.0f} deltas each\n")
+    print(f"{'implementation':<20}{'p50/answer':>12}{'p99/answer':>12}{'us/delta':>10}{'matches batch':>15}")
+
+    for label, run in (("legacy buffer", legacy_stream), ("state machine", parser_stream)):
+        timings, correct = [], 0
+        for text, deltas in answers:
+            started = time.perf_counter()
+            result = run(deltas, args.references)
+            timings.append(time.perf_counter() - started)
+            correct += result == rewrite_citations(text, args.references)
+        per_delta = sum(timings) / sum(len(d) for _, d in answers) * 1e6
+        print(f"{label:<20}{percentile(timings, 50) * 1000:>10.2f}ms{percentile(timings, 99) * 1000:>10.2f}ms"
+              f"{per_delta:>10.2f}{f'{correct}/{len(answers)}':>15}")
+
+
+if __name__ == "__main__":
+    main()
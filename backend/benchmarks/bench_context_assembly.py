@@ -0,0 +1,105 @@
+"""
+컨텍스트 조립 전/후 프롬프트 토큰 비교 (오프라인)
+청크마다 "Document i" 블록을 만들던 기존 방식 vs 논문별 블록 + 인접 청크 병합/overlap 제거
+
+사용법:
+    # 합성 쿼리 세트 (ingestion과 같은 600자/150자 overlap 청킹, 인접 청크가 섞인 검색 결과)
+    python benchmarks/bench_context_assembly.py --synthetic 200
+
+    # 기록된 요청 재생 (JSONL: {"question": ..., "context_chunks": [...]} - 요청에 사용된 전체 청크, done 이벤트는 ID만 포함)
+    python benchmarks/bench_context_assembly.py --replay replay.jsonl
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import Dict, List
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.context_assembly import assemble_context, group_chunks_by_document
+from app.token_budget import TokenCounter
+from bench_vector_store import percentile
+
+WORDS = ("dogs cats clinical signs treatment diagnosis therapy dose study patients skin chronic acute "
+         "response owners veterinary disease management outcome oclacitinib 0.4 mg/kg serum T4 was were").split()
+
+
+def chunk_text(text: str, chunk_size: int = 600, overlap: int = 150) -> List[str]:
+    """Same splitting as recursive_chunk_with_overlap in the XML ingestion scripts"""
+    chunks, start = [], 0
+    while start < len(text):
+        end = min(start + chunk_size, len(text))
+        if end < len(text):
+            last_sep = text.rfind(". ", start, end)
+            if last_sep > start:
+                end = last_sep + 2
+        chunk = text[start:end].strip()
+        if len(chunk) > 50:
+            chunks.append(chunk)
+        next_start = end - overlap
+        start = next_start if next_start > start else start + chunk_size
+    return chunks
+
+
+def build_synthetic(n_requests: int) -> List[Dict]:
+    """Retrieval-like results: runs of neighbouring chunks from a few papers plus scattered hits"""
+    rng = np.random.default_rng(3)
+    papers = []
+    for p in range(60):
+        sentences = [" ".join(rng.choice(WORDS, size=rng.integers(8, 20))).capitalize() + "." for _ in range(120)]
+        papers.append(chunk_text(" ".join(sentences)))
+
+    requests = []
+    for _ in range(n_requests):
+        chunks = []
+        for p in rng.choice(len(papers), size=6, replace=False):
+            start = int(rng.integers(len(papers[p]) - 4))
+            run = int(rng.integers(1, 4))
+            for index in range(start, start + run):
+                chunks.append({"title": f"Paper {p}", "source": "J", "pmcid": f"PMC{p}", "page": index, "text": papers[p][index]})
+        order = rng.permutation(len(chunks))
+        requests.append({"question": "synthetic", "context_chunks": [chunks[i] for i in order][:15]})
+    return requests
+
+
+def legacy_context(chunks: List[Dict]) -> str:
+    """Previous prompt layout: one "Document i" block per chunk"""
+    return "\n\n".join(f"Document {i}: {chunk.get('text', '')}" for i, chunk in enumerate(chunks[:25]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt tokens before/after context assembly")
+    parser.add_argument("--replay", help="JSONL of recorded requests with context_chunks")
+    parser.add_argument("--synthetic", type=int, default=200, help="Synthetic requests when --replay is not given")
+    args = parser.parse_args()
+
+    if args.replay:
+        with open(args.replay, encoding="utf-8") as f:
+            requests = [json.loads(line) for line in f if line.strip()]
+    else:
+        requests = build_synthetic(args.synthetic)
+
+    counter = TokenCounter("gpt-4o")
+    before, after, passages, chunks = [], [], [], []
+    for item in requests:
+        doc_order, seen_docs = group_chunks_by_document(item["context_chunks"])
+        context_text, stats = assemble_context(doc_order, seen_docs)
+        before.append(counter.count(legacy_context(item["context_chunks"])))
+        after.append(counter.count(context_text))
+        passages.append(stats.passages)
+        chunks.append(stats.chunks)
+
+    saved = [b - a for b, a in zip(before, after)]
+    print(f"📊 {len(requests)} requests, tokenizer: {counter.backend}")
+    print(f"   chunks/request   {np.mean(chunks):8.1f}  → passages/request {np.mean(passages):.1f}")
+    print(f"   context tokens   before p50={percentile(before, 50):6.0f}  after p50={percentile(after, 50):6.0f}")
+    print(f"   tokens saved     mean={np.mean(saved):6.1f}  p50={percentile(saved, 50):6.0f}  "
+          f"p99={percentile(saved, 99):6.0f}  ({sum(saved) / max(1, sum(before)) * 100:.1f}% of context tokens)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+HNSW recall / 지연시간 벤치마크
+exact search(NumpyVectorStore) 결과를 정답으로 ef 값별 recall@15와 p50/p99 쿼리 지연시간 측정
+
+사용법:
+    # 합성 데이터
+    python benchmarks/bench_hnsw_recall.py --synthetic 100000
+
+    # 실제 인덱스 (export_vector_store.py + build_local_index.py)
+    python benchmarks/bench_hnsw_recall.py --path vector_data/numpy --ef 32 64 128 256
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.hnsw_store import HnswVectorStore
+from app.vector_store import NumpyVectorStore
+from bench_vector_store import build_synthetic, percentile
+
+
+def sample_queries(store: NumpyVectorStore, count: int, noise: float = 0.3):
+    """Stored vectors + gaussian noise: realistic queries that land near the data"""
+    rng = np.random.default_rng(7)
+    rows = rng.choice(len(store._base_ids), size=count, replace=False)
+    queries = []
+    for row in rows:
+        vector = store._vector(int(row))
+        queries.append((vector + rng.standard_normal(len(vector)) * noise / np.sqrt(len(vector))).tolist())
+    return queries
+
+
+def run(store, queries, top_k, filter=None):
+    ids, timings = [], []
+    for query in queries:
+        started = time.perf_counter()
+        result = store.query(query, top_k=top_k, filter=filter, include_metadata=False)
+        timings.append(time.perf_counter() - started)
+        ids.append([m.id for m in result.matches])
+    return ids, timings
+
+
+def recall(approx, exact, top_k):
+    return float(np.mean([len(set(a) & set(e)) / max(1, min(top_k, len(e))) for a, e in zip(approx, exact)]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HNSW recall@k vs exact search")
+    parser.add_argument("--path", help="Local store directory (HNSW graph is built if missing)")
+    parser.add_argument("--synthetic", type=int, default=0)
+    parser.add_argument("--dimension", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=15)
+    parser.add_argument("--ef", type=int, nargs="+", default=[16, 32, 64, 128, 256])
+    parser.add_argument("--M", type=int, default=16)
+    parser.add_argument("--filter-journal", help="Also measure a journal-filtered query")
+    args = parser.parse_args()
+
+    tmp = None
+    path = args.path
+    if not path:
+        tmp = tempfile.TemporaryDirectory()
+        path = os.path.join(tmp.name, "store")
+        print(f"🔧 Building synthetic store: {args.synthetic or 20000} x {args.dimension}")
+        build_synthetic(path, args.synthetic or 20000, args.dimension, "float16")
+        args.filter_journal = args.filter_journal or "BMC Veterinary Research"
+
+    exact_store = NumpyVectorStore(path)
+    queries = sample_queries(exact_store, args.queries)
+    filter = {"journal": {"$eq": args.filter_journal}} if args.filter_journal else None
+
+    exact_ids, exact_times = run(exact_store, queries, args.top_k)
+    exact_filtered = run(exact_store, queries, args.top_k, filter)[0] if filter else None
+
+    started = time.perf_counter()
+    hnsw = HnswVectorStore(path, M=args.M, num_threads=os.cpu_count() or 1)
+    hnsw.save()
+    print(f"📊 {hnsw.stats().total_vector_count:,} vectors, graph ready in {time.perf_counter() - started:.1f}s (M={hnsw.M})\n")
+
+    print(f"{'search':<16}{'recall@' + str(args.top_k):>12}{'p50':>10}{'p99':>10}")
+    print(f"{'exact':<16}{1.0:>12.3f}{percentile(exact_times, 50) * 1000:>8.1f}ms{percentile(exact_times, 99) * 1000:>8.1f}ms")
+    for ef in args.ef:
+        hnsw.ef = ef
+        approx_ids, times = run(hnsw, queries, args.top_k)
+        print(f"{'hnsw ef=' + str(ef):<16}{recall(approx_ids, exact_ids, args.top_k):>12.3f}"
+              f"{percentile(times, 50) * 1000:>8.1f}ms{percentile(times, 99) * 1000:>8.1f}ms")
+        if filter:
+            filtered_ids, times = run(hnsw, queries, args.top_k, filter)
+            print(f"{'  + journal':<16}{recall(filtered_ids, exact_filtered, args.top_k):>12.3f}"
+                  f"{percentile(times, 50) * 1000:>8.1f}ms{percentile(times, 99) * 1000:>8.1f}ms")
+
+    if tmp:
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
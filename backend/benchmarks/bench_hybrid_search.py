@@ -0,0 +1,117 @@
+"""
+Hybrid (BM25 + dense, RRF) vs dense-only 검색 벤치마크 (오프라인)
+known-item 쿼리에 대해 정답 청크의 recall@25와 검색 지연시간 비교
+
+사용법:
+    # 합성 코퍼스 (약물명/용량 토큰이 들어간 청크 + 노이즈를 섞은 쿼리 임베딩)
+    python benchmarks/bench_hybrid_search.py --synthetic 20000
+
+    # 실제 인덱스 + 라벨링된 쿼리 (JSONL: {"queries": [...], "embeddings": [[...], ...], "relevant_ids": [...]})
+    python benchmarks/bench_hybrid_search.py --path vector_data/numpy --bm25-path vector_data/bm25 --queries queries.jsonl
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.bm25 import BM25Index, build_bm25_index
+from app.vector_search import chunk_handle, reciprocal_rank_fusion
+from app.vector_store import NumpyVectorStore, VectorRecord, get_vector_store, write_store
+from bench_vector_store import percentile
+
+GENERIC_WORDS = ("dogs cats clinical signs treatment diagnosis therapy dose study patients "
+                 "skin chronic acute response owners veterinary disease management outcome").split()
+
+
+def build_synthetic(tmp: str, count: int, dimension: int, n_queries: int) -> List[Dict]:
+    """Corpus where each chunk mentions one drug + dosage; queries name the drug, embeddings are noisy"""
+    rng = np.random.default_rng(11)
+    centers = rng.standard_normal((max(1, count // 200), dimension)).astype(np.float32)
+    cluster = rng.integers(len(centers), size=count)
+    vectors = centers[cluster] + 0.6 * rng.standard_normal((count, dimension)).astype(np.float32)
+
+    records, documents = [], []
+    for i in range(count):
+        words = " ".join(rng.choice(GENERIC_WORDS, size=60))
+        text = f"{words} drug{i:06d} {rng.integers(1, 20) / 10:.1f}-{rng.integers(2, 40) / 10:.1f} mg/kg {words[:80]}"
+        metadata = {"title": f"Paper {i // 10}", "text": text}
+        records.append(VectorRecord(id=f"chunk_{i}", values=vectors[i], metadata=metadata))
+        documents.append((f"chunk_{i}", metadata))
+
+    write_store(os.path.join(tmp, "store"), records, dimension=dimension, dtype="float16")
+    build_bm25_index(os.path.join(tmp, "bm25"), documents)
+
+    queries = []
+    for target in rng.choice(count, size=n_queries, replace=False):
+        # Paraphrased question: the embedding captures the topic, only weakly the specific chunk
+        center = centers[cluster[target]]
+        embedding = center + 0.1 * (vectors[target] - center) + 0.6 * rng.standard_normal(dimension).astype(np.float32)
+        text = f"What is the dose of drug{target:06d} for {' '.join(rng.choice(GENERIC_WORDS, size=4))}?"
+        queries.append({"queries": [text], "embeddings": [embedding.tolist()], "relevant_ids": [f"chunk_{target}"]})
+    return queries
+
+
+def evaluate(store, bm25: BM25Index, queries: List[Dict], top_k: int, cut: int, hybrid: bool):
+    recalls, timings = [], []
+    for item in queries:
+        started = time.perf_counter()
+        dense = [
+            [dict(m.metadata, id=m.id, score=m.score) for m in result.matches]
+            for result in store.query_batch(item["embeddings"], top_k=top_k)
+        ]
+        if hybrid:
+            chunks = reciprocal_rank_fusion(dense + bm25.search_many(item["queries"], top_k))
+        else:
+            chunks = sorted((c for r in dense for c in r), key=lambda c: c["score"], reverse=True)
+        found = {chunk_handle(c) for c in chunks[:cut]}
+        timings.append(time.perf_counter() - started)
+        relevant = set(item["relevant_ids"])
+        recalls.append(len(found & relevant) / len(relevant))
+    return float(np.mean(recalls)), timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hybrid BM25 + dense retrieval benchmark")
+    parser.add_argument("--path", help="Local vector store directory")
+    parser.add_argument("--bm25-path", help="BM25 index directory")
+    parser.add_argument("--queries", help="JSONL of labelled queries")
+    parser.add_argument("--synthetic", type=int, default=0)
+    parser.add_argument("--dimension", type=int, default=256)
+    parser.add_argument("--num-queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=15, help="Results per query list")
+    parser.add_argument("--cut", type=int, default=25, help="Context size (recall@cut)")
+    args = parser.parse_args()
+
+    tmp = None
+    if args.path and args.bm25_path and args.queries:
+        store = NumpyVectorStore(args.path) if os.path.isdir(args.path) else get_vector_store()
+        bm25 = BM25Index(args.bm25_path)
+        with open(args.queries, encoding="utf-8") as f:
+            queries = [json.loads(line) for line in f if line.strip()]
+    else:
+        tmp = tempfile.TemporaryDirectory()
+        print(f"🔧 Building synthetic corpus: {args.synthetic or 20000} chunks (dim={args.dimension})")
+        queries = build_synthetic(tmp.name, args.synthetic or 20000, args.dimension, args.num_queries)
+        store = NumpyVectorStore(os.path.join(tmp.name, "store"))
+        bm25 = BM25Index(os.path.join(tmp.name, "bm25"))
+
+    print(f"📊 {len(queries)} queries, BM25 {bm25.stats()}\n")
+    print(f"{'path':<14}{'recall@' + str(args.cut):>12}{'p50':>10}{'p99':>10}")
+    for label, hybrid in (("dense only", False), ("hybrid (RRF)", True)):
+        recall, timings = evaluate(store, bm25, queries, args.top_k, args.cut, hybrid)
+        print(f"{label:<14}{recall:>12.3f}{percentile(timings, 50) * 1000:>8.1f}ms{percentile(timings, 99) * 1000:>8.1f}ms")
+
+    if tmp:
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
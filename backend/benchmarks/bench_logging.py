@@ -0,0 +1,203 @@
+"""
+요청당 로깅 오버헤드 벤치마크 (호출 스레드 = 이벤트 루프 기준 µs/request)
+기존 print(..., file=sys.stderr, flush=True) ~60회 vs app.structured_logging
+(INFO JSON 로그 + debug 세부 로그, 큐 기반 핸들러 → 백그라운드 스레드에서 기록)
+
+로그 출력은 파이프로 보내고 별도 스레드가 읽어서 버림 (Railway 로그 수집기 역할).
+요청 사이에는 --idle-ms 동안 쉼 (실제 요청은 대부분 OpenAI/Pinecone 응답 대기 - 이때 writer 스레드가 기록).
+--drain-delay-ms로 수집기가 느린 상황(파이프가 가득 차 write가 블로킹)을 재현
+
+사용법:
+    python benchmarks/bench_logging.py
+    python benchmarks/bench_logging.py --requests 2000 --references 12
+    python benchmarks/bench_logging.py --drain-delay-ms 2   # 느린 로그 수집기 (4KB 읽고 2ms 쉼)
+"""
+
+import argparse
+import io
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Callable, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.structured_logging import configure_logging, logging_stats, request_id_var, shutdown_logging
+from bench_vector_store import percentile
+
+QUESTION = "고양이 만성 신장병 2기에서 인 제한 식이는 언제 시작해야 하나요?"
+QUERIES = ["feline chronic kidney disease stage 2 phosphate restriction", "renal diet timing IRIS stage 2 cats",
+           "phosphate binders cats CKD", "dietary phosphorus feline renal", "CKD progression diet cats"]
+
+
+class PipeSink:
+    """Write end of an OS pipe drained by a reader thread"""
+
+    def __init__(self, drain_delay: float = 0.0):
+        self.read_fd, write_fd = os.pipe()
+        self.stream = io.TextIOWrapper(os.fdopen(write_fd, "wb", buffering=0), encoding="utf-8", write_through=True)
+        self.drain_delay = drain_delay
+        self.bytes = 0
+        self._reader = threading.Thread(target=self._drain, daemon=True)
+        self._reader.start()
+
+    def _drain(self):
+        while True:
+            data = os.read(self.read_fd, 4096 if self.drain_delay else 65536)
+            if not data:
+                return
+            self.bytes += len(data)
+            if self.drain_delay:
+                time.sleep(self.drain_delay)
+
+    def close(self):
+        self.stream.close()
+        self._reader.join()
+
+
+def legacy_request(out, references: int):
+    """The print calls query_stream made for one answered question"""
+    p = lambda message: print(message, file=out, flush=True)
+    p(f"\n{'='*80}")
+    p("📨 New query received")
+    p(f"   Question: {QUESTION}")
+    p("   Language from frontend: Korean")
+    p("   Previous context: 0 IDs + 0 chunks")
+    p("   History: 2 messages")
+    p("🔍 질문 텍스트 기반 언어 자동 감지: Korean")
+    p(f"   Question preview: {QUESTION[:100]}...")
+    p(f"✅ 번역 완료: {QUESTION[:50]}... → {QUERIES[0][:50]}...")
+    p("🔍 Question type: treatment (llm)")
+    p(f"🔍 Query expansion: {len(QUERIES)} queries (English)")
+    for i, q in enumerate(QUERIES):
+        p(f"   Query {i+1}: {q}")
+    p(f"🧮 Embedding: {len(QUERIES)} queries → 0 cached, {len(QUERIES)} requested in 1 batch")
+    p("🔀 RRF: dense 50 + BM25 50 결과 병합")
+    p("✅ Query Expansion 검색 완료: 72개 청크 발견 → MMR로 15개 선택 (논문 8편)")
+    p("🤖 generate_answer_stream started")
+    p(f"   question: {QUESTION[:50]}...")
+    p("   language parameter: 'Korean' (type: str)")
+    p("   context_chunks: 15")
+    p(f"   doc_order: {references} documents")
+    p("   conversation_history: 2 messages")
+    p("   token budget (treatment): 7321/12000 planned - fixed 1800, history 420 (2 msgs, 0 dropped), context 5101 (15 chunks, 0 dropped)")
+    p("   context assembly: 15 chunks → 9 passages, 812 chars saved (20431 → 19619)")
+    p(f"✅ Streaming complete. Seen citations: {list(range(references))}")
+    p("   Total: 412 chunks, 1893 chars")
+    p("   prompt tokens: 7290 actual vs 7321 planned, 1792 cached (prefix 3fa2c1), TTFT 0.61s")
+    p("✅ Total chunks sent: 412")
+    p("📚 참고문헌 추출 및 후속 질문 생성 시작...")
+    p("🔍 extract_references_from_answer:")
+    p(f"   doc_order: {references} documents")
+    p(f"   cited_indices from answer: {list(range(references))}")
+    p(f"   Remapping: { {i: i for i in range(references)} }")
+    p("   Original answer length: 1893")
+    p("   Remapped answer length: 1893")
+    for i in range(references):
+        p(f"🔗 URL 생성 중 - PMCID: 'PMC{9000 + i}', PMID: '{3100 + i}', DOI: '10.1111/vde.{i}'")
+        p(f"   ✅ PMCID URL 생성: https://www.ncbi.nlm.nih.gov/pmc/articles/PMC{9000 + i}/")
+    p(f"✅ Extracted {references} references")
+    p(f"✅ 참고문헌 전송 완료: {references}개")
+    p("✅ 스트리밍 완료 이벤트 전송")
+    p("✅ Generated 3 follow-up questions in Korean")
+    p("✅ 후속 질문 전송: 3개")
+    p("⏱️  ok in 4.12s - language_detection 0ms, query_understanding 812ms, embedding 95ms, vector_search 140ms")
+    p("📡 SSE: 48 frames / 412 deltas, 24510 bytes, 11.6 frames/s over 4.12s")
+
+
+def structured_request(logger: logging.Logger, references: int):
+    """The logger calls query_stream makes for the same question"""
+    logger.info(f"📨 New query received: {QUESTION[:100]}",
+                extra={"language": "Korean", "previous_context_ids": 0, "previous_context_chunks": 0,
+                       "history_messages": 2, "summarized_messages": 0, "session_id": None})
+    logger.debug("Detected language: %s", "Korean")
+    logger.debug("Translated: %s → %s", QUESTION[:50], QUERIES[0][:50])
+    logger.info(f"🔍 Question type: treatment (llm), {len(QUERIES)} expanded queries", extra={"detected_language": "Korean"})
+    for i, q in enumerate(QUERIES):
+        logger.debug("Expanded query %d: %s", i + 1, q, extra={"sampled": True})
+    logger.info(f"🧮 Embedding: {len(QUERIES)} queries → 0 cached, {len(QUERIES)} requested in 1 batch")
+    logger.info("🔀 RRF: dense 50 + BM25 50 결과 병합")
+    logger.info("✅ Query Expansion 검색 완료: 72개 청크 발견 → MMR로 15개 선택 (논문 8편)")
+    logger.debug("generate_answer_stream: language %r, %d chunks, %d documents, %d history messages", "Korean", 15, references, 2)
+    logger.info("Token budget (treatment): 7321/12000 planned",
+                extra={"budget": {"fixed": 1800, "history": 420, "context": 5101, "history_messages": 2,
+                                  "dropped_messages": 0, "chunks": 15, "dropped_chunks": 0}})
+    logger.debug("Context assembly: %d chunks → %d passages, %d chars saved (%d → %d)", 15, 9, 812, 20431, 19619)
+    logger.info("✅ Streaming complete: 412 chunks, 1893 chars", extra={"citations": list(range(references))})
+    logger.info("Prompt tokens: 7290 actual vs 7321 planned, 1792 cached",
+                extra={"usage": {"prompt_tokens": 7290, "completion_tokens": 512, "cached_tokens": 1792},
+                       "prefix": "3fa2c1", "ttft": 0.61})
+    logger.debug("Answer chunks sent: %d", 412)
+    logger.debug("Extracting references and generating follow-up questions")
+    logger.debug("extract_references_from_answer: %d documents, cited %s", references, list(range(references)))
+    logger.debug("Citation remapping: %s", {i: i for i in range(references)})
+    for i in range(references):
+        logger.debug("Reference URL: %s (PMCID %r, PMID %r, DOI %r)", f"https://www.ncbi.nlm.nih.gov/pmc/articles/PMC{9000 + i}/",
+                     f"PMC{9000 + i}", str(3100 + i), f"10.1111/vde.{i}", extra={"sampled": True})
+    logger.info(f"✅ Extracted {references} references")
+    logger.debug("References sent: %d", references)
+    logger.debug("Done event sent")
+    logger.info("✅ Generated 3 follow-up questions in Korean")
+    logger.debug("Follow-up questions sent: %d", 3)
+    logger.info("⏱️  ok in 4.12s - language_detection 0ms, query_understanding 812ms, embedding 95ms, vector_search 140ms",
+                extra={"outcome": "ok", "seconds": 4.12,
+                       "stages": {"language_detection": 0.0001, "query_understanding": 0.812, "embedding": 0.095, "vector_search": 0.14},
+                       "sse": {"frames": 48, "deltas": 412, "bytes": 24510, "frames_per_sec": 11.6, "seconds": 4.12}})
+
+
+def measure(run: Callable[[], None], requests: int, idle: float) -> List[float]:
+    """Caller-thread time per request (µs), excluding the idle gap between requests"""
+    samples = []
+    for i in range(requests):
+        time.sleep(idle)
+        token = request_id_var.set(f"bench-{i}")
+        started = time.perf_counter()
+        run()
+        samples.append((time.perf_counter() - started) * 1e6)
+        request_id_var.reset(token)
+    return samples
+
+
+def report(label: str, samples: List[float], sink: PipeSink, drained_s: float, extra: str = ""):
+    print(f"{label:<28}{sum(samples) / len(samples):>10.1f}{percentile(samples, 50):>10.1f}{percentile(samples, 99):>10.1f}"
+          f"{sink.bytes / len(samples):>12.0f}{drained_s:>12.2f}  {extra}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-request logging overhead benchmark")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--references", type=int, default=8, help="References per answer (per-reference log lines)")
+    parser.add_argument("--idle-ms", type=float, default=1.0, help="Idle time between requests (upstream waits)")
+    parser.add_argument("--drain-delay-ms", type=float, default=0.0, help="Sleep per 4 KB pipe read in the log collector")
+    parser.add_argument("--levels", default="INFO,DEBUG", help="Structured logger levels to measure")
+    args = parser.parse_args()
+    drain_delay = args.drain_delay_ms / 1000
+    idle = args.idle_ms / 1000
+
+    print(f"📊 {args.requests} requests, {args.references} references each, idle {args.idle_ms}ms, "
+          f"drain delay {args.drain_delay_ms}ms\n")
+    print(f"{'logging':<28}{'mean us':>10}{'p50 us':>10}{'p99 us':>10}{'bytes/req':>12}{'total s':>12}")
+
+    sink = PipeSink(drain_delay)
+    started = time.perf_counter()
+    samples = measure(lambda: legacy_request(sink.stream, args.references), args.requests, idle)
+    sink.close()
+    report("print(flush=True)", samples, sink, time.perf_counter() - started)
+
+    for level in args.levels.split(","):
+        sink = PipeSink(drain_delay)
+        configure_logging(level=level, fmt="json", sample_rate=0.1, queue_size=10_000, stream=sink.stream)
+        logger = logging.getLogger("bench")
+        started = time.perf_counter()
+        samples = measure(lambda: structured_request(logger, args.references), args.requests, idle)
+        stats = logging_stats()
+        shutdown_logging()  # 큐에 남은 레코드를 모두 기록할 때까지 대기
+        sink.close()
+        report(f"queue + JSON ({level})", samples, sink, time.perf_counter() - started,
+               f"dropped {stats['dropped_queue_full']} (queue full), {stats['dropped_sampling']} (sampling)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+양자화 벡터 스토어 메모리 / recall 리포트
+int8, PQ(m별) 코드의 RAM 사용량과 exact search 대비 recall@25 (re-scoring 후보 수별) 비교
+
+사용법:
+    # 합성 데이터
+    python benchmarks/bench_quantized_recall.py --synthetic 50000
+
+    # 실제 인덱스 (export_vector_store.py로 내보낸 디렉토리)
+    python benchmarks/bench_quantized_recall.py --path vector_data/numpy --pq-m 48 96 192 --rescore 0 100 400
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.quantized_store import QuantizedVectorStore
+from app.vector_store import NumpyVectorStore
+from bench_hnsw_recall import recall, run, sample_queries
+from bench_vector_store import build_synthetic, percentile
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory footprint vs recall@k of quantized stores")
+    parser.add_argument("--path", help="Local store directory (codes are built if missing)")
+    parser.add_argument("--synthetic", type=int, default=0)
+    parser.add_argument("--dimension", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--top-k", type=int, default=25)
+    parser.add_argument("--pq-m", type=int, nargs="+", default=[48, 96, 192])
+    parser.add_argument("--rescore", type=int, nargs="+", default=[0, 100, 400],
+                        help="Exact re-scoring candidates (0 = only the top-k ranked on the codes)")
+    args = parser.parse_args()
+
+    tmp = None
+    path = args.path
+    if not path:
+        tmp = tempfile.TemporaryDirectory()
+        path = os.path.join(tmp.name, "store")
+        print(f"🔧 Building synthetic store: {args.synthetic or 20000} x {args.dimension}")
+        build_synthetic(path, args.synthetic or 20000, args.dimension, "float16")
+
+    exact = NumpyVectorStore(path)
+    total = exact.stats().total_vector_count
+    queries = sample_queries(exact, args.queries)
+    exact_ids, exact_times = run(exact, queries, args.top_k)
+
+    float32_mb = total * exact.dimension * 4 / 1e6
+    print(f"📊 {total:,} vectors, dim={exact.dimension} (float32 in RAM: {float32_mb:.1f} MB)\n")
+    print(f"{'store':<14}{'RAM':>10}{'ratio':>8}{'rescore':>9}{'recall@' + str(args.top_k):>12}{'p50':>10}{'p99':>10}")
+    print(f"{'float32':<14}{float32_mb:>8.1f}MB{1.0:>7.1f}x{'-':>9}{1.0:>12.3f}"
+          f"{percentile(exact_times, 50) * 1000:>8.1f}ms{percentile(exact_times, 99) * 1000:>8.1f}ms")
+
+    configs = [("int8", None)] + [("pq", m) for m in args.pq_m if exact.dimension % m == 0]
+    for method, m in configs:
+        started = time.perf_counter()
+        store = QuantizedVectorStore(path, method=method, pq_m=m or 96)
+        if method == "pq" and store.quantizer.m != m:
+            # Codes on disk were built with another m - rebuild in memory for this row
+            store.method, store.pq_m = method, m
+            store._build()
+        build_time = time.perf_counter() - started
+        label = method if m is None else f"pq m={m}"
+        memory_mb = store.memory_bytes() / 1e6
+
+        for rescore in args.rescore:
+            store.rescore = rescore
+            ids, times = run(store, queries, args.top_k)
+            print(f"{label:<14}{memory_mb:>8.1f}MB{float32_mb / memory_mb:>7.1f}x{rescore:>9}"
+                  f"{recall(ids, exact_ids, args.top_k):>12.3f}"
+                  f"{percentile(times, 50) * 1000:>8.1f}ms{percentile(times, 99) * 1000:>8.1f}ms")
+        print(f"{'':<14}(codes built in {build_time:.1f}s)")
+
+    if tmp:
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
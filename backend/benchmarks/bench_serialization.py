@@ -0,0 +1,133 @@
+"""
+SSE 이벤트 직렬화 마이크로벤치마크 (events/sec)
+기존 create_sse_event (json.dumps + f-string, StreamingResponse에서 UTF-8 인코딩) vs
+app.serialization (stdlib / orjson, 델타 프레임 prefix 및 고정 상태 이벤트 사전 인코딩)
+
+사용법:
+    # 합성 답변 스트림 (델타 ~500개 + 청크 25개짜리 done 이벤트)
+    python benchmarks/bench_serialization.py
+
+    # 기록된 스트림 재생 (curl -N로 저장한 /query-stream 응답, "data: {...}" 줄)
+    curl -N -X POST localhost:8000/query-stream -H 'Content-Type: application/json' \\
+        -d '{"question": "...", "stream_flush_ms": 0}' > stream.txt
+    python benchmarks/bench_serialization.py --replay stream.txt
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.serialization import StdlibSerializer, get_serializer, orjson
+from bench_citation_stream import SENTENCES, split_deltas
+
+STATUS_MESSAGES = {
+    "translating": "질문 이해 중...",
+    "embedding": "벡터 변환 중...",
+    "searching": "문헌 검색 중...",
+    "generating": "답변 생성 중...",
+}
+
+
+def synthetic_stream(rng: random.Random, deltas: int, chunks: int) -> List[Dict]:
+    events = [{"status": status, "message": message} for status, message in STATUS_MESSAGES.items()]
+    answer = " ".join(rng.choice(SENTENCES) + "{{citation:%d}}" % rng.randrange(chunks) for _ in range(deltas // 20))
+    pieces = split_deltas(rng, answer, max(1, len(answer) // deltas))
+    events += [{"status": "streaming", "chunk": piece} for piece in pieces]
+    references = [{
+        "source": "Veterinary Dermatology", "title": f"Paper {i}", "authors": "Kim J, Lee S", "journal": "Vet Dermatol",
+        "year": "2021", "doi": f"10.1111/vde.{i}", "url": f"https://www.ncbi.nlm.nih.gov/pmc/articles/PMC{i}/",
+        "relevance_score": round(rng.random(), 4)
+    } for i in range(8)]
+    events.append({"status": "references_ready", "answer": answer, "references": references})
+    context_chunks = [{
+        "id": f"paper_PMC{i // 3}_c{i % 3}", "title": f"Paper {i // 3}", "source": "Vet Dermatol", "journal": "Vet Dermatol",
+        "year": "2021", "page": i % 3, "pmcid": f"PMC{i // 3}", "score": rng.random(), "rrf_score": rng.random() / 30,
+        "text": " ".join(rng.choice(SENTENCES) for _ in range(16))
+    } for i in range(chunks)]
+    events.append({"status": "done", "message": "완료", "context_chunks": context_chunks})
+    events.append({"status": "followup_ready", "followup_questions": ["용량은?", "부작용은?", "대체 약물은?"]})
+    return events
+
+
+def load_stream(path: str) -> List[Dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line[len("data: "):]) for line in f if line.startswith("data: ")]
+
+
+def legacy_encoder(data: dict) -> bytes:
+    """The previous create_sse_event plus the str -> bytes step StreamingResponse performs"""
+    return f"data: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
+
+
+def layer_encoder(serializer) -> Callable[[dict], bytes]:
+    """app.serialization framing for one backend, with pre-encoded constant and delta prefix frames"""
+    constants = {status: b"data: " + serializer.dumps({"status": status, "message": message}) + b"\n\n"
+                 for status, message in STATUS_MESSAGES.items()}
+    prefix = b'data: {"status":"streaming","chunk":'
+
+    def encode(data: dict) -> bytes:
+        status = data.get("status")
+        if status == "streaming":
+            return prefix + serializer.dumps(data["chunk"]) + b"}\n\n"
+        if status in constants and data.get("message") == STATUS_MESSAGES[status]:
+            return constants[status]
+        return b"data: " + serializer.dumps(data) + b"\n\n"
+
+    return encode
+
+
+def measure(encode: Callable[[dict], bytes], events: List[Dict], repeat: int) -> Dict:
+    done = [event for event in events if event.get("status") == "done"]
+    started = time.perf_counter()
+    total_bytes = 0
+    for _ in range(repeat):
+        for event in events:
+            total_bytes += len(encode(event))
+    elapsed = time.perf_counter() - started
+
+    done_started = time.perf_counter()
+    for _ in range(repeat):
+        for event in done:
+            encode(event)
+    done_elapsed = time.perf_counter() - done_started
+    return {
+        "events_per_sec": len(events) * repeat / elapsed,
+        "mb_per_sec": total_bytes / elapsed / 1e6,
+        "stream_ms": elapsed / repeat * 1000,
+        "done_us": done_elapsed / max(1, len(done) * repeat) * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SSE event serialization microbenchmark")
+    parser.add_argument("--replay", help="Recorded /query-stream output (data: lines)")
+    parser.add_argument("--deltas", type=int, default=500, help="Streaming deltas in the synthetic answer")
+    parser.add_argument("--chunks", type=int, default=25, help="Context chunks in the synthetic done event")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    events = load_stream(args.replay) if args.replay else synthetic_stream(random.Random(0), args.deltas, args.chunks)
+    print(f"📊 {len(events)} events per stream, {sum(len(legacy_encoder(e)) for e in events) / 1024:.1f} KB, "
+          f"x{args.repeat}\n")
+    print(f"{'serializer':<24}{'events/s':>12}{'MB/s':>8}{'ms/stream':>11}{'done us':>10}")
+
+    implementations = [("legacy json.dumps", legacy_encoder), ("stdlib layer", layer_encoder(StdlibSerializer()))]
+    if orjson is not None:
+        implementations.append(("orjson layer", layer_encoder(get_serializer("orjson"))))
+    else:
+        print("⚠️  orjson not installed - only the stdlib backend is measured")
+
+    for label, encode in implementations:
+        result = measure(encode, events, args.repeat)
+        print(f"{label:<24}{result['events_per_sec']:>12,.0f}{result['mb_per_sec']:>8.1f}"
+              f"{result['stream_ms']:>11.3f}{result['done_us']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
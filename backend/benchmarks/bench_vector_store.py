@@ -0,0 +1,107 @@
+"""
+로컬 벡터 스토어 검색 지연시간 벤치마크
+NumpyVectorStore에 대해 단건 쿼리 vs 배치 쿼리(확장 쿼리 3개를 한 번의 행렬곱으로) 지연시간 측정
+
+사용법:
+    # 합성 데이터 (200k x 1536, float16)
+    python benchmarks/bench_vector_store.py --synthetic 200000
+
+    # export_vector_store.py로 내보낸 실제 인덱스
+    python benchmarks/bench_vector_store.py --path vector_data/numpy --queries 50
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from typing import List
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.vector_store import NumpyVectorStore, VectorRecord, write_store
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[idx]
+
+
+def build_synthetic(path: str, count: int, dimension: int, dtype: str):
+    rng = np.random.default_rng(0)
+    journals = ["Frontiers in Veterinary Science", "BMC Veterinary Research", "Journal of Veterinary Science"]
+
+    # Clustered data (topics) - closer to real embeddings than uniform noise
+    centers = rng.standard_normal((max(1, count // 100), dimension), dtype=np.float32)
+
+    def records():
+        for i in range(count):
+            yield VectorRecord(
+                id=f"vec_{i}",
+                values=centers[rng.integers(len(centers))] + 0.5 * rng.standard_normal(dimension, dtype=np.float32),
+                metadata={"journal": journals[i % len(journals)], "year": str(2000 + i % 25), "text": f"chunk {i}"}
+            )
+
+    write_store(path, records(), dimension=dimension, dtype=dtype)
+
+
+def report(label: str, timings: List[float]):
+    print(f"  {label:<28} p50={percentile(timings, 50) * 1000:7.1f}ms  p99={percentile(timings, 99) * 1000:7.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local vector store latency benchmark")
+    parser.add_argument("--path", help="Existing NumpyVectorStore directory")
+    parser.add_argument("--synthetic", type=int, default=0, help="Build a synthetic store with N vectors")
+    parser.add_argument("--dimension", type=int, default=1536)
+    parser.add_argument("--dtype", choices=["float16", "float32"], default="float16")
+    parser.add_argument("--queries", type=int, default=30)
+    parser.add_argument("--top-k", type=int, default=15)
+    args = parser.parse_args()
+
+    tmp = None
+    path = args.path
+    if not path:
+        tmp = tempfile.TemporaryDirectory()
+        path = os.path.join(tmp.name, "store")
+        print(f"🔧 Building synthetic store: {args.synthetic or 50000} x {args.dimension} ({args.dtype})")
+        build_synthetic(path, args.synthetic or 50000, args.dimension, args.dtype)
+
+    store = NumpyVectorStore(path)
+    stats = store.stats()
+    print(f"📊 {stats.total_vector_count:,} vectors, dim={stats.dimension}, dtype={store.dtype}")
+
+    rng = np.random.default_rng(1)
+    queries = [rng.standard_normal((3, stats.dimension)).astype(np.float32).tolist() for _ in range(args.queries)]
+
+    store.query(queries[0][0], top_k=args.top_k)  # page in the mmap
+
+    single, batched, filtered = [], [], []
+    for expanded in queries:
+        started = time.perf_counter()
+        for vector in expanded:
+            store.query(vector, top_k=args.top_k)
+        single.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        store.query_batch(expanded, top_k=args.top_k)
+        batched.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        store.query(expanded[0], top_k=args.top_k, filter={"journal": {"$eq": "BMC Veterinary Research"}})
+        filtered.append(time.perf_counter() - started)
+
+    print(f"\n⏱️  {args.queries} rounds of 3 expanded queries (top_k={args.top_k})")
+    report("3 x single query", single)
+    report("1 x batched query (3)", batched)
+    report("single query + filter", filtered)
+
+    if tmp:
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+"""
+오프라인 부하 테스트용 OpenAI / Pinecone 대역 서버
+실제 API 비용 없이 main.app을 띄우기 위한 로컬 HTTP 서버 두 개:
+
+- OpenAI (OPENAI_BASE_URL=http://127.0.0.1:<port>/v1)
+  /v1/chat/completions: 질문 이해(JSON 모드), 후속 질문, 예시 질문, 히스토리 요약, 스트리밍 답변
+  /v1/embeddings: 텍스트 해시로 만든 결정적 벡터 (float / base64)
+  첫 토큰까지 지연(--llm-latency-ms)과 스트리밍 속도(--tokens-per-sec)를 설정 가능
+- Pinecone 데이터 플레인 (PINECONE_HOST=http://127.0.0.1:<port>)
+  /query, /vectors/fetch, /describe_index_stats - 합성 논문 코퍼스에 대한 exact cosine 검색
+
+사용법:
+    python benchmarks/fake_upstreams.py --openai-port 8101 --pinecone-port 8102 --tokens-per-sec 80
+
+    OPENAI_BASE_URL=http://127.0.0.1:8101/v1 OPENAI_API_KEY=fake \\
+    PINECONE_HOST=http://127.0.0.1:8102 PINECONE_API_KEY=fake \\
+    uvicorn main:app --port 8000
+
+offline_load_test.py가 이 서버와 main.app을 함께 띄우고 부하를 건다.
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import time
+from dataclasses import dataclass
+from typing import Dict, List
+
+import numpy as np
+from fastapi import FastAPI, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.serialization import FastJSONResponse
+from app.vector_store import matches_filter
+from bench_citation_stream import SENTENCES
+
+DIMENSION = 1536  # text-embedding-3-small
+
+
+@dataclass
+class UpstreamConfig:
+    llm_latency: float = 0.3        # 요청 → 첫 토큰 (비스트리밍 응답은 + 생성 시간)
+    tokens_per_sec: float = 80.0    # 스트리밍 답변 속도
+    answer_tokens: int = 300        # 스트리밍 답변 길이 (토큰 ≈ 4글자)
+    embedding_latency: float = 0.05
+    vector_latency: float = 0.03
+    corpus_size: int = 2000         # 합성 코퍼스 청크 수 (논문당 5청크)
+    error_rate: float = 0.0         # 이 비율만큼 OpenAI 요청에 500 응답
+    seed: int = 0
+
+
+def text_vector(text: str, dimension: int = DIMENSION) -> np.ndarray:
+    """Deterministic unit vector for a text (same text → same embedding across processes)"""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(dimension).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+# ============================================================
+# OpenAI
+# ============================================================
+
+def _completion(content: str, model: str, prompt_tokens: int) -> Dict:
+    return {
+        "id": f"chatcmpl-fake{random.getrandbits(32):08x}", "object": "chat.completion", "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": max(1, len(content) // 4),
+                  "total_tokens": prompt_tokens + max(1, len(content) // 4)}
+    }
+
+
+def _chunk(model: str, content: str = None, usage: Dict = None) -> str:
+    data = {"id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+            "choices": [] if usage else [{"index": 0, "delta": {"content": content}, "finish_reason": None}]}
+    if usage:
+        data["usage"] = usage
+    return f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _reply_for(messages: List[Dict], body: Dict) -> str:
+    """Non-streaming replies in the format each main.py call site parses"""
+    prompt = "\n".join(str(m.get("content", "")) for m in messages)
+    if body.get("response_format", {}).get("type") == "json_object":
+        match = re.search(r"Question \((\w+)\):\n(.*?)\n\nRespond", prompt, re.DOTALL)
+        question = match.group(2).strip() if match else prompt[-200:]
+        english = f"veterinary question {hashlib.md5(question.encode()).hexdigest()[:8]}"
+        return json.dumps({"english_query": english,
+                           "alternative_queries": [f"{english} causes", f"{english} treatment"],
+                           "question_type": "general"})
+    if "JSON array" in prompt or "JSON配列" in prompt or "JSON 배열" in prompt:
+        return json.dumps([f"Sample question {i} about {random.choice(SENTENCES)[:40]}?" for i in range(3)])
+    if "follow-up questions" in prompt:
+        return "\n".join(f"What is the next step for finding {i}?" for i in range(3))
+    if "Summarize this veterinary consultation" in prompt:
+        return "Dog, 8 kg, vomiting for two days; bloodwork pending."
+    return random.choice(SENTENCES)
+
+
+def _answer_tokens(prompt: str, count: int) -> List[str]:
+    """Answer split into ~4 character tokens, with a citation per sentence"""
+    documents = max(1, len(re.findall(r"(?m)^Document \d+:", prompt)))
+    rng = random.Random(len(prompt))
+    parts = []
+    while sum(len(p) for p in parts) < count * 4:
+        parts.append(rng.choice(SENTENCES) + "{{citation:%d}} " % rng.randrange(min(documents, 8)))
+    text = "".join(parts)[:count * 4]
+    return [text[i:i + 4] for i in range(0, len(text), 4)]
+
+
+def create_openai_app(config: UpstreamConfig) -> FastAPI:
+    app = FastAPI(title="fake-openai")
+
+    def fail() -> bool:
+        return config.error_rate > 0 and random.random() < config.error_rate
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        messages = body.get("messages", [])
+        model = body.get("model", "gpt-4o")
+        prompt_tokens = sum(len(str(m.get("content", ""))) for m in messages) // 4
+        if fail():
+            await asyncio.sleep(config.llm_latency)
+            return JSONResponse({"error": {"message": "fake upstream error", "type": "server_error"}}, status_code=500)
+
+        if not body.get("stream"):
+            # 비스트리밍 응답도 생성 시간은 같음 (첫 토큰 + 토큰 수 / 속도)
+            reply = _reply_for(messages, body)
+            generation = len(reply) / 4 / config.tokens_per_sec if config.tokens_per_sec > 0 else 0
+            await asyncio.sleep(config.llm_latency + generation)
+            return _completion(reply, model, prompt_tokens)
+
+        if body.get("response_format", {}).get("type") == "json_object":
+            # 스트리밍 질문 이해 (추측 검색) - JSON 응답을 토큰 단위로
+            reply = _reply_for(messages, body)
+            tokens = [reply[i:i + 4] for i in range(0, len(reply), 4)]
+        else:
+            tokens = _answer_tokens("\n".join(str(m.get("content", "")) for m in messages), config.answer_tokens)
+
+        async def stream():
+            await asyncio.sleep(config.llm_latency)
+            interval = 1 / config.tokens_per_sec if config.tokens_per_sec > 0 else 0
+            started = time.perf_counter()
+            for i, token in enumerate(tokens):
+                # 누적 시간 기준으로 sleep (토큰마다 sleep 오차가 쌓이지 않게)
+                delay = started + i * interval - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                yield _chunk(model, token)
+            if body.get("stream_options", {}).get("include_usage"):
+                yield _chunk(model, usage={"prompt_tokens": prompt_tokens, "completion_tokens": len(tokens),
+                                           "total_tokens": prompt_tokens + len(tokens),
+                                           "prompt_tokens_details": {"cached_tokens": 0}})
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        await asyncio.sleep(config.embedding_latency)
+        if fail():
+            return JSONResponse({"error": {"message": "fake upstream error", "type": "server_error"}}, status_code=500)
+        data = []
+        for i, text in enumerate(inputs):
+            vector = text_vector(str(text))
+            embedding = (base64.b64encode(vector.tobytes()).decode() if body.get("encoding_format") == "base64"
+                         else vector.tolist())
+            data.append({"object": "embedding", "index": i, "embedding": embedding})
+        tokens = sum(len(str(text)) for text in inputs) // 4
+        return FastJSONResponse({"object": "list", "data": data, "model": body.get("model", "text-embedding-3-small"),
+                                 "usage": {"prompt_tokens": tokens, "total_tokens": tokens}})
+
+    return app
+
+
+# ============================================================
+# Pinecone data plane
+# ============================================================
+
+class SyntheticCorpus:
+    """Papers of 5 chunks each, with metadata shaped like the production index"""
+
+    def __init__(self, size: int, seed: int = 0):
+        rng = random.Random(seed)
+        self.ids: List[str] = []
+        self.metadata: List[Dict] = []
+        for i in range(size):
+            paper = i // 5
+            self.ids.append(f"paper_PMC{100000 + paper}_c{i % 5}")
+            self.metadata.append({
+                "title": f"Synthetic veterinary study {paper}", "authors": "Kim J, Lee S, Park H",
+                "journal": "Journal of Veterinary Internal Medicine", "source": "Journal of Veterinary Internal Medicine",
+                "year": str(2005 + paper % 20), "doi": f"10.1111/jvim.{100000 + paper}", "pmcid": f"PMC{100000 + paper}",
+                "pmid": str(30000000 + paper), "page": i % 5,
+                "text": " ".join(rng.choice(SENTENCES) for _ in range(12))
+            })
+        matrix = np.random.default_rng(seed).standard_normal((size, DIMENSION)).astype(np.float32)
+        self.vectors = matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+        self.rows = {vector_id: row for row, vector_id in enumerate(self.ids)}
+
+    def query(self, vector: List[float], top_k: int, filter: Dict = None) -> List[tuple]:
+        scores = self.vectors @ np.asarray(vector, dtype=np.float32)
+        ranked = np.argsort(-scores)
+        results = []
+        for row in ranked:
+            if filter and not matches_filter(self.metadata[row], filter):
+                continue
+            results.append((int(row), float(scores[row])))
+            if len(results) >= top_k:
+                break
+        return results
+
+
+def create_pinecone_app(config: UpstreamConfig) -> FastAPI:
+    app = FastAPI(title="fake-pinecone")
+    corpus = SyntheticCorpus(config.corpus_size, config.seed)
+
+    @app.post("/query")
+    async def query(request: Request):
+        body = await request.json()
+        await asyncio.sleep(config.vector_latency)
+        matches = []
+        for row, score in corpus.query(body["vector"], int(body.get("topK", 10)), body.get("filter")):
+            match = {"id": corpus.ids[row], "score": score, "values": []}
+            if body.get("includeMetadata"):
+                match["metadata"] = corpus.metadata[row]
+            if body.get("includeValues"):
+                match["values"] = corpus.vectors[row].tolist()
+            matches.append(match)
+        # dict를 그대로 반환하면 jsonable_encoder가 float 하나하나를 순회 (includeValues 응답에서 수백 ms)
+        return FastJSONResponse({"matches": matches, "namespace": body.get("namespace", ""), "usage": {"readUnits": 5}})
+
+    @app.get("/vectors/fetch")
+    async def fetch(ids: List[str] = Query(default=[])):
+        await asyncio.sleep(config.vector_latency)
+        vectors = {
+            vector_id: {"id": vector_id, "values": corpus.vectors[corpus.rows[vector_id]].tolist(),
+                        "metadata": corpus.metadata[corpus.rows[vector_id]]}
+            for vector_id in ids if vector_id in corpus.rows
+        }
+        return FastJSONResponse({"vectors": vectors, "namespace": "", "usage": {"readUnits": 1}})
+
+    @app.api_route("/describe_index_stats", methods=["GET", "POST"])
+    async def describe_index_stats():
+        return {"namespaces": {"": {"vectorCount": len(corpus.ids)}}, "dimension": DIMENSION,
+                "indexFullness": 0.0, "totalVectorCount": len(corpus.ids)}
+
+    return app
+
+
+async def serve(config: UpstreamConfig, openai_port: int, pinecone_port: int, host: str = "127.0.0.1"):
+    import uvicorn
+
+    servers = [
+        uvicorn.Server(uvicorn.Config(create_openai_app(config), host=host, port=openai_port, log_level="warning")),
+        uvicorn.Server(uvicorn.Config(create_pinecone_app(config), host=host, port=pinecone_port, log_level="warning")),
+    ]
+    await asyncio.gather(*(server.serve() for server in servers))
+
+
+def add_upstream_arguments(parser: argparse.ArgumentParser):
+    defaults = UpstreamConfig()
+    parser.add_argument("--llm-latency-ms", type=float, default=defaults.llm_latency * 1000)
+    parser.add_argument("--tokens-per-sec", type=float, default=defaults.tokens_per_sec)
+    parser.add_argument("--answer-tokens", type=int, default=defaults.answer_tokens)
+    parser.add_argument("--embedding-latency-ms", type=float, default=defaults.embedding_latency * 1000)
+    parser.add_argument("--vector-latency-ms", type=float, default=defaults.vector_latency * 1000)
+    parser.add_argument("--corpus-size", type=int, default=defaults.corpus_size)
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate, help="Fraction of OpenAI calls answered with 500")
+
+
+def config_from_args(args) -> UpstreamConfig:
+    return UpstreamConfig(
+        llm_latency=args.llm_latency_ms / 1000, tokens_per_sec=args.tokens_per_sec, answer_tokens=args.answer_tokens,
+        embedding_latency=args.embedding_latency_ms / 1000, vector_latency=args.vector_latency_ms / 1000,
+        corpus_size=args.corpus_size, error_rate=args.error_rate
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenAI / Pinecone stand-ins for offline load tests")
+    parser.add_argument("--openai-port", type=int, default=8101)
+    parser.add_argument("--pinecone-port", type=int, default=8102)
+    add_upstream_arguments(parser)
+    args = parser.parse_args()
+    asyncio.run(serve(config_from_args(args), args.openai_port, args.pinecone_port))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+/query-stream 동시 요청 부하 테스트
+N개의 SSE 스트림을 동시에 열어 처리량(throughput)과 지연시간을 측정
+
+사용법:
+    # 서버 실행 (워커 1개)
+    uvicorn main:app --port 8000 --workers 1
+
+    # 부하 테스트
+    python benchmarks/load_test_query_stream.py --concurrency 20 --requests 40
+
+동일한 옵션으로 변경 전/후 커밋의 서버를 각각 측정해서 비교한다.
+실제 API 없이 측정하려면 benchmarks/offline_load_test.py (로컬 OpenAI/Pinecone 대역 서버 사용).
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+DEFAULT_QUESTIONS = [
+    "What are the core vaccines recommended for dogs?",
+    "How is atopic dermatitis in dogs treated?",
+    "What are the clinical signs of feline infectious peritonitis?",
+    "강아지가 아침에 거품토를 했는데 원인이 뭔가요?",
+    "猫が食後に吐き続けます。原因は何ですか？",
+]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """정렬된 값 목록에서 백분위수 계산 (nearest-rank)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[idx]
+
+
+async def run_single_request(client: httpx.AsyncClient, url: str, question: str) -> Dict:
+    """SSE 스트림 하나를 끝까지 읽고 타이밍 기록"""
+    started = time.perf_counter()
+    first_token_at = None
+    events = 0
+    status = "ok"
+
+    try:
+        async with client.stream("POST", url, json={"question": question}) as response:
+            if response.status_code != 200:
+                return {"status": f"http_{response.status_code}", "total": time.perf_counter() - started}
+
+            async for line in response.aiter_lines():
+                if not line.startswith("data: "):
+                    continue
+                events += 1
+                try:
+                    data = json.loads(line[6:])
+                except json.JSONDecodeError:
+                    continue
+                if data.get("status") == "streaming" and first_token_at is None:
+                    first_token_at = time.perf_counter()
+                elif data.get("status") == "error":
+                    status = "error"
+    except httpx.HTTPError as e:
+        status = f"exception:{type(e).__name__}"
+
+    finished = time.perf_counter()
+    return {
+        "status": status,
+        "ttft": (first_token_at - started) if first_token_at else None,
+        "total": finished - started,
+        "events": events,
+    }
+
+
+async def run_load_test(base_url: str, concurrency: int, total_requests: int, timeout: float,
+                        questions: Optional[List[str]] = None) -> List[Dict]:
+    """concurrency 개의 요청을 동시에 유지하면서 total_requests 개 처리"""
+    url = f"{base_url.rstrip('/')}/query-stream"
+    questions = questions or DEFAULT_QUESTIONS
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        async def bounded(i: int) -> Dict:
+            async with semaphore:
+                return await run_single_request(client, url, questions[i % len(questions)])
+
+        return await asyncio.gather(*(bounded(i) for i in range(total_requests)))
+
+
+def print_report(results: List[Dict], wall_time: float, concurrency: int):
+    ok = [r for r in results if r["status"] == "ok"]
+    ttfts = [r["ttft"] for r in ok if r.get("ttft") is not None]
+    totals = [r["total"] for r in ok]
+
+    print("=" * 70)
+    print(f"🧪 /query-stream 부하 테스트 (concurrency={concurrency})")
+    print("=" * 70)
+    print(f"요청 수: {len(results)}  성공: {len(ok)}  실패: {len(results) - len(ok)} "
+          f"(오류율 {(len(results) - len(ok)) / max(1, len(results)) * 100:.1f}%)")
+    print(f"총 소요 시간: {wall_time:.2f}s")
+    print(f"처리량: {len(ok) / wall_time:.2f} req/s, SSE {sum(r.get('events', 0) for r in results) / wall_time:.1f} events/s")
+    if ttfts:
+        print(f"TTFT  p50={percentile(ttfts, 50):.2f}s  p95={percentile(ttfts, 95):.2f}s  p99={percentile(ttfts, 99):.2f}s  max={max(ttfts):.2f}s")
+    if totals:
+        print(f"Total p50={percentile(totals, 50):.2f}s  p95={percentile(totals, 95):.2f}s  p99={percentile(totals, 99):.2f}s  mean={statistics.mean(totals):.2f}s")
+    failures = {}
+    for r in results:
+        if r["status"] != "ok":
+            failures[r["status"]] = failures.get(r["status"], 0) + 1
+    for reason, count in failures.items():
+        print(f"   ❌ {reason}: {count}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent /query-stream load test")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--timeout", type=float, default=180.0)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    results = asyncio.run(run_load_test(args.url, args.concurrency, args.requests, args.timeout))
+    print_report(results, time.perf_counter() - started, args.concurrency)
+
+
+if __name__ == "__main__":
+    main()
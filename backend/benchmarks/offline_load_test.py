@@ -0,0 +1,173 @@
+"""
+오프라인 end-to-end 부하 테스트 (API 비용 없음)
+로컬 OpenAI / Pinecone 대역 서버(fake_upstreams.py)와 main.app(uvicorn)을 각각 별도 프로세스로 띄우고
+/query-stream 세션 N개를 동시에 돌려 TTFT, 전체 지연 백분위수, SSE events/s, 오류율을 측정
+
+캐시는 기본적으로 끈 상태(디스크 tier 없음, 답변 캐시 off, 요청마다 다른 질문)로 cold path를 측정.
+--warm이면 같은 질문 5개를 반복해서 캐시가 채워진 상태를 측정.
+대역 서버와 부하 생성기도 같은 머신의 CPU를 쓰므로, 코어가 1-2개인 머신에서는 높은 concurrency의
+지연시간이 실제보다 크게 나옴 (변경 전/후 비교는 같은 머신, 같은 옵션으로)
+
+사용법:
+    python benchmarks/offline_load_test.py --concurrency 20 --requests 100
+    python benchmarks/offline_load_test.py --concurrency 50 --requests 200 --tokens-per-sec 40 --llm-latency-ms 600
+    python benchmarks/offline_load_test.py --error-rate 0.05          # 업스트림 오류 주입
+    python benchmarks/offline_load_test.py --env SSE_COALESCE_MS=0    # main.app 설정 비교
+
+    # 이전 커밋과 비교: git worktree로 체크아웃한 backend/를 같은 대역 서버로 측정
+    git worktree add /tmp/before <commit>
+    python benchmarks/offline_load_test.py --backend-dir /tmp/before/backend
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fake_upstreams import add_upstream_arguments
+from load_test_query_stream import DEFAULT_QUESTIONS, print_report, run_load_test
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(url: str, process: subprocess.Popen, timeout: float, log_path: str):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{url} exited with {process.returncode} - see {log_path}")
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} not ready after {timeout:.0f}s - see {log_path}")
+
+
+def app_environment(openai_port: int, pinecone_port: int, workdir: str, warm: bool, overrides: List[str]) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update({
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{openai_port}/v1",
+        "OPENAI_API_KEY": "sk-offline",
+        "PINECONE_HOST": f"http://127.0.0.1:{pinecone_port}",
+        "PINECONE_API_KEY": "offline",
+        "VECTOR_STORE_BACKEND": "pinecone",
+        "LOG_LEVEL": "WARNING",
+        # 이전 실행/실서버 캐시와 섞이지 않게 디스크 tier는 임시 디렉터리 또는 off
+        "EMBEDDING_CACHE_PATH": os.path.join(workdir, "embeddings.sqlite3") if warm else "",
+        "TRANSLATION_CACHE_PATH": os.path.join(workdir, "translations.sqlite3") if warm else "",
+        "CHUNK_STORE_PATH": "",
+        "SESSION_STORE_PATH": "",
+        "BM25_INDEX_PATH": os.path.join(workdir, "bm25"),
+        "ANSWER_CACHE_ENABLED": "true" if warm else "false",
+    })
+    for item in overrides:
+        key, _, value = item.partition("=")
+        env[key] = value
+    return env
+
+
+def build_questions(total: int, warm: bool) -> List[str]:
+    if warm:
+        return DEFAULT_QUESTIONS
+    # 요청마다 다른 질문 → 번역/임베딩 캐시 miss (전체 파이프라인)
+    return [f"{DEFAULT_QUESTIONS[i % len(DEFAULT_QUESTIONS)]} (case {i})" for i in range(total)]
+
+
+async def scrape_stages(base_url: str) -> str:
+    """Stage p95 bucket bounds from /metrics (same numbers a Prometheus histogram_quantile would bracket)"""
+    async with httpx.AsyncClient(timeout=10.0) as client:
+        response = await client.get(f"{base_url}/metrics")
+    if response.status_code != 200:
+        return ""
+    buckets: Dict[str, List[tuple]] = {}
+    for line in response.text.splitlines():
+        if line.startswith("rag_stage_duration_seconds_bucket{"):
+            labels, value = line[len("rag_stage_duration_seconds_bucket{"):].rsplit("} ", 1)
+            fields = dict(part.split("=", 1) for part in labels.split(","))
+            stage, le = fields["stage"].strip('"'), fields["le"].strip('"')
+            buckets.setdefault(stage, []).append((float("inf") if le == "+Inf" else float(le), float(value)))
+    summary = []
+    for stage, series in buckets.items():
+        total = series[-1][1]
+        if total:
+            bound = next(le for le, count in series if count >= 0.95 * total)
+            summary.append(f"{stage} ≤{bound:g}s")
+    return ", ".join(summary)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline /query-stream load test against local OpenAI / Pinecone stand-ins")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--app", default="main:app", help="ASGI app served by uvicorn (from --backend-dir)")
+    parser.add_argument("--backend-dir", default=BACKEND_DIR, help="backend/ checkout to serve (e.g. a worktree of an older commit)")
+    parser.add_argument("--warm", action="store_true", help="Repeat 5 questions with caches enabled")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="Extra env for main.app")
+    add_upstream_arguments(parser)
+    args = parser.parse_args()
+
+    openai_port, pinecone_port, app_port = free_port(), free_port(), free_port()
+    workdir = tempfile.mkdtemp(prefix="offline_load_")
+    upstream_log = os.path.join(workdir, "upstreams.log")
+    app_log = os.path.join(workdir, "app.log")
+    upstream_args = [f"--{name}={getattr(args, name.replace('-', '_'))}" for name in (
+        "llm-latency-ms", "tokens-per-sec", "answer-tokens", "embedding-latency-ms", "vector-latency-ms",
+        "corpus-size", "error-rate")]
+
+    processes = []
+    try:
+        with open(upstream_log, "w") as log:
+            processes.append(subprocess.Popen(
+                [sys.executable, os.path.join(os.path.dirname(__file__), "fake_upstreams.py"),
+                 f"--openai-port={openai_port}", f"--pinecone-port={pinecone_port}", *upstream_args],
+                stdout=log, stderr=subprocess.STDOUT))
+        wait_until_ready(f"http://127.0.0.1:{pinecone_port}/describe_index_stats", processes[0], 30, upstream_log)
+
+        with open(app_log, "w") as log:
+            processes.append(subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", args.app, "--host", "127.0.0.1", "--port", str(app_port),
+                 "--workers", "1", "--log-level", "warning"],
+                cwd=args.backend_dir, env=app_environment(openai_port, pinecone_port, workdir, args.warm, args.env),
+                stdout=log, stderr=subprocess.STDOUT))
+        base_url = f"http://127.0.0.1:{app_port}"
+        wait_until_ready(f"{base_url}/health", processes[1], 120, app_log)
+
+        print(f"🧪 upstreams: LLM {args.llm_latency_ms:.0f}ms + {args.tokens_per_sec:.0f} tok/s x {args.answer_tokens}, "
+              f"embedding {args.embedding_latency_ms:.0f}ms, vector {args.vector_latency_ms:.0f}ms, "
+              f"errors {args.error_rate:.0%} ({'warm' if args.warm else 'cold'} caches)")
+        started = time.perf_counter()
+        results = asyncio.run(run_load_test(base_url, args.concurrency, args.requests, args.timeout,
+                                            build_questions(args.requests, args.warm)))
+        print_report(results, time.perf_counter() - started, args.concurrency)
+        stages = asyncio.run(scrape_stages(base_url))
+        if stages:
+            print(f"Stage p95: {stages}")
+        print(f"Logs: {workdir}")
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+if __name__ == "__main__":
+    main()
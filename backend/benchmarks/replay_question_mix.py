@@ -0,0 +1,138 @@
+"""
+고정 질문 세트 재생 벤치마크 (업스트림 카세트와 함께 사용)
+실서비스 질문 유형(test_prenatal_query.py, test_followup.py, test_question_classification.py의 케이스)을
+/query-stream → 후속 질문 턴(session_id) → /generate-questions 순서로 실행하고 요청별 TTFT/전체 시간을 기록.
+카세트 기록(record) 한 번 → 재생(replay)으로 파이프라인 변경 전/후를 같은 업스트림 응답으로 비교
+
+사용법:
+    # 1) 실제 API로 한 번 기록 (디스크 캐시 off - 재생 때와 같은 업스트림 호출이 나가도록, 카세트에는 질문/답변 원문이 남으므로 저장소 밖 경로에)
+    CASSETTE_MODE=record CASSETTE_PATH=/var/tmp/cassettes/mix.jsonl EMBEDDING_CACHE_PATH= TRANSLATION_CACHE_PATH= \\
+        ANSWER_CACHE_ENABLED=false uvicorn main:app --port 8000
+    python benchmarks/replay_question_mix.py --output before.json
+
+    # 2) 변경 후 코드로 재생 (API 호출 없음, 기록된 지연시간 그대로)
+    CASSETTE_MODE=replay CASSETTE_PATH=/var/tmp/cassettes/mix.jsonl EMBEDDING_CACHE_PATH= TRANSLATION_CACHE_PATH= \\
+        ANSWER_CACHE_ENABLED=false uvicorn main:app --port 8000
+    python benchmarks/replay_question_mix.py --compare before.json --output after.json
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+from load_test_query_stream import percentile
+
+# (질문, 후속 질문 턴 실행 여부)
+QUESTION_MIX = [
+    ("What are the effects of prenatal testosterone excess?", False),
+    ("What are the clinical signs of feline infectious peritonitis?", True),
+    ("강아지가 아침에 거품토를 했는데 원인이 뭔가요?", True),
+    ("우리 강아지가 설사해요", False),
+    ("My dog vomited foam this morning", False),
+    ("犬が吐いています", False),
+    ("슬개골 탈구 치료는 어떻게 하나요?", True),
+    ("How to treat atopic dermatitis?", False),
+    ("What is the prognosis for dogs with lymphoma?", False),
+]
+
+CATEGORIES = [("Diagnostic Protocols", "English"), ("치료 대안", "Korean")]
+
+
+async def run_query(client: httpx.AsyncClient, base_url: str, payload: Dict) -> Dict:
+    """SSE 스트림 하나를 끝까지 읽고 타이밍 + done/followup 이벤트 기록"""
+    started = time.perf_counter()
+    result = {"question": payload["question"], "turn": 2 if payload.get("session_id") else 1, "status": "ok",
+              "ttft": None, "followups": [], "session_id": None, "references": 0, "answer_chars": 0}
+    async with client.stream("POST", f"{base_url}/query-stream", json=payload) as response:
+        if response.status_code != 200:
+            result["status"] = f"http_{response.status_code}"
+        async for line in response.aiter_lines():
+            if not line.startswith("data: "):
+                continue
+            data = json.loads(line[6:])
+            status = data.get("status")
+            if status == "streaming" and result["ttft"] is None:
+                result["ttft"] = time.perf_counter() - started
+            elif status == "references_ready":
+                result["references"] = len(data.get("references", []))
+                result["answer_chars"] = len(data.get("answer", ""))
+            elif status == "done":
+                result["session_id"] = data.get("session_id")
+            elif status == "followup_ready":
+                result["followups"] = data.get("followup_questions", [])
+            elif status == "error":
+                result["status"] = "error"
+    result["total"] = time.perf_counter() - started
+    return result
+
+
+async def run_mix(base_url: str, timeout: float, followups: bool) -> List[Dict]:
+    """질문을 순서대로 실행 (카세트 재생 순서가 기록 순서와 같도록 동시 실행하지 않음)"""
+    results = []
+    async with httpx.AsyncClient(timeout=timeout) as client:
+        for question, with_followup in QUESTION_MIX:
+            first = await run_query(client, base_url, {"question": question})
+            results.append(first)
+            if followups and with_followup and first["followups"] and first["session_id"]:
+                results.append(await run_query(client, base_url, {"question": first["followups"][0],
+                                                                  "session_id": first["session_id"]}))
+        for category, language in CATEGORIES:
+            started = time.perf_counter()
+            response = await client.post(f"{base_url}/generate-questions", json={"category": category, "language": language})
+            results.append({"question": f"[generate-questions] {category}", "turn": 1,
+                            "status": "ok" if response.status_code == 200 else f"http_{response.status_code}",
+                            "ttft": None, "total": time.perf_counter() - started})
+    return results
+
+
+def print_results(results: List[Dict], baseline: Optional[List[Dict]]):
+    # 같은 후속 질문이 여러 번 나올 수 있으므로 순서(위치)로 비교
+    baseline = baseline or []
+    print(f"{'request':<52}{'status':>8}{'ttft s':>9}{'total s':>9}{'Δ total':>9}")
+    for i, r in enumerate(results):
+        label = ("  ↳ " if r["turn"] == 2 else "") + r["question"]
+        before = baseline[i] if i < len(baseline) and baseline[i]["question"] == r["question"] else None
+        delta = f"{r['total'] - before['total']:+.2f}" if before and before["status"] == "ok" else ""
+        ttft = f"{r['ttft']:.2f}" if r.get("ttft") is not None else "-"
+        print(f"{label[:50]:<52}{r['status']:>8}{ttft:>9}{r['total']:>9.2f}{delta:>9}")
+
+    ok = [r for r in results if r["status"] == "ok"]
+    ttfts = [r["ttft"] for r in ok if r.get("ttft") is not None]
+    totals = [r["total"] for r in ok]
+    print(f"\n성공 {len(ok)}/{len(results)}")
+    if ttfts:
+        print(f"TTFT  p50={percentile(ttfts, 50):.2f}s  p95={percentile(ttfts, 95):.2f}s  mean={statistics.mean(ttfts):.2f}s")
+    if totals:
+        print(f"Total p50={percentile(totals, 50):.2f}s  p95={percentile(totals, 95):.2f}s  sum={sum(totals):.2f}s")
+    if baseline:
+        before_totals = [r["total"] for r in baseline if r["status"] == "ok"]
+        print(f"기준 대비 전체 시간 합: {sum(before_totals):.2f}s → {sum(totals):.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a fixed question mix against /query-stream")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--timeout", type=float, default=180.0)
+    parser.add_argument("--no-followups", action="store_true", help="Skip the follow-up turns")
+    parser.add_argument("--output", help="Write per-request results as JSON")
+    parser.add_argument("--compare", help="Previous --output file to compare against")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_mix(args.url.rstrip("/"), args.timeout, not args.no_followups))
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
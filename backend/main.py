@@ -9,31 +9,60 @@ import os
 import json
 import asyncio
 import re
-import sys
+import time
+import logging
 from typing import List, Dict, AsyncGenerator, Set, Tuple, Optional
 from pathlib import Path
 
 from fastapi import FastAPI, HTTPException, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
-from openai import OpenAI
-from pinecone import Pinecone
+from openai import AsyncOpenAI
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, disable_created_metrics
 
 from app.transcription import get_transcription_service
+from app.query_understanding import PROMPT_VERSION, classify_question_type, understand_query
+from app.vector_search import ConcurrentSearcher, chunk_handle, chunk_key, reciprocal_rank_fusion
+from app.bm25 import load_bm25_index
+from app.context_assembly import assemble_context, group_chunks_by_document
+from app.citation_stream import CitationStreamParser
+from app.sse import SSETotals, SSEWriter, with_flush_deadlines
+from app.serialization import FastJSONResponse, install_exception_handlers, serializer, sse_delta_frame, sse_frame
+from app.prompt_cache import PromptCacheStats, cached_tokens_from_usage, prefix_fingerprint
+from app.token_budget import TokenCounter, parse_budgets, plan_prompt
+from app.context_selection import document_key, select_context
+from app.vector_store import get_vector_store
+from app.cache import ChunkStore, EmbeddingCache, QueryUnderstandingCache, chunk_ref
+from app.sessions import HistoryCompactor, SessionStore, record_turn
+from app.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, DEFAULT_BUCKETS, RequestTimer, record_request, render_metrics
+from app.answer_cache import CachedAnswer, SemanticAnswerCache, replay_answer
+from app.retrieval import Retriever
+from app.structured_logging import RequestIdMiddleware, configure_logging, logging_stats
+from app.cassettes import Cassette
 
 # 환경 변수 로드
 load_dotenv()
 
+# 로깅: JSON 한 줄 로그 + request_id, 큐 기반 핸들러라 이벤트 루프에서 stderr flush를 기다리지 않음
+configure_logging(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    fmt=os.getenv("LOG_FORMAT", "json"),
+    sample_rate=float(os.getenv("LOG_SAMPLE_RATE", "0.1")),
+    queue_size=int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+)
+logging.getLogger("httpx").setLevel(logging.WARNING)  # OpenAI/Pinecone 호출마다 찍히는 요청 로그
+logger = logging.getLogger(__name__)
+
 # PDF URL 매핑 로드
 PDF_URL_MAPPING = {}
 url_mapping_path = Path(__file__).parent / "pdf_url_mapping.json"
 if url_mapping_path.exists():
     with open(url_mapping_path, 'r', encoding='utf-8') as f:
         PDF_URL_MAPPING = json.load(f)
-        print(f"✅ PDF URL 매핑 로드 완료: {len(PDF_URL_MAPPING)}개", file=sys.stderr, flush=True)
+        logger.info(f"✅ PDF URL 매핑 로드 완료: {len(PDF_URL_MAPPING)}개")
 
 # PDF 메타데이터 매핑 로드 (title → filename)
 TITLE_TO_FILENAME = {}
@@ -46,9 +75,9 @@ if metadata_mapping_path.exists():
             if title:
                 normalized_title = title.lower().strip()
                 TITLE_TO_FILENAME[normalized_title] = filename
-        print(f"✅ Title → Filename 매핑 로드 완료: {len(TITLE_TO_FILENAME)}개", file=sys.stderr, flush=True)
+        logger.info(f"✅ Title → Filename 매핑 로드 완료: {len(TITLE_TO_FILENAME)}개")
 else:
-    print(f"⚠️  메타데이터 매핑 파일을 찾을 수 없습니다: {metadata_mapping_path}", file=sys.stderr, flush=True)
+    logger.warning(f"⚠️  메타데이터 매핑 파일을 찾을 수 없습니다: {metadata_mapping_path}")
 
 # 언어 매핑 및 감지 함수
 def map_language(frontend_lang: str) -> str:
@@ -80,84 +109,152 @@ def detect_language_from_text(text: str) -> str:
     # 기본값: 영어
     return "English"
 
-def classify_question_type(question: str, language: str) -> str:
-    """
-    Classify question type using pattern matching.
-
-    Returns: 'diagnostic_symptom', 'treatment', 'prognosis',
-             'diagnostic_disease', 'general'
-    """
-    import re
-    question_lower = question.lower()
-
-    # Symptom patterns (highest priority)
-    symptom_patterns = {
-        'Korean': [r'토.*해', r'구토', r'설사', r'기침', r'절뚝', r'가려워',
-                   r'안.*먹', r'기운.*없', r'우웩', r'콜록', r'거품', r'물.*똥',
-                   r'피.*똥', r'긁', r'핥', r'처져', r'불안'],
-        'Japanese': [r'吐.*て', r'嘔吐', r'下痢', r'咳', r'痒.*がっ',
-                     r'食べ.*ない', r'元気.*ない', r'泡', r'血便', r'掻.*て',
-                     r'舐.*て', r'ぐったり'],
-        'English': [r'vomit', r'diarrhea', r'cough', r'limp', r'itch',
-                    r'not.*eat', r'letharg', r'foam', r'scratch', r'lick',
-                    r'weak', r'tired']
-    }
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
+PINECONE_INDEX_NAME = os.getenv("PINECONE_INDEX_NAME", "medical-guidelines-kr")
+EMBEDDING_MODEL = "text-embedding-3-small"
 
-    # Treatment patterns
-    treatment_patterns = {
-        'Korean': [r'치료', r'약물', r'처치', r'수술', r'투여', r'처방'],
-        'Japanese': [r'治療', r'薬物', r'処置', r'手術', r'投与', r'処方'],
-        'English': [r'treatment', r'therapy', r'medication', r'protocol', r'drug', r'how to treat']
-    }
+# 업스트림 카세트 (CASSETTE_MODE=record | replay) - OpenAI/벡터 스토어 호출을 기록하거나 기록으로 재생
+cassette = Cassette.from_env()
+if cassette:
+    logger.info(f"📼 Cassette {cassette.mode}: {cassette.path} (replay speed x{cassette.speed})")
 
-    # Prognosis patterns
-    prognosis_patterns = {
-        'Korean': [r'예후', r'생존율', r'얼마나 살', r'완치', r'회복'],
-        'Japanese': [r'予後', r'生存率', r'どのくらい生きる', r'完治', r'回復'],
-        'English': [r'prognosis', r'survival', r'life expectancy', r'outcome', r'cure rate']
-    }
+# OpenAI 클라이언트 (async - 이벤트 루프를 블로킹하지 않도록)
+openai_client = AsyncOpenAI(api_key=OPENAI_API_KEY, http_client=cassette.http_client() if cassette else None)
 
-    # Check patterns in priority order
-    if language in symptom_patterns:
-        for pattern in symptom_patterns[language]:
-            if re.search(pattern, question_lower):
-                return 'diagnostic_symptom'
-
-    if language in treatment_patterns:
-        for pattern in treatment_patterns[language]:
-            if re.search(pattern, question_lower):
-                return 'treatment'
+# 벡터 스토어 (VECTOR_STORE_BACKEND=pinecone | numpy, 로컬 백엔드는 LOCAL_VECTOR_STORE_PATH)
+# 재생 모드에서는 실제 스토어에 연결하지 않음
+if cassette and cassette.mode == "replay":
+    vector_store = cassette.wrap_vector_store(None)
+else:
+    vector_store = get_vector_store(PINECONE_INDEX_NAME)
+    if cassette:
+        vector_store = cassette.wrap_vector_store(vector_store)
+logger.info(f"✅ Vector store: {vector_store.backend_name}")
+
+# 쿼리 임베딩 캐시 (in-process LRU + SQLite, EMBEDDING_CACHE_PATH="" 이면 디스크 tier 비활성화)
+embedding_cache = EmbeddingCache(
+    model=EMBEDDING_MODEL,
+    memory_size=int(os.getenv("EMBEDDING_CACHE_SIZE", "2048")),
+    ttl=float(os.getenv("EMBEDDING_CACHE_TTL", str(7 * 24 * 3600))),
+    disk_path=os.getenv("EMBEDDING_CACHE_PATH", str(Path(__file__).parent / "cache" / "embedding_cache.sqlite3")) or None,
+    disk_max_entries=int(os.getenv("EMBEDDING_CACHE_DISK_ENTRIES", "100000"))
+)
 
-    if language in prognosis_patterns:
-        for pattern in prognosis_patterns[language]:
-            if re.search(pattern, question_lower):
-                return 'prognosis'
+# 질문 이해(번역 + 확장 + 유형) 캐시 - (언어, 정규화된 질문, 프롬프트 버전) 기준
+understanding_cache = QueryUnderstandingCache(
+    prompt_version=PROMPT_VERSION,
+    memory_size=int(os.getenv("TRANSLATION_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("TRANSLATION_CACHE_TTL", str(30 * 24 * 3600))),
+    disk_path=os.getenv("TRANSLATION_CACHE_PATH", str(Path(__file__).parent / "cache" / "translation_cache.sqlite3")) or None,
+    disk_max_entries=int(os.getenv("TRANSLATION_CACHE_DISK_ENTRIES", "50000"))
+)
+# /generate-questions 예시 질문의 번역을 미리 캐시 (예시마다 gpt-4o-mini 호출 비용 - 기본 off, 실제 제출 시 캐시됨)
+TRANSLATION_CACHE_PREWARM = os.getenv("TRANSLATION_CACHE_PREWARM", "false").lower() == "true"
+
+# 컨텍스트 청크 저장소 - done 이벤트는 청크 ID/점수만 보내고, 다음 질문의 ID 목록을 여기서 복원
+chunk_store = ChunkStore(
+    memory_size=int(os.getenv("CHUNK_STORE_SIZE", "4096")),
+    ttl=float(os.getenv("CHUNK_STORE_TTL", str(7 * 24 * 3600))),
+    disk_path=os.getenv("CHUNK_STORE_PATH", str(Path(__file__).parent / "cache" / "chunk_store.sqlite3")) or None,
+    disk_max_entries=int(os.getenv("CHUNK_STORE_DISK_ENTRIES", "200000"))
+)
 
-    # Check for disease names (diagnostic_disease)
-    disease_patterns = [r'what is', r'뭔가요', r'とは何', r'무엇', r'何ですか']
-    for pattern in disease_patterns:
-        if re.search(pattern, question_lower):
-            return 'diagnostic_disease'
+# 시맨틱 답변 캐시 (cosine distance 기준, 인덱스 버전이 바뀌면 무효화)
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+ANSWER_CACHE_VERSION_CHECK_INTERVAL = 300
+answer_cache = SemanticAnswerCache(
+    max_entries=int(os.getenv("ANSWER_CACHE_SIZE", "500")),
+    max_distance=float(os.getenv("ANSWER_CACHE_MAX_DISTANCE", "0.03")),
+    ttl=float(os.getenv("ANSWER_CACHE_TTL", str(24 * 3600)))
+)
 
-    return 'general'
+# 요청 지표 (GET /metrics, Prometheus text format) - 단계별 지연 히스토그램, 요청 결과/토큰 카운터
+disable_created_metrics()  # *_created 시리즈는 출력만 두 배로 늘림 (지표 생성 전에 꺼야 함)
+metrics = CollectorRegistry()
+stage_latency = Histogram("rag_stage_duration_seconds", "Duration of each query_stream stage", ["stage"],
+                          buckets=DEFAULT_BUCKETS, registry=metrics)
+request_latency = Histogram("rag_request_duration_seconds", "End-to-end query_stream duration", ["outcome"],
+                            buckets=DEFAULT_BUCKETS, registry=metrics)
+vector_query_latency = Histogram("rag_vector_query_duration_seconds", "Duration of each vector index call", ["outcome"],
+                                 buckets=DEFAULT_BUCKETS, registry=metrics)
+requests_total = Counter("rag_requests_total", "query_stream requests by outcome", ["outcome"], registry=metrics)
+llm_tokens_total = Counter("rag_llm_tokens_total", "Answer model tokens", ["kind"], registry=metrics)
+requests_in_progress = Gauge("rag_requests_in_progress", "query_stream requests being served", registry=metrics)
+cache_hit_ratio = Gauge("rag_cache_hit_ratio", "Hit rate of each cache since startup", ["cache"], registry=metrics)
+
+# 벡터 검색 (전용 스레드 풀에서 확장 쿼리를 병렬 검색, 쿼리별 타임아웃)
+VECTOR_SEARCH_TOP_K = 15
+vector_searcher = ConcurrentSearcher(
+    vector_store,
+    max_workers=int(os.getenv("VECTOR_SEARCH_WORKERS", "8")),
+    timeout=float(os.getenv("VECTOR_SEARCH_TIMEOUT", "5.0")),
+    on_query=lambda seconds, outcome: vector_query_latency.labels(outcome=outcome).observe(seconds)
+)
 
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
-PINECONE_INDEX_NAME = os.getenv("PINECONE_INDEX_NAME", "medical-guidelines-kr")
+# 추측 검색: 질문 이해 응답을 스트리밍해 english_query가 나오는 즉시 1차 쿼리를 임베딩/검색하고,
+# 확장 쿼리 결과는 1차 검색이 끝난 뒤 EXPANSION_DEADLINE_MS까지만 기다림 (0 = 끝날 때까지 기다림)
+SPECULATIVE_RETRIEVAL_ENABLED = os.getenv("SPECULATIVE_RETRIEVAL_ENABLED", "true").lower() == "true"
+EXPANSION_DEADLINE_MS = float(os.getenv("EXPANSION_DEADLINE_MS", "800"))
+expansions_total = Counter("rag_query_expansions_total", "Speculative retrieval expansion outcomes", ["outcome"], registry=metrics)
+
+# BM25 키워드 인덱스 (약물명, 용량, 검사명 등 정확한 토큰 매칭) - 인덱스가 없으면 dense 검색만 사용
+HYBRID_SEARCH_ENABLED = os.getenv("HYBRID_SEARCH_ENABLED", "true").lower() == "true"
+RRF_K = int(os.getenv("RRF_K", "60"))
+bm25_index = load_bm25_index(os.getenv("BM25_INDEX_PATH", str(Path(__file__).parent / "vector_data" / "bm25"))) if HYBRID_SEARCH_ENABLED else None
+if bm25_index:
+    logger.info(f"✅ BM25 index: {bm25_index.stats()}")
+
+# 컨텍스트 선택: MMR로 서로 비슷한 청크를 줄이고 논문당 청크 수 제한
+MMR_ENABLED = os.getenv("MMR_ENABLED", "true").lower() == "true"
+MMR_LAMBDA = float(os.getenv("MMR_LAMBDA", "0.7"))
+CONTEXT_MAX_CHUNKS = int(os.getenv("CONTEXT_MAX_CHUNKS", "15"))
+MAX_CHUNKS_PER_DOCUMENT = int(os.getenv("MAX_CHUNKS_PER_DOCUMENT", "3"))
+
+# 검색 단계 (질문 이해 → 임베딩 → 벡터/BM25 검색, 추측 검색과 확장 쿼리 데드라인 포함) - app/retrieval.py
+retriever = Retriever(
+    openai_client,
+    vector_searcher,
+    embedding_cache,
+    understanding_cache=understanding_cache,
+    bm25_index=bm25_index,
+    embedding_model=EMBEDDING_MODEL,
+    top_k=VECTOR_SEARCH_TOP_K,
+    include_values=MMR_ENABLED,
+    speculative=SPECULATIVE_RETRIEVAL_ENABLED,
+    expansion_deadline_ms=EXPANSION_DEADLINE_MS
+)
 
-# OpenAI 클라이언트
-openai_client = OpenAI(api_key=OPENAI_API_KEY)
+# 답변 프롬프트 토큰 예산 (질문 유형별, 예: "treatment=12000,general=6000"으로 덮어쓰기)
+PROMPT_TOKEN_BUDGETS = parse_budgets(os.getenv("PROMPT_TOKEN_BUDGETS"))
+token_counter = TokenCounter("gpt-4o")
+
+# 서버 측 대화 세션 - 히스토리는 서버에 두고, 오래된 턴은 백그라운드에서 요약 (SESSION_STORE_PATH="" 이면 메모리만)
+SESSIONS_ENABLED = os.getenv("SESSIONS_ENABLED", "true").lower() == "true"
+SESSION_COMPACT_TOKENS = int(os.getenv("SESSION_COMPACT_TOKENS", "1500"))
+SESSION_KEEP_RECENT_MESSAGES = int(os.getenv("SESSION_KEEP_RECENT_MESSAGES", "4"))
+session_store = SessionStore(
+    memory_size=int(os.getenv("SESSION_STORE_SIZE", "2048")),
+    ttl=float(os.getenv("SESSION_TTL", str(7 * 24 * 3600))),
+    disk_path=os.getenv("SESSION_STORE_PATH", str(Path(__file__).parent / "cache" / "sessions.sqlite3")) or None
+)
 
-# Pinecone 클라이언트
-pc = Pinecone(api_key=PINECONE_API_KEY)
-pinecone_index = pc.Index(PINECONE_INDEX_NAME)
+# SSE 스트리밍: 답변 델타를 시간 창/바이트 단위로 묶어 한 프레임으로 전송 (클라이언트별로 조정 가능)
+SSE_COALESCE_MS = int(os.getenv("SSE_COALESCE_MS", "50"))
+SSE_COALESCE_BYTES = int(os.getenv("SSE_COALESCE_BYTES", "1024"))
+SSE_MAX_COALESCE_MS = 500
+SSE_MAX_COALESCE_BYTES = 64 * 1024  # 클라이언트 지정값 상한 (답변 전체가 한 프레임에 묶이지 않도록)
+sse_totals = SSETotals()
+logger.info(f"✅ Token counter: {token_counter.backend}, budgets {PROMPT_TOKEN_BUDGETS}")
 
 # FastAPI 앱
 app = FastAPI(
     title="의료 가이드라인 RAG API",
     description="한국 의학회 진료지침서 AI 검색 플랫폼",
-    version="2.0.0"
+    version="2.0.0",
+    default_response_class=FastJSONResponse
 )
+install_exception_handlers(app)  # HTTPException / 422 본문도 같은 serializer로
 
 # CORS 설정
 app.add_middleware(
@@ -177,13 +274,20 @@ app.add_middleware(
     max_age=3600,
 )
 
+# 요청별 correlation ID (X-Request-ID) - 스트리밍 중 로그에도 request_id로 남음
+app.add_middleware(RequestIdMiddleware)
+
 
 # Request/Response 모델
 class QueryRequest(BaseModel):
     question: str
-    conversation_history: List[Dict] = []
-    previous_context_chunks: List[Dict] = []  # 누적 컨텍스트
+    session_id: Optional[str] = None  # 서버 측 세션 (있으면 conversation_history 대신 서버에 저장된 히스토리 사용)
+    conversation_history: List[Dict] = []  # 최근 히스토리 - 세션이 없거나 만료되었을 때만 사용 (새 세션의 초기 히스토리)
+    previous_context_ids: List[str] = []  # 누적 컨텍스트 (이전 done 이벤트의 청크 ID, 서버에서 복원)
+    previous_context_chunks: List[Dict] = []  # 구버전 클라이언트 호환 (전체 청크 또는 {"id", "score"})
     language: Optional[str] = None  # Optional - 없으면 질문 텍스트에서 자동 감지
+    stream_flush_ms: Optional[int] = None  # SSE 델타 병합 시간 창 (0 = 델타마다 전송, 없으면 서버 기본값)
+    stream_flush_bytes: Optional[int] = None  # SSE 델타 병합 최대 바이트 (최대 64KB)
 
 
 class Reference(BaseModel):
@@ -197,9 +301,22 @@ class Reference(BaseModel):
     relevance_score: float = 0.0
 
 
-def create_sse_event(data: dict) -> str:
-    """SSE 이벤트 생성"""
-    return f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+def create_sse_event(data: dict) -> bytes:
+    """SSE 이벤트 생성 (orjson 사용 가능 시 orjson으로 직렬화)"""
+    return sse_frame(data)
+
+
+# 내용이 고정된 상태 이벤트는 시작 시 한 번만 직렬화
+STATUS_EVENTS = {name: create_sse_event(event) for name, event in {
+    "translating": {"status": "translating", "message": "질문 이해 중..."},
+    "embedding": {"status": "embedding", "message": "벡터 변환 중..."},
+    "searching": {"status": "searching", "message": "문헌 검색 중..."},
+    "generating": {"status": "generating", "message": "답변 생성 중..."},
+    "out_of_scope": {"status": "out_of_scope", "message": "질문이 제공된 문서의 범위를 벗어났습니다."},
+    "no_results": {"status": "error", "message": "관련 문헌을 찾을 수 없습니다. 다른 질문을 시도해주세요."},
+    "error": {"status": "error", "message": "오류가 발생했습니다. 다시 시도해주세요."},
+}.items()}
+logger.info(f"🧾 JSON serializer: {serializer.name}")
 
 
 def extract_cited_indices(text: str) -> Set[int]:
@@ -217,24 +334,6 @@ def extract_cited_indices(text: str) -> Set[int]:
     return citations
 
 
-def group_chunks_by_document(chunks: List[Dict]) -> Tuple[List[str], Dict[str, List[Dict]]]:
-    """
-    청크들을 문서별로 그룹화
-    Returns: (doc_order, grouped_chunks)
-    """
-    seen_docs = {}
-    doc_order = []
-
-    for chunk in chunks:
-        ref_key = f"{chunk.get('source', 'unknown')}_{chunk.get('title', 'unknown')}"
-        if ref_key not in seen_docs:
-            seen_docs[ref_key] = []
-            doc_order.append(ref_key)
-        seen_docs[ref_key].append(chunk)
-
-    return doc_order, seen_docs
-
-
 async def extract_references_from_answer(answer: str, doc_order: List[str], seen_docs: Dict) -> Tuple[str, List[Reference]]:
     """
     답변에서 실제 사용된 참고문헌만 추출하고 citation 번호를 재매핑
@@ -243,19 +342,17 @@ async def extract_references_from_answer(answer: str, doc_order: List[str], seen
         # 답변에서 실제 사용된 citation 번호 추출
         cited_indices = extract_cited_indices(answer)
 
-        print(f"🔍 extract_references_from_answer:", file=sys.stderr, flush=True)
-        print(f"   doc_order: {len(doc_order)} documents", file=sys.stderr, flush=True)
-        print(f"   cited_indices from answer: {sorted(cited_indices)}", file=sys.stderr, flush=True)
+        logger.debug(f"extract_references_from_answer: {len(doc_order)} documents, cited {sorted(cited_indices)}")
 
         if not cited_indices:
-            print("⚠️  No citations found in answer", file=sys.stderr, flush=True)
+            logger.warning("⚠️  No citations found in answer")
             return answer, []
 
         # cited_indices를 정렬하여 새로운 인덱스 생성 (0부터 시작)
         sorted_cited = sorted(cited_indices)
         old_to_new = {old_idx: new_idx for new_idx, old_idx in enumerate(sorted_cited)}
 
-        print(f"   Remapping: {old_to_new}", file=sys.stderr, flush=True)
+        logger.debug(f"Citation remapping: {old_to_new}")
 
         # 답변의 citation 번호를 재매핑
         remapped_answer = answer
@@ -275,9 +372,6 @@ async def extract_references_from_answer(answer: str, doc_order: List[str], seen
             answer
         )
 
-        print(f"   Original answer length: {len(answer)}", file=sys.stderr, flush=True)
-        print(f"   Remapped answer length: {len(remapped_answer)}", file=sys.stderr, flush=True)
-
         # 🔥 Punctuation relocation removed - GPT now instructed to place punctuation BEFORE citations
         # This prevents {. pattern during streaming when chunks split at citation boundaries
 
@@ -285,7 +379,7 @@ async def extract_references_from_answer(answer: str, doc_order: List[str], seen
         references = []
         for new_idx, old_idx in enumerate(sorted_cited):
             if old_idx >= len(doc_order):
-                print(f"⚠️  Invalid index {old_idx} >= {len(doc_order)}", file=sys.stderr, flush=True)
+                logger.warning(f"⚠️  Invalid index {old_idx} >= {len(doc_order)}")
                 continue
 
             ref_key = doc_order[old_idx]
@@ -298,20 +392,15 @@ async def extract_references_from_answer(answer: str, doc_order: List[str], seen
             pmid = first_chunk.get('pmid', '')
             doi = first_chunk.get('doi', '')
 
-            print(f"🔗 URL 생성 중 - PMCID: '{pmcid}', PMID: '{pmid}', DOI: '{doi}'", file=sys.stderr, flush=True)
-
             if pmcid and pmcid.startswith('PMC'):
                 # PMCID가 있으면 PubMed Central URL 생성
                 url = f"https://www.ncbi.nlm.nih.gov/pmc/articles/{pmcid}/"
-                print(f"   ✅ PMCID URL 생성: {url}", file=sys.stderr, flush=True)
             elif pmid:
                 # PMID가 있으면 PubMed URL 생성
                 url = f"https://pubmed.ncbi.nlm.nih.gov/{pmid}/"
-                print(f"   ✅ PMID URL 생성: {url}", file=sys.stderr, flush=True)
             elif doi:
                 # DOI가 있으면 DOI URL 생성
                 url = f"https://doi.org/{doi}"
-                print(f"   ✅ DOI URL 생성: {url}", file=sys.stderr, flush=True)
             else:
                 # 없으면 PDF URL 매핑에서 찾기
                 title = first_chunk.get('title', 'Unknown')
@@ -319,9 +408,10 @@ async def extract_references_from_answer(answer: str, doc_order: List[str], seen
                 if normalized_title in TITLE_TO_FILENAME:
                     filename = TITLE_TO_FILENAME[normalized_title]
                     url = PDF_URL_MAPPING.get(filename, "")
-                    print(f"   ✅ PDF URL 매핑: {url}", file=sys.stderr, flush=True)
-                else:
-                    print(f"   ⚠️  URL을 찾을 수 없음", file=sys.stderr, flush=True)
+
+            # 참고문헌마다 찍히는 hot path 로그 - 샘플링
+            logger.debug(f"Reference URL: {url or 'not found'} (PMCID {pmcid!r}, PMID {pmid!r}, DOI {doi!r})",
+                         extra={"sampled": True})
 
             # source 필드가 없으면 journal을 사용 (XML 논문의 경우)
             source = first_chunk.get('source', first_chunk.get('journal', 'Unknown'))
@@ -338,43 +428,22 @@ async def extract_references_from_answer(answer: str, doc_order: List[str], seen
             )
             references.append(ref)
 
-        print(f"✅ Extracted {len(references)} references", file=sys.stderr, flush=True)
+        logger.info(f"✅ Extracted {len(references)} references")
         return remapped_answer, references
 
     except Exception as e:
-        print(f"❌ Error in extract_references_from_answer: {e}", file=sys.stderr, flush=True)
-        import traceback
-        traceback.print_exc(file=sys.stderr)
+        logger.exception(f"❌ Error in extract_references_from_answer: {e}")
         return answer, []
 
 
-async def generate_answer_stream(
-    question: str,
-    context_chunks: List[Dict],
-    language: str,
-    conversation_history: List[Dict]
-) -> AsyncGenerator[Tuple, None]:
-    """
-    GPT를 사용하여 답변 스트리밍 생성
-    Yields: (chunk_text, is_done) OR (full_answer, True, doc_order, seen_docs)
-    """
-    doc_order, seen_docs = group_chunks_by_document(context_chunks)
-    num_references = len(doc_order)
-
-    print(f"🤖 generate_answer_stream started", file=sys.stderr, flush=True)
-    print(f"   question: {question[:50]}...", file=sys.stderr, flush=True)
-    print(f"   language parameter: '{language}' (type: {type(language).__name__})", file=sys.stderr, flush=True)
-    print(f"   context_chunks: {len(context_chunks)}", file=sys.stderr, flush=True)
-    print(f"   doc_order: {len(doc_order)} documents", file=sys.stderr, flush=True)
-    print(f"   conversation_history: {len(conversation_history)} messages", file=sys.stderr, flush=True)
+ANSWER_ERROR_MESSAGE = "죄송합니다. 답변 생성 중 오류가 발생했습니다."
 
-    # 컨텍스트 구성
-    context_text = "\n\n".join([
-        f"Document {i}: {chunk.get('text', '')}"
-        for i, chunk in enumerate(context_chunks[:25])
-    ])
 
-    # 시스템 프롬프트
+def build_system_prompt(language: str) -> str:
+    """
+    답변 생성 시스템 프롬프트 (언어별로 고정된 내용 - 요청마다 달라지는 값은 넣지 않음)
+    OpenAI 자동 prompt caching은 동일한 prefix에만 적용되므로 문서 수/질문/컨텍스트는 사용자 메시지로
+    """
     system_prompt = f"""You are an EVIDENCE-BASED CITATION ENGINE for VETERINARY MEDICINE.
 
 🌐 CRITICAL LANGUAGE REQUIREMENT 🌐
@@ -449,13 +518,13 @@ If the references don't contain specific dosages/protocols, you MUST say so expl
 CITATION RULES
 ────────────────────────────────────────
 1. **ALWAYS cite sources** using {{{{citation:N}}}} format where N is the document index (0-based)
-2. **CRITICAL**: You have EXACTLY {num_references} documents available (indices 0 to {num_references-1})
-3. **NEVER cite document indices >= {num_references}** - such citations are INVALID and will be removed
+2. **CRITICAL**: The user message starts with "Available documents: 0 to N-1" - you have EXACTLY N documents
+3. **NEVER cite document indices >= N** - such citations are INVALID and will be removed
 4. **Place citations at the END of each paragraph** that uses information from sources
 5. **Multiple citations**: Use comma-separated indices like {{{{citation:0,1,2}}}}
 6. **Every clinical claim MUST have a citation**
 7. **Do NOT make claims without citation support**
-8. **ONLY use document indices that exist in the provided references (0 to {num_references-1})**
+8. **ONLY use document indices that exist in the provided references (0 to N-1)**
 9. **PUNCTUATION PLACEMENT**: ALWAYS place periods, exclamation marks, and question marks BEFORE citations, not after
    - ✅ Correct: "This is a sentence.{{{{citation:0}}}}"
    - ❌ Wrong: "This is a sentence{{{{citation:0}}}}."
@@ -513,21 +582,8 @@ EXAMPLE STRUCTURE:
 [Optional: Comparison table if needed]
 
 [Concluding paragraph with prognosis, complications to monitor, or clinical pearls. **Bold the take-home message.**]{{{{citation:8,9}}}}
-
-Available documents: 0 to {num_references-1}
 """
 
-    # 메시지 구성
-    messages = [{"role": "system", "content": system_prompt}]
-
-    # 대화 히스토리 추가
-    for msg in conversation_history[-6:]:  # 최근 3턴
-        messages.append({
-            "role": msg["role"],
-            "content": msg["content"]
-        })
-
-    # 현재 질문
     # 🔥 한국어/일본어 답변용 특별 지시사항
     non_english_instruction = ""
     if language == "Korean":
@@ -617,10 +673,32 @@ BAD EXAMPLE (VAGUE, INCOMPLETE):
 (Missing: drug names, dosages, percentages, mechanisms, study data)
 """
 
-    user_message = f"""Question: {question}
+    return system_prompt + non_english_instruction
+
+
+# 언어별 시스템 프롬프트를 시작 시 한 번만 생성 (매 요청 byte-identical prefix → provider prompt cache hit)
+ANSWER_LANGUAGES = ("Korean", "Japanese", "English")
+ANSWER_SYSTEM_PROMPTS = {language: build_system_prompt(language) for language in ANSWER_LANGUAGES}
+ANSWER_PROMPT_FINGERPRINTS = {language: prefix_fingerprint(prompt) for language, prompt in ANSWER_SYSTEM_PROMPTS.items()}
+prompt_cache_stats = PromptCacheStats()
+for _language, _prompt in ANSWER_SYSTEM_PROMPTS.items():
+    logger.info(f"✅ Answer system prompt [{_language}]: {token_counter.count(_prompt)} tokens, prefix {ANSWER_PROMPT_FINGERPRINTS[_language]}")
+
+
+def build_answer_prompts(question: str, context_text: str, language: str, num_references: int) -> Tuple[str, str]:
+    """
+    답변 생성 프롬프트 구성
+    Returns: (system_prompt, user_message) - system_prompt는 언어별 고정 prefix
+    """
+    system_prompt = ANSWER_SYSTEM_PROMPTS.get(language) or build_system_prompt(language)
+
+    # 현재 질문 + 컨텍스트 (요청마다 달라지는 부분은 모두 여기)
+    user_message = f"""Available documents: 0 to {num_references-1} (EXACTLY {num_references} documents)
+
+Question: {question}
 
 Context (Documents 0-{num_references-1}):
-{context_text}{non_english_instruction}
+{context_text}
 
 🌐🌐🌐 CRITICAL REMINDER 🌐🌐🌐
 YOU MUST WRITE YOUR ANSWER IN: {language}
@@ -632,162 +710,185 @@ Provide a comprehensive, detailed clinical answer in {language} following the fo
 
 Remember: Your answer MUST be written in {language}."""
 
+    return system_prompt, user_message
+
+
+async def generate_answer_stream(
+    question: str,
+    context_chunks: List[Dict],
+    language: str,
+    conversation_history: List[Dict],
+    question_type: str = 'general',
+    history_summary: Optional[Dict] = None,
+    timer: Optional[RequestTimer] = None
+) -> AsyncGenerator[Tuple, None]:
+    """
+    GPT를 사용하여 답변 스트리밍 생성
+    Yields: (chunk_text, is_done) OR (full_answer, True, doc_order, seen_docs, usage)
+    """
+    doc_order, _ = group_chunks_by_document(context_chunks)
+
+    logger.debug(f"generate_answer_stream: language {language!r}, {len(context_chunks)} chunks, {len(doc_order)} documents, "
+                 f"{len(conversation_history)} history messages")
+
+    # 토큰 예산: 고정 프롬프트(시스템 + 질문 지시사항) → 대화 히스토리 → 순위순 컨텍스트 청크
+    prompt_build_started = time.perf_counter()
+    budget = PROMPT_TOKEN_BUDGETS.get(question_type, PROMPT_TOKEN_BUDGETS['general'])
+    system_prompt, user_template = build_answer_prompts(question, "", language, len(doc_order))
+    fixed_tokens = (token_counter.count_message({"content": system_prompt})
+                    + token_counter.count_message({"content": user_template}))
+    plan = plan_prompt(token_counter, budget, fixed_tokens, context_chunks, conversation_history, summary=history_summary)
+    logger.info(f"Token budget ({question_type}): {plan.total_tokens}/{budget} planned",
+                extra={"budget": {"fixed": plan.fixed_tokens, "history": plan.history_tokens, "context": plan.context_tokens,
+                                  "history_messages": len(plan.history), "dropped_messages": plan.dropped_messages,
+                                  "chunks": len(plan.chunks), "dropped_chunks": plan.dropped_chunks}})
+
+    doc_order, seen_docs = group_chunks_by_document(plan.chunks)
+    num_references = len(doc_order)
+
+    # 컨텍스트 구성 - 논문당 하나의 "Document i" 블록 (citation 번호 = doc_order 인덱스)
+    # 같은 논문의 인접 청크는 하나의 passage로 이어 붙이고 청크 간 overlap 제거
+    context_text, assembly_stats = assemble_context(doc_order, seen_docs)
+    logger.debug(f"Context assembly: {assembly_stats.chunks} chunks → {assembly_stats.passages} passages, "
+                 f"{assembly_stats.chars_saved} chars saved ({assembly_stats.raw_chars} → {assembly_stats.context_chars})")
+
+    system_prompt, user_message = build_answer_prompts(question, context_text, language, num_references)
+
+    # 메시지 구성: 시스템 → (이전 대화 요약) → 예산 안의 최근 대화 히스토리 → 현재 질문
+    messages = [{"role": "system", "content": system_prompt}]
+    for msg in plan.history:
+        messages.append({
+            "role": msg["role"],
+            "content": msg["content"]
+        })
     messages.append({"role": "user", "content": user_message})
+    if timer:
+        timer.observe("prompt_build", time.perf_counter() - prompt_build_started)
 
     # GPT 스트리밍
     try:
-        stream = openai_client.chat.completions.create(
+        request_started = time.perf_counter()
+        first_token_at = None
+        stream = await openai_client.chat.completions.create(
             model="gpt-4o",
             messages=messages,
             stream=True,
             temperature=0.3,
-            max_tokens=2000
+            max_tokens=2000,
+            stream_options={"include_usage": True}
         )
 
         full_answer = ""  # 🔥 Cleaned answer (invalid citations removed)
-        buffer = ""
-        seen_citations = set()
         chunk_num = 0
+        usage = {}
+        # Citation 태그 후보("{{cita...")만 보류하고 나머지 텍스트는 즉시 출력
+        # 태그가 완성되면 유효한 번호만 남겨 {{citation:N,M}} 형식으로 정규화
+        citation_parser = CitationStreamParser(
+            num_references,
+            on_invalid=lambda n: logger.warning(f"⚠️  Invalid citation {{{{citation:{n}}}}} removed", extra={"sampled": True})
+        )
 
-        for chunk in stream:
-            if chunk.choices[0].delta.content:
+        async for chunk in stream:
+            # include_usage: 마지막 청크에 토큰 사용량이 포함됨 (choices는 비어 있음)
+            if getattr(chunk, "usage", None):
+                usage = {
+                    "prompt_tokens": chunk.usage.prompt_tokens,
+                    "completion_tokens": chunk.usage.completion_tokens,
+                    "cached_tokens": cached_tokens_from_usage(chunk.usage)
+                }
+            if chunk.choices and chunk.choices[0].delta.content:
                 content = chunk.choices[0].delta.content
-                buffer += content  # 🔥 버퍼에만 원본 추가 (full_answer는 cleaned version 유지)
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
                 chunk_num += 1
 
-                # Citation 버퍼링: {{citation:...}} 패턴이 완성될 때까지 대기
-                output_chunk = ""
-
-                while buffer:
-                    # Citation 패턴 찾기
-                    match = re.search(r'\{\{?citation:(\d+(?:,\d+)*)\}\}?', buffer)
-
-                    if match:
-                        # Citation 앞부분 출력
-                        before_citation = buffer[:match.start()]
-                        output_chunk += before_citation
-                        full_answer += before_citation  # 🔥 Cleaned answer에 추가
-
-                        # Citation 유효성 검증
-                        cite_nums_str = match.group(1)
-                        cite_nums = [int(n.strip()) for n in cite_nums_str.split(',')]
-
-                        valid_nums = []
-                        for cite_num in cite_nums:
-                            if 0 <= cite_num < num_references:
-                                valid_nums.append(cite_num)
-                                seen_citations.add(cite_num)
-                            else:
-                                print(f"⚠️  Invalid citation {{{{citation:{cite_num}}}}} removed", file=sys.stderr, flush=True)
-
-                        # 유효한 citation 출력
-                        if valid_nums:
-                            valid_citation = '{{citation:' + ','.join(map(str, valid_nums)) + '}}'
-                            output_chunk += valid_citation
-                            full_answer += valid_citation  # 🔥 Cleaned answer에 추가
-
-                        # Citation 이후 버퍼 업데이트
-                        buffer = buffer[match.end():]
-                    elif buffer and ('{{' in buffer[-10:] or buffer.endswith('{{')):
-                        # Citation 시작 가능성 - 버퍼 유지
-                        # 🔥 ONLY buffer if we see '{{' pattern (NOT single '{')
-                        # This prevents false positives where GPT outputs '{' as regular text
-
-                        # buffer에서 마지막 '{{' 위치 찾기
-                        last_double_brace_idx = buffer.rfind('{{')
-
-                        if last_double_brace_idx != -1:
-                            # '{{' 이후 텍스트 추출
-                            after_brace = buffer[last_double_brace_idx:]
-
-                            # Partial citation 패턴들 (MUST start with '{{', NOT single '{')
-                            partial_patterns = ['{{', '{{c', '{{ci', '{{cit', '{{cita', '{{citat',
-                                              '{{citati', '{{citatio', '{{citation', '{{citation:']
-
-                            is_partial = any(after_brace.startswith(p) for p in partial_patterns)
-
-                            if is_partial:
-                                # Partial citation - '{{' 앞까지만 출력
-                                if last_double_brace_idx > 0:
-                                    safe_chunk = buffer[:last_double_brace_idx]
-                                    output_chunk += safe_chunk
-                                    full_answer += safe_chunk
-                                    buffer = buffer[last_double_brace_idx:]  # '{{' 부터 버퍼에 유지
-                                break
-                            else:
-                                # '{{' 이후가 citation 패턴이 아님 - 전부 출력
-                                output_chunk += buffer
-                                full_answer += buffer
-                                buffer = ""
-                                break
-
-                        # 일반적인 긴 버퍼 처리
-                        if len(buffer) > 25:
-                            safe_chunk = buffer[:-25]
-                            output_chunk += safe_chunk
-                            full_answer += safe_chunk
-                            buffer = buffer[-25:]
-                        break
-                    else:
-                        # 안전하게 출력
-                        output_chunk += buffer
-                        full_answer += buffer  # 🔥 Cleaned answer에 추가
-                        buffer = ""
-                        break
-
-                # 청크 출력
+                output_chunk = citation_parser.feed(content)
                 if output_chunk:
+                    full_answer += output_chunk
                     yield (output_chunk, False)
-                    await asyncio.sleep(0.01)  # 🔥 타이핑 속도 조절 (10ms 딜레이)
 
-        # 버퍼 비우기
-        if buffer:
-            print(f"📝 Flushing final buffer: '{buffer}'", file=sys.stderr, flush=True)
+        # 스트림 끝: 두 번째 '}'가 없는 태그 완성, 미완성 후보는 텍스트로 출력
+        final_output = citation_parser.flush()
+        if final_output:
+            full_answer += final_output
+            yield (final_output, False)
+        seen_citations = citation_parser.seen_citations
+        if timer:
+            if first_token_at:
+                timer.observe("ttft", first_token_at - request_started)
+            timer.observe("generation", time.perf_counter() - request_started)
+
+        logger.info(f"✅ Streaming complete: {chunk_num} chunks, {len(full_answer)} chars",
+                    extra={"citations": sorted(seen_citations)})
+        if usage:
+            ttft = first_token_at - request_started if first_token_at else None
+            prompt_cache_stats.record(usage["prompt_tokens"], usage["cached_tokens"], ttft)
+            for kind in ("prompt_tokens", "completion_tokens", "cached_tokens"):
+                llm_tokens_total.labels(kind=kind.replace("_tokens", "")).inc(usage[kind])
+            logger.info(f"Prompt tokens: {usage['prompt_tokens']} actual vs {plan.total_tokens} planned, {usage['cached_tokens']} cached",
+                        extra={"usage": usage, "prefix": ANSWER_PROMPT_FINGERPRINTS.get(language, "dynamic"),
+                               "ttft": ttft if ttft is None else round(ttft, 3)})
 
-            final_output = ""
-            while buffer:
-                match = re.search(r'\{\{?citation:(\d+(?:,\d+)*)\}\}?', buffer)
+        # 최종 답변 반환
+        yield (full_answer, True, doc_order, seen_docs, usage)
 
-                if match:
-                    before_citation = buffer[:match.start()]
-                    final_output += before_citation
+    except Exception as e:
+        logger.exception(f"❌ Error in generate_answer_stream: {e}")
+        yield (ANSWER_ERROR_MESSAGE, True, doc_order, seen_docs, {})
 
-                    cite_nums_str = match.group(1)
-                    cite_nums = [int(n.strip()) for n in cite_nums_str.split(',')]
 
-                    valid_nums = []
-                    for cite_num in cite_nums:
-                        if 0 <= cite_num < num_references:
-                            valid_nums.append(cite_num)
-                            seen_citations.add(cite_num)
-                        else:
-                            print(f"⚠️  Invalid citation {{{{citation:{cite_num}}}}} removed from final buffer", file=sys.stderr, flush=True)
+# 백그라운드 작업 (응답과 무관하게 끝까지 실행) - 이벤트 루프는 태스크를 약한 참조로만 보관하므로 여기서 참조 유지
+background_tasks: Set[asyncio.Task] = set()
 
-                    if valid_nums:
-                        valid_citation = '{{citation:' + ','.join(map(str, valid_nums)) + '}}'
-                        final_output += valid_citation
 
-                    buffer = buffer[match.end():]
-                else:
-                    final_output += buffer
-                    buffer = ""
+def spawn_background(coro) -> asyncio.Task:
+    """응답을 기다리지 않는 작업 실행 - 끝날 때까지 참조를 유지하고 처리되지 않은 예외는 로그로 남김"""
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(_background_task_done)
+    return task
 
-            if final_output:
-                full_answer += final_output
-                yield (final_output, False)
 
-        print(f"✅ Streaming complete. Seen citations: {sorted(seen_citations)}", file=sys.stderr, flush=True)
-        print(f"   Total: {chunk_num} chunks, {len(full_answer)} chars", file=sys.stderr, flush=True)
+def _background_task_done(task: asyncio.Task):
+    background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"❌ Background task failed: {task.exception()!r}")
 
-        # 최종 답변 반환
-        yield (full_answer, True, doc_order, seen_docs)
 
+async def rehydrate_chunks(chunk_ids: List[str]) -> List[Dict]:
+    """
+    청크 ID 목록 → 청크 (ID 순서 유지)
+    chunk store에 없는 ID는 벡터 스토어 메타데이터에서 복원 (만료/다른 인스턴스)
+    """
+    found = await asyncio.to_thread(chunk_store.get_many, chunk_ids)
+    missing = [chunk_id for chunk_id in chunk_ids if chunk_id not in found]
+    if missing:
+        try:
+            records = await asyncio.to_thread(vector_store.fetch, missing)
+        except Exception as e:
+            logger.warning(f"⚠️  Chunk rehydration failed for {len(missing)} IDs: {e}")
+            records = {}
+        for vid, record in records.items():
+            chunk = dict(record.metadata)
+            chunk['id'] = vid
+            found[vid] = chunk
+        if records:
+            await asyncio.to_thread(chunk_store.put_many, [found[vid] for vid in records])
+        logger.debug(f"Chunk store: {len(chunk_ids) - len(missing)} hits, {len(records)}/{len(missing)} fetched from vector store")
+    return [found[chunk_id] for chunk_id in chunk_ids if chunk_id in found]
+
+
+async def prefetch_followup_embeddings(followup_questions: List[str], language: str):
+    """
+    후속 질문 임베딩을 미리 캐시에 적재 (사용자가 클릭하면 캐시 히트)
+    영어 질문만 - 그대로 검색 쿼리로 쓰이기 때문 (한국어/일본어는 번역 후 쿼리가 달라짐)
+    """
+    if language != "English" or not followup_questions:
+        return
+    try:
+        await retriever.embed_queries(followup_questions)
     except Exception as e:
-        print(f"❌ Error in generate_answer_stream: {e}", file=sys.stderr, flush=True)
-        import traceback
-        traceback.print_exc(file=sys.stderr)
-        error_msg = "죄송합니다. 답변 생성 중 오류가 발생했습니다."
-        yield (error_msg, True, doc_order, seen_docs)
+        logger.warning(f"⚠️  Follow-up embedding prefetch failed: {e}")
 
 
 async def generate_followup_questions(question: str, answer: str, conversation_history: List[Dict], language: str = "Korean") -> List[str]:
@@ -823,7 +924,7 @@ Examples of BAD follow-up questions (too general):
 Generate 3 specific follow-up questions based on the actual content of the answer above.
 Return only the questions, one per line, without numbering or bullet points."""
 
-        response = openai_client.chat.completions.create(
+        response = await openai_client.chat.completions.create(
             model="gpt-4o-mini",
             messages=[{"role": "user", "content": prompt}],
             temperature=0.7,
@@ -833,14 +934,59 @@ Return only the questions, one per line, without numbering or bullet points."""
         followup_text = response.choices[0].message.content.strip()
         questions = [q.strip() for q in followup_text.split('\n') if q.strip()]
 
-        print(f"✅ Generated {len(questions)} follow-up questions in {language}", file=sys.stderr, flush=True)
+        logger.info(f"✅ Generated {len(questions)} follow-up questions in {language}")
         return questions[:3]
 
     except Exception as e:
-        print(f"❌ Error generating follow-up questions: {e}", file=sys.stderr, flush=True)
+        logger.exception(f"❌ Error generating follow-up questions: {e}")
         return []
 
 
+async def summarize_history(previous_summary: str, messages: List[Dict]) -> str:
+    """세션 히스토리 압축: 이전 요약 + 오래된 대화 턴 → 새 요약 (gpt-4o-mini)"""
+    transcript = "\n\n".join(f"{m['role'].upper()}: {m['content']}" for m in messages)
+    prompt = f"""Summarize this veterinary consultation so the conversation can continue without the original messages.
+
+Keep every clinically relevant detail: species, breed, age, weight, history, symptoms, test results,
+diagnoses discussed, medications and doses, and questions that are still open. Omit citations and pleasantries.
+Write at most 200 words, in the same language as the conversation.
+
+Summary so far:
+{previous_summary or "(none)"}
+
+New messages:
+{transcript}"""
+
+    response = await openai_client.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0.2,
+        max_tokens=400
+    )
+    return (response.choices[0].message.content or "").strip()
+
+
+history_compactor = HistoryCompactor(
+    session_store,
+    token_counter,
+    summarize_history,
+    threshold_tokens=SESSION_COMPACT_TOKENS,
+    keep_recent=SESSION_KEEP_RECENT_MESSAGES
+)
+
+
+async def prewarm_understanding_cache(questions: List[str], language: str):
+    """예시 질문들의 질문 이해 결과(번역 포함)를 백그라운드에서 캐시에 적재"""
+    try:
+        await asyncio.gather(*(
+            understand_query(openai_client, q, language, cache=understanding_cache)
+            for q in questions
+            if isinstance(q, str) and q.strip()
+        ))
+    except Exception as e:
+        logger.warning(f"⚠️  Understanding cache prewarm failed: {e}")
+
+
 class GenerateQuestionsRequest(BaseModel):
     category: str
     language: str = "English"
@@ -891,7 +1037,7 @@ Keep each question to 15-20 words maximum.
 Return the questions in English as a JSON array: ["question1", "question2", "question3"]"""
 
         # GPT-4o-mini로 질문 생성
-        response = openai_client.chat.completions.create(
+        response = await openai_client.chat.completions.create(
             model="gpt-4o-mini",
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -923,18 +1069,30 @@ Return the questions in English as a JSON array: ["question1", "question2", "que
             if len(questions) < 3:
                 raise ValueError("Not enough questions generated")
 
+            # 한국어/일본어 예시 질문은 번역 결과를 미리 캐시 (클릭 시 번역 왕복 생략, TRANSLATION_CACHE_PREWARM=true일 때만)
+            if TRANSLATION_CACHE_PREWARM and target_language in ["Korean", "Japanese"]:
+                spawn_background(prewarm_understanding_cache(questions, target_language))
+
             return {"questions": questions}
 
         except Exception as parse_error:
-            print(f"❌ JSON 파싱 오류: {parse_error}", file=sys.stderr, flush=True)
-            print(f"Raw content: {content}", file=sys.stderr, flush=True)
+            logger.error(f"❌ JSON 파싱 오류: {parse_error}", extra={"raw_content": content[:500]})
             raise HTTPException(status_code=500, detail="Failed to parse generated questions")
 
     except Exception as e:
-        print(f"❌ 질문 생성 오류: {e}", file=sys.stderr, flush=True)
+        logger.exception(f"❌ 질문 생성 오류: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Prometheus 지표 (단계별 지연 히스토그램, 요청/토큰 카운터, 캐시 적중률)"""
+    for name, cache in (("embeddings", embedding_cache), ("translations", understanding_cache),
+                        ("chunks", chunk_store), ("answers", answer_cache), ("sessions", session_store)):
+        cache_hit_ratio.labels(cache=name).set(cache.stats().get("hit_rate", 0.0))
+    return Response(content=render_metrics(metrics), media_type=METRICS_CONTENT_TYPE)
+
+
 @app.get("/health")
 async def health_check():
     """헬스 체크"""
@@ -942,321 +1100,348 @@ async def health_check():
         # OpenAI 연결 확인
         openai_status = "connected" if openai_client else "disconnected"
 
-        # Pinecone 연결 확인
-        stats = pinecone_index.describe_index_stats()
+        # 벡터 스토어 연결 확인 (블로킹 호출은 스레드에서 실행)
+        stats = await asyncio.to_thread(vector_store.stats)
         pinecone_status = "connected"
-        total_vectors = stats.get('total_vector_count', 0)
+        total_vectors = stats.total_vector_count
 
         return {
             "status": "healthy",
             "services": {
                 "openai": openai_status,
                 "pinecone": pinecone_status,
-                "vectors": total_vectors
-            }
+                "vector_store": stats.backend,
+                "vectors": total_vectors,
+                "bm25": bm25_index.stats() if bm25_index else None
+            },
+            "caches": {
+                "embeddings": embedding_cache.stats(),
+                "translations": understanding_cache.stats(),
+                "chunks": chunk_store.stats(),
+                "answers": answer_cache.stats()
+            },
+            "sessions": {**session_store.stats(), **history_compactor.stats()},
+            "prompt_cache": prompt_cache_stats.stats(),
+            "sse": sse_totals.stats(),
+            "logging": logging_stats(),
+            "cassette": cassette.stats() if cassette else None
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+_index_version_checked_at = 0.0
+
+
+async def refresh_answer_cache_index_version():
+    """
+    벡터 인덱스 버전이 바뀌면 답변 캐시 무효화
+    VECTOR_INDEX_VERSION 환경 변수가 있으면 그 값을, 없으면 벡터 개수를 버전으로 사용 (최대 5분에 한 번 확인)
+    """
+    global _index_version_checked_at
+    now = time.time()
+    if now - _index_version_checked_at < ANSWER_CACHE_VERSION_CHECK_INTERVAL:
+        return
+    _index_version_checked_at = now
+
+    try:
+        version = os.getenv("VECTOR_INDEX_VERSION")
+        if not version:
+            stats = await asyncio.to_thread(vector_store.stats)
+            version = f"{stats.backend}:{PINECONE_INDEX_NAME}:{stats.total_vector_count}"
+        answer_cache.set_index_version(version)
+    except Exception as e:
+        logger.warning(f"⚠️  Index version check failed: {e}")
+
+
 @app.post("/query-stream")
 async def query_stream(request: QueryRequest):
     """
     SSE 스트리밍으로 답변 생성
     """
+    flush_ms = SSE_COALESCE_MS if request.stream_flush_ms is None else request.stream_flush_ms
+    sse = SSEWriter(
+        create_sse_event,
+        encode_delta=sse_delta_frame,
+        window=min(max(flush_ms, 0), SSE_MAX_COALESCE_MS) / 1000,
+        max_bytes=min(SSE_COALESCE_BYTES if request.stream_flush_bytes is None else request.stream_flush_bytes, SSE_MAX_COALESCE_BYTES)
+    )
+
     async def event_generator():
+        timer = RequestTimer(stage_latency)
+        outcome = "aborted"  # 클라이언트 연결 종료 등으로 끝까지 가지 못한 요청
+        requests_in_progress.inc()
         try:
             question = request.question
             conversation_history = request.conversation_history
-            previous_context_chunks = request.previous_context_chunks
             language = request.language
 
-            print(f"\n{'='*80}", file=sys.stderr, flush=True)
-            print(f"📨 New query received", file=sys.stderr, flush=True)
-            print(f"   Question: {question}", file=sys.stderr, flush=True)
-            print(f"   Language from frontend: {language}", file=sys.stderr, flush=True)
-            print(f"   Previous context: {len(previous_context_chunks)} chunks", file=sys.stderr, flush=True)
-            print(f"   History: {len(conversation_history)} messages", file=sys.stderr, flush=True)
+            # 서버 측 세션: 저장된 히스토리(요약 + 최근 메시지) 사용, 없거나 만료되었으면 요청의 히스토리로 새 세션 생성
+            # (클라이언트는 세션이 있어도 최근 히스토리를 함께 보냄 - 세션 만료 시 맥락 유지용)
+            session = None
+            history_summary = None
+            if SESSIONS_ENABLED:
+                session = await asyncio.to_thread(session_store.get_or_create, request.session_id, conversation_history)
+                conversation_history = list(session.messages)
+                history_summary = session.summary_message()
+            session_id = session.session_id if session else None
+
+            # 이전 컨텍스트는 ID로 받아 서버에서 복원 (병합은 최대 5개, 전체 청크를 보내는 구버전 클라이언트도 허용)
+            previous_context_chunks = [chunk for chunk in request.previous_context_chunks if chunk.get('text')]
+            previous_context_ids = list(request.previous_context_ids) + [
+                chunk_handle(chunk) for chunk in request.previous_context_chunks if not chunk.get('text')
+            ]
+            if not previous_context_ids and not previous_context_chunks and session:
+                previous_context_ids = list(session.context_ids)
+            previous_context_task = asyncio.create_task(
+                rehydrate_chunks(previous_context_ids[:5])
+            ) if previous_context_ids else None
+
+            logger.info(f"📨 New query received: {question[:100]}",
+                        extra={"language": language, "previous_context_ids": len(previous_context_ids),
+                               "previous_context_chunks": len(previous_context_chunks),
+                               "history_messages": len(conversation_history),
+                               "summarized_messages": session.summarized_messages if history_summary else 0,
+                               "session_id": session_id})
+
+            if ANSWER_CACHE_ENABLED:
+                spawn_background(refresh_answer_cache_index_version())
 
             # 1단계: 언어 감지 - 질문 텍스트에서 자동 감지 (프론트엔드 설정 무시)
-            detected_lang = detect_language_from_text(question)
-            print(f"🔍 질문 텍스트 기반 언어 자동 감지: {detected_lang}", file=sys.stderr, flush=True)
-            print(f"   Question preview: {question[:100]}...", file=sys.stderr, flush=True)
+            with timer.span("language_detection"):
+                detected_lang = detect_language_from_text(question)
+            logger.debug(f"Detected language: {detected_lang}")
 
-            # Classify question type
-            question_type = classify_question_type(question, detected_lang)
-            print(f"🔍 Question type: {question_type}", file=sys.stderr, flush=True)
+            yield sse.encoded(STATUS_EVENTS["translating"])
 
-            yield create_sse_event({
-                "status": "translating",
-                "message": "질문 이해 중..."
-            })
+            # 질문 이해: 번역 + Query expansion + 질문 유형 분류를 한 번의 JSON 호출로
+            # (DB가 영어이므로 한국어/일본어 질문은 영어로 번역, 실패 시 regex 분류기로 fallback)
+            # 추측 검색: 응답을 스트리밍해 english_query가 나오는 즉시(영어 질문은 호출 전에) 1차 검색을 시작하고,
+            # 확장 쿼리는 응답이 오는 대로 별도 task에서 검색 (키워드 검색은 임베딩과 동시에 시작)
+            retrieval = retriever.start(question, detected_lang, timer)
+            primary_queries = await retrieval.primary_queries()
 
-            # 한국어 또는 일본어 질문이면 영어로 번역 (DB가 영어이므로)
-            search_query = question
             if detected_lang in ["Korean", "Japanese"]:
-                lang_display = "한국어" if detected_lang == "Korean" else "日本語"
-                print(f"🌐 {lang_display} 질문 감지 - 영어로 번역 중...", file=sys.stderr, flush=True)
-
-                # 🔥 ENHANCED: Medical context-preserving translation
-                if detected_lang == "Korean":
-                    translation_prompt = f"""You are a veterinary medical translator. Translate this Korean veterinary question to English while PRESERVING ALL clinical context and nuances.
-
-CRITICAL RULES:
-1. **Preserve temporal context**: "아침에" → "in the morning", "밤에" → "at night", "식후" → "after eating"
-2. **Preserve symptom descriptions**:
-   - "우웩우웩" (retching sound) → "retched" or "dry heaving"
-   - "거품토" → "foamy vomit" or "frothy vomit"
-   - "물같은 설사" → "watery diarrhea"
-   - "피똥" → "bloody stool" or "hematochezia"
-3. **Preserve clinical patterns**: If the question mentions timing, frequency, or progression, keep those details
-4. **Use proper veterinary terminology**: Translate colloquial Korean to professional English medical terms
-5. **Preserve question intent**: If asking "what causes", keep it as diagnostic question; if asking "how to treat", keep it as treatment question
-
-Examples:
-- "강아지가 아침에 우웩우웩 거품토를 했는데 뭐가 원인임?"
-  → "My dog retched and vomited foam in the morning. What could be the cause?"
-
-- "고양이가 밥 먹고 나서 계속 토해요"
-  → "My cat keeps vomiting after eating meals"
-
-- "강아지 다리를 절뚝거려요. 어디가 아픈건가요?"
-  → "My dog is limping. Where might the pain be?"
-
-Now translate this Korean veterinary question:
-
-{question}
-
-Return ONLY the English translation that preserves all clinical details and context."""
-                else:  # Japanese
-                    translation_prompt = f"""You are a veterinary medical translator. Translate this Japanese veterinary question to English while PRESERVING ALL clinical context and nuances.
-
-CRITICAL RULES:
-1. **Preserve temporal context**: "朝に" → "in the morning", "夜に" → "at night", "食後" → "after eating"
-2. **Preserve symptom descriptions** (keep onomatopoeia meanings):
-   - "ゲーゲー" (retching sound) → "retched" or "dry heaving"
-   - "泡状の嘔吐" → "foamy vomit" or "frothy vomit"
-   - "水様性下痢" → "watery diarrhea"
-   - "血便" → "bloody stool" or "hematochezia"
-3. **Preserve clinical patterns**: If the question mentions timing, frequency, or progression, keep those details
-4. **Use proper veterinary terminology**: Translate colloquial Japanese to professional English medical terms
-5. **Preserve question intent**: Maintain whether it's asking for diagnosis, treatment, or explanation
-
-Examples:
-- "犬が朝に泡状の嘔吐をしました。原因は何ですか？"
-  → "My dog vomited foam in the morning. What could be the cause?"
-
-- "猫が食後に吐き続けます"
-  → "My cat keeps vomiting after eating meals"
-
-- "犬が足を引きずっています。どこが痛いのでしょうか？"
-  → "My dog is limping. Where might the pain be?"
-
-Now translate this Japanese veterinary question:
-
-{question}
-
-Return ONLY the English translation that preserves all clinical details and context."""
-
-                translation_response = openai_client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=[{
-                        "role": "user",
-                        "content": translation_prompt
-                    }],
-                    temperature=0.2,
-                    max_tokens=250
-                )
-                search_query = translation_response.choices[0].message.content.strip()
-                print(f"✅ 번역 완료: {question[:50]}... → {search_query[:50]}...", file=sys.stderr, flush=True)
-
-            # 2단계: 임베딩 (영어 쿼리로)
-            yield create_sse_event({
-                "status": "embedding",
-                "message": "벡터 변환 중..."
-            })
-
-            query_embedding = openai_client.embeddings.create(
-                model="text-embedding-3-small",
-                input=search_query
-            ).data[0].embedding
+                logger.debug(f"Translated: {question[:50]} → {primary_queries[0][:50]}")
+            for i, q in enumerate(primary_queries):
+                logger.debug(f"Expanded query {i + 1}: {q}", extra={"sampled": True})
+
+            # 2단계: 임베딩 - 알려진 쿼리를 한 번의 배치 요청으로 (영어 쿼리로)
+            yield sse.encoded(STATUS_EVENTS["embedding"])
+
+            all_embeddings = await retrieval.embed()
+
+            # 시맨틱 답변 캐시: 대화 히스토리 없는 첫 질문이 기존 질문과 거의 같으면 저장된 답변을 재생
+            use_answer_cache = ANSWER_CACHE_ENABLED and not conversation_history and not previous_context_chunks and not previous_context_ids
+            if use_answer_cache:
+                cached_answer = answer_cache.lookup(all_embeddings[0], detected_lang)
+                if cached_answer:
+                    logger.info(f"♻️  Semantic answer cache hit: '{cached_answer.question[:50]}'")
+                    retrieval.cancel()  # 질문 이해는 계속 진행되어 캐시에 저장됨
+                    if session_id:
+                        await record_turn(session_store, history_compactor, session_id, question, cached_answer.answer,
+                                          [chunk_handle(chunk) for chunk in cached_answer.context_chunks], spawn_background)
+                    async for event in replay_answer(cached_answer, sse, chunk_store, STATUS_EVENTS["generating"], session_id):
+                        yield event
+                    outcome = "cached"
+                    return
 
             # 3단계: 검색
-            yield create_sse_event({
-                "status": "searching",
-                "message": "문헌 검색 중..."
-            })
-
-            # Query expansion (영어로, DB가 영어이므로)
-            expansion_prompt = f"""Generate 2 alternative phrasings of this veterinary question in English:
-
-Original: {search_query}
-
-Return only the alternative questions, one per line."""
-
-            expansion_response = openai_client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[{"role": "user", "content": expansion_prompt}],
-                temperature=0.4,
-                max_tokens=100
-            )
-
-            expanded_queries = [search_query]  # 번역된 영어 쿼리 포함
-            expansion_text = expansion_response.choices[0].message.content.strip()
-            for line in expansion_text.split('\n'):
-                if line.strip():
-                    expanded_queries.append(line.strip())
-
-            expanded_queries = expanded_queries[:3]  # 최대 3개
-
-            print(f"🔍 Query expansion: {len(expanded_queries)} queries (English)", file=sys.stderr, flush=True)
-            for i, q in enumerate(expanded_queries):
-                print(f"   Query {i+1}: {q}", file=sys.stderr, flush=True)
-
-            # 모든 쿼리 임베딩 생성
-            all_embeddings = []
-            for exp_query in expanded_queries:
-                emb = openai_client.embeddings.create(
-                    model="text-embedding-3-small",
-                    input=exp_query
-                ).data[0].embedding
-                all_embeddings.append(emb)
-
-            # 병렬 검색
-            async def search_single_query(embedding, idx):
-                results = pinecone_index.query(
-                    vector=embedding,
-                    top_k=15,
-                    include_metadata=True
+            yield sse.encoded(STATUS_EVENTS["searching"])
+
+            # 병렬 검색 - 가장 느린 쿼리 시간만큼만 소요 (타임아웃된 쿼리는 제외)
+            # 확장 쿼리 결과는 데드라인까지만 기다리고, 늦으면 1차 쿼리 결과만으로 진행
+            retrieval_result = await retrieval.search()
+            searched_queries = retrieval_result.queries
+            all_search_results = retrieval_result.dense_results
+            keyword_results = retrieval_result.keyword_results
+            if retrieval_result.expansion:
+                expansions_total.labels(outcome=retrieval_result.expansion).inc()
+
+            # 질문 유형은 답변 프롬프트에서만 필요 - 질문 이해가 아직 안 끝났으면 regex 분류기 사용
+            understanding = retrieval.understanding
+            question_type = understanding.question_type if understanding else classify_question_type(question, detected_lang)
+            logger.info(f"🔍 Question type: {question_type} ({understanding.source if understanding else 'regex'}), "
+                        f"{len(searched_queries)} queries searched",
+                        extra={"detected_language": detected_lang})
+
+            fusion_started = time.perf_counter()
+            if keyword_results:
+                # Hybrid: dense + BM25 결과를 reciprocal-rank fusion으로 병합 (점수 스케일이 달라 순위 기반)
+                all_chunks = reciprocal_rank_fusion(all_search_results + keyword_results, k=RRF_K)
+                logger.info(f"🔀 RRF: dense {sum(len(r) for r in all_search_results)} + BM25 {sum(len(r) for r in keyword_results)} 결과 병합")
+            else:
+                # 중복 제거
+                all_chunks = []
+                seen_chunk_ids = set()
+
+                for chunks in all_search_results:
+                    for chunk in chunks:
+                        chunk_id = chunk_key(chunk)
+                        if chunk_id not in seen_chunk_ids:
+                            all_chunks.append(chunk)
+                            seen_chunk_ids.add(chunk_id)
+
+                # 유사도 점수로 재정렬
+                all_chunks.sort(key=lambda x: x.get('score', 0), reverse=True)
+
+            if MMR_ENABLED:
+                # BM25에서만 나온 청크는 임베딩이 없으므로 벡터 스토어에서 가져옴
+                missing_ids = [c['id'] for c in all_chunks if c.get('id') and not c.get('values')]
+                if missing_ids:
+                    try:
+                        fetched = await asyncio.to_thread(vector_store.fetch, missing_ids)
+                        for chunk in all_chunks:
+                            record = fetched.get(chunk.get('id'))
+                            if record is not None and not chunk.get('values'):
+                                chunk['values'] = record.values
+                    except Exception as e:
+                        logger.warning(f"⚠️  Embedding fetch for MMR failed: {e}")
+
+                context_chunks = select_context(
+                    all_chunks,
+                    max_chunks=CONTEXT_MAX_CHUNKS,
+                    max_per_document=MAX_CHUNKS_PER_DOCUMENT or None,
+                    mmr_lambda=MMR_LAMBDA
                 )
-                chunks = []
-                for match in results.matches:
-                    chunk = match.metadata
-                    chunk['score'] = match.score
-                    chunks.append(chunk)
-                return chunks
-
-            search_tasks = [search_single_query(emb, idx) for idx, emb in enumerate(all_embeddings)]
-            all_search_results = await asyncio.gather(*search_tasks)
-
-            # 중복 제거
-            all_chunks = []
-            seen_chunk_ids = set()
-
-            for chunks in all_search_results:
-                for chunk in chunks:
-                    chunk_id = f"{chunk.get('source', 'unknown')}_{chunk.get('title', 'unknown')}_{chunk.get('page', 0)}"
-                    if chunk_id not in seen_chunk_ids:
-                        all_chunks.append(chunk)
-                        seen_chunk_ids.add(chunk_id)
-
-            # 유사도 점수로 재정렬 및 상위 25개 선택
-            all_chunks.sort(key=lambda x: x.get('score', 0), reverse=True)
-            context_chunks = all_chunks[:25]
-
-            print(f"✅ Query Expansion 검색 완료: {len(all_chunks)}개 청크 발견 → 상위 25개 선택", file=sys.stderr, flush=True)
+                paper_count = len({document_key(c) for c in context_chunks})
+                logger.info(f"✅ Query Expansion 검색 완료: {len(all_chunks)}개 청크 발견 → MMR로 {len(context_chunks)}개 선택 (논문 {paper_count}편)")
+            else:
+                context_chunks = all_chunks[:CONTEXT_MAX_CHUNKS]
+                logger.info(f"✅ Query Expansion 검색 완료: {len(all_chunks)}개 청크 발견 → 상위 {len(context_chunks)}개 선택")
+            timer.observe("fusion_selection", time.perf_counter() - fusion_started)
 
             # 이전 컨텍스트 병합 (최대 5개)
+            if previous_context_task:
+                with timer.span("previous_context"):
+                    previous_context_chunks = await previous_context_task + previous_context_chunks
             if previous_context_chunks and len(previous_context_chunks) > 0:
-                print(f"🔄 이전 컨텍스트 {len(previous_context_chunks)}개 + 새 컨텍스트 {len(context_chunks)}개 병합", file=sys.stderr, flush=True)
+                logger.info(f"🔄 이전 컨텍스트 {len(previous_context_chunks)}개 + 새 컨텍스트 {len(context_chunks)}개 병합")
 
-                existing_ids = {chunk.get('chunk_id') for chunk in context_chunks if chunk.get('chunk_id')}
+                existing_ids = {chunk_key(chunk) for chunk in context_chunks}
 
                 added_count = 0
                 for prev_chunk in previous_context_chunks[:5]:
-                    chunk_id = prev_chunk.get('chunk_id')
-                    if chunk_id and chunk_id not in existing_ids:
+                    chunk_id = chunk_key(prev_chunk)
+                    if chunk_id not in existing_ids:
                         context_chunks.append(prev_chunk)
                         existing_ids.add(chunk_id)
                         added_count += 1
 
-                print(f"   ✅ 이전 컨텍스트 {added_count}개 추가됨 (총 {len(context_chunks)}개)", file=sys.stderr, flush=True)
+                logger.debug(f"이전 컨텍스트 {added_count}개 추가됨 (총 {len(context_chunks)}개)")
 
             if not context_chunks:
-                error_message = "관련 문헌을 찾을 수 없습니다. 다른 질문을 시도해주세요."
-                yield create_sse_event({
-                    "status": "error",
-                    "message": error_message
-                })
+                outcome = "no_results"
+                yield sse.encoded(STATUS_EVENTS["no_results"])
                 return
 
             # 4단계: 답변 생성
-            yield create_sse_event({
-                "status": "generating",
-                "message": "답변 생성 중..."
-            })
+            yield sse.encoded(STATUS_EVENTS["generating"])
 
             # GPT 스트리밍
             full_answer = ""
             chunk_count = 0
             doc_order = []
             seen_docs = {}
+            usage = {}
 
-            async for result in generate_answer_stream(question, context_chunks, detected_lang, conversation_history):
-                if len(result) == 2:  # 스트리밍 중
+            # 델타는 SSEWriter가 병합 - 시간 창이 지나면(None) 다음 델타를 기다리지 않고 전송
+            answer_stream = generate_answer_stream(
+                question, context_chunks, detected_lang, conversation_history, question_type, history_summary, timer
+            )
+            async for result in with_flush_deadlines(answer_stream, sse):
+                if result is None:  # 병합 시간 창 만료
+                    frame = sse.flush()
+                    if frame:
+                        yield frame
+                elif len(result) == 2:  # 스트리밍 중
                     chunk_content, is_done = result
                     chunk_count += 1
 
-                    event_data = create_sse_event({
-                        "status": "streaming",
-                        "chunk": chunk_content
-                    })
-                    yield event_data
+                    frame = sse.delta(chunk_content)
+                    if frame:
+                        yield frame
                 else:  # 스트리밍 완료
-                    full_answer, is_done, doc_order, seen_docs = result
-                    print(f"✅ Total chunks sent: {chunk_count}", file=sys.stderr, flush=True)
+                    full_answer, is_done, doc_order, seen_docs, usage = result
+                    logger.debug(f"Answer chunks sent: {chunk_count}")
 
             # OUT_OF_SCOPE 체크
             if "OUT_OF_SCOPE_QUERY" in full_answer:
-                print("⚠️  Out of scope query detected", file=sys.stderr, flush=True)
-                yield create_sse_event({
-                    "status": "out_of_scope",
-                    "message": "질문이 제공된 문서의 범위를 벗어났습니다."
-                })
+                logger.warning("⚠️  Out of scope query detected")
+                outcome = "out_of_scope"
+                yield sse.encoded(STATUS_EVENTS["out_of_scope"])
                 return
 
             # 5단계: 참고문헌 추출
-            print("📚 참고문헌 추출 및 후속 질문 생성 시작...", file=sys.stderr, flush=True)
+            logger.debug("Extracting references and generating follow-up questions")
 
-            # 병렬 실행
-            refs_task = extract_references_from_answer(full_answer, doc_order, seen_docs)
-            followup_task = generate_followup_questions(question, full_answer, conversation_history, detected_lang)
+            # 병렬 실행 - 후속 질문 생성(LLM 호출)을 백그라운드 태스크로 먼저 시작
+            async def timed_followups():
+                with timer.span("followups"):
+                    return await generate_followup_questions(question, full_answer, conversation_history, detected_lang)
 
-            remapped_answer, references = await refs_task
-            followup_questions = await followup_task
+            followup_task = asyncio.create_task(timed_followups())
+            with timer.span("references"):
+                remapped_answer, references = await extract_references_from_answer(full_answer, doc_order, seen_docs)
 
             # 참고문헌 전송
-            yield create_sse_event({
+            yield sse.event({
                 "status": "references_ready",
                 "answer": remapped_answer,
                 "references": [ref.dict() for ref in references]
             })
-            print(f"✅ 참고문헌 전송 완료: {len(references)}개", file=sys.stderr, flush=True)
-
-            # 완료
-            yield create_sse_event({
+            logger.debug(f"References sent: {len(references)}")
+
+            # 완료 - 청크 본문은 서버에 저장하고 ID/점수만 전송
+            await asyncio.to_thread(chunk_store.put_many, context_chunks)
+            if session_id and full_answer != ANSWER_ERROR_MESSAGE:
+                await record_turn(session_store, history_compactor, session_id, question, remapped_answer,
+                                  [chunk_handle(chunk) for chunk in context_chunks], spawn_background)
+            yield sse.event({
                 "status": "done",
                 "message": "완료",
-                "context_chunks": context_chunks
+                "context_chunks": [chunk_ref(chunk) for chunk in context_chunks],
+                "session_id": session_id
             })
-            print(f"✅ 스트리밍 완료 이벤트 전송", file=sys.stderr, flush=True)
+            logger.debug("Done event sent")
 
             # 후속 질문 전송
+            followup_questions = await followup_task
             if followup_questions:
-                yield create_sse_event({
+                yield sse.event({
                     "status": "followup_ready",
                     "followup_questions": followup_questions
                 })
-                print(f"✅ 후속 질문 전송: {len(followup_questions)}개", file=sys.stderr, flush=True)
+                logger.debug(f"Follow-up questions sent: {len(followup_questions)}")
+                spawn_background(prefetch_followup_embeddings(followup_questions, detected_lang))
+            outcome = "ok" if full_answer != ANSWER_ERROR_MESSAGE else "error"
+
+            # 시맨틱 답변 캐시에 저장 (오류 답변 제외)
+            if use_answer_cache and full_answer != ANSWER_ERROR_MESSAGE and references:
+                answer_cache.store(all_embeddings[0], CachedAnswer(
+                    question=question,
+                    language=detected_lang,
+                    answer=remapped_answer,
+                    references=[ref.dict() for ref in references],
+                    followup_questions=followup_questions,
+                    context_chunks=context_chunks,
+                    prompt_tokens=usage.get("prompt_tokens", 0),
+                    completion_tokens=usage.get("completion_tokens", 0)
+                ))
 
         except Exception as e:
-            print(f"❌ Error in query_stream: {e}", file=sys.stderr, flush=True)
-            import traceback
-            traceback.print_exc(file=sys.stderr)
-            yield create_sse_event({
-                "status": "error",
-                "message": "오류가 발생했습니다. 다시 시도해주세요."
-            })
+            logger.exception(f"❌ Error in query_stream: {e}")
+            outcome = "error"
+            yield sse.encoded(STATUS_EVENTS["error"])
+        finally:
+            requests_in_progress.dec()
+            record_request(timer, outcome, requests_total, request_latency)
+            sse_totals.record(sse)
+            # 요청당 한 줄: 결과, 단계별 시간, SSE 통계 (request_id로 같은 요청의 다른 로그와 연결)
+            logger.info(f"⏱️  {outcome} in {timer.elapsed():.2f}s - {timer.summary()}",
+                        extra={"outcome": outcome, "seconds": round(timer.elapsed(), 3),
+                               "stages": {stage: round(seconds, 4) for stage, seconds in timer.stages.items()},
+                               "sse": sse.stats()})
 
     return StreamingResponse(
         event_generator(),
@@ -1272,7 +1457,7 @@ Return only the alternative questions, one per line."""
 @app.options("/transcribe")
 async def transcribe_options():
     """Handle CORS preflight for /transcribe endpoint"""
-    return JSONResponse(
+    return FastJSONResponse(
         content={"status": "ok"},
         headers={
             "Access-Control-Allow-Origin": "*",
@@ -1309,13 +1494,13 @@ async def transcribe_audio(
         filename = file.filename
     except Exception as e:
         # If file is already closed, try to read from file.file directly
-        print(f"⚠️  Failed to read from UploadFile, trying file.file: {e}", file=sys.stderr, flush=True)
+        logger.warning(f"⚠️  Failed to read from UploadFile, trying file.file: {e}")
         try:
             file.file.seek(0)
             file_content = file.file.read()
             filename = file.filename
         except Exception as e2:
-            print(f"❌ Failed to read file: {e2}", file=sys.stderr, flush=True)
+            logger.error(f"❌ Failed to read file: {e2}")
             async def error_generator():
                 yield create_sse_event({
                     "status": "error",
@@ -1340,7 +1525,7 @@ async def transcribe_audio(
                 temp_path = temp_file.name
             # File is now closed but exists on disk, safe to read by other processes
 
-            print(f"📝 Transcribing audio file: {filename} ({len(content)} bytes)", file=sys.stderr, flush=True)
+            logger.info(f"📝 Transcribing audio file: {filename} ({len(content)} bytes)")
 
             # Send initial status
             yield create_sse_event({
@@ -1361,12 +1546,10 @@ async def transcribe_audio(
 
             # Clean up temp file
             os.unlink(temp_path)
-            print(f"✅ Transcription complete", file=sys.stderr, flush=True)
+            logger.info(f"✅ Transcription complete")
 
         except Exception as e:
-            print(f"❌ Transcription error: {str(e)}", file=sys.stderr, flush=True)
-            import traceback
-            print(traceback.format_exc(), file=sys.stderr, flush=True)
+            logger.exception(f"❌ Transcription error: {str(e)}")
             # Clean up temp file if it exists
             if temp_path and os.path.exists(temp_path):
                 try:
@@ -0,0 +1,138 @@
+"""
+Unit tests for the semantic answer cache
+"""
+
+import sys
+import os
+import asyncio
+import json
+import time
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.answer_cache import CachedAnswer, SemanticAnswerCache, replay_answer, split_for_replay
+from app.cache import ChunkStore
+from app.sse import SSEWriter
+
+
+def make_entry(question: str, language: str = "English", **kwargs) -> CachedAnswer:
+    return CachedAnswer(
+        question=question,
+        language=language,
+        answer=f"Answer to {question}.{{{{citation:0}}}}",
+        references=[{"title": "Paper"}],
+        followup_questions=["Next?"],
+        context_chunks=[{"text": "chunk"}],
+        prompt_tokens=kwargs.get("prompt_tokens", 1000),
+        completion_tokens=kwargs.get("completion_tokens", 500)
+    )
+
+
+def test_near_duplicate_hit_and_distant_miss():
+    """Test the cosine distance threshold"""
+    cache = SemanticAnswerCache(max_distance=0.05)
+    cache.store([1.0, 0.0, 0.0], make_entry("core vaccines for dogs"))
+
+    hit = cache.lookup([0.99, 0.05, 0.0], "English")
+    assert hit is not None and hit.question == "core vaccines for dogs"
+
+    assert cache.lookup([0.0, 1.0, 0.0], "English") is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["saved_prompt_tokens"] == 1000
+    assert stats["saved_completion_tokens"] == 500
+    print("✅ Near-duplicate hit test passed")
+
+
+def test_language_must_match():
+    """Test that an identical embedding in another language is not a hit"""
+    cache = SemanticAnswerCache(max_distance=0.05)
+    cache.store([1.0, 0.0], make_entry("core vaccines", language="Korean"))
+    assert cache.lookup([1.0, 0.0], "English") is None
+    assert cache.lookup([1.0, 0.0], "Korean") is not None
+    print("✅ Language match test passed")
+
+
+def test_size_ttl_and_version_eviction():
+    """Test eviction by size and age, and invalidation on index version change"""
+    cache = SemanticAnswerCache(max_entries=2, max_distance=0.01)
+    cache.store([1.0, 0.0, 0.0], make_entry("a"))
+    cache.store([0.0, 1.0, 0.0], make_entry("b"))
+    cache.store([0.0, 0.0, 1.0], make_entry("c"))
+    assert cache.lookup([1.0, 0.0, 0.0], "English") is None  # oldest evicted
+    assert cache.lookup([0.0, 0.0, 1.0], "English").question == "c"
+
+    cache.set_index_version("medical-guidelines:1000")
+    assert cache.stats()["entries"] == 0
+
+    short = SemanticAnswerCache(ttl=0.05)
+    short.store([1.0, 0.0], make_entry("old"))
+    time.sleep(0.1)
+    assert short.lookup([1.0, 0.0], "English") is None
+    print("✅ Eviction test passed")
+
+
+def test_split_for_replay_keeps_citations_intact():
+    """Test that replay chunks never cut a citation tag"""
+    text = "A" * 35 + "{{citation:0,1,2}}" + " tail text " * 5
+    pieces = split_for_replay(text, chunk_size=40)
+    assert "".join(pieces) == text
+    assert any("{{citation:0,1,2}}" in p for p in pieces)
+    print("✅ Replay split test passed")
+
+
+def test_replay_matches_live_event_order():
+    """Test that a cache hit replays the live SSE sequence and stores its chunks for the next turn"""
+    encode = lambda data: f"data: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
+    entry = make_entry("Is xylitol toxic to dogs?")
+    entry.answer = "Yes. " * 30 + "{{citation:0}}"
+    entry.context_chunks = [{"id": "PMC1_c0", "text": "Xylitol causes hypoglycemia", "score": 0.91234}]
+    chunk_store = ChunkStore()
+    sse = SSEWriter(encode, window=0, max_bytes=0)
+
+    async def collect():
+        return [frame async for frame in replay_answer(entry, sse, chunk_store, encode({"status": "generating"}), "session-1")]
+
+    frames = b"".join(asyncio.run(collect()))
+    events = [json.loads(f[len(b"data: "):]) for f in frames.split(b"\n\n") if f]
+    statuses = [event["status"] for event in events if "chunk" not in event]
+    assert statuses == ["generating", "references_ready", "done", "followup_ready"]
+    assert "".join(event["chunk"] for event in events if "chunk" in event) == entry.answer
+    done = next(event for event in events if event.get("status") == "done")
+    assert done["cached"] is True and done["session_id"] == "session-1"
+    assert done["context_chunks"] == [{"id": "PMC1_c0", "score": 0.9123}]
+    assert chunk_store.get_many(["PMC1_c0"])["PMC1_c0"]["text"] == "Xylitol causes hypoglycemia"
+    print("✅ Replay event order test passed")
+
+
+def run_all_tests():
+    """Run all test functions"""
+    print("\n" + "="*60)
+    print("Running Semantic Answer Cache Tests")
+    print("="*60 + "\n")
+
+    try:
+        test_near_duplicate_hit_and_distant_miss()
+        test_language_must_match()
+        test_size_ttl_and_version_eviction()
+        test_split_for_replay_keeps_citations_intact()
+        test_replay_matches_live_event_order()
+
+        print("\n" + "="*60)
+        print("✅ ALL TESTS PASSED!")
+        print("="*60 + "\n")
+        return True
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
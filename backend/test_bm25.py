@@ -0,0 +1,140 @@
+"""
+Unit tests for the BM25 keyword index and reciprocal-rank fusion
+"""
+
+import sys
+import os
+import tempfile
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.bm25 import BM25Index, BM25Writer, build_bm25_index, tokenize
+from app.vector_search import chunk_handle, chunk_key, reciprocal_rank_fusion
+
+DOCUMENTS = [
+    ("c0", {"title": "Atopic dermatitis", "text": "Oclacitinib 0.4-0.6 mg/kg PO q12h for 14 days reduced pruritus in dogs."}),
+    ("c1", {"title": "Atopic dermatitis", "text": "Allergen-specific immunotherapy improves long-term outcome in atopic dogs."}),
+    ("c2", {"title": "Hyperthyroidism", "text": "Serum T4 >4.0 ug/dL supports hyperthyroidism in cats."}),
+    ("c3", {"title": "Vomiting", "text": "Bilious vomiting syndrome in dogs responds to late-evening feeding."}),
+]
+
+
+def test_tokenize_keeps_clinical_tokens():
+    """Test that dosages, units and test names survive tokenization"""
+    tokens = tokenize("Oclacitinib 0.4-0.6 mg/kg and T4 for the dog")
+    assert "oclacitinib" in tokens
+    assert "0.4-0.6" in tokens and "0.4" in tokens
+    assert "mg/kg" in tokens
+    assert "t4" in tokens
+    assert "the" not in tokens and "and" not in tokens
+    print("✅ Tokenizer test passed")
+
+
+def test_exact_terms_rank_first():
+    """Test that exact drug and test names retrieve their chunks"""
+    with tempfile.TemporaryDirectory() as tmp:
+        build_bm25_index(tmp, DOCUMENTS)
+        index = BM25Index(tmp)
+
+        results = index.search("oclacitinib dose for dogs", top_k=3)
+        assert results[0]["id"] == "c0"
+        assert results[0]["title"] == "Atopic dermatitis"
+        assert results[0]["bm25_score"] > results[-1]["bm25_score"]
+
+        assert index.search("T4 level in cats", top_k=1)[0]["id"] == "c2"
+        assert index.search("zzzz unknown", top_k=5) == []
+        assert index.stats()["documents"] == 4
+    print("✅ Exact term ranking test passed")
+
+
+def test_writer_replaces_reingested_chunks():
+    """Test that the ingestion log keeps only the latest version of a chunk"""
+    with tempfile.TemporaryDirectory() as tmp:
+        writer = BM25Writer(tmp)
+        writer.add([{"id": doc_id, "values": [0.0], "metadata": meta} for doc_id, meta in DOCUMENTS])
+        writer.add([{"id": "c3", "values": [0.0], "metadata": {"text": "Maropitant 1 mg/kg SC for acute vomiting."}}])
+        writer.flush()
+
+        index = BM25Index(tmp)
+        assert index.stats()["documents"] == 4
+        assert index.search("maropitant", top_k=1)[0]["id"] == "c3"
+        assert index.search("bilious", top_k=1) == []
+    print("✅ Writer test passed")
+
+
+def test_rebuild_swaps_under_open_index():
+    """Test that a rebuild leaves an open index readable and keeps the corpus log"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bm25")
+        writer = BM25Writer(path)
+        writer.add([{"id": doc_id, "values": [0.0], "metadata": meta} for doc_id, meta in DOCUMENTS])
+        writer.flush()
+        live = BM25Index(path)
+
+        writer.add([{"id": "c4", "values": [0.0], "metadata": {"text": "Maropitant 1 mg/kg SC for acute vomiting."}}])
+        writer.flush()
+        assert live.search("oclacitinib", top_k=1)[0]["id"] == "c0"
+        assert live.search("maropitant", top_k=1) == []
+        assert BM25Index(path).search("maropitant", top_k=1)[0]["id"] == "c4"
+        assert sorted(os.listdir(tmp)) == ["bm25"]
+        assert os.path.exists(os.path.join(path, "corpus.jsonl"))
+    print("✅ Rebuild swap test passed")
+
+
+def test_reciprocal_rank_fusion():
+    """Test that chunks found by both dense and keyword search rise to the top"""
+    def chunk(doc_id, **scores):
+        return {"id": doc_id, "source": "paper", "title": doc_id.upper(), "page": 0, **scores}
+    dense = [[chunk("a", score=0.9), chunk("b", score=0.8), chunk("c", score=0.7)]]
+    keyword = [[chunk("c", bm25_score=12.0), chunk("d", bm25_score=8.0)]]
+    fused = reciprocal_rank_fusion(dense + keyword, k=60)
+
+    assert [c["id"] for c in fused][:1] == ["c"]
+    assert {c["id"] for c in fused} == {"a", "b", "c", "d"}
+    c = fused[0]
+    assert c["score"] == 0.7 and c["bm25_score"] == 12.0
+    assert abs(c["rrf_score"] - (1 / 63 + 1 / 61)) < 1e-9
+    print("✅ RRF test passed")
+
+
+def test_chunk_key_and_handle():
+    """Test that dedup uses source/title/page while the handle is the vector ID"""
+    first = {"id": "paper_PMC1_c3", "source": "paper", "title": "Atopic dermatitis", "page": 3}
+    reingested = {**first, "id": "paper_PMC1_c3_v2"}
+    assert chunk_key(first) == chunk_key(reingested) == "paper_Atopic dermatitis_3"
+    assert chunk_handle(first) == "paper_PMC1_c3" and chunk_handle(reingested) == "paper_PMC1_c3_v2"
+    assert chunk_handle({"source": "paper", "title": "Atopic dermatitis", "page": 3}) == chunk_key(first)
+    assert len(reciprocal_rank_fusion([[first], [reingested]])) == 1
+    print("✅ Chunk key/handle test passed")
+
+
+def run_all_tests():
+    """Run all test functions"""
+    print("\n" + "="*60)
+    print("Running BM25 / Hybrid Search Tests")
+    print("="*60 + "\n")
+
+    try:
+        test_tokenize_keeps_clinical_tokens()
+        test_exact_terms_rank_first()
+        test_writer_replaces_reingested_chunks()
+        test_rebuild_swaps_under_open_index()
+        test_reciprocal_rank_fusion()
+        test_chunk_key_and_handle()
+
+        print("\n" + "="*60)
+        print("✅ ALL TESTS PASSED!")
+        print("="*60 + "\n")
+        return True
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
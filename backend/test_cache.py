@@ -0,0 +1,184 @@
+"""
+Unit tests for the caching primitives, the query embedding cache and the context chunk store
+"""
+
+import sys
+import os
+import tempfile
+import time
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.cache import LRUCache, ChunkStore, EmbeddingCache, QueryUnderstandingCache, chunk_ref, normalize_text
+
+
+def test_normalize_text():
+    """Test that cosmetic differences map to the same key"""
+    assert normalize_text("  Core  Vaccines for DOGS ") == "core vaccines for dogs"
+    assert normalize_text("ＡＢＣ") == "abc"  # full-width → NFKC
+    print("✅ Normalization test passed")
+
+
+def test_lru_eviction_and_ttl():
+    """Test size-based LRU eviction and TTL expiry"""
+    cache = LRUCache(max_size=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")       # a becomes most recently used
+    cache.put("c", 3)    # evicts b
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.evictions == 1
+
+    short = LRUCache(max_size=10, ttl=0.05)
+    short.put("x", 1)
+    time.sleep(0.1)
+    assert short.get("x") is None
+    print("✅ LRU eviction/TTL test passed")
+
+
+def test_embedding_cache_disk_tier_persists():
+    """Test that vectors survive a restart via the float16 SQLite tier"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "emb.sqlite3")
+        vector = [0.125, -0.5, 0.33, 1.0]
+
+        first = EmbeddingCache(model="text-embedding-3-small", disk_path=path)
+        first.put("Core vaccines for dogs", vector)
+        first.disk.close()
+
+        second = EmbeddingCache(model="text-embedding-3-small", disk_path=path)
+        cached = second.get("core vaccines  for dogs")
+        assert cached is not None
+        assert all(abs(a - b) < 1e-3 for a, b in zip(cached, vector))
+
+        stats = second.stats()
+        assert stats["disk_hits"] == 1
+        assert stats["misses"] == 0
+
+        # Second lookup is served from memory
+        second.get("core vaccines for dogs")
+        assert second.stats()["memory_hits"] == 1
+
+        # Different model → different key
+        other_model = EmbeddingCache(model="text-embedding-3-large", disk_path=path)
+        assert other_model.get("core vaccines for dogs") is None
+        second.disk.close()
+        other_model.disk.close()
+    print("✅ Disk tier persistence test passed")
+
+
+def test_disk_tier_row_limit():
+    """Test that the disk tier prunes least-recently-used rows beyond max_entries"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = EmbeddingCache(model="m", disk_path=os.path.join(tmp, "emb.sqlite3"), disk_max_entries=3)
+        for i in range(5):
+            cache.put(f"question {i}", [float(i)])
+        cache.disk.prune()
+        assert len(cache.disk) == 3
+        cache.disk.close()
+    print("✅ Disk tier row limit test passed")
+
+
+def test_understanding_cache_keys():
+    """Test near-identical questions share a key; language and prompt version do not"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "tr.sqlite3")
+        value = {"english_query": "My dog is limping", "alternative_queries": [], "question_type": "diagnostic_symptom"}
+
+        cache = QueryUnderstandingCache(prompt_version="v1", disk_path=path)
+        cache.put("Korean", "강아지가 절뚝거려요?", value)
+        assert cache.get("Korean", "강아지가  절뚝거려요") == value
+        assert cache.get("Japanese", "강아지가 절뚝거려요?") is None
+        cache.disk.close()
+
+        # Persisted across restarts, ignored after a prompt version bump
+        restarted = QueryUnderstandingCache(prompt_version="v1", disk_path=path)
+        assert restarted.get("Korean", "강아지가 절뚝거려요?") == value
+        bumped = QueryUnderstandingCache(prompt_version="v2", disk_path=path)
+        assert bumped.get("Korean", "강아지가 절뚝거려요?") is None
+        restarted.disk.close()
+        bumped.disk.close()
+    print("✅ Understanding cache key test passed")
+
+
+def test_chunk_store_round_trip():
+    """Test that chunks are stored without vectors and rehydrated by ID after a restart"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "chunks.sqlite3")
+        chunk = {"id": "paper_PMC1_c3", "title": "Atopic dermatitis", "text": "오클라시티닙 " * 50,
+                 "score": 0.812345, "values": [0.1, 0.2]}
+
+        store = ChunkStore(disk_path=path)
+        store.put_many([chunk])
+        assert chunk_ref(chunk) == {"id": "paper_PMC1_c3", "score": 0.8123}
+        store.disk.close()
+
+        restarted = ChunkStore(disk_path=path)
+        found = restarted.get_many(["paper_PMC1_c3", "missing"])
+        assert list(found) == ["paper_PMC1_c3"]
+        assert found["paper_PMC1_c3"]["text"] == chunk["text"]
+        assert "values" not in found["paper_PMC1_c3"]
+        assert restarted.stats()["disk_hits"] == 1
+        restarted.disk.close()
+    print("✅ Chunk store round trip test passed")
+
+
+def test_chunk_store_batches_disk_writes():
+    """Test that put_many is one transaction and recent disk hits do not write"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ChunkStore(disk_path=os.path.join(tmp, "chunks.sqlite3"))
+        statements = []
+        store.disk._conn.set_trace_callback(statements.append)
+        store.put_many([{"id": f"c{i}", "text": f"chunk {i}"} for i in range(20)])
+        assert sum(sql.startswith("INSERT") for sql in statements) == 20
+        assert statements.count("COMMIT") == 1
+
+        store.memory.clear()
+        statements.clear()
+        assert list(store.get_many(["c3", "c7", "missing"])) == ["c3", "c7"]
+        assert not any(sql.startswith(("UPDATE", "COMMIT")) for sql in statements)
+        assert store.stats()["disk_hits"] == 2
+
+        # Rows not read for TOUCH_INTERVAL get their LRU timestamp refreshed in one commit
+        store.memory.clear()
+        store.disk.TOUCH_INTERVAL = 0.0
+        statements.clear()
+        store.get_many(["c3", "c7"])
+        assert sum(sql.startswith("UPDATE") for sql in statements) == 2
+        assert statements.count("COMMIT") == 1
+        store.disk.close()
+    print("✅ Chunk store batching test passed")
+
+
+def run_all_tests():
+    """Run all test functions"""
+    print("\n" + "="*60)
+    print("Running Cache Tests")
+    print("="*60 + "\n")
+
+    try:
+        test_normalize_text()
+        test_lru_eviction_and_ttl()
+        test_embedding_cache_disk_tier_persists()
+        test_disk_tier_row_limit()
+        test_understanding_cache_keys()
+        test_chunk_store_round_trip()
+        test_chunk_store_batches_disk_writes()
+
+        print("\n" + "="*60)
+        print("✅ ALL TESTS PASSED!")
+        print("="*60 + "\n")
+        return True
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,205 @@
+"""
+Unit tests for upstream record/replay cassettes
+"""
+
+import sys
+import os
+import asyncio
+import json
+import tempfile
+
+import httpx
+import numpy as np
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.cassettes import Cassette, CassetteMiss, CassetteTransport
+from app.vector_store import NumpyVectorStore, VectorRecord, write_store
+
+SSE_CHUNKS = [
+    b'data: {"choices":[{"delta":{"content":"Hel"}}]}\n\n',
+    b'data: {"choices":[{"delta":{"content":"lo \xec\x95\x88',  # split inside a UTF-8 character
+    b'\xeb\x85\x95"}}]}\n\n',
+    b"data: [DONE]\n\n",
+]
+
+
+class _SlowStream(httpx.AsyncByteStream):
+    async def __aiter__(self):
+        for chunk in SSE_CHUNKS:
+            await asyncio.sleep(0.02)
+            yield chunk
+
+
+def upstream(request: httpx.Request) -> httpx.Response:
+    body = json.loads(request.content)
+    if body.get("stream"):
+        return httpx.Response(200, headers={"content-type": "text/event-stream"}, stream=_SlowStream())
+    return httpx.Response(200, json={"echo": body["messages"][0]["content"]})
+
+
+async def _post(client: httpx.AsyncClient, payload: dict) -> bytes:
+    async with client.stream("POST", "https://api.openai.com/v1/chat/completions", json=payload) as response:
+        return b"".join([chunk async for chunk in response.aiter_raw()])
+
+
+def test_http_record_then_replay():
+    """Test that streamed and plain OpenAI responses replay byte-for-byte, offline, with recorded timing"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "upstream.jsonl")
+        stream_request = {"model": "gpt-4o", "stream": True, "messages": [{"role": "user", "content": "hi"}]}
+        plain_request = {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": "translate"}]}
+
+        async def record():
+            cassette = Cassette(path, mode="record")
+            transport = CassetteTransport(cassette, inner=httpx.MockTransport(upstream))
+            async with httpx.AsyncClient(transport=transport) as client:
+                return await _post(client, stream_request), await _post(client, plain_request), cassette
+
+        streamed, plain, recorder = asyncio.run(record())
+        assert streamed == b"".join(SSE_CHUNKS)
+        assert recorder.stats()["recorded"] == 2
+
+        async def replay(speed: float):
+            cassette = Cassette(path, mode="replay", speed=speed)
+            async with cassette.http_client() as client:
+                loop = asyncio.get_running_loop()
+                started = loop.time()
+                result = await _post(client, stream_request)
+                elapsed = loop.time() - started
+                return result, await _post(client, plain_request), elapsed, cassette
+
+        replayed, replayed_plain, elapsed, player = asyncio.run(replay(1.0))
+        assert replayed == streamed
+        assert json.loads(replayed_plain) == {"echo": "translate"}
+        assert elapsed >= 0.07, f"recorded chunk timing not honored ({elapsed:.3f}s)"
+        assert player.stats()["replayed"] == 2
+
+        _, _, fast, _ = asyncio.run(replay(0.0))
+        assert fast < 0.05, f"speed 0 should skip delays ({fast:.3f}s)"
+
+        # 기록되지 않은 요청은 네트워크로 나가지 않고 연결 오류 (OpenAI SDK 재시도/오류 경로)
+        async def unrecorded():
+            async with Cassette(path, mode="replay", speed=0).http_client() as client:
+                await _post(client, {**plain_request, "messages": [{"role": "user", "content": "new"}]})
+
+        try:
+            asyncio.run(unrecorded())
+            raise AssertionError("Expected ConnectError for an unrecorded request")
+        except httpx.ConnectError:
+            pass
+
+    print("✅ HTTP record/replay test passed")
+
+
+def test_vector_store_record_replay():
+    """Test that vector store calls replay without the real store, with fallback for changed queries"""
+    rng = np.random.default_rng(5)
+    records = [VectorRecord(id=f"vec_{i}", values=rng.standard_normal(16).astype(np.float32).tolist(),
+                            metadata={"text": f"chunk {i}", "year": str(2015 + i % 5)}) for i in range(50)]
+    query = rng.standard_normal(16).tolist()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_store(os.path.join(tmp, "store"), records, dimension=16, dtype="float32")
+        path = os.path.join(tmp, "vectors.jsonl")
+        live = Cassette(path, mode="record").wrap_vector_store(NumpyVectorStore(os.path.join(tmp, "store"), dimension=16))
+        expected = live.query(query, top_k=5, filter={"year": {"$gte": "2017"}})
+        expected_batch = live.query_batch([query, query[::-1]], top_k=3)
+        expected_fetch = live.fetch(["vec_1", "vec_2"])
+        assert live.backend_name == "numpy+cassette"
+
+        replay = Cassette(path, mode="replay", speed=0).wrap_vector_store(None)
+        result = replay.query(query, top_k=5, filter={"year": {"$gte": "2017"}})
+        assert [m.id for m in result.matches] == [m.id for m in expected.matches]
+        assert result.matches[0].metadata == expected.matches[0].metadata
+        assert [[m.id for m in r.matches] for r in replay.query_batch([query, query[::-1]], top_k=3)] == \
+            [[m.id for m in r.matches] for r in expected_batch]
+        assert replay.fetch(["vec_2", "vec_1"])["vec_1"].values == expected_fetch["vec_1"].values
+        assert replay.stats().total_vector_count == 0  # not recorded
+
+        try:
+            replay.query(rng.standard_normal(16).tolist(), top_k=5)
+            raise AssertionError("Expected CassetteMiss")
+        except CassetteMiss:
+            pass
+
+        fallback = Cassette(path, mode="replay", speed=0, fallback=True)
+        other = fallback.wrap_vector_store(None).query(rng.standard_normal(16).tolist(), top_k=5)
+        assert [m.id for m in other.matches] == [m.id for m in expected.matches]
+        assert fallback.stats()["fallbacks"] == 1
+
+    print("✅ Vector store record/replay test passed")
+
+
+def test_take_order():
+    """Test that identical requests replay in recorded order and the last response repeats"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "order.jsonl")
+        recorder = Cassette(path, mode="record")
+        for i in range(2):
+            recorder.record("vector", "same", "vector query", {"op": "query"}, {"n": i})
+        recorder.record("vector", "other", "vector query", {"op": "query"}, {"n": 9})
+
+        cassette = Cassette(path, mode="replay")
+        assert [cassette.take("same", "vector query")["n"] for _ in range(3)] == [0, 1, 1]
+
+        # fallback은 이미 사용된 응답을 다시 쓰지 않음
+        cassette = Cassette(path, mode="replay", fallback=True)
+        assert cassette.take("same", "vector query")["n"] == 0
+        assert cassette.take("unknown", "vector query")["n"] == 1
+        assert cassette.take("other", "vector query")["n"] == 9
+        assert cassette.stats()["misses"] == 0
+
+        try:
+            Cassette(path, mode="playback")
+            raise AssertionError("Expected ValueError for an unknown mode")
+        except ValueError:
+            pass
+
+    print("✅ Take order test passed")
+
+
+def test_from_env_requires_path():
+    """Test that cassettes are off without CASSETTE_MODE and need an explicit CASSETTE_PATH with it"""
+    saved = {name: os.environ.pop(name, None) for name in ("CASSETTE_MODE", "CASSETTE_PATH")}
+    try:
+        assert Cassette.from_env() is None
+
+        os.environ["CASSETTE_MODE"] = "record"
+        try:
+            Cassette.from_env()
+            raise AssertionError("Expected ValueError without CASSETTE_PATH")
+        except ValueError:
+            pass
+
+        with tempfile.TemporaryDirectory() as tmp:
+            os.environ["CASSETTE_PATH"] = os.path.join(tmp, "nested", "upstream.jsonl")
+            cassette = Cassette.from_env()
+            assert cassette.mode == "record" and cassette.path == os.environ["CASSETTE_PATH"]
+            assert os.path.isdir(os.path.join(tmp, "nested"))
+    finally:
+        for name, value in saved.items():
+            os.environ.pop(name, None)
+            if value is not None:
+                os.environ[name] = value
+
+    print("✅ Cassette env test passed")
+
+
+def run_all_tests():
+    """Run all cassette tests"""
+    print("=" * 60)
+    print("Running Cassette Tests")
+    print("=" * 60)
+    test_http_record_then_replay()
+    test_vector_store_record_replay()
+    test_take_order()
+    test_from_env_requires_path()
+    print("=" * 60)
+    print("✅ All cassette tests passed!")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    run_all_tests()
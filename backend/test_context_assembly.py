@@ -0,0 +1,107 @@
+"""
+Unit tests for context assembly (per-paper blocks, adjacent chunk stitching, overlap removal)
+"""
+
+import sys
+import os
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.context_assembly import assemble_context, group_chunks_by_document, overlap_length, stitch_chunks
+
+TEXT = " ".join(f"Sentence number {i} describes the clinical finding." for i in range(40))
+
+
+def split_with_overlap(text, size=600, overlap=150):
+    chunks, start = [], 0
+    while start < len(text):
+        end = min(start + size, len(text))
+        chunks.append(text[start:end].strip())
+        if end == len(text):
+            break
+        start = end - overlap
+    return chunks
+
+
+def test_overlap_length():
+    """Test suffix/prefix overlap detection"""
+    assert overlap_length("abc the shared tail of text", "the shared tail of text and more") == len("the shared tail of text")
+    assert overlap_length("no overlap at all here", "completely different text") == 0
+    assert overlap_length("short xy", "xy then", min_overlap=5) == 0
+    print("✅ Overlap length test passed")
+
+
+def test_adjacent_chunks_are_stitched():
+    """Test that consecutive chunks reassemble the original text without repeated overlap"""
+    parts = split_with_overlap(TEXT)
+    chunks = [{"page": i, "text": t} for i, t in enumerate(parts)]
+    shuffled = [chunks[2], chunks[0], chunks[1], chunks[3]]
+
+    passages = stitch_chunks(shuffled)
+    assert len(passages) == 1
+    assert TEXT.startswith(passages[0])
+    assert passages[0].endswith(parts[3])
+    print("✅ Adjacent stitching test passed")
+
+
+def test_gaps_and_duplicates():
+    """Test that non-adjacent chunks stay separate and duplicates are dropped"""
+    parts = split_with_overlap(TEXT)
+    chunks = [{"page": 0, "text": parts[0]}, {"page": 4, "text": parts[4]}, {"page": 4, "text": parts[4]}]
+    passages = stitch_chunks(chunks)
+    assert passages == [parts[0], parts[4]]
+
+    # Same PDF page, unrelated text - kept as separate passages
+    same_page = [{"page": 3, "text": "First paragraph on the page."}, {"page": 3, "text": "Another paragraph, later on."}]
+    assert len(stitch_chunks(same_page)) == 2
+    print("✅ Gap / duplicate test passed")
+
+
+def test_one_block_per_paper():
+    """Test that Document indices follow doc_order (the citation numbering)"""
+    parts = split_with_overlap(TEXT)
+    chunks = [
+        {"source": "J", "title": "A", "page": 1, "text": parts[1]},
+        {"source": "J", "title": "B", "page": 0, "text": "Paper B finding."},
+        {"source": "J", "title": "A", "page": 0, "text": parts[0]},
+    ]
+    doc_order, seen_docs = group_chunks_by_document(chunks)
+    context_text, stats = assemble_context(doc_order, seen_docs)
+
+    blocks = context_text.split("\n\n")
+    assert len(blocks) == 2
+    assert blocks[0].startswith("Document 0: " + parts[0][:20])
+    assert blocks[1] == "Document 1: Paper B finding."
+    assert stats.chunks == 3 and stats.passages == 2
+    assert stats.chars_saved > 100
+    print("✅ Per-paper block test passed")
+
+
+def run_all_tests():
+    """Run all test functions"""
+    print("\n" + "="*60)
+    print("Running Context Assembly Tests")
+    print("="*60 + "\n")
+
+    try:
+        test_overlap_length()
+        test_adjacent_chunks_are_stitched()
+        test_gaps_and_duplicates()
+        test_one_block_per_paper()
+
+        print("\n" + "="*60)
+        print("✅ ALL TESTS PASSED!")
+        print("="*60 + "\n")
+        return True
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
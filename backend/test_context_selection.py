@@ -0,0 +1,87 @@
+"""
+Unit tests for MMR context selection and the per-paper chunk cap
+"""
+
+import sys
+import os
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.context_selection import select_context
+
+
+def make_chunk(chunk_id, score, values, pmcid):
+    return {"id": chunk_id, "score": score, "values": values, "pmcid": pmcid, "text": chunk_id}
+
+
+def test_pure_relevance_keeps_order():
+    """Test that lambda=1 without a cap returns the top chunks in score order"""
+    candidates = [make_chunk(f"c{i}", 1.0 - i * 0.1, [1.0, 0.0], f"P{i}") for i in range(5)]
+    selected = select_context(candidates, max_chunks=3, max_per_document=None, mmr_lambda=1.0)
+    assert [c["id"] for c in selected] == ["c0", "c1", "c2"]
+    assert all("values" not in c for c in selected)
+    assert "values" in candidates[0]
+    print("✅ Pure relevance test passed")
+
+
+def test_mmr_skips_near_duplicates():
+    """Test that a near-duplicate of the first pick loses to a different chunk"""
+    candidates = [
+        make_chunk("a", 0.90, [1.0, 0.0], "P1"),
+        make_chunk("a_overlap", 0.89, [0.99, 0.01], "P2"),
+        make_chunk("b", 0.80, [0.0, 1.0], "P3"),
+    ]
+    selected = select_context(candidates, max_chunks=2, max_per_document=None, mmr_lambda=0.7)
+    assert [c["id"] for c in selected] == ["a", "b"]
+    print("✅ MMR diversity test passed")
+
+
+def test_per_document_cap():
+    """Test that one paper contributes at most max_per_document chunks"""
+    candidates = [make_chunk(f"p1_{i}", 0.9 - i * 0.01, [1.0, i * 0.1], "P1") for i in range(6)]
+    candidates.append(make_chunk("p2_0", 0.5, [0.0, 1.0], "P2"))
+    selected = select_context(candidates, max_chunks=10, max_per_document=2, mmr_lambda=1.0)
+    assert [c["id"] for c in selected] == ["p1_0", "p1_1", "p2_0"]
+    print("✅ Per-document cap test passed")
+
+
+def test_rrf_scores_and_missing_values():
+    """Test that fused scores drive relevance and chunks without embeddings are still selectable"""
+    candidates = [
+        {"id": "k", "rrf_score": 0.03, "score": 0.2, "title": "Keyword only"},
+        {"id": "d", "rrf_score": 0.02, "score": 0.9, "values": [1.0, 0.0], "title": "Dense"},
+    ]
+    selected = select_context(candidates, max_chunks=2, mmr_lambda=0.7)
+    assert [c["id"] for c in selected] == ["k", "d"]
+    assert select_context([]) == []
+    print("✅ RRF relevance test passed")
+
+
+def run_all_tests():
+    """Run all test functions"""
+    print("\n" + "="*60)
+    print("Running Context Selection Tests")
+    print("="*60 + "\n")
+
+    try:
+        test_pure_relevance_keeps_order()
+        test_mmr_skips_near_duplicates()
+        test_per_document_cap()
+        test_rrf_scores_and_missing_values()
+
+        print("\n" + "="*60)
+        print("✅ ALL TESTS PASSED!")
+        print("="*60 + "\n")
+        return True
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
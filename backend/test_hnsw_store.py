@@ -0,0 +1,165 @@
+"""
+Unit tests for the HNSW local vector store
+"""
+
+import sys
+import os
+import tempfile
+import threading
+
+import numpy as np
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.hnsw_store import HnswVectorStore
+from app.vector_store import NumpyVectorStore, VectorRecord, write_store
+
+JOURNALS = ["Frontiers in Veterinary Science", "BMC Veterinary Research", "Journal of Veterinary Science"]
+
+
+def make_records(count: int = 600, dimension: int = 32):
+    rng = np.random.default_rng(3)
+    centers = rng.standard_normal((12, dimension))
+    return [
+        VectorRecord(
+            id=f"vec_{i}",
+            values=(centers[i % 12] + 0.3 * rng.standard_normal(dimension)).astype(np.float32).tolist(),
+            metadata={"journal": JOURNALS[i % 3], "year": str(2015 + i % 8), "text": f"chunk {i}"}
+        )
+        for i in range(count)
+    ]
+
+
+def build(tmp: str, records=None) -> str:
+    path = os.path.join(tmp, "store")
+    write_store(path, records or make_records(), dimension=32, dtype="float32")
+    return path
+
+
+def test_recall_against_exact():
+    """Test that HNSW top-15 agrees with exact search on clustered data"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = build(tmp)
+        exact = NumpyVectorStore(path)
+        hnsw = HnswVectorStore(path, ef=100)
+        queries = [r.values for r in make_records(20)]
+
+        hits = 0
+        for query in queries:
+            expected = {m.id for m in exact.query(query, top_k=15).matches}
+            found = [m for m in hnsw.query(query, top_k=15).matches]
+            hits += len(expected & {m.id for m in found})
+            assert found[0].score >= found[-1].score
+        assert hits / (15 * len(queries)) >= 0.9
+    print("✅ Recall test passed")
+
+
+def test_journal_and_year_filters():
+    """Test column filters (exact path) and metadata post-filtering"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = build(tmp)
+        hnsw = HnswVectorStore(path)
+        query = make_records(1)[0].values
+
+        result = hnsw.query(query, top_k=10, filter={"journal": {"$eq": "BMC Veterinary Research"}, "year": {"$gte": 2020}})
+        assert len(result.matches) == 10
+        assert all(m.metadata["journal"] == "BMC Veterinary Research" and int(m.metadata["year"]) >= 2020 for m in result.matches)
+
+        # Filter on a field without a column falls back to post-filtering
+        result = hnsw.query(query, top_k=5, filter={"text": {"$in": ["chunk 0", "chunk 12"]}})
+        assert {m.metadata["text"] for m in result.matches} <= {"chunk 0", "chunk 12"}
+    print("✅ Filter test passed")
+
+
+def test_incremental_insert_delete_and_persist():
+    """Test upsert/delete on the live graph and reloading the saved graph"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = build(tmp)
+        hnsw = HnswVectorStore(path)
+        hnsw.save()
+        assert os.path.exists(os.path.join(path, "hnsw", "graph.bin"))
+
+        new_vector = [0.0] * 31 + [1.0]
+        hnsw.upsert([{"id": "vec_new", "values": new_vector, "metadata": {"journal": "New Journal", "year": "2024"}}])
+        hnsw.upsert([{"id": "vec_5", "values": new_vector, "metadata": {"journal": "New Journal", "year": "2024"}}])
+        hnsw.delete(["vec_7"])
+        top = hnsw.query(new_vector, top_k=2)
+        assert {m.id for m in top.matches} == {"vec_new", "vec_5"}
+        assert hnsw.query(new_vector, top_k=5, filter={"journal": "New Journal"}).matches[0].metadata["year"] == "2024"
+
+        hnsw.flush()
+        reloaded = HnswVectorStore(path)
+        assert reloaded.stats().total_vector_count == 600
+        assert {m.id for m in reloaded.query(new_vector, top_k=2).matches} == {"vec_new", "vec_5"}
+        ids = {m.id for m in reloaded.query(make_records()[7].values, top_k=50).matches}
+        assert "vec_7" not in ids
+        assert len(reloaded.query(new_vector, top_k=5, filter={"journal": "New Journal"}).matches) == 2
+    print("✅ Incremental update test passed")
+
+
+def test_concurrent_searches_and_fixed_ef():
+    """Test that searches overlap, writes wait for them, and a large top_k leaves ef unchanged"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = HnswVectorStore(build(tmp), ef=16)
+        query = make_records()[5].values
+        assert len(store.query(query, top_k=100).matches) == 100
+        assert store.graph.ef == 16
+
+        scanning, release = threading.Event(), threading.Event()
+        original = HnswVectorStore._graph_search
+
+        def paused_graph_search(self, queries, k, label_filter=None):
+            if threading.current_thread().name == "paused":
+                scanning.set()
+                assert release.wait(5)
+            return original(self, queries, k, label_filter)
+
+        HnswVectorStore._graph_search = paused_graph_search
+        try:
+            paused = threading.Thread(name="paused", target=store.query, args=(query,))
+            paused.start()
+            assert scanning.wait(5)
+            assert store.query(query, top_k=1).matches[0].id == "vec_5"  # not blocked by the paused search
+
+            upserted = threading.Event()
+            writer = threading.Thread(target=lambda: (store.upsert([{"id": "vec_new", "values": query}]), upserted.set()))
+            writer.start()
+            assert not upserted.wait(0.2)  # the write waits for the running search
+            release.set()
+            paused.join(5)
+            writer.join(5)
+            assert upserted.is_set()
+        finally:
+            HnswVectorStore._graph_search = original
+        assert {m.id for m in store.query(query, top_k=2).matches} == {"vec_5", "vec_new"}
+    print("✅ Concurrent search test passed")
+
+
+def run_all_tests():
+    """Run all test functions"""
+    print("\n" + "="*60)
+    print("Running HNSW Store Tests")
+    print("="*60 + "\n")
+
+    try:
+        test_recall_against_exact()
+        test_journal_and_year_filters()
+        test_incremental_insert_delete_and_persist()
+        test_concurrent_searches_and_fixed_ef()
+
+        print("\n" + "="*60)
+        print("✅ ALL TESTS PASSED!")
+        print("="*60 + "\n")
+        return True
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,123 @@
+"""
+Unit tests for request metrics and the /metrics exposition
+"""
+
+import sys
+import os
+import time
+
+from prometheus_client import CollectorRegistry, Counter, Histogram, disable_created_metrics
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.metrics import DEFAULT_BUCKETS, RequestTimer, record_request, render_metrics
+
+
+def test_histogram_rendering():
+    """Test that stage histograms render cumulative buckets without *_created series"""
+    disable_created_metrics()  # main.py does this before creating its metrics
+    registry = CollectorRegistry()
+    histogram = Histogram("stage_seconds", "Stage latency", ["stage"], buckets=(0.1, 1.0), registry=registry)
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.labels(stage="embedding").observe(value)
+
+    text = render_metrics(registry).decode("utf-8")
+    assert "# TYPE stage_seconds histogram" in text
+    assert 'stage_seconds_bucket{le="0.1",stage="embedding"} 1.0' in text
+    assert 'stage_seconds_bucket{le="+Inf",stage="embedding"} 4.0' in text
+    assert 'stage_seconds_count{stage="embedding"} 4.0' in text
+    assert "_created" not in text
+    print("✅ Histogram rendering test passed")
+
+
+def test_stage_label():
+    """Test that spans are observed under the timer's label name, one sample per span"""
+    registry = CollectorRegistry()
+    histogram = Histogram("phase_seconds", "Phase latency", ["phase"], buckets=DEFAULT_BUCKETS, registry=registry)
+    timer = RequestTimer(histogram, label="phase")
+    for _ in range(3):
+        with timer.span("embedding"):
+            pass
+    try:
+        with timer.span("generation"):
+            raise ValueError("upstream failed")
+    except ValueError:
+        pass
+
+    assert registry.get_sample_value("phase_seconds_count", {"phase": "embedding"}) == 3.0
+    assert registry.get_sample_value("phase_seconds_count", {"phase": "generation"}) == 1.0
+    assert list(timer.stages) == ["embedding", "generation"]
+    assert abs(registry.get_sample_value("phase_seconds_sum", {"phase": "embedding"}) - timer.stages["embedding"]) < 1e-9
+
+    untracked = RequestTimer()
+    untracked.observe("ttft", 0.1)
+    assert untracked.stages == {"ttft": 0.1}
+    print("✅ Stage label test passed")
+
+
+def test_request_outcomes():
+    """Test that finished requests are counted and timed per outcome"""
+    registry = CollectorRegistry()
+    requests = Counter("requests_total", "Requests", ["outcome"], registry=registry)
+    latency = Histogram("request_seconds", "Request latency", ["outcome"], buckets=DEFAULT_BUCKETS, registry=registry)
+    for outcome in ("ok", "ok", "cached", "aborted"):
+        timer = RequestTimer()
+        timer.started -= 0.2
+        record_request(timer, outcome, requests, latency)
+
+    assert registry.get_sample_value("requests_total", {"outcome": "ok"}) == 2.0
+    assert registry.get_sample_value("requests_total", {"outcome": "cached"}) == 1.0
+    assert registry.get_sample_value("requests_total", {"outcome": "aborted"}) == 1.0
+    assert registry.get_sample_value("requests_total", {"outcome": "error"}) is None
+    assert registry.get_sample_value("request_seconds_count", {"outcome": "ok"}) == 2.0
+    assert registry.get_sample_value("request_seconds_bucket", {"outcome": "ok", "le": "0.1"}) == 0.0
+    assert registry.get_sample_value("request_seconds_bucket", {"outcome": "ok", "le": "0.25"}) == 2.0
+    print("✅ Request outcome test passed")
+
+
+def test_request_timer():
+    """Test spans feed the histogram and the per-request summary"""
+    registry = CollectorRegistry()
+    histogram = Histogram("stage_seconds", "Stage latency", ["stage"], buckets=DEFAULT_BUCKETS, registry=registry)
+    timer = RequestTimer(histogram)
+    with timer.span("vector_search"):
+        time.sleep(0.01)
+    timer.observe("ttft", 0.25)
+    timer.observe("ttft", 0.05)
+
+    assert timer.stages["vector_search"] >= 0.01
+    assert abs(timer.stages["ttft"] - 0.3) < 1e-9
+    assert registry.get_sample_value("stage_seconds_count", {"stage": "ttft"}) == 2.0
+    assert registry.get_sample_value("stage_seconds_count", {"stage": "vector_search"}) == 1.0
+    assert timer.summary().endswith("ttft 300ms")
+    print("✅ Request timer test passed")
+
+
+def run_all_tests():
+    """Run all test functions"""
+    print("\n" + "="*60)
+    print("Running Metrics Tests")
+    print("="*60 + "\n")
+
+    try:
+        test_histogram_rendering()
+        test_stage_label()
+        test_request_outcomes()
+        test_request_timer()
+
+        print("\n" + "="*60)
+        print("✅ ALL TESTS PASSED!")
+        print("="*60 + "\n")
+        return True
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
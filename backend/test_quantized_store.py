@@ -0,0 +1,163 @@
+"""
+Unit tests for the quantized (int8 / PQ) local vector store
+"""
+
+import sys
+import os
+import tempfile
+
+import numpy as np
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.hnsw_store import HnswVectorStore
+from app.quantized_store import ProductQuantizer, QuantizedVectorStore, ScalarInt8Quantizer
+from app.vector_store import NumpyVectorStore, VectorRecord, write_store
+
+
+def make_records(count: int = 800, dimension: int = 32):
+    rng = np.random.default_rng(5)
+    centers = rng.standard_normal((16, dimension))
+    return [
+        VectorRecord(
+            id=f"vec_{i}",
+            values=(centers[i % 16] + 0.4 * rng.standard_normal(dimension)).astype(np.float32).tolist(),
+            metadata={"journal": "BMC Veterinary Research" if i % 2 else "Frontiers in Veterinary Science", "text": f"chunk {i}"}
+        )
+        for i in range(count)
+    ]
+
+
+def build(tmp: str) -> str:
+    path = os.path.join(tmp, "store")
+    write_store(path, make_records(), dimension=32, dtype="float16")
+    return path
+
+
+def test_quantizers_roundtrip():
+    """Test that int8 and PQ approximate inner products closely"""
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((500, 32)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    query = vectors[:1]
+    exact = (query @ vectors.T)[0]
+
+    int8 = ScalarInt8Quantizer()
+    int8.train(vectors)
+    assert np.abs(int8.scores(query, int8.encode(vectors))[0] - exact).max() < 0.02
+
+    pq = ProductQuantizer(m=8)
+    pq.train(vectors)
+    codes = pq.encode(vectors)
+    assert codes.shape == (500, 8) and codes.dtype == np.uint8
+    assert np.corrcoef(pq.scores(query, codes)[0], exact)[0, 1] > 0.9
+    print("✅ Quantizer test passed")
+
+
+def test_rescored_results_match_exact():
+    """Test that re-scoring from float16 gives the exact top-25 and exact scores"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = build(tmp)
+        exact = NumpyVectorStore(path)
+        queries = [r.values for r in make_records(10)]
+        for method in ("int8", "pq"):
+            store = QuantizedVectorStore(path, method=method, pq_m=8, rescore=200)
+            for query in queries:
+                expected = exact.query(query, top_k=25).matches
+                found = store.query(query, top_k=25).matches
+                assert [m.id for m in found] == [m.id for m in expected]
+                assert abs(found[0].score - expected[0].score) < 1e-5
+            assert store.memory_bytes() < len(store.codes) * 32 * 4
+    print("✅ Re-scoring test passed")
+
+
+def test_persist_and_incremental_writes():
+    """Test that codes are saved, reloaded, and extended for upserted rows"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = build(tmp)
+        store = QuantizedVectorStore(path, method="pq", pq_m=8)
+        store.save(compact=False)
+        assert os.path.exists(os.path.join(path, "pq", "codes.npy"))
+
+        new_vector = [1.0] + [0.0] * 31
+        store.upsert([{"id": "vec_new", "values": new_vector, "metadata": {"journal": "New"}}])
+        store.delete(["vec_0"])
+        assert store.query(new_vector, top_k=1).matches[0].id == "vec_new"
+        store.flush()
+
+        reloaded = QuantizedVectorStore(path, method="pq", pq_m=8)
+        assert len(reloaded.codes) == 800
+        assert reloaded.query(new_vector, top_k=1).matches[0].id == "vec_new"
+        filtered = reloaded.query(new_vector, top_k=5, filter={"journal": "BMC Veterinary Research"})
+        assert all(m.metadata["journal"] == "BMC Veterinary Research" for m in filtered.matches)
+        assert "vec_0" not in reloaded.fetch(["vec_0"])
+    print("✅ Persistence test passed")
+
+
+def test_backends_share_store_directory():
+    """Test that one backend's flush keeps the other backends' indexes and they only add the new rows"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = build(tmp)
+        QuantizedVectorStore(path, method="int8").save(compact=False)
+        QuantizedVectorStore(path, method="pq", pq_m=8).save(compact=False)
+        HnswVectorStore(path).save()
+        derived = sorted(os.path.join(d, f) for d in ("int8", "pq", "hnsw") for f in os.listdir(os.path.join(path, d)))
+
+        new_vector = [1.0] + [0.0] * 31
+        int8 = QuantizedVectorStore(path, method="int8")
+        int8.upsert([{"id": "vec_new", "values": new_vector, "metadata": {"journal": "New"}}])
+        int8.flush()
+        assert sorted(os.path.join(d, f) for d in ("int8", "pq", "hnsw") for f in os.listdir(os.path.join(path, d))) == derived
+
+        # Saved indexes are extended with the appended row instead of being rebuilt
+        def no_rebuild(self):
+            raise AssertionError("index rebuilt")
+        original = (QuantizedVectorStore._build, HnswVectorStore._build_graph)
+        QuantizedVectorStore._build = HnswVectorStore._build_graph = no_rebuild
+        try:
+            pq = QuantizedVectorStore(path, method="pq", pq_m=8)
+            hnsw = HnswVectorStore(path)
+        finally:
+            QuantizedVectorStore._build, HnswVectorStore._build_graph = original
+        assert len(pq.codes) == 801
+        assert pq.query(new_vector, top_k=1).matches[0].id == "vec_new"
+        assert hnsw.query(new_vector, top_k=1).matches[0].id == "vec_new"
+        assert hnsw.query(new_vector, top_k=1, filter={"journal": "New"}).matches[0].id == "vec_new"
+
+        # Compaction moves rows: the other backends' indexes no longer match and are rebuilt
+        int8.delete(["vec_0"])
+        int8.save(compact=True)
+        rebuilt = QuantizedVectorStore(path, method="pq", pq_m=8)
+        assert len(rebuilt.codes) == 800
+        assert rebuilt.query(new_vector, top_k=1).matches[0].id == "vec_new"
+    print("✅ Shared store directory test passed")
+
+
+def run_all_tests():
+    """Run all test functions"""
+    print("\n" + "="*60)
+    print("Running Quantized Store Tests")
+    print("="*60 + "\n")
+
+    try:
+        test_quantizers_roundtrip()
+        test_rescored_results_match_exact()
+        test_persist_and_incremental_writes()
+        test_backends_share_store_directory()
+
+        print("\n" + "="*60)
+        print("✅ ALL TESTS PASSED!")
+        print("="*60 + "\n")
+        return True
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,236 @@
+"""
+Unit tests for the query understanding stage (JSON parsing + regex fallback)
+"""
+
+import asyncio
+import json
+import sqlite3
+import sys
+import os
+from types import SimpleNamespace
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.cache import QueryUnderstandingCache
+from app.query_understanding import extract_english_query, parse_understanding, build_understanding_prompt, understand_query
+
+
+def test_parse_valid_json():
+    """Test a well-formed JSON-mode response"""
+    content = json.dumps({
+        "english_query": "My dog vomited foam in the morning. What could be the cause?",
+        "alternative_queries": ["Causes of foamy vomiting in dogs", "Morning bilious vomiting in dogs"],
+        "question_type": "diagnostic_symptom"
+    })
+    result = parse_understanding(content, "강아지가 아침에 거품토를 했어요", "Korean")
+    assert result.source == "llm"
+    assert result.english_query.startswith("My dog vomited foam")
+    assert result.question_type == "diagnostic_symptom"
+    assert len(result.expanded_queries) == 3
+    assert result.expanded_queries[0] == result.english_query
+    print("✅ Valid JSON test passed")
+
+
+def test_invalid_json_falls_back_to_regex():
+    """Test that unusable output falls back to the regex classifier"""
+    result = parse_understanding("not json", "아토피 치료법은?", "Korean")
+    assert result.source == "fallback"
+    assert result.english_query == "아토피 치료법은?"
+    assert result.question_type == "treatment"
+    assert result.expanded_queries == ["아토피 치료법은?"]
+    print("✅ Invalid JSON fallback test passed")
+
+
+def test_unknown_question_type_uses_regex():
+    """Test that an out-of-vocabulary question type is replaced by the regex result"""
+    content = json.dumps({
+        "english_query": "What is the prognosis for mammary tumors?",
+        "alternative_queries": [],
+        "question_type": "oncology"
+    })
+    result = parse_understanding(content, "유선종양 예후는?", "Korean")
+    assert result.question_type == "prognosis"
+    print("✅ Unknown question type test passed")
+
+
+def test_english_question_is_kept_verbatim():
+    """Test that English questions are searched as typed, not rewritten"""
+    question = "How to treat atopic dermatitis?"
+    content = json.dumps({
+        "english_query": "Treatment of canine atopic dermatitis",
+        "alternative_queries": ["How to treat atopic dermatitis?", "Atopic dermatitis therapy in dogs", "extra", "extra2"],
+        "question_type": "treatment"
+    })
+    result = parse_understanding(content, question, "English")
+    assert result.english_query == question
+    # Duplicate of the main query is dropped, at most 2 alternatives kept
+    assert result.alternative_queries == ["Atopic dermatitis therapy in dogs", "extra"]
+    print("✅ English verbatim test passed")
+
+
+def test_prompt_contains_language_rules():
+    """Test that the prompt carries the language-specific translation rules"""
+    assert "거품토" in build_understanding_prompt("질문", "Korean")
+    assert "泡状の嘔吐" in build_understanding_prompt("質問", "Japanese")
+    assert "JSON" in build_understanding_prompt("question", "English")
+    print("✅ Prompt tests passed")
+
+
+class FakeClient:
+    """Minimal stand-in for AsyncOpenAI counting chat completion calls"""
+
+    def __init__(self, content):
+        self.calls = 0
+        self.content = content
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        message = SimpleNamespace(content=self.content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def test_cache_skips_llm_call():
+    """Test that a cached understanding result skips the LLM round trip"""
+    client = FakeClient(json.dumps({
+        "english_query": "My cat keeps vomiting after eating meals",
+        "alternative_queries": ["Postprandial vomiting in cats"],
+        "question_type": "diagnostic_symptom"
+    }))
+    cache = QueryUnderstandingCache(prompt_version="test")
+
+    first = asyncio.run(understand_query(client, "猫が食後に吐き続けます", "Japanese", cache=cache))
+    second = asyncio.run(understand_query(client, "猫が食後に吐き続けます。", "Japanese", cache=cache))
+    assert client.calls == 1
+    assert first.source == "llm"
+    assert second.source == "cache"
+    assert second.english_query == first.english_query
+
+    # Fallback results are not cached
+    broken = FakeClient("not json")
+    asyncio.run(understand_query(broken, "犬が吐いています", "Japanese", cache=cache))
+    asyncio.run(understand_query(broken, "犬が吐いています", "Japanese", cache=cache))
+    assert broken.calls == 2
+    print("✅ Cache test passed")
+
+
+def test_cache_errors_are_misses():
+    """Test that a failing cache read or write does not fail query understanding"""
+    class BrokenCache:
+        def get(self, language, question):
+            raise sqlite3.OperationalError("database is locked")
+
+        def put(self, language, question, value):
+            raise sqlite3.OperationalError("disk I/O error")
+
+    client = FakeClient(json.dumps({
+        "english_query": "My dog is limping",
+        "alternative_queries": [],
+        "question_type": "diagnostic_symptom"
+    }))
+    result = asyncio.run(understand_query(client, "강아지가 절뚝거려요", "Korean", cache=BrokenCache()))
+    assert client.calls == 1
+    assert result.source == "llm" and result.english_query == "My dog is limping"
+
+    # Entries written by an older QueryUnderstanding schema are also misses
+    stale = QueryUnderstandingCache(prompt_version="test")
+    stale.put("Korean", "강아지가 절뚝거려요", {"english_query": "My dog is limping", "removed_field": 1})
+    assert asyncio.run(understand_query(client, "강아지가 절뚝거려요", "Korean", cache=stale)).source == "llm"
+    assert client.calls == 2
+    print("✅ Cache error test passed")
+
+
+class FakeStreamingClient:
+    """AsyncOpenAI stand-in streaming the JSON content in small deltas, logging what happened when"""
+
+    def __init__(self, content, fail=False):
+        self.content = content
+        self.fail = fail
+        self.events = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, **kwargs):
+        assert kwargs.get("stream") is True
+        self.events.append("call")
+        if self.fail:
+            raise RuntimeError("upstream unavailable")
+
+        async def chunks():
+            for i in range(0, len(self.content), 5):
+                self.events.append("delta")
+                delta = SimpleNamespace(content=self.content[i:i + 5])
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+        return chunks()
+
+
+def test_extract_english_query_from_partial_json():
+    """Test that the English query is read only once its JSON string is complete"""
+    assert extract_english_query('{"english_query": "My dog vom') is None
+    assert extract_english_query('{"english_query": "My dog \\"vomited\\" foam", "alter') == 'My dog "vomited" foam'
+    assert extract_english_query('{"english_query": "  ", "alternative_queries"') is None
+    print("✅ Partial JSON extraction test passed")
+
+
+def test_streaming_reports_english_query_early():
+    """Test that speculative retrieval gets the search query before the understanding call finishes"""
+    content = json.dumps({
+        "english_query": "My dog vomited foam in the morning",
+        "alternative_queries": ["Causes of foamy vomiting in dogs", "Bilious vomiting syndrome in dogs"],
+        "question_type": "diagnostic_symptom"
+    })
+    client = FakeStreamingClient(content)
+    reported = []
+    on_english_query = lambda q: (reported.append(q), client.events.append("reported"))
+
+    result = asyncio.run(understand_query(client, "강아지가 아침에 거품토를 했어요", "Korean", on_english_query=on_english_query))
+    assert reported == ["My dog vomited foam in the morning"]
+    assert result.question_type == "diagnostic_symptom" and len(result.expanded_queries) == 3
+    assert client.events.index("reported") < len(client.events) - 10, "reported only at the end of the stream"
+
+    # English questions are searched verbatim - reported before the call is made
+    client = FakeStreamingClient(content)
+    asyncio.run(understand_query(client, "My dog is vomiting", "English", on_english_query=on_english_query))
+    assert reported[-1] == "My dog is vomiting"
+    assert client.events.index("reported") < client.events.index("call")
+
+    # A failed call still reports (the original question) exactly once
+    reported.clear()
+    result = asyncio.run(understand_query(FakeStreamingClient(content, fail=True), "犬が吐いています", "Japanese",
+                                          on_english_query=lambda q: reported.append(q)))
+    assert reported == ["犬が吐いています"] and result.source == "fallback"
+    print("✅ Streaming english_query test passed")
+
+
+def run_all_tests():
+    """Run all test functions"""
+    print("\n" + "="*60)
+    print("Running Query Understanding Tests")
+    print("="*60 + "\n")
+
+    try:
+        test_parse_valid_json()
+        test_invalid_json_falls_back_to_regex()
+        test_unknown_question_type_uses_regex()
+        test_english_question_is_kept_verbatim()
+        test_prompt_contains_language_rules()
+        test_cache_skips_llm_call()
+        test_cache_errors_are_misses()
+        test_extract_english_query_from_partial_json()
+        test_streaming_reports_english_query_early()
+
+        print("\n" + "="*60)
+        print("✅ ALL TESTS PASSED!")
+        print("="*60 + "\n")
+        return True
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,245 @@
+"""
+Unit tests for retrieval orchestration (speculative retrieval, expansion deadline, batched embedding)
+"""
+
+import asyncio
+import json
+import sys
+import os
+from types import SimpleNamespace
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.cache import EmbeddingCache, QueryUnderstandingCache
+from app.metrics import RequestTimer
+from app.retrieval import Retriever
+
+QUESTION = "강아지가 아침에 거품토를 했어요"
+UNDERSTANDING = {
+    "english_query": "My dog vomited foam in the morning",
+    "alternative_queries": ["Causes of foamy vomiting in dogs", "Bilious vomiting syndrome in dogs"],
+    "question_type": "diagnostic_symptom"
+}
+
+
+class FakeOpenAI:
+    """
+    AsyncOpenAI stand-in: the understanding JSON streams up to the end of
+    english_query at once and the rest after `tail_delay` seconds
+    """
+
+    def __init__(self, content=None, tail_delay=0.0, fail=False):
+        self.content = json.dumps(UNDERSTANDING) if content is None else content
+        self.tail_delay = tail_delay
+        self.fail = fail
+        self.understanding_calls = 0
+        self.understanding_finished = 0
+        self.embedding_inputs = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+        self.embeddings = SimpleNamespace(create=self.embed)
+
+    async def create(self, **kwargs):
+        self.understanding_calls += 1
+        if self.fail:
+            raise RuntimeError("upstream unavailable")
+        split = self.content.index('"alternative_queries"')
+
+        async def chunks():
+            for i, piece in enumerate((self.content[:split], self.content[split:])):
+                if i:
+                    await asyncio.sleep(self.tail_delay)
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))])
+            self.understanding_finished += 1
+        return chunks()
+
+    async def embed(self, model, input):
+        self.embedding_inputs.append(list(input))
+        data = [SimpleNamespace(index=i, embedding=[float(len(text)), 1.0]) for i, text in enumerate(input)]
+        return SimpleNamespace(data=list(reversed(data)))  # matched by index, not position
+
+
+class FakeSearcher:
+    """ConcurrentSearcher stand-in returning one chunk per embedding"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def search_many(self, embeddings, top_k=15, filter=None, include_values=False):
+        self.calls.append(len(embeddings))
+        return [[{"id": f"chunk-{int(e[0])}", "score": 0.9}] for e in embeddings]
+
+
+class FakeBM25:
+    def __init__(self):
+        self.queries = []
+
+    def search_many(self, queries, top_k):
+        self.queries.append(list(queries))
+        return [[{"id": f"bm25-{len(q)}", "bm25_score": 3.0}] for q in queries]
+
+
+def make_retriever(client, deadline_ms=800.0, bm25_index=None):
+    return Retriever(
+        client,
+        FakeSearcher(),
+        EmbeddingCache(model="test"),
+        understanding_cache=QueryUnderstandingCache(prompt_version="test"),
+        bm25_index=bm25_index,
+        expansion_deadline_ms=deadline_ms
+    )
+
+
+def test_expansion_arrives_before_deadline():
+    """Test that the primary query is searched first and expansion results within the deadline are merged"""
+    client = FakeOpenAI(tail_delay=0.05)
+    retriever = make_retriever(client, deadline_ms=1000, bm25_index=FakeBM25())
+    timer = RequestTimer()
+
+    async def run():
+        retrieval = retriever.start(QUESTION, "Korean", timer)
+        queries = await retrieval.primary_queries()
+        assert queries == [UNDERSTANDING["english_query"]]
+        assert retrieval.understanding is None  # searched before understanding finished
+        await retrieval.embed()
+        return retrieval, await retrieval.search()
+
+    retrieval, result = asyncio.run(run())
+    assert result.expansion == "merged"
+    assert result.queries == [UNDERSTANDING["english_query"]] + UNDERSTANDING["alternative_queries"]
+    assert len(result.dense_results) == 3 and len(result.keyword_results) == 3
+    assert retriever.searcher.calls == [1, 2]
+    assert client.embedding_inputs == [[UNDERSTANDING["english_query"]], UNDERSTANDING["alternative_queries"]]
+    assert retrieval.understanding.question_type == "diagnostic_symptom"
+    assert {"query_understanding", "embedding", "vector_search", "keyword_search_wait", "expansion_wait"} <= set(timer.stages)
+    print("✅ Expansion before deadline test passed")
+
+
+def test_expansion_misses_deadline():
+    """Test that late expansions are dropped while query understanding still finishes and is cached"""
+    client = FakeOpenAI(tail_delay=0.3)
+    retriever = make_retriever(client, deadline_ms=20)
+
+    async def run():
+        retrieval = retriever.start(QUESTION, "Korean")
+        await retrieval.primary_queries()
+        await retrieval.embed()
+        result = await retrieval.search()
+        assert retrieval.expansion_task.cancelled() or retrieval.expansion_task.cancelling()
+        assert retrieval.understanding is None
+        await retrieval.understanding_task
+        return result
+
+    result = asyncio.run(run())
+    assert result.expansion == "skipped"
+    assert result.queries == [UNDERSTANDING["english_query"]] and len(result.dense_results) == 1
+    assert retriever.searcher.calls == [1]
+    assert retriever.understanding_cache.get("Korean", QUESTION)["english_query"] == UNDERSTANDING["english_query"]
+
+    # The next identical question is fully understood up front - every query is primary, no expansion task
+    async def again():
+        retrieval = retriever.start(QUESTION, "Korean")
+        queries = await retrieval.primary_queries()
+        assert retrieval.expansion_task is None and retrieval.understanding.source == "cache"
+        await retrieval.embed()
+        return queries, await retrieval.search()
+
+    queries, result = asyncio.run(again())
+    assert len(queries) == 3 and result.expansion is None and len(result.dense_results) == 3
+    assert client.understanding_calls == 1
+    # The primary query was already embedded by the first request
+    assert client.embedding_inputs[-1] == UNDERSTANDING["alternative_queries"]
+    print("✅ Expansion deadline miss test passed")
+
+
+def test_understanding_falls_back():
+    """Test that a failed understanding call still searches the original question"""
+    client = FakeOpenAI(fail=True)
+    retriever = make_retriever(client)
+
+    async def run():
+        retrieval = retriever.start(QUESTION, "Korean")
+        queries = await retrieval.primary_queries()
+        await retrieval.embed()
+        return retrieval, queries, await retrieval.search()
+
+    retrieval, queries, result = asyncio.run(run())
+    assert queries == [QUESTION] and result.queries == [QUESTION]
+    assert result.expansion in (None, "merged") and len(result.dense_results) == 1
+    assert retrieval.understanding.source == "fallback"
+    assert retrieval.understanding.question_type == "diagnostic_symptom"
+    assert retriever.understanding_cache.get("Korean", QUESTION) is None
+    print("✅ Understanding fallback test passed")
+
+
+def test_answer_cache_hit_cancels_retrieval():
+    """Test that cancelling on an answer cache hit stops the searches but not query understanding"""
+    client = FakeOpenAI(tail_delay=0.1)
+    bm25 = FakeBM25()
+    retriever = make_retriever(client, bm25_index=bm25)
+
+    async def run():
+        retrieval = retriever.start(QUESTION, "Korean")
+        await retrieval.primary_queries()
+        await retrieval.embed()
+        retrieval.cancel()
+        await asyncio.sleep(0)
+        assert retrieval.expansion_task.cancelled()
+        assert not retrieval.understanding_task.done()
+        understanding = await retrieval.understanding_task
+        await asyncio.sleep(0.05)
+        return understanding
+
+    understanding = asyncio.run(run())
+    assert understanding.source == "llm" and client.understanding_finished == 1
+    assert retriever.understanding_cache.get("Korean", QUESTION) is not None
+    # Neither the primary nor the expanded queries reached the vector store
+    assert retriever.searcher.calls == []
+    assert client.embedding_inputs == [[UNDERSTANDING["english_query"]]]
+    print("✅ Answer cache cancellation test passed")
+
+
+def test_embedding_is_batched_and_deduplicated():
+    """Test that cached queries are reused and the rest go out in one de-duplicated request"""
+    client = FakeOpenAI()
+    retriever = make_retriever(client)
+    retriever.embedding_cache.put("cached query", [0.5, 0.5])
+
+    vectors = asyncio.run(retriever.embed_queries(["dog vomiting", "cached query", "dog vomiting", "cat"]))
+    assert client.embedding_inputs == [["dog vomiting", "cat"]]
+    assert vectors == [[12.0, 1.0], [0.5, 0.5], [12.0, 1.0], [3.0, 1.0]]
+
+    assert asyncio.run(retriever.embed_queries(["cat", "cat"])) == [[3.0, 1.0], [3.0, 1.0]]
+    assert asyncio.run(retriever.embed_queries([])) == []
+    assert len(client.embedding_inputs) == 1
+    print("✅ Batched embedding test passed")
+
+
+def run_all_tests():
+    """Run all test functions"""
+    print("\n" + "="*60)
+    print("Running Retrieval Tests")
+    print("="*60 + "\n")
+
+    try:
+        test_expansion_arrives_before_deadline()
+        test_expansion_misses_deadline()
+        test_understanding_falls_back()
+        test_answer_cache_hit_cancels_retrieval()
+        test_embedding_is_batched_and_deduplicated()
+
+        print("\n" + "="*60)
+        print("✅ ALL TESTS PASSED!")
+        print("="*60 + "\n")
+        return True
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,131 @@
+"""
+Unit tests for the JSON serialization layer
+"""
+
+import sys
+import os
+import json
+
+import numpy as np
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+import app.serialization as serialization
+from app.serialization import (FastJSONResponse, StdlibSerializer, get_serializer, install_exception_handlers,
+                               orjson, sse_delta_frame, sse_frame)
+
+EVENTS = [
+    {"status": "streaming", "chunk": "오클라시티닙 0.4–0.6 mg/kg {{citation:1}}\n\"quoted\" \\ \t"},
+    {"status": "done", "message": "완료", "context_chunks": [
+        {"id": "paper_PMC1_c0", "title": "Atopic dermatitis", "page": 3, "score": 0.8125, "text": "x" * 2000}
+    ], "cached": True},
+    {"status": "followup_ready", "followup_questions": [], "extra": None},
+]
+
+
+def test_backends_are_byte_identical():
+    """Test that orjson and stdlib produce the same compact UTF-8 bytes"""
+    stdlib = StdlibSerializer()
+    for event in EVENTS:
+        encoded = stdlib.dumps(event)
+        assert json.loads(encoded) == event
+        assert b"\\u" not in encoded  # non-ASCII is written as UTF-8, not escaped
+        if orjson is not None:
+            assert get_serializer("orjson").dumps(event) == encoded
+    assert get_serializer("json").name == "json"
+    print("✅ Backend equivalence test passed")
+
+
+def test_orjson_fallbacks():
+    """Test values orjson rejects or handles only with options"""
+    serializer = get_serializer()
+    assert json.loads(serializer.dumps({"big": 2 ** 70})) == {"big": 2 ** 70}
+    assert json.loads(serializer.dumps({1: "int key"})) == {"1": "int key"}
+    if serializer.name == "orjson":
+        assert json.loads(serializer.dumps({"score": np.float32(0.5)})) == {"score": 0.5}
+    print("✅ Fallback test passed")
+
+
+def test_sse_frames():
+    """Test SSE framing and the pre-encoded streaming prefix"""
+    for event in EVENTS:
+        frame = sse_frame(event)
+        assert frame.startswith(b"data: ") and frame.endswith(b"\n\n")
+        assert json.loads(frame[len(b"data: "):]) == event
+    text = EVENTS[0]["chunk"]
+    assert sse_delta_frame(text) == sse_frame({"status": "streaming", "chunk": text})
+    print("✅ SSE frame test passed")
+
+
+def test_error_responses_use_serializer():
+    """Test that HTTPException and validation error bodies go through the active serializer"""
+    class Item(BaseModel):
+        count: int
+
+    api = FastAPI(default_response_class=FastJSONResponse)
+    install_exception_handlers(api)
+
+    @api.get("/missing")
+    async def missing():
+        raise HTTPException(status_code=404, detail="없음", headers={"X-Reason": "test"})
+
+    @api.post("/items")
+    async def items(item: Item):
+        return {"count": item.count}
+
+    rendered = []
+
+    class RecordingSerializer(StdlibSerializer):
+        def dumps(self, obj):
+            rendered.append(obj)
+            return super().dumps(obj)
+
+    original = serialization.serializer
+    serialization.serializer = RecordingSerializer()
+    try:
+        client = TestClient(api)
+        response = client.get("/missing")
+        assert response.status_code == 404 and response.json() == {"detail": "없음"}
+        assert response.headers["X-Reason"] == "test"
+        invalid = client.post("/items", json={"count": "many"})
+        assert invalid.status_code == 422 and invalid.json()["detail"][0]["loc"] == ["body", "count"]
+        assert client.post("/items", json={"count": 2}).json() == {"count": 2}
+    finally:
+        serialization.serializer = original
+    assert [type(body) for body in rendered] == [dict, dict, dict]
+    assert rendered[0] == {"detail": "없음"}
+    print("✅ Error response serializer test passed")
+
+
+def run_all_tests():
+    """Run all test functions"""
+    print("\n" + "="*60)
+    print("Running Serialization Tests")
+    print("="*60 + "\n")
+
+    try:
+        test_backends_are_byte_identical()
+        test_orjson_fallbacks()
+        test_sse_frames()
+        test_error_responses_use_serializer()
+
+        print("\n" + "="*60)
+        print("✅ ALL TESTS PASSED!")
+        print("="*60 + "\n")
+        return True
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,205 @@
+"""
+Unit tests for server-side sessions and history compaction
+"""
+
+import sys
+import os
+import asyncio
+import tempfile
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.sessions import HistoryCompactor, SessionStore, record_turn
+from app.token_budget import TokenCounter
+
+counter = TokenCounter("gpt-4o")
+
+
+def turn(i):
+    return [{"role": "user", "content": f"question {i}"}, {"role": "assistant", "content": f"answer {i} " * 20}]
+
+
+def test_session_store_persists():
+    """Test that sessions are seeded from client history and survive a restart via SQLite"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sessions.sqlite3")
+        store = SessionStore(disk_path=path)
+        session = store.create([{"role": "user", "content": "고양이 CKD", "references": []}, {"role": "assistant", "content": ""}])
+        assert session.messages == [{"role": "user", "content": "고양이 CKD"}]
+
+        store.append_turn(session.session_id, turn(1), context_ids=["paper_PMC1_c0"])
+        store.disk.close()
+
+        restarted = SessionStore(disk_path=path)
+        loaded = restarted.get(session.session_id)
+        assert loaded.messages == session.messages and len(loaded.messages) == 3
+        assert loaded.context_ids == ["paper_PMC1_c0"]
+        assert restarted.get("unknown") is None
+        assert restarted.append_turn("unknown", turn(2)) is None
+        restarted.disk.close()
+    print("✅ Session persistence test passed")
+
+
+def test_expired_session_falls_back_to_client_history():
+    """Test that a missing session is replaced by one seeded with the history the client resent"""
+    store = SessionStore()
+    session = store.create()
+    store.append_turn(session.session_id, turn(1))
+    assert store.get_or_create(session.session_id, turn(9)) is session
+
+    store.memory.clear()  # expired / evicted
+    fresh = store.get_or_create(session.session_id, turn(1))
+    assert fresh.session_id != session.session_id
+    assert [m["content"] for m in fresh.messages] == [m["content"] for m in turn(1)]
+    print("✅ Expired session fallback test passed")
+
+
+def test_concurrent_appends_from_threads():
+    """Test that appends from worker threads (asyncio.to_thread) are not lost"""
+    store = SessionStore()
+    session = store.create()
+
+    async def append_all():
+        await asyncio.gather(*(asyncio.to_thread(store.append_turn, session.session_id, turn(i)) for i in range(50)))
+
+    asyncio.run(append_all())
+    assert len(store.get(session.session_id).messages) == 100
+    print("✅ Concurrent append test passed")
+
+
+def test_concurrent_compactions_fold_once():
+    """Test that two compactions triggered together for one session summarize it once"""
+    store = SessionStore()
+    session = store.create()
+    for i in range(5):
+        store.append_turn(session.session_id, turn(i))
+    calls = []
+
+    async def summarize(previous, messages):
+        calls.append(len(messages))
+        await asyncio.sleep(0.01)
+        return "summary"
+
+    compactor = HistoryCompactor(store, counter, summarize, threshold_tokens=10_000, keep_recent=4, max_messages=6)
+
+    async def both():
+        return await asyncio.gather(compactor.compact(session.session_id), compactor.compact(session.session_id))
+
+    assert sorted(asyncio.run(both())) == [False, True]
+    assert calls == [6]
+    assert [m["content"] for m in store.get(session.session_id).messages] == [m["content"] for m in turn(3) + turn(4)]
+    print("✅ Concurrent compaction test passed")
+
+
+def test_compaction_keeps_turns_added_meanwhile():
+    """Test that older turns become a summary and turns appended during summarization are kept"""
+    store = SessionStore()
+    session = store.create()
+    for i in range(4):
+        store.append_turn(session.session_id, turn(i))
+
+    calls = []
+
+    async def summarize(previous, messages):
+        calls.append((previous, len(messages)))
+        store.append_turn(session.session_id, turn(99))  # a new turn finishes while the summary is generated
+        await asyncio.sleep(0)
+        return "cat, 5kg, CKD stage 2"
+
+    compactor = HistoryCompactor(store, counter, summarize, threshold_tokens=10_000, keep_recent=4, max_messages=6)
+    assert compactor.needs_compaction(session)
+    assert asyncio.run(compactor.compact(session.session_id))
+
+    compacted = store.get(session.session_id)
+    assert calls == [("", 4)]
+    assert [m["content"] for m in compacted.messages] == [m["content"] for m in turn(2) + turn(3) + turn(99)]
+    assert compacted.summarized_messages == 4
+    assert compacted.summary_message()["content"].endswith("cat, 5kg, CKD stage 2")
+    assert compactor.stats()["compactions"] == 1 and compactor.stats()["tokens_saved"] > 0
+    print("✅ Compaction test passed")
+
+
+def test_compaction_thresholds_and_failures():
+    """Test the token threshold and that a failed summary leaves the history untouched"""
+    store = SessionStore()
+    session = store.create(turn(0) + turn(1) + turn(2))
+
+    async def failing(previous, messages):
+        raise RuntimeError("rate limited")
+
+    compactor = HistoryCompactor(store, counter, failing, threshold_tokens=10_000, keep_recent=4, max_messages=6)
+    assert not compactor.needs_compaction(session)
+    compactor.threshold_tokens = 50
+    assert compactor.needs_compaction(session)
+
+    assert not asyncio.run(compactor.compact(session.session_id))
+    assert len(store.get(session.session_id).messages) == 6
+    assert compactor.stats()["failures"] == 1
+    print("✅ Threshold / failure test passed")
+
+
+def test_seeded_session_records_turns():
+    """Test that a session seeded from client history records turns and schedules compaction when due"""
+    store = SessionStore()
+    summarized = []
+
+    async def summarize(previous, messages):
+        summarized.append(len(messages))
+        return "dog, 12 years, mitral valve disease"
+
+    compactor = HistoryCompactor(store, counter, summarize, threshold_tokens=10_000, keep_recent=2, max_messages=4)
+
+    async def conversation():
+        session = store.get_or_create(None, turn(0))
+        spawned = []
+        spawn = lambda coro: spawned.append(asyncio.ensure_future(coro))
+        await record_turn(store, compactor, session.session_id, "question 1", "answer 1", ["PMC1_c0"], spawn)
+        assert spawned == []
+        # Known IDs are reused as-is; an expired / unknown ID is seeded from the client history
+        assert store.get_or_create(session.session_id, []).messages == store.get(session.session_id).messages
+        seeded = store.get_or_create("expired", turn(5))
+        assert seeded.session_id != "expired" and seeded.messages == turn(5)
+        await record_turn(store, compactor, session.session_id, "question 2", "answer 2", ["PMC2_c0"], spawn)
+        assert len(spawned) == 1
+        assert await spawned[0]
+        return store.get(session.session_id)
+
+    session = asyncio.run(conversation())
+    assert summarized == [4]
+    assert [m["content"] for m in session.messages] == ["question 2", "answer 2"]
+    assert session.context_ids == ["PMC2_c0"] and session.summary.startswith("dog, 12 years")
+    assert asyncio.run(record_turn(store, compactor, "unknown", "q", "a", [], lambda coro: None)) is None
+    print("✅ Seeded session turn recording test passed")
+
+
+def run_all_tests():
+    """Run all test functions"""
+    print("\n" + "="*60)
+    print("Running Session Tests")
+    print("="*60 + "\n")
+
+    try:
+        test_session_store_persists()
+        test_expired_session_falls_back_to_client_history()
+        test_concurrent_appends_from_threads()
+        test_concurrent_compactions_fold_once()
+        test_compaction_keeps_turns_added_meanwhile()
+        test_compaction_thresholds_and_failures()
+        test_seeded_session_records_turns()
+
+        print("\n" + "="*60)
+        print("✅ ALL TESTS PASSED!")
+        print("="*60 + "\n")
+        return True
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
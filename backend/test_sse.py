@@ -0,0 +1,102 @@
+"""
+Unit tests for SSE delta coalescing
+"""
+
+import sys
+import os
+import asyncio
+import json
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.sse import SSETotals, SSEWriter, with_flush_deadlines
+
+
+def encode(data):
+    return f"data: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
+
+
+def chunks_of(frames):
+    events = [json.loads(f[len(b"data: "):]) for f in b"".join(frames).split(b"\n\n") if f]
+    return [event["chunk"] for event in events if "chunk" in event]
+
+
+def test_byte_threshold_and_event_order():
+    """Test that deltas merge until max_bytes and other events flush pending text first"""
+    sse = SSEWriter(encode, window=10.0, max_bytes=10)
+    assert sse.delta("abc") == b""
+    assert sse.delta("def") == b""
+    frame = sse.delta("ghij")
+    assert chunks_of([frame]) == ["abcdefghij"]
+
+    assert sse.delta("tail") == b""
+    combined = sse.event({"status": "references_ready"})
+    assert combined.index(b'"tail"') < combined.index(b"references_ready")
+    assert sse.delta("한글") == b""
+    assert sse.encoded(b"data: {}\n\n").endswith(b"}\n\ndata: {}\n\n")
+    assert sse.frames == 5 and sse.deltas == 5
+    assert sse.bytes == len(frame) + len(combined) + len(encode({"status": "streaming", "chunk": "한글"})) + 10
+    print("✅ Byte threshold / ordering test passed")
+
+
+def test_zero_window_sends_every_delta():
+    """Test that window=0 disables coalescing"""
+    sse = SSEWriter(encode, window=0, max_bytes=0)
+    frames = [sse.delta(text) for text in ("a", "b", "c")]
+    assert chunks_of(frames) == ["a", "b", "c"]
+    assert sse.flush() == b""
+    print("✅ No-coalescing test passed")
+
+
+def test_window_expires_while_waiting():
+    """Test that pending text is flushed when the next delta is late"""
+    async def slow_source():
+        yield "fast1"
+        yield "fast2"
+        await asyncio.sleep(0.2)
+        yield "late"
+
+    async def run():
+        sse = SSEWriter(encode, window=0.05, max_bytes=1 << 20)
+        frames = []
+        async for item in with_flush_deadlines(slow_source(), sse):
+            frames.append(sse.flush() if item is None else sse.delta(item))
+        frames.append(sse.flush())
+        return sse, frames
+
+    sse, frames = asyncio.run(run())
+    assert chunks_of(frames) == ["fast1fast2", "late"]
+
+    totals = SSETotals()
+    totals.record(sse)
+    assert totals.stats()["frames"] == 2 and totals.stats()["deltas_per_frame"] == 1.5
+    print("✅ Window expiry test passed")
+
+
+def run_all_tests():
+    """Run all test functions"""
+    print("\n" + "="*60)
+    print("Running SSE Writer Tests")
+    print("="*60 + "\n")
+
+    try:
+        test_byte_threshold_and_event_order()
+        test_zero_window_sends_every_delta()
+        test_window_expires_while_waiting()
+
+        print("\n" + "="*60)
+        print("✅ ALL TESTS PASSED!")
+        print("="*60 + "\n")
+        return True
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,117 @@
+"""
+Unit tests for structured, queue-backed logging
+"""
+
+import sys
+import os
+import io
+import json
+import asyncio
+import logging
+import queue
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.structured_logging import (
+    NonBlockingQueueHandler, RequestIdMiddleware, SamplingFilter, configure_logging,
+    logging_stats, request_id_var, shutdown_logging
+)
+
+
+def test_json_lines_with_request_id():
+    """Test that records are written as JSON lines with request_id, extra fields and tracebacks"""
+    stream = io.StringIO()
+    configure_logging(level="INFO", stream=stream)
+    logger = logging.getLogger("test.structured")
+    token = request_id_var.set("req-123")
+    try:
+        logger.info("query done: %s", "ok", extra={"stages": {"embedding": 0.08}})
+        logger.debug("hidden")
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("failed")
+    finally:
+        request_id_var.reset(token)
+    logger.warning("outside request")
+    shutdown_logging()
+
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [line["msg"] for line in lines] == ["query done: ok", "failed", "outside request"]
+    assert lines[0]["request_id"] == "req-123" and lines[0]["level"] == "INFO"
+    assert lines[0]["stages"] == {"embedding": 0.08} and lines[0]["logger"] == "test.structured"
+    assert "ValueError: boom" in lines[1]["exc"]
+    assert lines[2]["request_id"] == "-"
+    print("✅ JSON lines test passed")
+
+
+def test_sampling_and_full_queue():
+    """Test that sampled records are thinned out and a full queue drops instead of blocking"""
+    sampler = SamplingFilter(rate=0.25)
+    kept = [sampler.filter(logging.makeLogRecord({"sampled": True})) for _ in range(8)]
+    assert kept == [True, False, False, False, True, False, False, False]
+    assert sampler.filter(logging.makeLogRecord({})) and sampler.dropped == 6
+    assert not SamplingFilter(rate=0).filter(logging.makeLogRecord({"sampled": True}))
+
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=2))
+    for i in range(5):
+        handler.handle(logging.makeLogRecord({"msg": "line %d", "args": (i,)}))
+    assert handler.dropped == 3
+    record = handler.queue.get_nowait()
+    assert record.msg == "line 0" and record.args is None
+    print("✅ Sampling / queue test passed")
+
+
+def test_request_id_middleware():
+    """Test that the middleware reuses or generates X-Request-ID and exposes it while the app runs"""
+    seen = []
+
+    async def app(scope, receive, send):
+        seen.append(request_id_var.get())
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def call(headers):
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        await RequestIdMiddleware(app)({"type": "http", "headers": headers}, None, send)
+        return dict(sent[0]["headers"])[b"x-request-id"].decode()
+
+    assert asyncio.run(call([(b"x-request-id", b"client-id")])) == "client-id"
+    generated = asyncio.run(call([]))
+    assert len(generated) == 16 and seen == ["client-id", generated]
+    assert request_id_var.get() == "-"
+    assert set(logging_stats()) == {"queued", "dropped_queue_full", "dropped_sampling", "write_batches"}
+    print("✅ Request ID middleware test passed")
+
+
+def run_all_tests():
+    """Run all test functions"""
+    print("\n" + "="*60)
+    print("Running Structured Logging Tests")
+    print("="*60 + "\n")
+
+    try:
+        test_json_lines_with_request_id()
+        test_sampling_and_full_queue()
+        test_request_id_middleware()
+
+        print("\n" + "="*60)
+        print("✅ ALL TESTS PASSED!")
+        print("="*60 + "\n")
+        return True
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
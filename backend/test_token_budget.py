@@ -0,0 +1,101 @@
+"""
+Unit tests for the prompt token budget planner
+"""
+
+import sys
+import os
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.token_budget import DEFAULT_BUDGETS, TokenCounter, parse_budgets, plan_prompt
+
+counter = TokenCounter("gpt-4o")
+
+
+def make_chunks(n, words=100):
+    return [{"id": f"c{i}", "text": " ".join(["clinical"] * words)} for i in range(n)]
+
+
+def test_chunk_counts_are_cached():
+    """Test that per-chunk token counts are computed once per chunk ID"""
+    chunk = {"id": "cache_test", "text": "Oclacitinib 0.4-0.6 mg/kg PO q12h reduced pruritus."}
+    first = counter.count_chunk(chunk)
+    hits = counter.stats()["hits"]
+    assert counter.count_chunk(chunk) == first > 0
+    assert counter.stats()["hits"] == hits + 1
+    assert counter.count("") == 0
+    print("✅ Chunk count cache test passed")
+
+
+def test_context_is_packed_in_rank_order():
+    """Test that chunks are kept best-first until the budget is spent"""
+    chunks = make_chunks(20)
+    per_chunk = counter.count_chunk(chunks[0]) + 5
+    plan = plan_prompt(counter, budget=1000 + per_chunk * 5, fixed_tokens=1000, chunks=chunks, history=[])
+
+    assert [c["id"] for c in plan.chunks] == ["c0", "c1", "c2", "c3", "c4"]
+    assert plan.dropped_chunks == 15
+    assert plan.total_tokens <= plan.budget
+
+    # The top chunk is kept even when the fixed prompt already fills the budget
+    tight = plan_prompt(counter, budget=500, fixed_tokens=1000, chunks=chunks, history=[])
+    assert [c["id"] for c in tight.chunks] == ["c0"]
+    print("✅ Rank-order packing test passed")
+
+
+def test_history_keeps_newest_messages():
+    """Test that history is trimmed from the oldest end within its share"""
+    history = [{"role": "user" if i % 2 == 0 else "assistant", "content": " ".join(["word"] * 200) + f" m{i}"} for i in range(6)]
+    per_message = counter.count_message(history[0])
+    budget = 1000 + int(per_message * 2.5 / 0.3)
+    plan = plan_prompt(counter, budget=budget, fixed_tokens=1000, chunks=make_chunks(3), history=history)
+
+    assert plan.history == history[-2:]
+    assert plan.dropped_messages == 4
+    assert plan.total_tokens <= budget
+
+    # A compacted summary of older turns goes first when it fits in the leftover history share
+    summary = {"role": "system", "content": "Earlier: 5kg cat, CKD stage 2, on renal diet."}
+    with_summary = plan_prompt(counter, budget=budget, fixed_tokens=1000, chunks=make_chunks(3), history=history, summary=summary)
+    assert with_summary.history == [summary] + history[-2:]
+    assert with_summary.history_tokens == plan.history_tokens + counter.count_message(summary)
+    print("✅ History trimming test passed")
+
+
+def test_parse_budgets():
+    """Test per-question-type budget overrides"""
+    budgets = parse_budgets("treatment=15000, general=6000,bogus")
+    assert budgets["treatment"] == 15000 and budgets["general"] == 6000
+    assert budgets["prognosis"] == DEFAULT_BUDGETS["prognosis"]
+    assert parse_budgets(None) == DEFAULT_BUDGETS
+    print("✅ Budget parsing test passed")
+
+
+def run_all_tests():
+    """Run all test functions"""
+    print("\n" + "="*60)
+    print("Running Token Budget Tests")
+    print("="*60 + "\n")
+
+    try:
+        test_chunk_counts_are_cached()
+        test_context_is_packed_in_rank_order()
+        test_history_keeps_newest_messages()
+        test_parse_budgets()
+
+        print("\n" + "="*60)
+        print("✅ ALL TESTS PASSED!")
+        print("="*60 + "\n")
+        return True
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,105 @@
+"""
+Unit tests for the concurrent vector search layer
+"""
+
+import asyncio
+import sys
+import os
+import time
+from types import SimpleNamespace
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.vector_search import ConcurrentSearcher
+
+
+class SlowIndex:
+    """Fake blocking index: sleeps for vector[0] seconds, then returns one match"""
+
+    def query(self, vector, top_k, include_metadata=True, filter=None):
+        time.sleep(vector[0])
+        match = SimpleNamespace(id=f"doc_{vector[0]}", score=1.0 - vector[0], metadata={"title": f"Doc {vector[0]}"})
+        return SimpleNamespace(matches=[match])
+
+
+def test_queries_run_concurrently():
+    """Test that wall time equals the slowest query, not the sum"""
+    searcher = ConcurrentSearcher(SlowIndex(), max_workers=4, timeout=2.0)
+    started = time.perf_counter()
+    results = asyncio.run(searcher.search_many([[0.2], [0.2], [0.2]]))
+    elapsed = time.perf_counter() - started
+    searcher.shutdown()
+
+    assert len(results) == 3
+    assert all(len(r) == 1 for r in results)
+    assert results[0][0]["title"] == "Doc 0.2"
+    assert results[0][0]["score"] == 0.8
+    assert elapsed < 0.5, f"expected concurrent execution, took {elapsed:.2f}s"
+    print("✅ Concurrency test passed")
+
+
+def test_slow_query_times_out():
+    """Test that a query slower than the timeout is dropped without failing the rest"""
+    observed = []
+    searcher = ConcurrentSearcher(SlowIndex(), max_workers=4, timeout=0.2,
+                                  on_query=lambda seconds, outcome: observed.append(outcome))
+    results = asyncio.run(searcher.search_many([[0.0], [1.0]]))
+    searcher.shutdown()
+
+    assert len(results[0]) == 1
+    assert results[1] == []
+    assert searcher.timeouts == 1
+    assert sorted(observed) == ["ok", "timeout"]
+    print("✅ Timeout test passed")
+
+
+def test_stalled_workers_fail_fast():
+    """Test that once every worker is stuck in a timed-out call, searches are rejected until one returns"""
+    observed = []
+    searcher = ConcurrentSearcher(SlowIndex(), max_workers=2, timeout=0.05,
+                                  on_query=lambda seconds, outcome: observed.append(outcome))
+
+    async def scenario():
+        assert await searcher.search_many([[0.5], [0.5]]) == [[], []]
+        assert searcher.stalled == 2
+        started = time.perf_counter()
+        assert await searcher.search([0.0]) == []
+        assert time.perf_counter() - started < 0.05  # rejected without waiting for the timeout
+        await asyncio.sleep(0.6)  # the stuck calls return and free their workers
+        assert searcher.stalled == 0
+        return await searcher.search([0.0])
+
+    assert len(asyncio.run(scenario())) == 1
+    searcher.shutdown()
+    assert searcher.rejected == 1
+    assert observed == ["timeout", "timeout", "rejected", "ok"]
+    print("✅ Stalled worker test passed")
+
+
+def run_all_tests():
+    """Run all test functions"""
+    print("\n" + "="*60)
+    print("Running Vector Search Tests")
+    print("="*60 + "\n")
+
+    try:
+        test_queries_run_concurrently()
+        test_slow_query_times_out()
+        test_stalled_workers_fail_fast()
+
+        print("\n" + "="*60)
+        print("✅ ALL TESTS PASSED!")
+        print("="*60 + "\n")
+        return True
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,197 @@
+"""
+Unit tests for the vector store abstraction and the local NumPy backend
+"""
+
+import asyncio
+import sys
+import os
+import tempfile
+import threading
+
+import numpy as np
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.vector_search import ConcurrentSearcher
+from app.vector_store import NumpyVectorStore, VectorRecord, matches_filter, write_store
+
+
+def make_records(count: int = 200, dimension: int = 16):
+    rng = np.random.default_rng(42)
+    journals = ["Frontiers in Veterinary Science", "BMC Veterinary Research"]
+    return [
+        VectorRecord(
+            id=f"vec_{i}",
+            values=rng.standard_normal(dimension).astype(np.float32).tolist(),
+            metadata={"journal": journals[i % 2], "year": str(2010 + i % 10), "text": f"chunk {i}"}
+        )
+        for i in range(count)
+    ]
+
+
+def brute_force(records, query, top_k):
+    matrix = np.asarray([r.values for r in records], dtype=np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    q = np.asarray(query, dtype=np.float32)
+    scores = matrix @ (q / np.linalg.norm(q))
+    return [records[i].id for i in np.argsort(-scores)[:top_k]]
+
+
+def test_filter_syntax():
+    """Test the Pinecone-style filter subset"""
+    meta = {"journal": "BMC Veterinary Research", "year": "2021"}
+    assert matches_filter(meta, {"journal": {"$eq": "BMC Veterinary Research"}})
+    assert matches_filter(meta, {"journal": "BMC Veterinary Research"})
+    assert not matches_filter(meta, {"journal": {"$ne": "BMC Veterinary Research"}})
+    assert matches_filter(meta, {"year": {"$gte": 2020, "$lte": 2022}})
+    assert matches_filter(meta, {"$or": [{"year": {"$in": ["1999"]}}, {"journal": {"$in": ["BMC Veterinary Research"]}}]})
+    assert not matches_filter(meta, {"$and": [{"year": {"$gt": 2021}}]})
+    print("✅ Filter syntax test passed")
+
+
+def test_exact_search_matches_brute_force():
+    """Test that the mmap store returns the exact top-k, single and batched, across blocks"""
+    records = make_records()
+    with tempfile.TemporaryDirectory() as tmp:
+        write_store(tmp + "/store", records, dimension=16, dtype="float32")
+        store = NumpyVectorStore(tmp + "/store", block_size=64)
+        assert store.stats().total_vector_count == 200
+
+        queries = [make_records(3, 16)[i].values for i in range(3)]
+        batched = store.query_batch(queries, top_k=10)
+        for query, result in zip(queries, batched):
+            expected = brute_force(records, query, 10)
+            assert [m.id for m in result.matches] == expected
+            assert [m.id for m in store.query(query, top_k=10).matches] == expected
+        assert "journal" in batched[0].matches[0].metadata
+    print("✅ Exact search test passed")
+
+
+def test_filtered_query():
+    """Test metadata filtering on the local store"""
+    records = make_records()
+    with tempfile.TemporaryDirectory() as tmp:
+        write_store(tmp + "/store", records, dimension=16)
+        store = NumpyVectorStore(tmp + "/store")
+        result = store.query(records[0].values, top_k=50, filter={"journal": {"$eq": "BMC Veterinary Research"}})
+        assert len(result.matches) == 50
+        assert all(m.metadata["journal"] == "BMC Veterinary Research" for m in result.matches)
+    print("✅ Filtered query test passed")
+
+
+def test_upsert_fetch_delete_and_save():
+    """Test in-memory writes on top of the mmap base and persisting them with save()"""
+    records = make_records(50)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = tmp + "/store"
+        write_store(path, records, dimension=16, dtype="float16")
+        store = NumpyVectorStore(path)
+
+        new_vector = [1.0] + [0.0] * 15
+        store.upsert([{"id": "vec_3", "values": new_vector, "metadata": {"journal": "Updated"}}])
+        store.upsert([{"id": "vec_new", "values": [0.0, 1.0] + [0.0] * 14, "metadata": {"journal": "New"}}])
+        store.delete(["vec_4"])
+
+        assert store.query(new_vector, top_k=1).matches[0].id == "vec_3"
+        fetched = store.fetch(["vec_3", "vec_4", "vec_new"])
+        assert set(fetched) == {"vec_3", "vec_new"}
+        assert fetched["vec_3"].metadata["journal"] == "Updated"
+        assert store.stats().total_vector_count == 50
+
+        store.flush()
+        reopened = NumpyVectorStore(path)
+        assert reopened.stats().total_vector_count == 50
+        assert reopened.fetch(["vec_3"])["vec_3"].metadata["journal"] == "Updated"
+        assert "vec_4" not in {m.id for m in reopened.query(records[4].values, top_k=50).matches}
+    print("✅ Upsert/fetch/delete/save test passed")
+
+
+def test_scan_runs_outside_the_lock():
+    """Test that a query blocked mid-scan does not block other queries, and a save during the scan is handled"""
+    records = make_records()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "store")
+        write_store(path, records, dimension=16, dtype="float32")
+        store = NumpyVectorStore(path, dimension=16)
+        query = records[3].values
+        expected = brute_force(records, query, 5)
+
+        scanning, release = threading.Event(), threading.Event()
+        original = NumpyVectorStore._block_scores
+
+        def paused_block_scores(self, queries, view):
+            if threading.current_thread().name == "paused":
+                scanning.set()
+                assert release.wait(5)
+            yield from original(self, queries, view)
+
+        NumpyVectorStore._block_scores = paused_block_scores
+        try:
+            paused_result = []
+            paused = threading.Thread(name="paused", target=lambda: paused_result.append(store.query(query, top_k=5)))
+            paused.start()
+            assert scanning.wait(5)
+            # Another query and a write + compacting save finish while the first scan is still paused
+            assert [m.id for m in store.query(query, top_k=5).matches] == expected
+            store.delete(["vec_0"])
+            store.save(compact=True)
+            release.set()
+            paused.join(5)
+        finally:
+            NumpyVectorStore._block_scores = original
+        # The paused scan saw the old rows; its results are recomputed on the reloaded store
+        assert [m.id for m in paused_result[0].matches] == [i for i in brute_force(records[1:], query, 5)]
+    print("✅ Unlocked scan test passed")
+
+
+def test_searcher_uses_batched_query():
+    """Test that ConcurrentSearcher issues one batched query for local stores"""
+    records = make_records()
+    with tempfile.TemporaryDirectory() as tmp:
+        write_store(tmp + "/store", records, dimension=16)
+        store = NumpyVectorStore(tmp + "/store")
+        calls = []
+        original = store.query_batch
+        store.query_batch = lambda *a, **kw: calls.append(1) or original(*a, **kw)
+
+        searcher = ConcurrentSearcher(store, max_workers=2, timeout=5.0)
+        results = asyncio.run(searcher.search_many([records[0].values, records[1].values], top_k=5))
+        searcher.shutdown()
+
+        assert len(calls) == 1
+        assert results[0][0]["text"] == "chunk 0"
+        assert results[1][0]["text"] == "chunk 1"
+        assert results[0][0]["score"] > 0.99
+    print("✅ Batched search test passed")
+
+
+def run_all_tests():
+    """Run all test functions"""
+    print("\n" + "="*60)
+    print("Running Vector Store Tests")
+    print("="*60 + "\n")
+
+    try:
+        test_filter_syntax()
+        test_exact_search_matches_brute_force()
+        test_filtered_query()
+        test_upsert_fetch_delete_and_save()
+        test_scan_runs_outside_the_lock()
+        test_searcher_uses_batched_query()
+
+        print("\n" + "="*60)
+        print("✅ ALL TESTS PASSED!")
+        print("="*60 + "\n")
+        return True
+
+    except AssertionError as e:
+        print(f"\n❌ TEST FAILED: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
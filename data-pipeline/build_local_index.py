@@ -0,0 +1,90 @@
+"""
+로컬 벡터 스토어 위에 검색 인덱스 빌드
+export_vector_store.py로 내보낸 디렉토리에 HNSW 그래프 또는 양자화 코드를 만들어 저장
+(VECTOR_STORE_BACKEND=hnsw / int8 / pq), 또는 청크 텍스트로 BM25 키워드 인덱스 빌드
+
+사용법:
+    python build_local_index.py --path ../backend/vector_data/numpy --type hnsw --M 16 --ef-construction 200
+    python build_local_index.py --type int8
+    python build_local_index.py --type pq --pq-m 96
+    python build_local_index.py --type bm25 --bm25-path ../backend/vector_data/bm25
+"""
+import argparse
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+
+def build_hnsw(args):
+    from app.hnsw_store import HnswVectorStore
+
+    started = time.time()
+    store = HnswVectorStore(args.path, M=args.M, ef_construction=args.ef_construction, num_threads=args.threads)
+    store.save()
+    print(f"✅ HNSW graph: {store.stats().total_vector_count:,} vectors in {time.time() - started:.1f}s → {args.path}/hnsw/")
+
+
+def build_quantized(args):
+    from app.quantized_store import QuantizedVectorStore
+
+    started = time.time()
+    store = QuantizedVectorStore(args.path, method=args.type, pq_m=args.pq_m, train_size=args.train_size)
+    store.save(compact=False)
+    float32_bytes = store.stats().total_vector_count * store.dimension * 4
+    print(f"✅ {args.type} codes: {store.stats().total_vector_count:,} vectors in {time.time() - started:.1f}s, "
+          f"{store.memory_bytes() / 1e6:.1f} MB in RAM (float32: {float32_bytes / 1e6:.1f} MB)")
+
+
+def build_bm25(args):
+    from app.bm25 import BM25Writer
+    from app.vector_store import NumpyVectorStore
+
+    started = time.time()
+    store = NumpyVectorStore(args.path)
+    writer = BM25Writer(args.bm25_path)
+    # 내보낸 전체 코퍼스로 로그를 새로 시작 (이후 ingestion 스크립트가 로그에 추가)
+    writer.log_path.unlink(missing_ok=True)
+    batch = []
+    for record in store.iter_records():
+        batch.append({"id": record.id, "metadata": record.metadata})
+        if len(batch) >= 1000:
+            writer.add(batch)
+            batch = []
+    writer.add(batch)
+    writer.flush()
+    print(f"✅ BM25 index: {store.stats().total_vector_count:,} chunks in {time.time() - started:.1f}s → {args.bm25_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a search index on a local vector store")
+    parser.add_argument("--path", default=str(Path(__file__).resolve().parent.parent / "backend" / "vector_data" / "numpy"))
+    parser.add_argument("--type", choices=["hnsw", "int8", "pq", "bm25"], default="hnsw")
+    parser.add_argument("--bm25-path", default=os.getenv("BM25_INDEX_PATH", str(Path(__file__).resolve().parent.parent / "backend" / "vector_data" / "bm25")))
+    parser.add_argument("--M", type=int, default=16, help="HNSW graph degree")
+    parser.add_argument("--ef-construction", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--pq-m", type=int, default=96, help="PQ sub-vectors (bytes per vector)")
+    parser.add_argument("--train-size", type=int, default=50000, help="Vectors sampled to train the quantizer")
+    parser.add_argument("--rebuild", action="store_true", help="Discard an existing graph / codes and rebuild")
+    args = parser.parse_args()
+
+    if args.type == "bm25":
+        build_bm25(args)
+        return
+
+    if args.rebuild:
+        # 각 인덱스는 스토어 디렉토리 안의 자기 하위 디렉토리에만 있음 (hnsw/, int8/, pq/)
+        shutil.rmtree(Path(args.path) / args.type, ignore_errors=True)
+
+    if args.type == "hnsw":
+        build_hnsw(args)
+    else:
+        build_quantized(args)
+
+
+if __name__ == "__main__":
+    main()
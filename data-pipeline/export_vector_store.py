@@ -0,0 +1,58 @@
+"""
+Pinecone 인덱스를 로컬 NumPy 벡터 스토어로 내보내기
+오프라인 실행 / 로컬 검색 벤치마크용 (VECTOR_STORE_BACKEND=numpy)
+
+사용법:
+    python export_vector_store.py --index medical-guidelines-kr --output ../backend/vector_data/numpy
+    python export_vector_store.py --dtype float32 --limit 10000
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+from app.vector_store import PineconeVectorStore, write_store
+
+load_dotenv()
+
+
+def iter_pinecone_records(store: PineconeVectorStore, batch_size: int = 100, limit: int = None):
+    """ID 목록을 페이지 단위로 받아 fetch로 벡터 + 메타데이터를 가져옴"""
+    exported = 0
+    for id_batch in store.list_ids(batch_size=batch_size):
+        records = store.fetch(id_batch)
+        for vid in id_batch:
+            if vid in records:
+                yield records[vid]
+                exported += 1
+                if limit and exported >= limit:
+                    return
+        print(f"  💾 {exported:,} vectors exported", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a Pinecone index to a local NumPy vector store")
+    parser.add_argument("--index", default=os.getenv("PINECONE_INDEX_NAME", "medical-guidelines-kr"))
+    parser.add_argument("--output", default=str(Path(__file__).resolve().parent.parent / "backend" / "vector_data" / "numpy"))
+    parser.add_argument("--dtype", choices=["float16", "float32"], default="float16")
+    parser.add_argument("--limit", type=int, default=None, help="Export at most N vectors")
+    args = parser.parse_args()
+
+    store = PineconeVectorStore(args.index)
+    stats = store.stats()
+    print(f"📊 {args.index}: {stats.total_vector_count:,} vectors (dim={stats.dimension})")
+
+    write_store(
+        args.output,
+        iter_pinecone_records(store, limit=args.limit),
+        dimension=stats.dimension,
+        dtype=args.dtype
+    )
+    print(f"✅ Exported to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
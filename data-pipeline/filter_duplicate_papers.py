@@ -4,19 +4,24 @@ Pinecone DB에 이미 학습된 논문을 필터링하여 새로운 XML만 추
 사용법:
     python3 filter_duplicate_papers.py --xml-folder /path/to/xml --journal "Journal Name"
 """
+import atexit
 import os
+import sys
 import xml.etree.ElementTree as ET
 from pathlib import Path
 from typing import List, Set, Dict
 from dotenv import load_dotenv
-from pinecone import Pinecone
 import re
 import argparse
 
 load_dotenv()
 
-pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
-index = pc.Index("medical-guidelines")
+
+# 벡터 스토어 (VECTOR_STORE_BACKEND=numpy 이면 로컬 인덱스에 저장, 종료 시 디스크에 기록)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+from app.vector_store import get_vector_store
+index = get_vector_store("medical-guidelines")
+atexit.register(index.flush)
 
 
 def extract_pmcid_from_xml(xml_path: Path) -> str:
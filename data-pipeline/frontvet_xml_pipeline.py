@@ -3,22 +3,32 @@ Frontiers in Veterinary Science XML 처리 파이프라인
 PMC XML 파일을 청킹하여 Pinecone 벡터 DB에 저장
 """
 
+import atexit
 import os
+import sys
 import re
 import xml.etree.ElementTree as ET
 from pathlib import Path
 from typing import List, Dict, Tuple
 from dotenv import load_dotenv
 from openai import OpenAI
-from pinecone import Pinecone
 import json
 
 load_dotenv()
 
 # 클라이언트 초기화
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
-index = pc.Index("medical-guidelines")
+
+# 벡터 스토어 (VECTOR_STORE_BACKEND=numpy 이면 로컬 인덱스에 저장, 종료 시 디스크에 기록)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+from app.vector_store import get_vector_store
+from app.bm25 import BM25Writer
+index = get_vector_store("medical-guidelines")
+atexit.register(index.flush)
+
+# BM25 키워드 인덱스 (청크 텍스트를 코퍼스 로그에 추가, 종료 시 인덱스 재빌드)
+bm25_writer = BM25Writer(os.getenv("BM25_INDEX_PATH", str(Path(__file__).resolve().parent.parent / "backend" / "vector_data" / "bm25")))
+atexit.register(bm25_writer.flush)
 
 
 def extract_text_from_element(element):
@@ -316,6 +326,7 @@ def process_single_xml(xml_path: Path) -> int:
     for i in range(0, len(vectors), batch_size):
         batch = vectors[i:i + batch_size]
         index.upsert(vectors=batch)
+        bm25_writer.add(batch)
         print(f"  💾 Pinecone 저장: {i+1}-{min(i+batch_size, len(vectors))}/{len(vectors)}")
 
     print(f"  ✅ 완료! {len(chunks)}개 청크 저장")
@@ -14,6 +14,7 @@
         --progress-file progress.json
 """
 
+import atexit
 import os
 import re
 import json
@@ -22,7 +23,6 @@ from pathlib import Path
 from typing import List, Dict, Optional, Set
 from dotenv import load_dotenv
 from openai import OpenAI
-from pinecone import Pinecone
 import sys
 import argparse
 import random
@@ -31,8 +31,17 @@ load_dotenv()
 
 # 클라이언트 초기화
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
-index = pc.Index("medical-guidelines")
+
+# 벡터 스토어 (VECTOR_STORE_BACKEND=numpy 이면 로컬 인덱스에 저장, 종료 시 디스크에 기록)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+from app.vector_store import get_vector_store
+from app.bm25 import BM25Writer
+index = get_vector_store("medical-guidelines")
+atexit.register(index.flush)
+
+# BM25 키워드 인덱스 (청크 텍스트를 코퍼스 로그에 추가, 종료 시 인덱스 재빌드)
+bm25_writer = BM25Writer(os.getenv("BM25_INDEX_PATH", str(Path(__file__).resolve().parent.parent / "backend" / "vector_data" / "bm25")))
+atexit.register(bm25_writer.flush)
 
 
 # ============================================================
@@ -399,6 +408,8 @@ def upsert_to_pinecone(chunks_metadata: List[Dict], embeddings: List[List[float]
             })
 
         index.upsert(vectors=vectors)
+
+        bm25_writer.add(vectors)
         print(f"  💾 Pinecone 저장: {i+1}-{i+len(batch_meta)}/{total}")
 
 